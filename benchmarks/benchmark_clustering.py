@@ -0,0 +1,143 @@
+"""
+Benchmark del agrupamiento de comentarios antes de resumir (core.comment_clustering).
+
+Para cada tamaño genera comentarios etiquetados con su sentimiento y compara
+el resumen de lote (etapa 'resumen_lote') enviando todos los comentarios
+textuales contra un representante por grupo con su conteo. Reporta:
+- grupos (opiniones distintas) frente a comentarios y textos únicos;
+- tiempo de agrupar y caracteres/tokens de entrada del prompt (los tokens
+  salen de las métricas de Bedrock, con los dobles de fake_aws.py);
+- comentarios mostrados explícitamente en el prompt y omitidos por el
+  presupuesto MAX_CARACTERES_PROMPT;
+- similitud de Jaccard real (k-gramas) entre cada miembro y su
+  representante, para ver que los grupos no mezclan opiniones distintas.
+
+Uso:
+    python benchmarks/benchmark_clustering.py --sizes 1000,10000,50000
+    python benchmarks/benchmark_clustering.py --sizes 5000 --threshold 0.5
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('AWS_DEFAULT_REGION', os.environ['AWS_REGION'])
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+from benchmark_pipeline import percentile
+from generate_comments import GeneradorComentarios
+
+
+def kgramas(texto):
+    from core.comment_clustering import LONGITUD_KGRAMA, normalize_text
+    texto = normalize_text(texto).ljust(LONGITUD_KGRAMA)
+    return {texto[i:i + LONGITUD_KGRAMA] for i in range(len(texto) - LONGITUD_KGRAMA + 1)}
+
+
+def similitud_con_representante(grupos, textos, muestra, seed):
+    """
+    Jaccard exacto entre una muestra de miembros y el representante de su grupo.
+    """
+    rng = random.Random(seed)
+    pares = [(g['representative'], textos[i]) for g in grupos for i in g['members'] if len(g['members']) > 1]
+    similitudes = []
+    for representante, miembro in rng.sample(pares, min(muestra, len(pares))):
+        a, b = kgramas(representante), kgramas(miembro)
+        similitudes.append(len(a & b) / len(a | b))
+    if not similitudes:
+        return {}
+    return {'p5': round(percentile(similitudes, 5), 3), 'p50': round(percentile(similitudes, 50), 3),
+            'min': round(min(similitudes), 3)}
+
+
+def tokens_de_entrada(tarea):
+    """
+    Ejecuta `tarea` y suma los tokens de entrada y el costo de sus llamadas a Bedrock.
+    """
+    from core.metrics import collect
+
+    with collect() as records, contextlib.redirect_stdout(io.StringIO()):
+        tarea()
+    llamadas = [r for r in records if r['service'] == 'bedrock']
+    return {
+        'input_tokens': sum((r.get('input_tokens') or 0) + (r.get('cache_read_tokens') or 0)
+                            + (r.get('cache_write_tokens') or 0) for r in llamadas),
+        'cost_usd': round(sum(r.get('cost_usd') or 0.0 for r in llamadas), 6),
+    }
+
+
+def medir(tamano, args):
+    from core.bedrock_summarization import SISTEMA_RESUMEN_LOTE, generate_clustered_summary
+    from core.comment_clustering import cluster_comments, format_clusters, normalize_text
+    from core.model_routing import complete
+
+    comentarios = list(GeneradorComentarios(seed=args.seed, etiquetar=True).generar(tamano))
+    textos = [c['text'] for c in comentarios]
+    sentimientos = [c['expected_sentiment'] for c in comentarios]
+
+    inicio = time.perf_counter()
+    grupos = cluster_comments(textos, sentimientos, threshold=args.threshold)
+    segundos = time.perf_counter() - inicio
+    bloque = format_clusters(grupos)
+    mostrados = sum(g['count'] for g in grupos if g['representative'][:80] in bloque)
+
+    textual = "\n".join(textos)
+    return {
+        'comentarios': tamano,
+        'textos_unicos': len({(s, normalize_text(t)) for s, t in zip(sentimientos, textos)}),
+        'grupos': len(grupos),
+        'segundos_agrupar': round(segundos, 3),
+        'caracteres_textual': len(textual),
+        'caracteres_agrupado': len(bloque),
+        'comentarios_mostrados': mostrados,
+        'similitud_con_representante': similitud_con_representante(grupos, textos, args.pairs, args.seed),
+        'textual': tokens_de_entrada(lambda: complete(
+            'resumen_lote', f"--- Comentarios ---\n{textual}\n---\n\nResumen:", system=SISTEMA_RESUMEN_LOTE)),
+        'agrupado': tokens_de_entrada(lambda: generate_clustered_summary(textos, sentimientos)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,50000', help="Tamaños separados por comas")
+    parser.add_argument('--threshold', type=float, help="Similitud mínima con el representante "
+                                                        "(por defecto UMBRAL_SIMILITUD)")
+    parser.add_argument('--pairs', type=int, default=2000, help="Pares miembro-representante a verificar")
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--json', help="Ruta donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    from fake_aws import install_fakes
+    from core.comment_clustering import UMBRAL_SIMILITUD
+
+    os.environ['RATE_LIMITS'] = json.dumps({'bedrock': {'tps': 1e6, 'tokens_per_minute': None}})
+    install_fakes()
+    args.threshold = args.threshold or UMBRAL_SIMILITUD
+
+    reporte = [medir(int(tamano), args) for tamano in args.sizes.split(',')]
+
+    print(f"\n=== Resumen de lote: textual vs agrupado (umbral {args.threshold}) ===")
+    print(f"{'comentarios':>12}{'únicos':>9}{'grupos':>9}{'agrupar s':>11}{'tokens textual':>16}"
+          f"{'tokens agrupado':>17}{'mostrados':>11}{'jaccard p5':>12}")
+    for fila in reporte:
+        print(f"{fila['comentarios']:>12}{fila['textos_unicos']:>9}{fila['grupos']:>9}{fila['segundos_agrupar']:>11}"
+              f"{fila['textual']['input_tokens']:>16}{fila['agrupado']['input_tokens']:>17}"
+              f"{fila['comentarios_mostrados'] / fila['comentarios']:>11.0%}"
+              f"{fila['similitud_con_representante'].get('p5', '-'):>12}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
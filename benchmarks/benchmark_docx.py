@@ -0,0 +1,99 @@
+"""
+Benchmark del exportador Word sobre programaciones curriculares de ~50 páginas.
+
+Mide el tiempo de renderizado en frío, el acierto de caché (rerun de Streamlit)
+y la exportación incremental de versiones que cambian en algunas unidades
+(solo se renderizan los bloques modificados), junto con la memoria pico.
+
+Uso:
+    python benchmarks/benchmark_docx.py --paginas 50 --versiones 4
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from core import docx_exporter
+
+# Aproximación de líneas por página en el documento renderizado
+LINEAS_POR_PAGINA = 40
+
+
+def generar_programacion_sintetica(paginas, semilla=0):
+    """
+    Construye una programación con la misma mezcla de secciones, viñetas y
+    tablas delimitadas por | que producen los generadores.
+    """
+    lineas = []
+    unidad = 0
+    while len(lineas) < paginas * LINEAS_POR_PAGINA:
+        unidad += 1
+        lineas.append(f"# UNIDAD {unidad}: CINEMÁTICA Y DINÁMICA ({semilla})")
+        lineas.append("COMPETENCIA Y CAPACIDADES")
+        lineas.append("Indaga mediante métodos científicos para construir sus conocimientos.")
+        lineas.append("| CONTENIDOS | DESEMPEÑOS | CRITERIOS DE EVALUACIÓN | INSTRUMENTOS |")
+        lineas.append("|---|---|---|---|")
+        for fila in range(8):
+            lineas.append(
+                f"| Movimiento rectilíneo {fila} | Formula preguntas sobre el movimiento de objetos "
+                f"| Plantea hipótesis verificables | Rúbrica de indagación |"
+            )
+        lineas.append("")
+        for vineta in range(6):
+            lineas.append(f"- Sesión {vineta + 1}: experimento guiado con registro de datos y análisis grupal")
+        lineas.append("Los estudiantes comunican sus conclusiones mediante un informe de laboratorio.")
+    return '\n'.join(lineas)
+
+
+def medir(funcion, *args):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, duracion, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paginas', type=int, default=50)
+    parser.add_argument('--versiones', type=int, default=4,
+                        help="Versiones del documento, cada una con una unidad modificada")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    if not docx_exporter.DOCX_OK:
+        print("❌ python-docx no está instalado")
+        sys.exit(1)
+
+    contenido = generar_programacion_sintetica(args.paginas)
+    print(f"Programación sintética: {len(contenido.splitlines())} líneas, {len(contenido) / 1024:.0f} KiB")
+
+    tiempos_frio = []
+    for _ in range(args.repeticiones):
+        docx_exporter.limpiar_cache()
+        doc_bytes, duracion, pico = medir(docx_exporter.crear_documento_profesional, contenido, "Benchmark", 3)
+        tiempos_frio.append(duracion)
+    print(f"Render en frío:      {min(tiempos_frio) * 1000:8.1f} ms (mejor de {args.repeticiones}), "
+          f"pico {pico / 1024 / 1024:.1f} MiB, {len(doc_bytes) / 1024:.0f} KiB")
+
+    _, duracion, pico = medir(docx_exporter.crear_documento_profesional, contenido, "Benchmark", 3)
+    print(f"Acierto de caché:    {duracion * 1000:8.3f} ms, pico {pico / 1024:.1f} KiB")
+
+    # Cada versión reescribe una unidad distinta, como una sesión regenerada
+    versiones = [contenido.replace(f"# UNIDAD {i + 1}:", f"# UNIDAD {i + 1} (versión {i + 1}):", 1)
+                 for i in range(args.versiones)]
+    incrementales = []
+    for version in versiones:
+        _, duracion, pico = medir(docx_exporter.crear_documento_profesional, version, "Benchmark", 3)
+        incrementales.append(duracion)
+    print(f"Versión modificada:  {sum(incrementales) / len(incrementales) * 1000:8.1f} ms de media en "
+          f"{args.versiones} versiones ({min(tiempos_frio) / max(incrementales):.1f}x), pico {pico / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
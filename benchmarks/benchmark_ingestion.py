@@ -0,0 +1,202 @@
+"""
+Benchmark del servicio de ingesta (core.ingestion_service).
+
+Levanta el servicio en el mismo proceso y envía comentarios sueltos desde
+clientes HTTP concurrentes con conexiones keep-alive. El destino es un
+directorio local o S3 simulado con moto (--s3). Reporta:
+- solicitudes por segundo y latencia p50/p95/p99;
+- shards escritos y comentarios por shard, comparados con un objeto S3 por
+  comentario (upload_comments_to_s3 con un solo comentario);
+- que cada comentario aceptado aparezca exactamente una vez en los shards.
+Con --slow-sink se agrega latencia a cada escritura para ver la
+contrapresión (respuestas 503).
+
+Uso:
+    python benchmarks/benchmark_ingestion.py --comments 20000 --clients 50
+    python benchmarks/benchmark_ingestion.py --s3 --max-wait 0.5
+    python benchmarks/benchmark_ingestion.py --slow-sink 0.5 --max-pending 2000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('AWS_DEFAULT_REGION', os.environ['AWS_REGION'])
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+from moto import mock_aws
+
+from benchmark_pipeline import latency_stats
+from generate_comments import GeneradorComentarios
+
+BUCKET_NAME = 'bench-ingesta-comentarios'
+
+
+class SumideroLento:
+    """
+    Envuelve un sumidero y agrega latencia fija a cada escritura.
+    """
+
+    def __init__(self, sink, latencia: float):
+        self.sink = sink
+        self.latencia = latencia
+
+    def write(self, name, body):
+        time.sleep(self.latencia)
+        return self.sink.write(name, body)
+
+
+async def cliente(port, comentarios, latencias, estados):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for comentario in comentarios:
+            cuerpo = json.dumps(comentario, ensure_ascii=False).encode('utf-8')
+            inicio = time.perf_counter()
+            writer.write(b'POST /comments HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n'
+                         + f"Content-Length: {len(cuerpo)}\r\n\r\n".encode('ascii') + cuerpo)
+            await writer.drain()
+            estado = int((await reader.readline()).split()[1])
+            largo = 0
+            while True:
+                linea = await reader.readline()
+                if linea == b'\r\n':
+                    break
+                if linea.lower().startswith(b'content-length:'):
+                    largo = int(linea.split(b':')[1])
+            await reader.readexactly(largo)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            estados[estado] = estados.get(estado, 0) + 1
+    finally:
+        writer.close()
+
+
+async def correr_servicio(sink, comentarios, args):
+    from core.ingestion_service import IngestionServer, MicroBatcher
+
+    batcher = MicroBatcher(sink, max_batch=args.max_batch, max_wait=args.max_wait, max_pending=args.max_pending)
+    servidor = IngestionServer(batcher, port=0)
+    await servidor.start()
+    latencias, estados = [], {}
+    reparto = [comentarios[i::args.clients] for i in range(args.clients)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(servidor.port, parte, latencias, estados) for parte in reparto))
+    segundos_envio = time.perf_counter() - inicio
+    await servidor.stop()
+    return {
+        'segundos_envio': round(segundos_envio, 3),
+        'segundos_hasta_ultimo_shard': round(time.perf_counter() - inicio, 3),
+        'solicitudes_por_s': round(len(comentarios) / segundos_envio, 1),
+        'latencia': latency_stats(latencias),
+        'estados_http': estados,
+        **batcher.stats,
+    }
+
+
+def leer_shards(args, directorio):
+    """
+    Ids de todos los comentarios escritos en los shards.
+    """
+    ids = []
+    if args.s3:
+        from core.aws_clients import get_client
+        s3 = get_client('s3')
+        for pagina in s3.get_paginator('list_objects_v2').paginate(Bucket=BUCKET_NAME, Prefix='comments/'):
+            for objeto in pagina.get('Contents', []):
+                cuerpo = s3.get_object(Bucket=BUCKET_NAME, Key=objeto['Key'])['Body'].read()
+                ids.extend(json.loads(linea)['id'] for linea in cuerpo.splitlines() if linea)
+    else:
+        for raiz, _, archivos in os.walk(directorio):
+            for nombre in archivos:
+                with open(os.path.join(raiz, nombre), 'rb') as f:
+                    ids.extend(json.loads(linea)['id'] for linea in f if linea.strip())
+    return ids
+
+
+def un_objeto_por_comentario(comentarios):
+    """
+    Línea base: cada comentario como un objeto S3 (una invocación de Lambda cada uno).
+    """
+    from core.data_ingestion import upload_comments_to_s3
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for comentario in comentarios:
+            upload_comments_to_s3([comentario], BUCKET_NAME, file_prefix='baseline/')
+    segundos = time.perf_counter() - inicio
+    return {'objetos': len(comentarios), 'segundos': round(segundos, 3),
+            'comentarios_por_s': round(len(comentarios) / segundos, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--comments', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=20, help="Conexiones concurrentes")
+    parser.add_argument('--max-batch', type=int, default=500)
+    parser.add_argument('--max-wait', type=float, default=1.0)
+    parser.add_argument('--max-pending', type=int, default=20000)
+    parser.add_argument('--s3', action='store_true', help="Escribir en S3 simulado con moto en lugar de disco")
+    parser.add_argument('--slow-sink', type=float, default=0.0, help="Segundos extra por escritura de shard")
+    parser.add_argument('--baseline', type=int, default=500,
+                        help="Comentarios para la línea base de un objeto por comentario (0 para omitir; requiere --s3)")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help="Ruta donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    from core.ingestion_service import LocalShardSink, S3ShardSink
+
+    # Sin id ni timestamp: el servicio los completa como haría con un cliente real
+    comentarios = [{'text': c['text']} for c in GeneradorComentarios(seed=args.seed).generar(args.comments)]
+    directorio = tempfile.mkdtemp(prefix='bench_ingesta_')
+    reporte = {'comentarios': args.comments, 'clientes': args.clients}
+
+    with mock_aws() if args.s3 else contextlib.nullcontext():
+        if args.s3:
+            from core.aws_clients import get_client
+            get_client('s3').create_bucket(Bucket=BUCKET_NAME)
+            sink = S3ShardSink(BUCKET_NAME)
+        else:
+            sink = LocalShardSink(directorio)
+        if args.slow_sink:
+            sink = SumideroLento(sink, args.slow_sink)
+
+        reporte['servicio'] = asyncio.run(correr_servicio(sink, comentarios, args))
+        ids = leer_shards(args, directorio)
+        aceptados = reporte['servicio']['accepted']
+        reporte['verificacion'] = {
+            'comentarios_en_shards': len(ids),
+            'duplicados': len(ids) - len(set(ids)),
+            'coincide_con_aceptados': len(ids) == aceptados == len(set(ids)),
+            'comentarios_por_shard': round(len(ids) / max(1, reporte['servicio']['shards']), 1),
+        }
+        if args.s3 and args.baseline:
+            reporte['un_objeto_por_comentario'] = un_objeto_por_comentario(comentarios[:args.baseline])
+
+    servicio = reporte['servicio']
+    print(f"\n=== Ingesta de {args.comments} comentarios con {args.clients} clientes "
+          f"({'S3 simulado' if args.s3 else 'disco local'}) ===")
+    print(f"Solicitudes/s: {servicio['solicitudes_por_s']}  latencia p50 {servicio['latencia']['p50_ms']} ms  "
+          f"p95 {servicio['latencia']['p95_ms']} ms  p99 {servicio['latencia']['p99_ms']} ms")
+    print(f"Estados HTTP: {servicio['estados_http']}  rechazados: {servicio['rejected']}")
+    print(f"Shards: {servicio['shards']} ({reporte['verificacion']['comentarios_por_shard']} comentarios/shard, "
+          f"último escrito a los {servicio['segundos_hasta_ultimo_shard']} s)")
+    print(f"Verificación: {reporte['verificacion']}")
+    if 'un_objeto_por_comentario' in reporte:
+        base = reporte['un_objeto_por_comentario']
+        print(f"Un objeto por comentario: {base['objetos']} objetos, {base['comentarios_por_s']} comentarios/s")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
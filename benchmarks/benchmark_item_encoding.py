@@ -0,0 +1,162 @@
+"""
+Benchmark de la codificación de ítems de DynamoDB (core.item_codec).
+
+Codifica los mismos comentarios procesados en formato legado y compacto y
+compara tamaño de ítem (promedio, p95, máximo), WCU por escritura
+(1 KB por unidad), RCU para leer la tabla completa con Scan (4 KB por
+unidad, lectura eventualmente consistente a mitad de costo) y el tiempo de
+codificar y decodificar. Los puntajes y entidades imitan la salida de
+Comprehend (floats de doble precisión). Luego escribe ambas versiones en
+tablas simuladas con moto, las lee con get_all_comments y verifica que el
+texto, el sentimiento y las entidades vuelvan iguales y los puntajes con
+error menor a 1e-4.
+
+Uso:
+    python benchmarks/benchmark_item_encoding.py --comments 20000
+    python benchmarks/benchmark_item_encoding.py --long-ratio 0.3 --roundtrip 2000
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('AWS_DEFAULT_REGION', os.environ['AWS_REGION'])
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+from moto import mock_aws
+
+from benchmark_pipeline import percentile
+from generate_comments import GeneradorComentarios
+from core.item_codec import COMPACTA, LEGADA, decode_item, encode_item, item_size
+
+SENTIMIENTOS = ('POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED')
+TIPOS = ('COMMERCIAL_ITEM', 'ORGANIZATION', 'OTHER', 'QUANTITY', 'LOCATION')
+
+
+def procesar(comentarios, long_ratio, seed):
+    """
+    Comentarios como los guarda lambda_handler, con puntajes y entidades al
+    estilo de Comprehend. Una fracción `long_ratio` recibe un texto largo
+    (reseña de varios párrafos) para ejercitar la compresión.
+    """
+    rng = random.Random(seed)
+    procesados = []
+    for comentario in comentarios:
+        texto = comentario['text']
+        if rng.random() < long_ratio:
+            texto = ' '.join([texto] + [c['text'] for c in rng.sample(comentarios, 12)])
+        crudos = [rng.random() ** 3 for _ in SENTIMIENTOS]
+        crudos[rng.randrange(4)] += 2
+        total = sum(crudos)
+        puntajes = {clave: valor / total for clave, valor in zip(('Positive', 'Negative', 'Neutral', 'Mixed'), crudos)}
+        sentimiento = SENTIMIENTOS[max(range(4), key=lambda i: crudos[i])]
+        palabras = [p for p in texto.split() if len(p) > 4]
+        entidades = [{'Text': p.strip('.,!¿?'), 'Type': rng.choice(TIPOS), 'Score': rng.uniform(0.5, 1.0)}
+                     for p in rng.sample(palabras, min(len(palabras), rng.randrange(0, 4)))]
+        procesados.append({
+            'comment_id': comentario['id'],
+            'timestamp': comentario['timestamp'],
+            'text': texto,
+            'sentiment': sentimiento,
+            'sentiment_score': puntajes,
+            'entities': entidades,
+        })
+    return procesados
+
+
+def medir(procesados, encoding):
+    inicio = time.perf_counter()
+    items = [encode_item(c, encoding) for c in procesados]
+    segundos_codificar = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for item in items:
+        decode_item(item)
+    segundos_decodificar = time.perf_counter() - inicio
+    tamanos = [item_size(item) for item in items]
+    return {
+        'bytes_promedio': round(sum(tamanos) / len(tamanos), 1),
+        'bytes_p95': percentile(tamanos, 95),
+        'bytes_max': max(tamanos),
+        'wcu_por_escritura': round(sum(math.ceil(t / 1024) for t in tamanos) / len(tamanos), 3),
+        'rcu_scan_completo': math.ceil(sum(tamanos) / 4096 / 2),
+        'us_codificar': round(segundos_codificar / len(items) * 1e6, 2),
+        'us_decodificar': round(segundos_decodificar / len(items) * 1e6, 2),
+    }
+
+
+def ida_y_vuelta(procesados):
+    """
+    Escribe y lee con DynamoDBManager en ambos formatos y cuenta diferencias.
+    """
+    from core.database_management import DynamoDBManager
+
+    resultado = {}
+    with mock_aws(), contextlib.redirect_stdout(io.StringIO()):
+        for encoding in (LEGADA, COMPACTA):
+            db = DynamoDBManager(f'Bench{encoding}', f'Bench{encoding}Search', encoding=encoding)
+            db.create_table()
+            inicio = time.perf_counter()
+            for comentario in procesados:
+                db.add_comment(comentario)
+            segundos_escritura = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            leidos = {c['comment_id']: c for c in db.get_all_comments()}
+            segundos_lectura = time.perf_counter() - inicio
+            diferencias = 0
+            for original in procesados:
+                leido = leidos.get(original['comment_id'])
+                if (leido is None or leido['text'] != original['text'] or leido['sentiment'] != original['sentiment']
+                        or any(abs(leido['sentiment_score'][k] - v) > 1e-4 for k, v in original['sentiment_score'].items())
+                        or [(e['Text'], e['Type']) for e in leido['entities']]
+                        != [(e['Text'], e['Type']) for e in original['entities']]
+                        or any(abs(a['Score'] - b['Score']) > 1e-4 for a, b in zip(leido['entities'], original['entities']))):
+                    diferencias += 1
+            resultado[encoding] = {'diferencias': diferencias, 'segundos_escritura': round(segundos_escritura, 3),
+                                   'segundos_get_all_comments': round(segundos_lectura, 3)}
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--long-ratio', type=float, default=0.1, help="Fracción de comentarios con texto largo")
+    parser.add_argument('--roundtrip', type=int, default=1000,
+                        help="Comentarios para la prueba de ida y vuelta con moto (0 para omitir)")
+    parser.add_argument('--seed', type=int, default=3)
+    parser.add_argument('--json', help="Ruta donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    comentarios = list(GeneradorComentarios(seed=args.seed).generar(args.comments))
+    procesados = procesar(comentarios, args.long_ratio, args.seed)
+    reporte = {'comentarios': args.comments, 'long_ratio': args.long_ratio,
+               LEGADA: medir(procesados, LEGADA), COMPACTA: medir(procesados, COMPACTA)}
+    if args.roundtrip:
+        reporte['ida_y_vuelta'] = ida_y_vuelta(procesados[:args.roundtrip])
+
+    print(f"\n=== {args.comments} comentarios ({args.long_ratio:.0%} largos) ===")
+    print(f"{'':<22}{'legado':>12}{'compacto':>12}{'ahorro':>10}")
+    for clave in ('bytes_promedio', 'bytes_p95', 'bytes_max', 'wcu_por_escritura', 'rcu_scan_completo',
+                  'us_codificar', 'us_decodificar'):
+        legado, compacto = reporte[LEGADA][clave], reporte[COMPACTA][clave]
+        ahorro = f"{1 - compacto / legado:.0%}" if legado and not clave.startswith('us_') else ''
+        print(f"{clave:<22}{legado:>12}{compacto:>12}{ahorro:>10}")
+    if 'ida_y_vuelta' in reporte:
+        print(f"Ida y vuelta con moto: {reporte['ida_y_vuelta']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
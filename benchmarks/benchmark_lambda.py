@@ -0,0 +1,197 @@
+"""
+Benchmark de arranque en frío del Lambda de comentarios (core.lambda_handler).
+
+Emula el ciclo de vida de un contenedor de Lambda. Cada contenedor es un
+proceso nuevo con el entorno de Lambda (AWS_LAMBDA_FUNCTION_NAME, región)
+y S3/DynamoDB simulados con moto y los dobles de fake_aws.py. En cada uno
+se mide:
+- Init: la importación del handler, igual que la fase de init de Lambda.
+  Incluye la inicialización a nivel de módulo.
+- la primera invocación;
+- las invocaciones en caliente, con p50 y p95.
+
+Aparte, en un proceso limpio sin moto, se mide el grafo de importación real
+del handler: tiempo total y módulos de core que carga.
+
+Con --rie-url se invoca en cambio un Runtime Interface Emulator local (la
+imagen de contenedor del Lambda corriendo con docker), y la latencia se
+mide desde el cliente.
+
+Uso:
+    python benchmarks/benchmark_lambda.py --containers 3 --invocations 20 --comments 20
+    python benchmarks/benchmark_lambda.py --rie-url http://localhost:9000 --bucket mi-bucket --key comments/x.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+BUCKET_NAME = 'bench-lambda-comentarios'
+
+# Se ejecuta en un proceso nuevo por contenedor emulado
+_SCRIPT_CONTENEDOR = r"""
+import contextlib, importlib, io, json, os, sys, time
+args = json.loads(sys.argv[1])
+os.environ.update({
+    'AWS_REGION': 'us-east-1', 'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing',
+    'RATE_LIMITS': json.dumps({n: {'tps': 1e6, 'tokens_per_minute': None}
+                               for n in ('bedrock', 'bedrock-kb', 'comprehend')}),
+})
+from moto import mock_aws
+from fake_aws import install_fakes
+from generate_comments import generar_archivo
+
+with mock_aws(), contextlib.redirect_stdout(io.StringIO()):
+    # Preparación (fuera de la medición): bucket, tabla y archivo del evento
+    from core import aws_clients
+    from core.database_management import DynamoDBManager
+    install_fakes(bedrock_latency=args['bedrock_latency'], comprehend_latency=args['comprehend_latency'])
+    aws_clients.get_client('s3').create_bucket(Bucket=args['bucket'])
+    DynamoDBManager().create_table()
+    ruta = os.path.join(args['workdir'], 'comentarios.json')
+    generar_archivo(ruta, args['comments'], seed=args['comments'])
+    aws_clients.get_client('s3').upload_file(ruta, args['bucket'], 'comments/bench.json')
+    event = {'Records': [{'s3': {'bucket': {'name': args['bucket']}, 'object': {'key': 'comments/bench.json'}}}]}
+
+    # Un contenedor nuevo no tiene clientes creados: se descartan los de la preparación
+    aws_clients.reset_clients()
+    install_fakes(bedrock_latency=args['bedrock_latency'], comprehend_latency=args['comprehend_latency'])
+
+    # Fase de init: Lambda importa el módulo del handler con su entorno
+    os.environ['AWS_LAMBDA_FUNCTION_NAME'] = 'procesador-comentarios'
+    inicio = time.perf_counter()
+    handler = importlib.import_module('core.lambda_handler').lambda_handler
+    init_ms = (time.perf_counter() - inicio) * 1000
+
+    invocaciones = []
+    for _ in range(args['invocations']):
+        inicio = time.perf_counter()
+        respuesta = handler(event, None)
+        invocaciones.append((time.perf_counter() - inicio) * 1000)
+        assert respuesta['statusCode'] == 200, respuesta
+
+print(json.dumps({'init_ms': init_ms, 'invocaciones_ms': invocaciones}))
+"""
+
+# Grafo de importación real del handler, en un proceso limpio
+_SCRIPT_IMPORTACION = r"""
+import json, sys, time
+inicio = time.perf_counter()
+import core.lambda_handler
+print(json.dumps({
+    'import_ms': (time.perf_counter() - inicio) * 1000,
+    'modulos_core': sorted(m for m in sys.modules if m.startswith('core.')),
+}))
+"""
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def _python(script, *argumentos):
+    env = dict(os.environ, AWS_REGION=os.environ.get('AWS_REGION', 'us-east-1'))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(ROOT_DIR, 'src'), BENCH_DIR,
+                                                      env.get('PYTHONPATH')]))
+    env.pop('AWS_LAMBDA_FUNCTION_NAME', None)
+    salida = subprocess.run([sys.executable, '-c', script, *argumentos], capture_output=True, text=True,
+                            env=env, cwd=ROOT_DIR)
+    if salida.returncode != 0:
+        raise RuntimeError(salida.stderr[-2000:])
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def emular(args):
+    import tempfile
+
+    contenedores = []
+    for _ in range(args.containers):
+        parametros = {
+            'bucket': BUCKET_NAME, 'comments': args.comments, 'invocations': args.invocations,
+            'bedrock_latency': args.bedrock_latency, 'comprehend_latency': args.comprehend_latency,
+            'workdir': tempfile.mkdtemp(prefix='bench_lambda_'),
+        }
+        contenedores.append(_python(_SCRIPT_CONTENEDOR, json.dumps(parametros)))
+
+    calientes = [ms for c in contenedores for ms in c['invocaciones_ms'][1:]]
+    importacion = _python(_SCRIPT_IMPORTACION)
+    return {
+        'modo': 'emulado',
+        'contenedores': args.containers,
+        'comentarios_por_evento': args.comments,
+        'import_ms': round(importacion['import_ms'], 1),
+        'modulos_core': importacion['modulos_core'],
+        'init_ms_p50': round(percentile([c['init_ms'] for c in contenedores], 50), 1),
+        'primera_invocacion_ms_p50': round(percentile([c['invocaciones_ms'][0] for c in contenedores], 50), 1),
+        'caliente_ms_p50': round(percentile(calientes, 50), 1),
+        'caliente_ms_p95': round(percentile(calientes, 95), 1),
+    }
+
+
+def invocar_rie(args):
+    """
+    Invoca un Runtime Interface Emulator: la primera llamada tras levantar
+    el contenedor es la fría.
+    """
+    url = f"{args.rie_url.rstrip('/')}/2015-03-31/functions/function/invocations"
+    event = {'Records': [{'s3': {'bucket': {'name': args.bucket}, 'object': {'key': args.key}}}]}
+    latencias = []
+    for _ in range(args.invocations):
+        peticion = urllib.request.Request(url, data=json.dumps(event).encode('utf-8'),
+                                          headers={'Content-Type': 'application/json'})
+        inicio = time.perf_counter()
+        with urllib.request.urlopen(peticion, timeout=300) as respuesta:
+            respuesta.read()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'modo': 'rie',
+        'primera_invocacion_ms_p50': round(latencias[0], 1),
+        'caliente_ms_p50': round(percentile(latencias[1:], 50), 1),
+        'caliente_ms_p95': round(percentile(latencias[1:], 95), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--containers', type=int, default=3, help="Contenedores fríos a emular")
+    parser.add_argument('--invocations', type=int, default=20, help="Invocaciones por contenedor")
+    parser.add_argument('--comments', type=int, default=20, help="Comentarios por evento de S3")
+    parser.add_argument('--bedrock-latency', type=float, default=0.0)
+    parser.add_argument('--comprehend-latency', type=float, default=0.0)
+    parser.add_argument('--rie-url', help="URL de un Runtime Interface Emulator (ej. http://localhost:9000)")
+    parser.add_argument('--bucket', help="Bucket del evento (con --rie-url)")
+    parser.add_argument('--key', help="Key del evento (con --rie-url)")
+    parser.add_argument('--json', help="Ruta donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    if args.rie_url and not (args.bucket and args.key):
+        parser.error("--rie-url requiere --bucket y --key")
+    reporte = invocar_rie(args) if args.rie_url else emular(args)
+
+    if reporte['modo'] == 'emulado':
+        print(f"Importación del handler (proceso limpio): {reporte['import_ms']:.1f} ms")
+        print(f"  módulos de core: {', '.join(reporte['modulos_core'])}")
+        print(f"Init (fase de init de Lambda)     p50 {reporte['init_ms_p50']:>8.1f} ms")
+    print(f"Primera invocación                p50 {reporte['primera_invocacion_ms_p50']:>8.1f} ms")
+    print(f"Invocación en caliente            p50 {reporte['caliente_ms_p50']:>8.1f} ms  "
+          f"p95 {reporte['caliente_ms_p95']:.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
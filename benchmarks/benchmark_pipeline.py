@@ -0,0 +1,313 @@
+"""
+Benchmark del pipeline completo contra dobles locales de AWS.
+
+Recorre upload_file_to_s3 -> lambda_handler -> lecturas de DynamoDBManager
+con archivos de benchmarks/generate_comments.py y los tres generadores de core.bedrock_services, usando moto para S3/DynamoDB
+y los dobles de fake_aws.py para Comprehend, Bedrock y la Knowledge Base.
+Reporta throughput, latencias p50/p95/p99 y memoria pico por etapa.
+
+Uso:
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/benchmark_pipeline.py --sizes 1000,10000,100000 --bedrock-latency 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('AWS_DEFAULT_REGION', os.environ['AWS_REGION'])
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+# Sin esto las imágenes simuladas terminarían en el caché real de la aplicación
+os.environ.setdefault('IMAGE_CACHE_DIR', tempfile.mkdtemp(prefix='bench_imagenes_'))
+
+from moto import mock_aws
+
+from fake_aws import install_fakes
+from generate_comments import generar_archivo
+from core import aws_clients
+from core.metrics import collect, collect_events, summarize_events
+
+BUCKET_NAME = 'bucket-comentarios-snacks-bench'
+
+
+def percentile(values, p):
+    """
+    Percentil por interpolación lineal (equivalente a numpy.percentile).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def latency_stats(values_ms):
+    return {
+        'n': len(values_ms),
+        'p50_ms': round(percentile(values_ms, 50), 3),
+        'p95_ms': round(percentile(values_ms, 95), 3),
+        'p99_ms': round(percentile(values_ms, 99), 3),
+    }
+
+
+@contextlib.contextmanager
+def stage(results, name, **extra):
+    """
+    Mide duración, memoria pico de Python, llamadas externas y eventos de una etapa.
+    """
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    with collect() as records, collect_events() as events, contextlib.redirect_stdout(io.StringIO()):
+        yield records
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    por_operacion, reintentos = {}, {}
+    for record in records:
+        operacion = f"{record['service']}.{record['operation']}"
+        por_operacion.setdefault(operacion, []).append(record['latency_ms'])
+        reintentos[operacion] = reintentos.get(operacion, 0) + (record.get('retries') or 0)
+    results.append({
+        'stage': name,
+        'seconds': round(duracion, 3),
+        'peak_mb': round(pico / 1024 / 1024, 2),
+        'calls': {operacion: {**latency_stats(latencias), 'retries': reintentos[operacion]}
+                  for operacion, latencias in por_operacion.items()},
+        'events': {f"{e['service']}.{e['event']}": e['count'] for e in summarize_events(events)},
+        **extra,
+    })
+
+
+def cache_hit_rate(etapa):
+    """
+    Tasa de aciertos de la caché de Comprehend dentro de una etapa.
+    """
+    consultas = {'hit': 0, 'miss': 0}
+    for evento, cantidad in etapa['events'].items():
+        if evento.startswith('comprehend_cache.'):
+            consultas['miss' if evento.endswith(':miss') else 'hit'] += cantidad
+    total = consultas['hit'] + consultas['miss']
+    return round(consultas['hit'] / total, 3) if total else None
+
+
+def run_size(size, args):
+    from core.data_ingestion import upload_file_to_s3
+    from core.database_management import DynamoDBManager
+    from core.lambda_handler import lambda_handler
+
+    results = []
+    ruta = os.path.join(args.workdir, f"comentarios_{size}.{args.format}")
+    generar_archivo(ruta, size, args.format, seed=size)
+
+    with stage(results, 'upload_file_to_s3', comments=size):
+        key = upload_file_to_s3(ruta, BUCKET_NAME, file_prefix=f'comments/{size}/')
+
+    event = {'Records': [{'s3': {'bucket': {'name': BUCKET_NAME}, 'object': {'key': key}}}]}
+    with stage(results, 'lambda_handler', comments=size):
+        lambda_handler(event, None)
+    results[-1]['throughput_per_s'] = round(size / results[-1]['seconds'], 1)
+    results[-1]['comprehend_cache_hit_rate'] = cache_hit_rate(results[-1])
+    if args.reprocess:
+        # Reintento del mismo archivo: los textos ya están en la caché de Comprehend
+        with stage(results, 'lambda_handler (reproceso)', comments=size):
+            lambda_handler(event, None)
+        results[-1]['throughput_per_s'] = round(size / results[-1]['seconds'], 1)
+        results[-1]['comprehend_cache_hit_rate'] = cache_hit_rate(results[-1])
+
+    db_manager = DynamoDBManager()
+    with stage(results, 'get_all_comments'):
+        items = db_manager.get_all_comments()
+    results[-1]['items'] = len(items)
+    with stage(results, 'get_latest_comments'):
+        db_manager.get_latest_comments(limit=10)
+
+    # Búsqueda: filtro en Python sobre get_all_comments frente al índice invertido
+    with stage(results, 'filtro_python #precio'):
+        esperados = [c for c in db_manager.get_all_comments() if '#precio' in c['text'].lower()]
+    results[-1]['items'] = len(esperados)
+    with stage(results, 'search_comments #precio (1a página)'):
+        pagina = db_manager.search_comments('#precio', limit=20, source='hashtag')
+    results[-1]['items'] = len(pagina['comments'])
+    with stage(results, 'search_comments #precio (todas las páginas)'):
+        encontrados, token = [], None
+        while True:
+            pagina = db_manager.search_comments('#precio', limit=100, next_token=token, source='hashtag')
+            encontrados.extend(pagina['comments'])
+            token = pagina['next_token']
+            if not token:
+                break
+    results[-1]['items'] = len(encontrados)
+    with stage(results, "search_comments prefijo 'sab'"):
+        pagina = db_manager.search_comments('sab', prefix=True, limit=20)
+    results[-1]['items'] = len(pagina['comments'])
+
+    # Modo archivo de la pestaña de comentarios: el mismo archivo sin pasar por S3 ni DynamoDB
+    from core import bedrock_services
+    from core.bulk_analysis import analizar_archivo_comentarios
+    with stage(results, 'analizar_archivo_comentarios', comments=size):
+        analisis = analizar_archivo_comentarios(ruta, ruta, bedrock_services.generar_resumen_comentarios,
+                                                bedrock_services.generar_resumen_consolidado)
+    results[-1]['throughput_per_s'] = round(size / results[-1]['seconds'], 1)
+    results[-1]['muestra'] = analisis['muestra']
+
+    # Archivo Parquet: exportación completa, exportación incremental sin
+    # cambios y agregado por día leyendo solo tres columnas
+    from collections import Counter
+    from core.comment_archive import export_comments, sentiment_by_day
+    archivo = os.path.join(args.workdir, f"archivo_{size}")
+    with stage(results, 'export_comments (completa)', comments=size):
+        exportado = export_comments(db_manager, archivo, full=True)
+    results[-1]['items'] = exportado['filas']
+    results[-1]['parquet_bytes'] = sum(a['bytes'] for a in exportado['archivos'])
+    with stage(results, 'export_comments (incremental)'):
+        exportado = export_comments(db_manager, archivo)
+    results[-1]['items'] = exportado['filas']
+    with stage(results, 'sentimiento por día (get_all_comments)'):
+        conteo = Counter((c['timestamp'][:10], c['sentiment']) for c in db_manager.get_all_comments())
+    results[-1]['items'] = len(conteo)
+    with stage(results, 'sentimiento por día (Parquet)'):
+        tabla = sentiment_by_day(archivo)
+    results[-1]['items'] = tabla.num_rows
+    return results
+
+
+def run_generators(args):
+    from core import bedrock_services
+
+    results = []
+    generadores = {
+        'generar_programacion_curricular': lambda: bedrock_services.generar_programacion_curricular(
+            3, "Indaga mediante métodos científicos para construir sus conocimientos.",
+            "• Problematiza situaciones para hacer indagación.", "1. CINEMÁTICA"
+        ),
+        'generar_programacion_curricular_2': lambda: bedrock_services.generar_programacion_curricular_2(
+            3, "Indaga mediante métodos científicos para construir sus conocimientos.",
+            "• Problematiza situaciones para hacer indagación.", "1. CINEMÁTICA"
+        ),
+        'generar_imagen_promocional': lambda: bedrock_services.generar_imagen_promocional(
+            "Laboratorio de física", seed=time.time_ns() % 2**31
+        ),
+        'generar_resumen_comentarios': lambda: bedrock_services.generar_resumen_comentarios(
+            "Las clases son interesantes.\nQuiero más experimentos."
+        ),
+    }
+    for nombre, generador in generadores.items():
+        latencias = []
+        with stage(results, nombre, runs=args.generator_runs):
+            for _ in range(args.generator_runs):
+                inicio = time.perf_counter()
+                generador()
+                latencias.append((time.perf_counter() - inicio) * 1000)
+        results[-1]['end_to_end'] = latency_stats(latencias)
+    return results
+
+
+def print_report(report):
+    for bloque in report:
+        print(f"\n=== {bloque['title']} ===")
+        for etapa in bloque['stages']:
+            extra = ', '.join(f"{k}={v}" for k, v in etapa.items()
+                              if k in ('comments', 'items', 'runs', 'throughput_per_s', 'comprehend_cache_hit_rate'))
+            print(f"{etapa['stage']:<34} {etapa['seconds']:>9.3f} s  pico {etapa['peak_mb']:>8.2f} MiB  {extra}")
+            if 'end_to_end' in etapa:
+                e2e = etapa['end_to_end']
+                print(f"{'  end-to-end':<34} p50 {e2e['p50_ms']:.1f} ms  p95 {e2e['p95_ms']:.1f} ms  p99 {e2e['p99_ms']:.1f} ms")
+            for operacion, stats in etapa['calls'].items():
+                print(f"  {operacion:<32} n={stats['n']:<7} p50 {stats['p50_ms']:.2f} ms  "
+                      f"p95 {stats['p95_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms  reintentos {stats['retries']}")
+            for evento, cantidad in etapa['events'].items():
+                print(f"  {evento:<32} eventos={cantidad}")
+    print(f"\nRSS máximo del proceso: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000', help="Tamaños de archivo de comentarios")
+    parser.add_argument('--bedrock-latency', type=float, default=0.0, help="Latencia simulada de Bedrock (s)")
+    parser.add_argument('--bedrock-token-latency', type=float, default=0.0,
+                        help="Latencia simulada por token de salida de Bedrock (s)")
+    parser.add_argument('--comprehend-latency', type=float, default=0.0, help="Latencia simulada de Comprehend (s)")
+    parser.add_argument('--kb-latency', type=float, default=0.0, help="Latencia simulada de la Knowledge Base (s)")
+    parser.add_argument('--bedrock-quota-tps', type=float, default=None,
+                        help="Cuota simulada de Bedrock: rechaza con ThrottlingException por encima de este TPS")
+    parser.add_argument('--comprehend-quota-tps', type=float, default=None,
+                        help="Cuota simulada de Comprehend por operación")
+    parser.add_argument('--bedrock-error-rate', type=float, default=0.0,
+                        help="Fracción de llamadas a Bedrock que fallan con 503 (prueba de circuit breakers)")
+    parser.add_argument('--kb-error-rate', type=float, default=0.0,
+                        help="Fracción de consultas a la Knowledge Base que fallan con 503")
+    parser.add_argument('--rate-limits', default=None,
+                        help="JSON de cuotas del cliente (core.rate_limiter); por defecto sin límite")
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='ndjson',
+                        help="Formato de los archivos de comentarios generados")
+    parser.add_argument('--workdir', default=None, help="Directorio para los archivos generados")
+    parser.add_argument('--generator-runs', type=int, default=5)
+    parser.add_argument('--reprocess', action='store_true',
+                        help="Procesar dos veces cada archivo (reintento del mismo evento de S3)")
+    parser.add_argument('--comprehend-cache-size', type=int, default=None,
+                        help="Entradas del LRU de Comprehend (0 lo desactiva)")
+    parser.add_argument('--comprehend-cache-table', default=None,
+                        help="Tabla DynamoDB (simulada) para el nivel compartido de la caché de Comprehend")
+    parser.add_argument('--json', help="Ruta donde guardar el reporte en JSON")
+    args = parser.parse_args()
+    args.workdir = args.workdir or tempfile.mkdtemp(prefix='bench_comentarios_')
+    # Sin --rate-limits se mide el pipeline sin el freno de las cuotas reales de AWS
+    from core.rate_limiter import DEFAULT_QUOTAS
+    os.environ['RATE_LIMITS'] = args.rate_limits or json.dumps(
+        {name: {'tps': 1e6, 'tokens_per_minute': None} for name in DEFAULT_QUOTAS}
+    )
+
+    if args.comprehend_cache_size is not None:
+        os.environ['COMPREHEND_CACHE_SIZE'] = str(args.comprehend_cache_size)
+    if args.comprehend_cache_table:
+        os.environ['COMPREHEND_CACHE_TABLE'] = args.comprehend_cache_table
+
+    report = []
+    with mock_aws():
+        aws_clients.reset_clients()
+        install_fakes(
+            bedrock_latency=args.bedrock_latency,
+            comprehend_latency=args.comprehend_latency,
+            kb_latency=args.kb_latency,
+            latency_per_output_token=args.bedrock_token_latency,
+            bedrock_quota_tps=args.bedrock_quota_tps,
+            comprehend_quota_tps=args.comprehend_quota_tps,
+            bedrock_error_rate=args.bedrock_error_rate,
+            kb_error_rate=args.kb_error_rate,
+        )
+        aws_clients.get_client('s3').create_bucket(Bucket=BUCKET_NAME)
+
+        from core.database_management import DynamoDBManager
+        with contextlib.redirect_stdout(io.StringIO()):
+            DynamoDBManager().create_table()
+            if args.comprehend_cache_table:
+                from core.comprehend_cache import DynamoDBCacheTier
+                DynamoDBCacheTier(args.comprehend_cache_table).create_table()
+
+        for size in [int(s) for s in args.sizes.split(',') if s]:
+            report.append({'title': f"Pipeline con {size} comentarios", 'stages': run_size(size, args)})
+        report.append({'title': "Generadores de core.bedrock_services", 'stages': run_generators(args)})
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark A/B de configuraciones de modelos por etapa (core.model_routing).
+
+Ejecuta el generador RSIP, la respuesta RAG y los dos resúmenes con cada
+configuración y compara por etapa: modelo, latencia p50/p95, tokens de
+salida, tokens leídos de la caché de prompts y costo estimado. Por defecto usa los dobles de fake_aws.py, con una
+velocidad por token distinta para cada modelo (TOKEN_LATENCY_BY_MODEL); con
+--live llama a Bedrock con las credenciales del entorno.
+
+Uso:
+    python benchmarks/benchmark_routing.py --profiles uniforme,escalonado --runs 3
+    python benchmarks/benchmark_routing.py --profiles escalonado,mi_config.json --live
+    python benchmarks/benchmark_routing.py --profiles escalonado,escalonado_cache
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+COMPETENCIA = "Indaga mediante métodos científicos para construir sus conocimientos."
+CAPACIDADES = "• Problematiza situaciones para hacer indagación.\n• Diseña estrategias para hacer indagación."
+CONTENIDOS = "1. LA FÍSICA Y MAGNITUDES\n2. CINEMÁTICA\n3. DINÁMICA LINEAL"
+COMENTARIOS = ["Las clases son interesantes.", "Quiero más experimentos.", "El laboratorio es muy pequeño."]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def cargar_configuracion(valor):
+    """
+    Un perfil de core.model_routing o la ruta de un JSON con rutas por etapa.
+    """
+    if valor.endswith('.json'):
+        with open(valor, 'r', encoding='utf-8') as f:
+            return os.path.basename(valor), json.load(f)
+    return valor, valor
+
+
+def ejecutar_configuracion(configuracion, runs):
+    from core import bedrock_services
+    from core.bedrock_summarization import generate_summary_bedrock
+    from core.metrics import collect
+    from core.model_routing import use_routing
+    from core.rag_service import generar_programacion_curricular_rag
+
+    tareas = {
+        'rsip': lambda: bedrock_services.generar_programacion_curricular(3, COMPETENCIA, CAPACIDADES, CONTENIDOS),
+        'rag': lambda: generar_programacion_curricular_rag(3, COMPETENCIA, CAPACIDADES, CONTENIDOS),
+        'resumen_comentarios': lambda: bedrock_services.generar_resumen_comentarios("\n".join(COMENTARIOS)),
+        'resumen_lote': lambda: generate_summary_bedrock(COMENTARIOS),
+    }
+    duraciones = {nombre: [] for nombre in tareas}
+    longitudes = {nombre: [] for nombre in tareas}
+    with use_routing(configuracion), collect() as records, contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(runs):
+            for nombre, tarea in tareas.items():
+                inicio = time.perf_counter()
+                resultado = tarea() or ''
+                duraciones[nombre].append((time.perf_counter() - inicio) * 1000)
+                longitudes[nombre].append(len(resultado))
+    return records, duraciones, longitudes
+
+
+def resumen_por_etapa(records, runs):
+    etapas = {}
+    for record in records:
+        if record['service'] != 'bedrock' or not record.get('stage'):
+            continue
+        etapa = etapas.setdefault(record['stage'], {'model_id': record.get('model_id'), 'latencias': [],
+                                                    'output_tokens': 0, 'cache_read_tokens': 0,
+                                                    'input_tokens': 0, 'cost_usd': 0.0, 'errors': 0})
+        etapa['latencias'].append(record['latency_ms'])
+        etapa['output_tokens'] += record.get('output_tokens') or 0
+        etapa['input_tokens'] += (record.get('input_tokens') or 0) + (record.get('cache_write_tokens') or 0)
+        etapa['cache_read_tokens'] += record.get('cache_read_tokens') or 0
+        etapa['cost_usd'] += record.get('cost_usd') or 0.0
+        etapa['errors'] += 1 if record['error'] else 0
+    return {
+        nombre: {
+            'model_id': etapa['model_id'],
+            'calls': len(etapa['latencias']),
+            'p50_ms': round(percentile(etapa['latencias'], 50), 1),
+            'p95_ms': round(percentile(etapa['latencias'], 95), 1),
+            'output_tokens_por_llamada': round(etapa['output_tokens'] / len(etapa['latencias']), 1),
+            'cache_hit_ratio': round(
+                etapa['cache_read_tokens'] / ((etapa['cache_read_tokens'] + etapa['input_tokens']) or 1), 3
+            ),
+            'costo_por_run_usd': round(etapa['cost_usd'] / runs, 6),
+            'errors': etapa['errors'],
+        }
+        for nombre, etapa in sorted(etapas.items())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', default='uniforme,escalonado',
+                        help="Perfiles de core.model_routing o archivos JSON, separados por comas")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--live', action='store_true', help="Llamar a Bedrock real en lugar de los dobles")
+    parser.add_argument('--time-scale', type=float, default=0.02,
+                        help="Escala de la latencia simulada por token (1.0 = velocidad real aproximada)")
+    parser.add_argument('--cache-min-tokens', type=int,
+                        help="Mínimo de tokens del prefijo cacheable en los dobles (por defecto, el del modelo). "
+                             "build_body solo marca prefijos que alcanzan el mínimo real del modelo")
+    parser.add_argument('--json', help="Ruta donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    if not args.live:
+        from fake_aws import INPUT_TOKEN_LATENCY, TOKEN_LATENCY_BY_MODEL, install_fakes
+        os.environ.setdefault('AWS_REGION', 'us-east-1')
+        os.environ['RATE_LIMITS'] = json.dumps({'bedrock': {'tps': 1e6, 'tokens_per_minute': None},
+                                                'bedrock-kb': {'tps': 1e6}})
+        install_fakes(latency_per_output_token={
+            modelo: segundos * args.time_scale for modelo, segundos in TOKEN_LATENCY_BY_MODEL.items()
+        }, latency_per_input_token=INPUT_TOKEN_LATENCY * args.time_scale, cache_min_tokens=args.cache_min_tokens)
+
+    reporte = {}
+    for valor in args.profiles.split(','):
+        nombre, configuracion = cargar_configuracion(valor.strip())
+        records, duraciones, longitudes = ejecutar_configuracion(configuracion, args.runs)
+        reporte[nombre] = {
+            'etapas': resumen_por_etapa(records, args.runs),
+            'tareas': {
+                tarea: {
+                    'p50_ms': round(percentile(valores, 50), 1),
+                    'longitud_media': round(sum(longitudes[tarea]) / len(longitudes[tarea])),
+                }
+                for tarea, valores in duraciones.items()
+            },
+        }
+
+    for nombre, datos in reporte.items():
+        costo_total = sum(etapa['costo_por_run_usd'] for etapa in datos['etapas'].values())
+        print(f"\n=== {nombre}: ${costo_total:.4f} por run ===")
+        for etapa, stats in datos['etapas'].items():
+            print(f"  {etapa:<24} {stats['model_id']:<42} p50 {stats['p50_ms']:>9.1f} ms  "
+                  f"p95 {stats['p95_ms']:>9.1f} ms  salida {stats['output_tokens_por_llamada']:>7.1f} tok  "
+                  f"caché {stats['cache_hit_ratio']:>5.1%}  "
+                  f"${stats['costo_por_run_usd']:.4f}/run  errores {stats['errors']}")
+        for tarea, stats in datos['tareas'].items():
+            print(f"  [{tarea}] end-to-end p50 {stats['p50_ms']:.1f} ms, {stats['longitud_media']} caracteres")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark de concordancia y rendimiento del motor local de sentimiento
+(core.local_sentiment) frente a Amazon Comprehend.
+
+Sobre comentarios con el esquema de comments_data.json (id, timestamp, text)
+mide:
+- concordancia del motor local con las etiquetas de referencia: porcentaje
+  de acuerdo, kappa de Cohen y matriz de confusión;
+- rendimiento (comentarios/s) del motor local por tamaño de lote frente a
+  Comprehend, secuencial y con su costo estimado;
+- el modo hybrid: por cada umbral de confianza, qué fracción de comentarios
+  iría a Comprehend, la concordancia resultante y el costo por cada 1000
+  comentarios.
+
+Las etiquetas de referencia son salidas de Comprehend. Pueden venir de un
+archivo grabado (--reference), de Comprehend real (--live, que puede
+grabarlas con --save-reference) o, por defecto, del Comprehend simulado de
+fake_aws.py, que también es un léxico: sin --reference ni --live la
+concordancia es solo una prueba de humo. Con --synthetic se generan
+comentarios con el tono con que se escribieron ('expected_sentiment') y se
+reporta además la concordancia con ese tono.
+
+Uso:
+    python benchmarks/benchmark_sentiment.py --data comments_data.json --live --save-reference ref.json
+    python benchmarks/benchmark_sentiment.py --data comments_data.json --reference ref.json
+    python benchmarks/benchmark_sentiment.py --synthetic 5000 --thresholds 0.6,0.7,0.75,0.8,0.9
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+SENTIMIENTOS = ('POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED')
+
+
+def cargar_comentarios(args):
+    if args.synthetic:
+        from generate_comments import GeneradorComentarios
+        return list(GeneradorComentarios(seed=args.seed, etiquetar=True).generar(args.synthetic))
+    with open(args.data, encoding='utf-8') as f:
+        contenido = f.read()
+    from core.data_ingestion import parse_comments
+    return [c for c in parse_comments(contenido, args.data) if c.get('id') and c.get('text')]
+
+
+def referencia_comprehend(comentarios, args):
+    """
+    Etiquetas de Comprehend por id y segundos de la pasada secuencial
+    (None si vienen de un archivo grabado).
+    """
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as f:
+            grabado = json.load(f)
+        faltantes = [c['id'] for c in comentarios if c['id'] not in grabado]
+        if faltantes:
+            sys.exit(f"La referencia no tiene {len(faltantes)} comentarios (ej. {faltantes[0]})")
+        return {c['id']: grabado[c['id']] for c in comentarios}, None
+
+    from core.sentiment_analysis import ComprehendBackend
+    if not args.live:
+        from fake_aws import install_fakes
+        install_fakes(comprehend_latency=args.comprehend_latency)
+
+    comprehend = ComprehendBackend()
+    inicio = time.perf_counter()
+    resultados = comprehend.analyze_batch([c['text'] for c in comentarios])
+    segundos = time.perf_counter() - inicio
+    referencia = {c['id']: {'Sentiment': s, 'SentimentScore': p} for c, (s, p) in zip(comentarios, resultados)}
+    errores = sum(1 for r in referencia.values() if r['Sentiment'] == 'UNKNOWN')
+    if errores:
+        sys.exit(f"Comprehend falló en {errores} comentarios; revisa credenciales y región")
+    if args.save_reference:
+        with open(args.save_reference, 'w', encoding='utf-8') as f:
+            json.dump(referencia, f, ensure_ascii=False, indent=2)
+    return referencia, segundos
+
+
+def concordancia(esperadas, obtenidas):
+    """
+    Acuerdo, kappa de Cohen y matriz de confusión (filas: referencia).
+    """
+    n = len(esperadas)
+    matriz = {e: {o: 0 for o in SENTIMIENTOS} for e in SENTIMIENTOS}
+    for esperada, obtenida in zip(esperadas, obtenidas):
+        matriz[esperada][obtenida] += 1
+    acuerdo = sum(matriz[s][s] for s in SENTIMIENTOS) / n if n else 0.0
+    azar = sum(
+        (sum(matriz[s].values()) / n) * (sum(matriz[e][s] for e in SENTIMIENTOS) / n) for s in SENTIMIENTOS
+    ) if n else 0.0
+    kappa = (acuerdo - azar) / (1 - azar) if azar < 1 else 1.0
+    return {'acuerdo': round(acuerdo, 4), 'kappa': round(kappa, 4), 'matriz': matriz}
+
+
+def rendimiento_local(engine, textos, tamanos, minimo):
+    """
+    Comentarios por segundo del motor local para cada tamaño de lote,
+    repitiendo los textos hasta puntuar al menos `minimo` comentarios.
+    """
+    repeticiones = max(1, -(-minimo // len(textos)))
+    textos = (textos * repeticiones)[:max(minimo, len(textos))]
+    resultado = {}
+    for tamano in tamanos:
+        tamano = min(tamano, len(textos))
+        inicio = time.perf_counter()
+        for i in range(0, len(textos), tamano):
+            engine.score_batch(textos[i:i + tamano])
+        resultado[tamano] = round(len(textos) / (time.perf_counter() - inicio), 1)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(ROOT_DIR, 'comments_data.json'),
+                        help="Archivo de comentarios (JSON o NDJSON)")
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help="Generar N comentarios etiquetados en lugar de leer --data")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--reference', help="JSON grabado {id: {Sentiment, SentimentScore}} de Comprehend")
+    parser.add_argument('--live', action='store_true', help="Usar Amazon Comprehend real como referencia")
+    parser.add_argument('--save-reference', help="Grabar la referencia obtenida en esta ruta")
+    parser.add_argument('--comprehend-latency', type=float, default=0.05,
+                        help="Latencia simulada de Comprehend (s), sin --live")
+    parser.add_argument('--thresholds', default='0.5,0.6,0.7,0.75,0.8,0.9',
+                        help="Umbrales de confianza del modo hybrid")
+    parser.add_argument('--batch-sizes', default='1,100,10000', help="Tamaños de lote para el rendimiento local")
+    parser.add_argument('--min-comments', type=int, default=20000,
+                        help="Comentarios mínimos a puntuar al medir el rendimiento local")
+    parser.add_argument('--json', help="Ruta donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault('AWS_REGION', 'us-east-1')
+    # La caché de Comprehend ocultaría el costo real de la referencia
+    os.environ['COMPREHEND_CACHE_SIZE'] = '0'
+    os.environ.pop('COMPREHEND_CACHE_TABLE', None)
+    if not args.live:
+        os.environ['RATE_LIMITS'] = json.dumps({'comprehend': {'tps': 1e6, 'tokens_per_minute': None}})
+
+    from core.local_sentiment import LexiconSentimentEngine
+    from core.metrics import estimate_comprehend_cost
+
+    comentarios = cargar_comentarios(args)
+    textos = [c['text'] for c in comentarios]
+    referencia, segundos_comprehend = referencia_comprehend(comentarios, args)
+    esperadas = [referencia[c['id']]['Sentiment'] for c in comentarios]
+
+    engine = LexiconSentimentEngine()
+    etiquetas, puntajes = engine.score_batch(textos)
+    confianza = puntajes.max(axis=1)
+    costos = [estimate_comprehend_cost(t) for t in textos]
+
+    reporte = {
+        'comentarios': len(comentarios),
+        'referencia': 'archivo' if args.reference else ('comprehend' if args.live else 'comprehend_simulado'),
+        'local_vs_comprehend': concordancia(esperadas, etiquetas),
+    }
+    if all('expected_sentiment' in c for c in comentarios):
+        generadas = [c['expected_sentiment'] for c in comentarios]
+        reporte['local_vs_generador'] = concordancia(generadas, etiquetas)
+        reporte['comprehend_vs_generador'] = concordancia(generadas, esperadas)
+
+    tamanos = [int(t) for t in args.batch_sizes.split(',')]
+    reporte['local_comentarios_por_s'] = rendimiento_local(engine, textos, tamanos, args.min_comments)
+    if segundos_comprehend:
+        reporte['comprehend_comentarios_por_s'] = round(len(textos) / segundos_comprehend, 1)
+    reporte['comprehend_costo_por_1000_usd'] = round(sum(costos) / len(costos) * 1000, 4)
+
+    reporte['hybrid'] = []
+    for umbral in (float(u) for u in args.thresholds.split(',')):
+        remotos = confianza < umbral
+        combinadas = [esperada if remoto else local for esperada, local, remoto in zip(esperadas, etiquetas, remotos)]
+        reporte['hybrid'].append({
+            'umbral': umbral,
+            'a_comprehend': round(float(remotos.mean()), 4),
+            'acuerdo': concordancia(esperadas, combinadas)['acuerdo'],
+            'costo_por_1000_usd': round(sum(c for c, r in zip(costos, remotos) if r) / len(costos) * 1000, 4),
+        })
+
+    print(f"Comentarios: {reporte['comentarios']}  (referencia: {reporte['referencia']})")
+    if reporte['referencia'] == 'comprehend_simulado':
+        print("  ⚠️  Referencia simulada por léxico: use --reference o --live para una concordancia real")
+    for nombre in ('local_vs_comprehend', 'local_vs_generador', 'comprehend_vs_generador'):
+        if nombre in reporte:
+            print(f"{nombre:<26} acuerdo {reporte[nombre]['acuerdo']:.1%}  kappa {reporte[nombre]['kappa']:.3f}")
+    print("Matriz de confusión local (filas: Comprehend, columnas: local):")
+    print(' ' * 10 + ''.join(f"{s:>10}" for s in SENTIMIENTOS))
+    for esperada, fila in reporte['local_vs_comprehend']['matriz'].items():
+        print(f"{esperada:<10}" + ''.join(f"{fila[s]:>10}" for s in SENTIMIENTOS))
+    print("Rendimiento del motor local:")
+    for tamano, velocidad in reporte['local_comentarios_por_s'].items():
+        print(f"  lote de {tamano:>6}: {velocidad:>12,.0f} comentarios/s")
+    if 'comprehend_comentarios_por_s' in reporte:
+        print(f"  Comprehend secuencial: {reporte['comprehend_comentarios_por_s']:>8,.1f} comentarios/s")
+    print(f"Modo hybrid (Comprehend solo: ${reporte['comprehend_costo_por_1000_usd']:.4f} por 1000 comentarios):")
+    for fila in reporte['hybrid']:
+        print(f"  umbral {fila['umbral']:.2f}: {fila['a_comprehend']:>6.1%} a Comprehend, "
+              f"acuerdo {fila['acuerdo']:.1%}, ${fila['costo_por_1000_usd']:.4f} por 1000")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Mide el arranque en frío de la aplicación Streamlit (src/app/app.py).
+
+Cada corrida usa un proceso nuevo de Python, así que incluye todas las
+importaciones. Para cada corrida se mide:
+- la importación de streamlit;
+- la primera ejecución del script, hasta tener la página dibujada (con
+  streamlit.testing.AppTest, sin servidor ni navegador);
+- el fin del precalentamiento en segundo plano (core.warmup);
+- qué módulos pesados importa la primera página por sí misma (en una corrida
+  aparte con el precalentamiento detenido, que si no los importa en paralelo).
+
+Además desglosa con `python -X importtime` el costo de importación de los
+módulos pesados. Retorna código 1 si la primera página supera --target-ms,
+para usarlo como control en CI.
+
+Uso:
+    python benchmarks/benchmark_startup.py --runs 5 --target-ms 1500
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_PATH = os.path.join(ROOT_DIR, 'src', 'app', 'app.py')
+
+MODULOS_PESADOS = ['boto3', 'botocore', 'docx', 'core.bedrock_services', 'core.rag_service', 'core.docx_exporter']
+
+# Se ejecuta en un proceso nuevo por corrida
+_SCRIPT_CORRIDA = r"""
+import json, sys, threading, time
+if sys.argv[3] == 'sin_precalentamiento':
+    import core.warmup
+    core.warmup.Warmup.start = lambda self: self
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+importado = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+dibujado = time.perf_counter()
+cargados = [m for m in json.loads(sys.argv[2]) if m in sys.modules]
+for hilo in threading.enumerate():
+    if hilo.name == 'warmup':
+        hilo.join()
+precalentado = time.perf_counter()
+print(json.dumps({
+    'import_streamlit_ms': (importado - inicio) * 1000,
+    'primera_pagina_ms': (dibujado - importado) * 1000,
+    'precalentamiento_ms': (precalentado - importado) * 1000,
+    'modulos_en_primera_pagina': cargados,
+    'errores': [e.value for e in at.error],
+}))
+"""
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def entorno():
+    env = dict(os.environ)
+    env.setdefault('AWS_REGION', 'us-east-1')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(ROOT_DIR, 'src'), env.get('PYTHONPATH')]))
+    return env
+
+
+def corrida(modo='normal'):
+    salida = subprocess.run(
+        [sys.executable, '-c', _SCRIPT_CORRIDA, APP_PATH, json.dumps(MODULOS_PESADOS), modo],
+        capture_output=True, text=True, env=entorno(), cwd=ROOT_DIR, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def costo_importacion(modulos):
+    """
+    Milisegundos acumulados de importación de cada módulo según -X importtime.
+    """
+    codigo = '; '.join(f"import {modulo}" for modulo in modulos)
+    salida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                            capture_output=True, text=True, env=entorno(), cwd=ROOT_DIR)
+    costos = {}
+    for linea in salida.stderr.splitlines():
+        encontrado = re.match(r'import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)', linea)
+        if encontrado and encontrado.group(3) in modulos and len(encontrado.group(2)) == 1:
+            costos[encontrado.group(3)] = round(int(encontrado.group(1)) / 1000, 1)
+    return costos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--target-ms', type=float, default=1500,
+                        help="Tiempo máximo aceptado (p50) hasta dibujar la primera página")
+    parser.add_argument('--json', help="Ruta donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    corridas = [corrida() for _ in range(args.runs)]
+    reporte = {
+        metrica: round(percentile([c[metrica] for c in corridas], 50), 1)
+        for metrica in ('import_streamlit_ms', 'primera_pagina_ms', 'precalentamiento_ms')
+    }
+    reporte['modulos_en_primera_pagina'] = corrida('sin_precalentamiento')['modulos_en_primera_pagina']
+    reporte['errores'] = sorted({e for c in corridas for e in c['errores']})
+    reporte['costo_importacion_ms'] = costo_importacion(MODULOS_PESADOS)
+    reporte['target_ms'] = args.target_ms
+
+    print(f"Corridas en frío: {args.runs}")
+    print(f"  import streamlit        p50 {reporte['import_streamlit_ms']:>8.1f} ms")
+    print(f"  primera página          p50 {reporte['primera_pagina_ms']:>8.1f} ms  (objetivo {args.target_ms:.0f} ms)")
+    print(f"  precalentamiento listo  p50 {reporte['precalentamiento_ms']:>8.1f} ms")
+    print(f"  módulos pesados en la primera página: {', '.join(reporte['modulos_en_primera_pagina']) or 'ninguno'}")
+    for error in reporte['errores']:
+        print(f"  error en la página: {error}")
+    print("Costo de importación (-X importtime, en orden; cada uno sin lo ya importado):")
+    for modulo, ms in reporte['costo_importacion_ms'].items():
+        print(f"  {modulo:<24} {ms:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+    if reporte['primera_pagina_ms'] > args.target_ms:
+        print(f"❌ La primera página supera el objetivo de {args.target_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
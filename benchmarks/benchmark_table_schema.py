@@ -0,0 +1,173 @@
+"""
+Benchmark del esquema de tabla por inquilino (core.table_schema) frente al legado.
+
+Carga comentarios de varios inquilinos (con reparto sesgado, como productos o
+colegios de distinto tamaño) en la tabla legada simulada con moto, los
+copia con core.table_migration (primero un tramo, luego se reanuda desde
+el estado guardado) y compara:
+- consultas por inquilino (últimos N y rango de fechas): Scan en el
+  esquema legado contra Query en el nuevo, en latencia e ítems leídos;
+- comentarios de un sentimiento desde una marca (dashboard en vivo); el
+  índice legado no distingue inquilinos, así que trae los de todos;
+- reparto de escrituras en las particiones del índice de sentimiento: la
+  fracción que recibe la partición más cargada y el ritmo de escritura
+  sostenible con el límite de 1000 WCU/s por partición;
+- que la migración copie todo sin diferencias de contenido.
+
+Uso:
+    python benchmarks/benchmark_table_schema.py --comments 5000 --tenants 20
+    python benchmarks/benchmark_table_schema.py --segments 4 --page-size 200
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('AWS_DEFAULT_REGION', os.environ['AWS_REGION'])
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+from moto import mock_aws
+
+from benchmark_pipeline import percentile
+from generate_comments import GeneradorComentarios
+
+WCU_POR_PARTICION = 1000
+
+
+def procesar(comentarios, tenants, seed):
+    """
+    Comentarios como los guarda lambda_handler, con un inquilino de
+    popularidad tipo Zipf (el primero recibe la mayor parte).
+    """
+    rng = random.Random(seed)
+    nombres = [f"colegio-{i:03d}" for i in range(tenants)]
+    pesos = [1 / (i + 1) for i in range(tenants)]
+    return [{
+        'comment_id': c['id'],
+        'timestamp': c['timestamp'],
+        'text': c['text'],
+        'sentiment': c['expected_sentiment'],
+        'sentiment_score': {'Positive': 0.25, 'Negative': 0.25, 'Neutral': 0.25, 'Mixed': 0.25},
+        'entities': [],
+        'tenant': rng.choices(nombres, pesos)[0],
+    } for c in comentarios]
+
+
+def medir(tarea, repeticiones):
+    """
+    Latencia p50 e ítems leídos por DynamoDB (métricas de core.metrics) de una consulta.
+    """
+    from core.metrics import collect
+
+    latencias, leidos, resultado = [], 0, None
+    for _ in range(repeticiones):
+        with collect() as records:
+            inicio = time.perf_counter()
+            resultado = tarea()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        leidos += sum(r.get('items') or 0 for r in records if r['service'] == 'dynamodb')
+    return {'p50_ms': round(percentile(latencias, 50), 2), 'items_leidos': leidos // repeticiones,
+            'resultados': len(resultado['comments'] if isinstance(resultado, dict) else resultado)}
+
+
+def reparto_escrituras(procesados):
+    """
+    Particiones del índice de sentimiento y fracción de escrituras de la más cargada.
+    """
+    from core.table_schema import key_attributes
+
+    reporte = {}
+    for nombre, claves in (('legado', [c['sentiment'] for c in procesados]),
+                           ('por_inquilino', [key_attributes(c)['sentiment_shard'] for c in procesados])):
+        conteo = Counter(claves)
+        fraccion = max(conteo.values()) / len(claves)
+        reporte[nombre] = {'particiones': len(conteo), 'fraccion_mas_cargada': round(fraccion, 3),
+                           'escrituras_por_s_sostenibles': round(WCU_POR_PARTICION / fraccion)}
+    return reporte
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--comments', type=int, default=3000)
+    parser.add_argument('--tenants', type=int, default=12)
+    parser.add_argument('--segments', type=int, default=4, help="Segmentos del Scan paralelo de la migración")
+    parser.add_argument('--page-size', type=int, default=250)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=5)
+    parser.add_argument('--json', help="Ruta donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    procesados = procesar(list(GeneradorComentarios(seed=args.seed, etiquetar=True).generar(args.comments)),
+                          args.tenants, args.seed)
+    reporte = {'comentarios': args.comments, 'inquilinos': args.tenants,
+               'indice_sentimiento': reparto_escrituras(procesados)}
+
+    with mock_aws(), contextlib.redirect_stdout(io.StringIO()):
+        from core.database_management import DynamoDBManager
+        from core.table_migration import migrate_comments, verify_migration
+
+        legado = DynamoDBManager('BenchLegacy', 'BenchSearch', schema='legacy')
+        legado.create_table()
+        with legado.table.batch_writer() as escritor:
+            for comentario in procesados:
+                escritor.put_item(Item=legado.encode_comment(comentario))
+        nuevo = DynamoDBManager('BenchTenant', 'BenchSearch', schema='tenant')
+        nuevo.create_table()
+
+        estado = os.path.join(tempfile.mkdtemp(prefix='bench_migracion_'), 'estado.json')
+        tramo = migrate_comments(legado, nuevo, estado, args.segments, args.page_size, max_pages=1)
+        final = migrate_comments(legado, nuevo, estado, args.segments, args.page_size)
+        copiados = {c['comment_id']: c for c in nuevo.get_all_comments()}
+        campos = ('timestamp', 'text', 'sentiment', 'sentiment_score', 'entities', 'tenant')
+        diferencias = sum(1 for c in procesados
+                          if any(copiados.get(c['comment_id'], {}).get(campo) != c[campo] for campo in campos))
+        reporte['migracion'] = {'primer_tramo': tramo, 'reanudada': final,
+                                'verificacion': verify_migration(legado, nuevo), 'diferencias': diferencias}
+
+        inquilino = Counter(c['tenant'] for c in procesados).most_common()[-1][0]
+        marcas = sorted(c['timestamp'] for c in procesados if c['tenant'] == inquilino)
+        desde, hasta = marcas[len(marcas) // 4], marcas[len(marcas) // 2]
+        marca = sorted(c['timestamp'] for c in procesados)[len(procesados) * 9 // 10]
+        consultas = {
+            'ultimos_20_del_inquilino': lambda db: db.query_comments(inquilino, limit=20),
+            'rango_de_fechas_del_inquilino': lambda db: db.query_comments(inquilino, since=desde, until=hasta, limit=1000),
+            'positivos_desde_marca': lambda db: db.get_comments_since('POSITIVE', marca, tenant=inquilino),
+        }
+        reporte['consultas'] = {nombre: {'legado': medir(lambda: consulta(legado), args.repeats),
+                                         'por_inquilino': medir(lambda: consulta(nuevo), args.repeats)}
+                                for nombre, consulta in consultas.items()}
+        reporte['consultas']['inquilino'] = inquilino
+
+    print(f"\n=== {args.comments} comentarios en {args.tenants} inquilinos ===")
+    for nombre, valores in reporte['indice_sentimiento'].items():
+        print(f"Índice de sentimiento {nombre:<14} {valores['particiones']:>4} particiones, la más cargada recibe "
+              f"{valores['fraccion_mas_cargada']:.1%} (~{valores['escrituras_por_s_sostenibles']:,} escrituras/s)")
+    migracion = reporte['migracion']
+    print(f"Migración: {migracion['primer_tramo']['copiados']} copiados en el primer tramo, "
+          f"{migracion['reanudada']['copiados']} al reanudar en {migracion['reanudada']['segundos']} s; "
+          f"{migracion['verificacion']}, diferencias {migracion['diferencias']}")
+    print(f"{'consulta (inquilino ' + inquilino + ')':<36}{'legado ms':>11}{'leídos':>9}{'nuevo ms':>11}{'leídos':>9}")
+    for nombre, valores in reporte['consultas'].items():
+        if nombre == 'inquilino':
+            continue
+        legado_, nuevo_ = valores['legado'], valores['por_inquilino']
+        print(f"{nombre:<36}{legado_['p50_ms']:>11}{legado_['items_leidos']:>9}{nuevo_['p50_ms']:>11}{nuevo_['items_leidos']:>9}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
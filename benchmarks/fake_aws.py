@@ -0,0 +1,340 @@
+"""
+Dobles locales de Comprehend, Bedrock Runtime y Bedrock Knowledge Bases para
+ejecutar el pipeline sin conexión a AWS. S3 y DynamoDB se simulan con moto.
+
+Los dobles imitan la forma de las respuestas de boto3 (incluido
+ResponseMetadata con cabeceras de tokens) y tienen latencia configurable,
+de modo que la instrumentación de core.metrics funciona igual que en AWS.
+"""
+import base64
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# PNG 1x1 válido para las respuestas de Stable Diffusion
+_PNG_1X1 = base64.b64encode(bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)).decode()
+
+# Segundos por token de salida aproximados de cada modelo (velocidad relativa),
+# para comparar configuraciones de modelos sin llamar a Bedrock
+TOKEN_LATENCY_BY_MODEL = {
+    'anthropic.claude-v2': 1 / 30,
+    'anthropic.claude-v2:1': 1 / 30,
+    'anthropic.claude-instant-v1': 1 / 80,
+    'anthropic.claude-3-haiku-20240307-v1:0': 1 / 120,
+    'anthropic.claude-3-5-haiku-20241022-v1:0': 1 / 60,
+    'anthropic.claude-3-sonnet-20240229-v1:0': 1 / 60,
+    'anthropic.claude-3-5-sonnet-20240620-v1:0': 1 / 60,
+    'anthropic.claude-3-7-sonnet-20250219-v1:0': 1 / 60,
+}
+# Segundos por token de entrada procesado (prefill), sin caché de prompts
+INPUT_TOKEN_LATENCY = 1 / 2500
+
+_POSITIVE_WORDS = {'encanta', 'delicioso', 'excelente', 'mejor', 'perfecto', 'buena', 'bueno', 'recomiendo', 'interesantes', 'bien'}
+_NEGATIVE_WORDS = {'problema', 'excesivo', 'decepcion', 'decepción', 'alto', 'regular', 'malo', 'difíciles', 'abierto', 'caro'}
+
+
+class _Latency:
+    """
+    Latencia simulada: media fija más jitter uniforme.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.latency and not self.jitter:
+            return
+        with self._lock:
+            extra = self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, self.latency + extra))
+
+
+class _Quota:
+    """
+    Cuota simulada del servicio, como token bucket (igual que AWS): rechaza
+    con ThrottlingException cuando se agotan las ráfagas de hasta `tps` solicitudes.
+    """
+
+    def __init__(self, tps=None):
+        self.tps = tps
+        self.rejected = 0
+        self._tokens = tps or 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def check(self, operation):
+        if not self.tps:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.tps, self._tokens + (now - self._updated) * self.tps)
+            self._updated = now
+            if self._tokens < 1:
+                self.rejected += 1
+                raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'},
+                                   'ResponseMetadata': {'HTTPStatusCode': 400}}, operation)
+            self._tokens -= 1
+
+
+class _Faults:
+    """
+    Fallas simuladas: una fracción `error_rate` de las llamadas responde
+    ServiceUnavailableException (503), como durante una degradación del servicio.
+    """
+
+    def __init__(self, error_rate=0.0, seed=0):
+        self.error_rate = error_rate
+        self.failed = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def check(self, operation):
+        if not self.error_rate:
+            return
+        with self._lock:
+            falla = self._random.random() < self.error_rate
+            self.failed += falla
+        if falla:
+            raise ClientError({'Error': {'Code': 'ServiceUnavailableException', 'Message': 'Service unavailable'},
+                               'ResponseMetadata': {'HTTPStatusCode': 503}}, operation)
+
+
+def _metadata(headers=None):
+    return {'HTTPStatusCode': 200, 'RetryAttempts': 0, 'HTTPHeaders': headers or {}}
+
+
+class FakeComprehend:
+    """
+    Comprehend simulado: sentimiento por léxico y entidades por hashtags.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, quota_tps=None):
+        self._latency = _Latency(latency, jitter)
+        # Comprehend aplica la cuota por operación
+        self.quotas = {'DetectSentiment': _Quota(quota_tps), 'DetectEntities': _Quota(quota_tps),
+                       'BatchDetectSentiment': _Quota(quota_tps)}
+        self.calls = 0
+
+    def detect_sentiment(self, Text, LanguageCode):
+        self.quotas['DetectSentiment'].check('DetectSentiment')
+        self._latency.wait()
+        self.calls += 1
+        sentiment, scores = self._sentiment(Text)
+        return {'Sentiment': sentiment, 'SentimentScore': scores, 'ResponseMetadata': _metadata()}
+
+    def batch_detect_sentiment(self, TextList, LanguageCode):
+        self.quotas['BatchDetectSentiment'].check('BatchDetectSentiment')
+        self._latency.wait()
+        self.calls += 1
+        resultados = []
+        for indice, texto in enumerate(TextList):
+            sentiment, scores = self._sentiment(texto)
+            resultados.append({'Index': indice, 'Sentiment': sentiment, 'SentimentScore': scores})
+        return {'ResultList': resultados, 'ErrorList': [], 'ResponseMetadata': _metadata()}
+
+    @staticmethod
+    def _sentiment(texto):
+        words = set(re.findall(r'\w+', texto.lower()))
+        positive = len(words & _POSITIVE_WORDS)
+        negative = len(words & _NEGATIVE_WORDS)
+        if positive and negative:
+            sentiment = 'MIXED'
+        elif positive:
+            sentiment = 'POSITIVE'
+        elif negative:
+            sentiment = 'NEGATIVE'
+        else:
+            sentiment = 'NEUTRAL'
+        scores = {'Positive': 0.05, 'Negative': 0.05, 'Neutral': 0.05, 'Mixed': 0.05}
+        scores[sentiment.capitalize()] = 0.85
+        return sentiment, scores
+
+    def detect_entities(self, Text, LanguageCode):
+        self.quotas['DetectEntities'].check('DetectEntities')
+        self._latency.wait()
+        self.calls += 1
+        entities = [
+            {'Text': tag, 'Type': 'OTHER', 'Score': 0.9, 'BeginOffset': 0, 'EndOffset': len(tag)}
+            for tag in re.findall(r'#\w+', Text)
+        ]
+        return {'Entities': entities, 'ResponseMetadata': _metadata()}
+
+
+class FakeBedrockRuntime:
+    """
+    Bedrock Runtime simulado que reproduce completions grabadas.
+    La completion se elige por la primera regla cuyo texto aparece en el prompt.
+    `latency_per_output_token` y `latency_per_input_token` pueden ser un número
+    o un dict por modelo. Simula la caché de prompts: un bloque de sistema con
+    cache_control se guarda por CACHE_TTL segundos si alcanza el mínimo de
+    tokens del modelo (o `cache_min_tokens`), y al leerlo de caché su
+    procesamiento cuesta CACHE_READ_LATENCY_FACTOR de la entrada normal.
+    """
+
+    CACHE_TTL = 300
+    CACHE_READ_LATENCY_FACTOR = 0.1
+
+    def __init__(self, latency=0.0, jitter=0.0, fixture_path=None, latency_per_output_token=0.0, quota_tps=None,
+                 error_rate=0.0, latency_per_input_token=0.0, cache_min_tokens=None):
+        self._latency = _Latency(latency, jitter)
+        self.quota = _Quota(quota_tps)
+        self.faults = _Faults(error_rate)
+        self.latency_per_output_token = latency_per_output_token
+        self.latency_per_input_token = latency_per_input_token
+        self.cache_min_tokens = cache_min_tokens
+        self._prompt_cache = {}
+        self._cache_lock = threading.Lock()
+        fixture_path = fixture_path or os.path.join(FIXTURES_DIR, 'bedrock_completions.json')
+        with open(fixture_path, 'r', encoding='utf-8') as f:
+            fixture = json.load(f)
+        self._completions = fixture['completions']
+        self._default = fixture['default']
+        self.calls = 0
+
+    def _completion_for(self, prompt):
+        for entry in self._completions:
+            if entry['match'] in prompt:
+                return entry['completion']
+        return self._default
+
+    @staticmethod
+    def _por_modelo(valor, model_id):
+        from core.metrics import base_model_id
+
+        return valor.get(base_model_id(model_id), 0.0) if isinstance(valor, dict) else valor
+
+    def _cached_prefix(self, model_id, system):
+        """
+        Retorna (tokens leídos de caché, tokens escritos en caché) del prefijo de sistema.
+        """
+        from core.model_routing import prompt_cache_min_tokens
+
+        marcas = [i for i, bloque in enumerate(system) if bloque.get('cache_control')]
+        minimo = self.cache_min_tokens or prompt_cache_min_tokens(model_id)
+        if not marcas or not minimo:
+            return 0, 0
+        prefijo = ''.join(bloque.get('text', '') for bloque in system[:marcas[-1] + 1])
+        tokens = len(prefijo) // 4
+        if tokens < minimo:
+            return 0, 0
+        clave = (model_id, prefijo)
+        ahora = time.monotonic()
+        with self._cache_lock:
+            leido = self._prompt_cache.get(clave, 0) > ahora
+            self._prompt_cache[clave] = ahora + self.CACHE_TTL
+        return (tokens, 0) if leido else (0, tokens)
+
+    def invoke_model(self, body, modelId, accept=None, contentType=None):
+        self.quota.check('InvokeModel')
+        self._latency.wait()
+        self.faults.check('InvokeModel')
+        self.calls += 1
+        request = json.loads(body)
+
+        if 'text_prompts' in request:
+            payload = {'artifacts': [{'base64': _PNG_1X1, 'seed': request.get('seed', 0), 'finishReason': 'SUCCESS'}]}
+            headers = {}
+        else:
+            prompt = request.get('prompt') or json.dumps(request.get('messages', []), ensure_ascii=False)
+            system = request.get('system') or []
+            if isinstance(system, str):
+                system = [{'type': 'text', 'text': system}]
+            texto_sistema = ''.join(bloque.get('text', '') for bloque in system)
+            completion = self._completion_for(texto_sistema + prompt)
+            max_tokens = request.get('max_tokens_to_sample') or request.get('max_tokens') or 4000
+            completion = completion[:max_tokens * 4]
+            cache_read, cache_write = self._cached_prefix(modelId, system)
+            input_tokens = (len(texto_sistema) + len(prompt)) // 4 - cache_read - cache_write
+            output_tokens = len(completion) // 4
+            # Latencia proporcional a la salida (el costo dominante de un LLM) más
+            # el procesamiento de la entrada, que la caché de prompts abarata
+            entrada = input_tokens + cache_write + cache_read * self.CACHE_READ_LATENCY_FACTOR
+            time.sleep(output_tokens * self._por_modelo(self.latency_per_output_token, modelId)
+                       + entrada * self._por_modelo(self.latency_per_input_token, modelId))
+            headers = {
+                'x-amzn-bedrock-input-token-count': str(input_tokens),
+                'x-amzn-bedrock-output-token-count': str(output_tokens),
+                'x-amzn-bedrock-cache-read-input-token-count': str(cache_read),
+                'x-amzn-bedrock-cache-write-input-token-count': str(cache_write),
+            }
+            if 'messages' in request:
+                payload = {
+                    'content': [{'type': 'text', 'text': completion}],
+                    'stop_reason': 'end_turn',
+                    'usage': {'input_tokens': input_tokens, 'output_tokens': output_tokens,
+                              'cache_read_input_tokens': cache_read, 'cache_creation_input_tokens': cache_write},
+                }
+            else:
+                payload = {'completion': completion, 'stop_reason': 'stop_sequence'}
+
+        return {
+            'body': io.BytesIO(json.dumps(payload, ensure_ascii=False).encode('utf-8')),
+            'contentType': 'application/json',
+            'ResponseMetadata': _metadata(headers),
+        }
+
+
+class FakeBedrockAgentRuntime:
+    """
+    Knowledge Base simulada: retorna fragmentos fijos del Currículo Nacional.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, results=5, error_rate=0.0):
+        self._latency = _Latency(latency, jitter)
+        self.faults = _Faults(error_rate)
+        self.results = results
+
+    def retrieve(self, knowledgeBaseId, retrievalQuery, retrievalConfiguration=None):
+        self._latency.wait()
+        self.faults.check('Retrieve')
+        return {
+            'retrievalResults': [
+                {
+                    'content': {'text': f"Fragmento {i} del Currículo Nacional sobre indagación científica."},
+                    'location': {'s3Location': {'uri': f"s3://minedu-documentos-educativos-peru/curriculo/doc{i}.pdf"}},
+                    'score': 0.9 - i * 0.05,
+                    'metadata': {},
+                }
+                for i in range(self.results)
+            ],
+            'ResponseMetadata': _metadata(),
+        }
+
+
+def install_fakes(bedrock_latency=0.0, comprehend_latency=0.0, kb_latency=0.0, jitter_ratio=0.2,
+                  latency_per_output_token=0.0, bedrock_quota_tps=None, comprehend_quota_tps=None,
+                  bedrock_error_rate=0.0, kb_error_rate=0.0, latency_per_input_token=0.0, cache_min_tokens=None):
+    """
+    Registra los dobles en core.aws_clients y retorna un diccionario con ellos.
+    Debe llamarse dentro del contexto de moto para que S3 y DynamoDB también sean locales.
+    """
+    from core import aws_clients
+
+    fakes = {
+        'comprehend': FakeComprehend(comprehend_latency, comprehend_latency * jitter_ratio,
+                                     quota_tps=comprehend_quota_tps),
+        'bedrock-runtime': FakeBedrockRuntime(bedrock_latency, bedrock_latency * jitter_ratio,
+                                              latency_per_output_token=latency_per_output_token,
+                                              quota_tps=bedrock_quota_tps, error_rate=bedrock_error_rate,
+                                              latency_per_input_token=latency_per_input_token,
+                                              cache_min_tokens=cache_min_tokens),
+        'bedrock-agent-runtime': FakeBedrockAgentRuntime(kb_latency, kb_latency * jitter_ratio,
+                                                         error_rate=kb_error_rate),
+    }
+    for service_name, client in fakes.items():
+        aws_clients.register_client(service_name, client)
+    return fakes
@@ -0,0 +1,230 @@
+"""
+Generador de comentarios sintéticos de snacks para pruebas de carga.
+
+Produce archivos de cualquier tamaño con el mismo esquema que
+comments_data.json (id, timestamp ISO 8601, text), con mezcla de
+sentimientos, hashtags y una distribución de longitudes realista. Los
+comentarios se escriben a disco a medida que se generan, sin mantenerlos
+en memoria, en formato de arreglo JSON o NDJSON (un comentario por línea).
+
+Uso:
+    python benchmarks/generate_comments.py 100000 -o comentarios_100k.ndjson
+    python benchmarks/generate_comments.py 10000 --format json --mix 0.3,0.4,0.2,0.1 --seed 7
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+
+SENTIMIENTOS = ('POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED')
+MEZCLA_POR_DEFECTO = (0.45, 0.25, 0.2, 0.1)
+
+SABORES = ['coco', 'chocolate', 'avena', 'maní', 'almendras', 'quinua', 'kiwicha', 'aguaymanto',
+           'lúcuma', 'cacao', 'fresa', 'miel', 'canela', 'plátano', 'sacha inchi']
+PRODUCTOS = ['snack', 'mix de frutos secos', 'chip de camote', 'alfajor', 'turrón', 'cereal']
+ASPECTOS = {
+    'sabor': ('el sabor a {sabor}', ['#sabor']),
+    'textura': ('la textura', ['#textura', '#crujiente']),
+    'empaque': ('el empaque', ['#empaque']),
+    'precio': ('el precio', ['#precio']),
+    'entrega': ('la entrega', ['#entrega', '#delivery']),
+    'porcion': ('el tamaño de la porción', ['#porcion']),
+    'nutricion': ('el aporte nutricional', ['#nutricion', '#saludable']),
+}
+
+FRASES = {
+    'POSITIVE': [
+        "Me encanta {aspecto}, ¡es delicioso!",
+        "{Aspecto} es excelente, superó mis expectativas.",
+        "El mejor {producto} de {sabor} que he probado.",
+        "¡Perfecto para llevar al colegio o al trabajo!",
+        "Muy buena calidad, se nota que usan insumos naturales.",
+        "Lo recomiendo totalmente, mis hijos lo amaron.",
+        "Ideal para una merienda rápida antes de entrenar.",
+        "{Aspecto} es justo como me gusta, ¡compraré de nuevo!",
+    ],
+    'NEGATIVE': [
+        "{Aspecto} me decepcionó bastante.",
+        "Tuve un problema con {aspecto}, no volveré a comprar.",
+        "El dulce es excesivo, parece más una golosina.",
+        "Llegó aplastado y {aspecto} dejó mucho que desear.",
+        "Es caro para la cantidad que trae.",
+        "El {producto} de {sabor} estaba rancio, muy malo.",
+        "Pésima experiencia, el paquete llegó abierto.",
+    ],
+    'NEUTRAL': [
+        "Producto promedio, cumple sin más.",
+        "{Aspecto} es normal, nada espectacular.",
+        "Lo compré en la tienda del barrio la semana pasada.",
+        "Viene en presentación de {gramos} gramos.",
+        "Es un {producto} de {sabor}, similar a otros del mercado.",
+        "Lo probé una vez, todavía no tengo una opinión clara.",
+    ],
+}
+
+CONECTORES_MIXTOS = [" Sin embargo, ", " Pero ", " Aunque ", " Eso sí, "]
+HASHTAGS_GENERALES = ['#snack', '#saludable', '#peru', '#merienda', '#familia', '#energia', '#glutenfree']
+
+# Número de oraciones por comentario: la mayoría son cortos y unos pocos muy largos
+ORACIONES = [1, 2, 3, 4, 6, 10]
+PESOS_ORACIONES = [0.3, 0.35, 0.18, 0.1, 0.05, 0.02]
+
+
+class GeneradorComentarios:
+    """
+    Genera comentarios reproducibles a partir de una semilla.
+    """
+
+    def __init__(self, seed=0, mezcla=MEZCLA_POR_DEFECTO, inicio=None, intervalo_medio=90,
+                 prob_hashtags=0.6, prefijo_id='S', etiquetar=False):
+        self._random = random.Random(seed)
+        self.mezcla = mezcla
+        self.instante = inicio or datetime.datetime(2025, 8, 1, tzinfo=datetime.timezone.utc)
+        self.intervalo_medio = intervalo_medio
+        self.prob_hashtags = prob_hashtags
+        self.prefijo_id = prefijo_id
+        # Agrega 'expected_sentiment' (el tono con que se generó) para medir motores de sentimiento
+        self.etiquetar = etiquetar
+
+    def _oracion(self, sentimiento):
+        _, (aspecto, hashtags) = self._random.choice(list(ASPECTOS.items()))
+        aspecto = aspecto.format(sabor=self._random.choice(SABORES))
+        frase = self._random.choice(FRASES[sentimiento]).format(
+            aspecto=aspecto,
+            Aspecto=aspecto[0].upper() + aspecto[1:],
+            sabor=self._random.choice(SABORES),
+            producto=self._random.choice(PRODUCTOS),
+            gramos=self._random.choice([30, 40, 45, 60, 120]),
+        )
+        return frase, hashtags
+
+    def _texto(self, sentimiento):
+        num_oraciones = self._random.choices(ORACIONES, PESOS_ORACIONES)[0]
+        oraciones, hashtags = [], set()
+        for i in range(num_oraciones):
+            if sentimiento == 'MIXED':
+                tono = 'POSITIVE' if i % 2 == 0 else 'NEGATIVE'
+            elif i > 0 and self._random.random() < 0.2:
+                tono = 'NEUTRAL'
+            else:
+                tono = sentimiento
+            frase, etiquetas = self._oracion(tono)
+            hashtags.update(etiquetas)
+            oraciones.append(frase)
+        if sentimiento == 'MIXED' and len(oraciones) == 1:
+            frase, etiquetas = self._oracion('NEGATIVE')
+            hashtags.update(etiquetas)
+            oraciones.append(frase)
+
+        texto = oraciones[0]
+        for i, oracion in enumerate(oraciones[1:], start=1):
+            if sentimiento == 'MIXED' and i % 2 == 1:
+                texto += self._random.choice(CONECTORES_MIXTOS) + oracion[0].lower() + oracion[1:]
+            else:
+                texto += ' ' + oracion
+
+        if self._random.random() < self.prob_hashtags:
+            hashtags.update(self._random.sample(HASHTAGS_GENERALES, self._random.randint(0, 2)))
+            etiquetas = sorted(hashtags)
+            self._random.shuffle(etiquetas)
+            texto += ' ' + ' '.join(etiquetas[:self._random.randint(1, 3)])
+        return texto
+
+    def comentario(self, indice):
+        """
+        Genera el comentario número `indice`. Los timestamps avanzan con
+        llegadas de Poisson (intervalo medio `intervalo_medio` segundos).
+        """
+        self.instante += datetime.timedelta(seconds=self._random.expovariate(1 / self.intervalo_medio))
+        sentimiento = self._random.choices(SENTIMIENTOS, self.mezcla)[0]
+        comentario = {
+            'id': f"{self.prefijo_id}{indice:08d}",
+            'timestamp': self.instante.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'text': self._texto(sentimiento),
+        }
+        if self.etiquetar:
+            comentario['expected_sentiment'] = sentimiento
+        return comentario
+
+    def generar(self, cantidad, inicio_id=1):
+        """
+        Iterador de `cantidad` comentarios; no los acumula en memoria.
+        """
+        for indice in range(inicio_id, inicio_id + cantidad):
+            yield self.comentario(indice)
+
+
+def escribir_comentarios(comentarios, salida, formato='ndjson'):
+    """
+    Escribe un iterable de comentarios en un archivo abierto en modo texto,
+    uno a la vez. Retorna el número de comentarios escritos.
+    """
+    total = 0
+    if formato == 'ndjson':
+        for comentario in comentarios:
+            salida.write(json.dumps(comentario, ensure_ascii=False))
+            salida.write('\n')
+            total += 1
+    elif formato == 'json':
+        salida.write('[')
+        for comentario in comentarios:
+            salida.write(',\n  ' if total else '\n  ')
+            salida.write(json.dumps(comentario, ensure_ascii=False))
+            total += 1
+        salida.write('\n]\n' if total else ']\n')
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+    return total
+
+
+def generar_archivo(ruta, cantidad, formato=None, **opciones):
+    """
+    Genera un archivo de comentarios. El formato se deduce de la extensión
+    (.ndjson/.jsonl -> NDJSON, otro -> arreglo JSON) si no se indica.
+    """
+    formato = formato or ('ndjson' if ruta.endswith(('.ndjson', '.jsonl')) else 'json')
+    generador = GeneradorComentarios(**opciones)
+    with open(ruta, 'w', encoding='utf-8') as salida:
+        return escribir_comentarios(generador.generar(cantidad), salida, formato)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('cantidad', type=int, help="Número de comentarios a generar")
+    parser.add_argument('-o', '--output', help="Archivo de salida (por defecto stdout)")
+    parser.add_argument('--format', choices=['json', 'ndjson'], help="Formato (por defecto según la extensión)")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla para resultados reproducibles")
+    parser.add_argument('--mix', default=','.join(str(p) for p in MEZCLA_POR_DEFECTO),
+                        help="Proporción positivo,negativo,neutral,mixto")
+    parser.add_argument('--start', default='2025-08-01T00:00:00Z', help="Timestamp del primer comentario")
+    parser.add_argument('--interval', type=float, default=90, help="Segundos promedio entre comentarios")
+    parser.add_argument('--id-prefix', default='S', help="Prefijo de los ids generados")
+    parser.add_argument('--labels', action='store_true',
+                        help="Incluir 'expected_sentiment' con el tono con que se generó cada comentario")
+    args = parser.parse_args()
+
+    mezcla = tuple(float(p) for p in args.mix.split(','))
+    if len(mezcla) != len(SENTIMIENTOS):
+        parser.error(f"--mix necesita {len(SENTIMIENTOS)} valores")
+    opciones = {
+        'seed': args.seed,
+        'mezcla': mezcla,
+        'inicio': datetime.datetime.strptime(args.start, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc),
+        'intervalo_medio': args.interval,
+        'prefijo_id': args.id_prefix,
+        'etiquetar': args.labels,
+    }
+
+    if args.output:
+        total = generar_archivo(args.output, args.cantidad, args.format, **opciones)
+        tamano = os.path.getsize(args.output) / 1024 / 1024
+        print(f"{total} comentarios escritos en '{args.output}' ({tamano:.1f} MiB)", file=sys.stderr)
+    else:
+        generador = GeneradorComentarios(**opciones)
+        escribir_comentarios(generador.generar(args.cantidad), sys.stdout, args.format or 'ndjson')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import argparse
+import logging
+import os
+import sys
+from dotenv import load_dotenv
+# Carga las variables del archivo .env
+load_dotenv()
+
+# Add the 'src' directory to Python's path to ensure imports work
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
+
+from core.curriculum_library import BibliotecaCurricular
+
+parser = argparse.ArgumentParser(description="Pregenera la biblioteca de programaciones curriculares predefinidas.")
+parser.add_argument('--todas', action='store_true', help="Regenera también las entradas vigentes")
+parser.add_argument('--directorio', default=None, help="Directorio de la biblioteca (por defecto BIBLIOTECA_CURRICULAR_DIR)")
+args = parser.parse_args()
+# El avance por programación se reporta con logging (core.curriculum_library)
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+biblioteca = BibliotecaCurricular(args.directorio)
+resumen = biblioteca.precomputar(solo_desactualizadas=not args.todas)
+print(f"Biblioteca en '{biblioteca.directorio}': {resumen}")
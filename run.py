@@ -1,10 +1,15 @@
-import subprocess
+import os
+import sys
 from dotenv import load_dotenv
 
 # Carga las variables del archivo .env
 load_dotenv()
 
-# Inicia la aplicación Streamlit directamente
-import os
+# Inicia la aplicación Streamlit en este mismo proceso (sin lanzar otro
+# intérprete de Python con subprocess)
+from streamlit.web import cli as stcli
+
 print(f"AWS_REGION: {os.getenv('AWS_REGION')}")
-subprocess.run(["streamlit", "run", "src/app/app.py"])
\ No newline at end of file
+ruta_app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'app', 'app.py')
+sys.argv = ["streamlit", "run", ruta_app, *sys.argv[1:]]
+sys.exit(stcli.main())
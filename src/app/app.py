@@ -1,7 +1,10 @@
 import streamlit as st
+import importlib.util
 import sys
 import os
 import re
+import tempfile
+from datetime import datetime
 
 # Configurar página ANTES que cualquier otra cosa
 st.set_page_config(page_title="Generador Educativo AI", page_icon="🤖", layout="wide")
@@ -10,36 +13,256 @@ st.set_page_config(page_title="Generador Educativo AI", page_icon="🤖", layout
 st.title("Generador de contenido educativo AI 🤖")
 st.markdown("Genera material educativo con exportación a Word")
 
-# Verificar imports paso a paso
-with st.spinner("🔄 Verificando dependencias..."):
-    # Agregar path
-    try:
-        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    except Exception as e:
-        st.error(f"❌ Error agregando path: {e}")
+# Agregar path
+ruta_src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ruta_src not in sys.path:
+    sys.path.append(ruta_src)
 
-    # Verificar python-docx
-    try:
-        from docx import Document
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-        from docx.shared import Inches
-        from datetime import datetime
-        from io import BytesIO
-        DOCX_OK = True
-    except ImportError as e:
-        st.error(f"❌ python-docx no disponible: {e}")
-        DOCX_OK = False
+def _cargar_bedrock():
+    from core import bedrock_services
+    return bedrock_services
+
+def _crear_clientes():
+    from core.aws_clients import get_client
+    return {nombre: get_client(nombre) for nombre in ('bedrock-runtime', 'bedrock-agent-runtime')}
+
+def _cargar_docx():
+    from core import docx_exporter
+    return docx_exporter
+
+@st.cache_resource(show_spinner="🔄 Verificando dependencias...")
+def cargar_servicios():
+    """
+    Crea una sola vez por proceso los objetos livianos que necesita la
+    primera página (cola de trabajos, biblioteca curricular) y lanza en
+    segundo plano el precalentamiento de lo pesado: boto3 y los servicios de
+    Bedrock, los clientes y python-docx. Cada pestaña pide
+    lo que necesita a servicios['precalentamiento'], que solo espera si la
+    tarea aún no terminó. Streamlit reutiliza el resultado en cada rerun y
+    entre sesiones.
+    """
+    servicios = {'DOCX_OK': False, 'SERVICES_OK': False, 'errores': []}
+
+    # Verificar python-docx sin importarlo
+    servicios['DOCX_OK'] = importlib.util.find_spec('docx') is not None
+    if not servicios['DOCX_OK']:
+        servicios['errores'].append("❌ python-docx no disponible")
 
     # Verificar servicios Bedrock
     try:
-        from core.bedrock_services import generar_programacion_curricular, generar_imagen_promocional, generar_resumen_comentarios
-        SERVICES_OK = True
+        from core.curriculum_library import BibliotecaCurricular
+        from core.job_queue import JobQueue
+        from core.metrics import record_event
+        from core.circuit_breaker import states as estados_circuitos
+        from core.warmup import Warmup
+
+        precalentamiento = Warmup([
+            ('bedrock', _cargar_bedrock),
+            ('clientes', _crear_clientes),
+            ('docx', _cargar_docx),
+        ]).start()
+        servicios['precalentamiento'] = precalentamiento
+        servicios['biblioteca'] = BibliotecaCurricular()
+        servicios['estados_circuitos'] = estados_circuitos
+
+        # Las generaciones largas se ejecutan en segundo plano y se consultan por id
+        cola = JobQueue()
+
+        def generar_programacion(params, progreso):
+            bedrock_services = precalentamiento.get('bedrock')
+            resultado = bedrock_services.generar_programacion_curricular(
+                params['grado'], params['competencia'], params['capacidades'], params['contenidos'], progreso=progreso
+            )
+            if not resultado.startswith("Error"):
+                return resultado
+            # Bedrock no disponible: se sirve la última versión conocida de la misma solicitud
+            entrada = servicios['biblioteca'].buscar(
+                params['grado'], params['competencia'], params['capacidades'], params['contenidos']
+            )
+            previo = None if entrada else cola.last_result(
+                'programacion', params, accept=lambda texto: not texto.startswith("Error")
+            )
+            if entrada or previo:
+                record_event('fallback', 'resultado_en_cache')
+                return entrada['texto'] if entrada else previo['result']
+            # Sin respaldo: el trabajo falla para que la cola lo reintente
+            raise RuntimeError(resultado)
+
+        cola.register('programacion', generar_programacion)
+        cola.register('imagen', lambda params, progreso: precalentamiento.get('bedrock').generar_variantes_imagen(
+            params['prompt'], num_variantes=params['variantes'], seed_inicial=params['seed'], borrador=params['borrador']
+        ))
+
+        def analizar_comentarios(params, progreso):
+            resultado = precalentamiento.get('bedrock').generar_resumen_comentarios(params['comentarios'])
+            if resultado.startswith("Error"):
+                raise RuntimeError(resultado)
+            return resultado
+
+        cola.register('analisis', analizar_comentarios)
+
+        def analizar_archivo(params, progreso):
+            from core.bulk_analysis import analizar_archivo_comentarios
+            bedrock_services = precalentamiento.get('bedrock')
+            resultado = analizar_archivo_comentarios(
+                params['ruta'], params['nombre'], bedrock_services.generar_resumen_comentarios,
+                bedrock_services.generar_resumen_consolidado, progreso=progreso
+            )
+            # El archivo subido solo se borra si el análisis terminó (un reintento lo necesita)
+            os.remove(params['ruta'])
+            return resultado
+
+        def descartar_archivo(params):
+            # Sin más reintentos el archivo subido ya no se usa
+            if os.path.exists(params['ruta']):
+                os.remove(params['ruta'])
+
+        cola.register('analisis_archivo', analizar_archivo, on_failure=descartar_archivo)
+        cola.start()
+        servicios['cola'] = cola
+        servicios['SERVICES_OK'] = True
     except Exception as e:
-        st.error(f"❌ Error importando servicios: {e}")
-        SERVICES_OK = False
+        servicios['errores'].append(f"❌ Error importando servicios: {e}")
+
+    return servicios
+
+servicios = cargar_servicios()
+for error in servicios['errores']:
+    st.error(error)
+DOCX_OK = servicios['DOCX_OK']
+SERVICES_OK = servicios['SERVICES_OK']
+if not SERVICES_OK:
+    # No dejar en caché un fallo: el siguiente rerun vuelve a intentarlo
+    cargar_servicios.clear()
+else:
+    # Fallos del precalentamiento (ej. boto3 o python-docx no instalados)
+    for tarea, error in servicios['precalentamiento'].errors().items():
+        st.error(f"❌ Error preparando '{tarea}': {error}")
+
+# Avisos cuando una generación usó un respaldo por falla de Bedrock o la Knowledge Base
+MENSAJES_RESPALDO = {
+    'resultado_en_cache': "⚠️ Bedrock no está disponible: se muestra la última versión generada para esta solicitud",
+    'rsip_a_borrador': "⚠️ Bedrock dejó de responder durante las mejoras: se muestra la versión más reciente",
+    'rag_a_generacion_directa': "⚠️ La base de conocimiento no respondió: se generó sin documentos del MINEDU",
+}
+
+# Resultados generados: sobreviven a los reruns (ej. al pulsar un botón de descarga)
+TIPOS_TRABAJO = ('programacion', 'imagen', 'analisis', 'analisis_archivo')
+for clave in TIPOS_TRABAJO:
+    st.session_state.setdefault(clave, None)
+
+# Trabajos en curso por tipo. El id también se guarda en la URL para
+# recuperarlo si el navegador se reconecta o se recarga la pestaña.
+st.session_state.setdefault('trabajos', {})
+# Desglose de llamadas externas de la última generación de cada tipo
+st.session_state.setdefault('metricas', {})
+for tipo in TIPOS_TRABAJO:
+    if tipo in st.query_params and tipo not in st.session_state.trabajos:
+        st.session_state.trabajos[tipo] = st.query_params[tipo]
+
+def enviar_trabajo(tipo, params):
+    """
+    Encola una generación y recuerda su id en la sesión y en la URL
+    """
+    job_id = servicios['cola'].submit(tipo, params)
+    st.session_state.trabajos[tipo] = job_id
+    st.session_state[tipo] = None
+    st.query_params[tipo] = job_id
+    return job_id
+
+def olvidar_trabajo(tipo):
+    st.session_state.trabajos.pop(tipo, None)
+    if tipo in st.query_params:
+        del st.query_params[tipo]
+
+def guardar_resultado_trabajo(trabajo):
+    """
+    Convierte el resultado de un trabajo terminado al formato de session_state
+    """
+    params = trabajo['params']
+    resultado = trabajo['result']
+    st.session_state.metricas[trabajo['job_type']] = trabajo['metrics']
+    if trabajo['job_type'] == 'programacion':
+        # Respaldos usados si Bedrock o la Knowledge Base no respondieron
+        respaldos = [evento['event'] for evento in (trabajo['metrics'] or {}).get('events', [])
+                     if evento['service'] == 'fallback']
+        st.session_state.programacion = {
+            'grado': params['grado'],
+            'texto': resultado,
+            'docx': None,
+            'desde_biblioteca': False,
+            'respaldos': respaldos,
+        }
+    elif trabajo['job_type'] == 'imagen':
+        # Las variantes que fallaron se guardan para mostrarlas después del rerun
+        st.session_state.imagen = {
+            'prompt': params['prompt'],
+            'imagenes': [ruta for ruta in resultado if not ruta.startswith("Error")],
+            'errores': [ruta for ruta in resultado if ruta.startswith("Error")],
+        }
+    elif trabajo['job_type'] == 'analisis':
+        st.session_state.analisis = {'comentarios': params['comentarios'], 'texto': resultado}
+    elif trabajo['job_type'] == 'analisis_archivo':
+        st.session_state.analisis_archivo = {'nombre': params['nombre'], **resultado}
+
+def panel_depuracion(tipo):
+    """
+    Muestra el desglose de tiempos, tokens y costo de la última generación
+    """
+    metricas = st.session_state.metricas.get(tipo)
+    if not st.session_state.get('modo_depuracion') or not metricas:
+        return
+    with st.expander("🐞 Depuración: desglose de la generación", expanded=True):
+        resumen = metricas['summary']
+        latencia_total = sum(llamada['latency_ms'] or 0 for llamada in metricas['calls'])
+        costo_total = sum(grupo['cost_usd'] for grupo in resumen)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Llamadas externas", len(metricas['calls']))
+        col2.metric("Tiempo en llamadas", f"{latencia_total / 1000:.1f} s")
+        col3.metric("Costo estimado", f"${costo_total:.4f}")
+        st.dataframe(resumen, use_container_width=True)
+        st.bar_chart({grupo['operation']: grupo['latency_ms'] for grupo in resumen})
+        # Estado actual de los circuit breakers de Bedrock, Knowledge Base y Comprehend
+        circuitos = servicios['estados_circuitos']() if 'estados_circuitos' in servicios else []
+        if circuitos:
+            st.caption("Circuitos: " + ", ".join(f"{c['name']} = {c['state']}" for c in circuitos))
+        # Respaldos, aciertos de caché y cambios de circuito durante la generación
+        if metricas.get('events'):
+            st.caption("Eventos: " + ", ".join(f"{e['service']}.{e['event']} × {e['count']}" for e in metricas['events']))
+
+@st.fragment(run_every=2)
+def seguimiento_trabajo(tipo):
+    """
+    Muestra el avance de un trabajo en segundo plano; solo este fragmento se
+    vuelve a ejecutar mientras se espera, el resto de la página no.
+    """
+    job_id = st.session_state.trabajos.get(tipo)
+    if not job_id:
+        return
+
+    trabajo = servicios['cola'].get(job_id)
+    if trabajo is None:
+        st.warning(f"⚠️ No se encontró el trabajo {job_id}")
+        olvidar_trabajo(tipo)
+        return
+
+    if trabajo['status'] in ('pending', 'running'):
+        estado = "⏳ En cola" if trabajo['status'] == 'pending' else "🔄 En proceso"
+        st.progress(trabajo['progress'], text=f"{estado}: {trabajo['message'] or 'iniciando...'}")
+        st.caption(f"Id del trabajo: `{job_id}` (puedes cerrar la pestaña y recuperarlo después)")
+    elif trabajo['status'] == 'done':
+        guardar_resultado_trabajo(trabajo)
+        olvidar_trabajo(tipo)
+        st.rerun()
+    else:
+        st.error(f"❌ El trabajo {job_id} falló")
+        with st.expander("Detalle del error"):
+            st.code(trabajo['error'] or '')
+        olvidar_trabajo(tipo)
 
 # Función para procesar y formatear el contenido generado
-def formatear_contenido_educativo(contenido_raw, grado):
+@st.cache_data(show_spinner=False)
+def formatear_contenido_educativo(contenido_raw, grado, fecha):
     """
     Procesa el contenido generado y lo estructura como un documento educativo profesional
     """
@@ -54,7 +277,7 @@ def formatear_contenido_educativo(contenido_raw, grado):
 ### 📋 INFORMACIÓN GENERAL
 - **Área Curricular:** Ciencia y Tecnología
 - **Grado:** {grado}º de Secundaria
-- **Fecha de Elaboración:** {datetime.now().strftime('%d de %B de %Y')}
+- **Fecha de Elaboración:** {fecha}
 - **Documento generado por:** IA Educativa
 
 ---
@@ -81,90 +304,145 @@ Esta programación curricular ha sido diseñada siguiendo los lineamientos del C
 """
     return contenido_formateado
 
-# Función mejorada para crear Word
-def crear_documento_profesional(contenido, titulo, grado):
-    if not DOCX_OK:
-        return None
-    
-    doc = Document()
-    
-    # Configurar propiedades del documento
-    doc.core_properties.title = titulo
-    doc.core_properties.author = "Sistema IA Educativa"
-    doc.core_properties.subject = f"Programación Curricular {grado}º Secundaria"
-    
-    # Título principal
-    titulo_principal = doc.add_heading(f"PROGRAMACIÓN CURRICULAR", 0)
-    titulo_principal.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    # Subtítulo
-    subtitulo = doc.add_heading(f"CIENCIA Y TECNOLOGÍA - {grado}º SECUNDARIA", 1)
-    subtitulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    # Información del documento
-    info_para = doc.add_paragraph()
-    info_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    info_run = info_para.add_run(f"Fecha: {datetime.now().strftime('%d/%m/%Y')}\nGenerado por: IA Educativa")
-    info_run.italic = True
-    
-    # Línea separadora
-    doc.add_paragraph("=" * 80)
-    
-    # Procesar contenido línea por línea con formato mejorado
-    lineas = contenido.split('\n')
-    for line in lineas:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Detectar encabezados
-        if line.startswith('#'):
-            level = line.count('#')
-            text = line.replace('#', '').strip()
-            if text:
-                doc.add_heading(text, level=min(level, 3))
-        
-        # Detectar tablas (líneas con múltiples |)
-        elif '|' in line and line.count('|') >= 2:
-            # Formatear como tabla o lista
-            cleaned_line = line.replace('|', ' | ').strip()
-            para = doc.add_paragraph(cleaned_line)
-            para.style = 'List Bullet'
-        
-        # Detectar listas con bullets
-        elif line.startswith(('•', '-', '*', '→')):
-            para = doc.add_paragraph()
-            para.style = 'List Bullet'
-            para.add_run(line[1:].strip())
-        
-        # Detectar texto en mayúsculas (posibles títulos)
-        elif line.isupper() and len(line) > 5:
-            doc.add_heading(line.title(), 2)
-        
-        # Texto normal
-        else:
-            if len(line) > 10:  # Solo agregar líneas con contenido significativo
-                doc.add_paragraph(line)
-    
-    # Pie de página
-    doc.add_page_break()
-    footer = doc.add_paragraph()
-    footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    footer_run = footer.add_run("GENERADO POR SISTEMA IA EDUCATIVA\nMinisterio de Educación - República del Perú")
-    footer_run.italic = True
-    
-    # Convertir a bytes
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer.getvalue()
+@st.cache_data(show_spinner=False)
+def formatear_analisis_comentarios(comentarios, analisis_raw, fecha):
+    """
+    Estructura el análisis de comentarios como un informe
+    """
+    return f"""
+# 📊 ANÁLISIS DE COMENTARIOS EDUCATIVOS
+
+## 📅 {fecha}
+
+---
+
+### 📝 COMENTARIOS ANALIZADOS
+{comentarios}
+
+---
+
+### 🔍 ANÁLISIS DETALLADO
+{analisis_raw}
+
+---
+
+### 📋 RECOMENDACIONES GENERALES
+- Implementar metodologías activas de enseñanza
+- Fomentar el aprendizaje experimental
+- Adaptar estrategias según retroalimentación estudiantil
+- Mantener comunicación constante con estudiantes
+
+---
+
+*Análisis generado por Sistema IA Educativa*
+"""
+
+@st.cache_data(show_spinner=False)
+def formatear_analisis_archivo(analisis, fecha):
+    """
+    Estructura el análisis de un archivo de comentarios como un informe
+    """
+    total = analisis['total'] or 1
+    sentimientos = "\n".join(
+        f"- {sentimiento}: {conteo:,} ({conteo / total:.1%})" for sentimiento, conteo in analisis['por_sentimiento'].items()
+    )
+    hashtags = "\n".join(f"- {tag}: {conteo:,}" for tag, conteo in analisis['hashtags'].items()) or "- Sin hashtags"
+    return f"""
+# 📊 ANÁLISIS DEL ARCHIVO {analisis['nombre']}
+
+## 📅 {fecha}
+
+---
+
+### 📈 SENTIMIENTOS ({analisis['total']:,} comentarios)
+{sentimientos}
+
+### #️⃣ HASHTAGS MÁS FRECUENTES
+{hashtags}
+
+---
+
+### 🔍 RESUMEN (muestra de {analisis['muestra']:,} comentarios)
+{analisis['resumen']}
+
+---
+
+*Análisis generado por Sistema IA Educativa*
+"""
+
+# Segundos entre actualizaciones del dashboard de comentarios
+INTERVALOS_DASHBOARD = [5, 10, 30, 60, 300]
+INTERVALO_DASHBOARD = int(os.environ.get('DASHBOARD_REFRESH_SECONDS', 10))
+
+def feed_comentarios():
+    """
+    Estado incremental del dashboard de la sesión (core.comment_feed); se
+    crea al activar el dashboard para no cargar boto3 en la primera página.
+    """
+    if 'feed_comentarios' not in st.session_state:
+        from core.comment_feed import CommentFeed
+        from core.database_management import DynamoDBManager
+        st.session_state.feed_comentarios = CommentFeed()
+        st.session_state.db_comentarios = DynamoDBManager()
+    return st.session_state.feed_comentarios
+
+def panel_dashboard():
+    """
+    Dibuja el dashboard con los comentarios nuevos desde la última lectura.
+    Corre como fragmento: solo esta parte se vuelve a ejecutar en cada intervalo.
+    """
+    feed = feed_comentarios()
+    feed.refresh(st.session_state.db_comentarios)
+
+    st.subheader("📈 Rendimiento General de los Comentarios")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Comentarios totales", f"{feed.total:,}", delta=feed.nuevos_ultimo_refresh or None)
+    promedio = feed.puntaje_promedio
+    col2.metric("Puntaje promedio (1-5)", f"{promedio:.2f}" if promedio is not None else "—")
+    col3.metric("Actualizado", datetime.fromtimestamp(feed.actualizado).strftime('%H:%M:%S'))
+    if not feed.total:
+        st.info("ℹ️ Aún no hay comentarios procesados en DynamoDB")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Comentarios por hora**")
+        st.line_chart(feed.serie_por_hora(), x='hora', y=[s for s in feed.sentimientos if feed.por_sentimiento.get(s)])
+    with col2:
+        st.markdown("**Distribución del sentimiento**")
+        st.bar_chart(dict(feed.por_sentimiento))
+
+    st.markdown("**Palabras clave más frecuentes**")
+    st.markdown(", ".join(f"**{palabra}** ({conteo})" for palabra, conteo in feed.palabras.most_common(40)))
+    st.markdown("**Últimos comentarios**")
+    st.dataframe(
+        [{'hora': c['timestamp'], 'sentimiento': c['sentiment'], 'comentario': c['text']} for c in feed.ultimos],
+        use_container_width=True, hide_index=True
+    )
 
 # Solo mostrar tabs si todo está OK
 if SERVICES_OK:
+    from core.curriculum_library import CONTENIDOS_POR_GRADO, COMPETENCIA_POR_DEFECTO, CAPACIDADES_POR_DEFECTO
+    biblioteca = servicios['biblioteca']
+
     st.success("🎉 ¡Sistema listo! Genera tu programación curricular.")
+
+    with st.sidebar:
+        st.toggle("🐞 Modo depuración", key="modo_depuracion", help="Muestra tiempos, tokens y costo por llamada")
+        st.subheader("🔎 Recuperar trabajo")
+        id_recuperar = st.text_input("Id del trabajo", key="id_recuperar")
+        if st.button("Recuperar", key="recuperar_trabajo", use_container_width=True) and id_recuperar.strip():
+            trabajo = servicios['cola'].get(id_recuperar.strip())
+            if trabajo is None:
+                st.warning("⚠️ No existe un trabajo con ese id")
+            else:
+                st.session_state.trabajos[trabajo['job_type']] = trabajo['job_id']
+                st.query_params[trabajo['job_type']] = trabajo['job_id']
+                st.info("✅ Trabajo recuperado; revisa la pestaña correspondiente")
     
     # Crear tabs
-    tab1, tab2, tab3 = st.tabs(["📚 Programación Curricular", "🖼️ Imágenes Educativas", "🗣️ Análisis de Comentarios"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📚 Programación Curricular", "🖼️ Imágenes Educativas", "🗣️ Análisis de Comentarios",
+                                      "📈 Dashboard de Comentarios"])
     
     with tab1:
         st.header("📚 Generador de Programación Curricular")
@@ -186,37 +464,26 @@ if SERVICES_OK:
             col1, col2 = st.columns([1, 2])
             
             with col1:
-                grado = st.selectbox("🎓 Grado", [3, 4, 5], format_func=lambda x: f"{x}º Secundaria")
-                
-                # Contenidos predefinidos por grado
-                contenidos_por_grado = {
-                    3: "1. LA FÍSICA Y MAGNITUDES\n2. VECTORES EN EL PLANO\n3. CINEMÁTICA\n4. DINÁMICA LINEAL\n5. TRABAJO Y ENERGÍA\n6. QUÍMICA Y MATERIA",
-                    4: "1. ONDAS Y SONIDO\n2. ÓPTICA GEOMÉTRICA\n3. ELECTRICIDAD\n4. MAGNETISMO\n5. QUÍMICA ORGÁNICA\n6. BIOQUÍMICA",
-                    5: "1. FÍSICA MODERNA\n2. TERMODINÁMICA\n3. FÍSICA NUCLEAR\n4. QUÍMICA AVANZADA\n5. BIOTECNOLOGÍA\n6. INVESTIGACIÓN CIENTÍFICA"
-                }
+                grado = st.selectbox("🎓 Grado", list(CONTENIDOS_POR_GRADO), format_func=lambda x: f"{x}º Secundaria")
             
             with col2:
                 competencia = st.text_area(
                     "🎯 Competencia Principal", 
-                    "Indaga mediante métodos científicos para construir sus conocimientos.",
+                    COMPETENCIA_POR_DEFECTO,
                     height=80,
                     help="Competencia principal del área de Ciencia y Tecnología"
                 )
             
             capacidades = st.text_area(
                 "⚡ Capacidades Específicas",
-                "• Problematiza situaciones para hacer indagación.\n"
-                "• Diseña estrategias para hacer indagación.\n" 
-                "• Genera y registra datos o información.\n"
-                "• Analiza datos e información.\n"
-                "• Evalúa y comunica el proceso y resultados de su indagación.",
+                CAPACIDADES_POR_DEFECTO,
                 height=120,
                 help="Capacidades que desarrollará el estudiante"
             )
             
             contenidos = st.text_area(
                 "📖 Contenidos Curriculares",
-                contenidos_por_grado[grado],
+                CONTENIDOS_POR_GRADO[grado],
                 height=120,
                 help="Contenidos organizados por unidades temáticas"
             )
@@ -225,57 +492,91 @@ if SERVICES_OK:
         
         # FUERA del formulario - manejar resultados
         if generar:
-            with st.spinner('🔄 Generando programación curricular profesional...'):
+            with st.spinner('🔄 Preparando programación curricular profesional...'):
                 try:
-                    resultado_raw = generar_programacion_curricular(grado, competencia, capacidades, contenidos)
-                    
-                    temp = resultado_raw
-                    # Formatear el contenido
-                    contenido_formateado = formatear_contenido_educativo(resultado_raw, grado)
-                    contenido_formateado = temp
-                    st.success("✅ ¡Programación curricular generada exitosamente!")
-                    
-                    # Mostrar resultado formateado
-                    st.markdown("---")
-                    st.markdown(contenido_formateado)
-                    st.markdown("---")
-                    
-                    # Botones de descarga
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.download_button(
-                            "📄 Descargar TXT",
-                            data=contenido_formateado,
-                            file_name=f"programacion_curricular_{grado}to_secundaria.txt",
-                            mime="text/plain",
-                            key="download_txt_prog",
-                            use_container_width=True
-                        )
-                    
-                    with col2:
-                        if DOCX_OK:
-                            doc_bytes = crear_documento_profesional(resultado_raw, f"Programación Curricular {grado}º Secundaria", grado)
-                            if doc_bytes:
-                                st.download_button(
-                                    "📝 Descargar WORD",
-                                    data=doc_bytes,
-                                    file_name=f"programacion_curricular_{grado}to_secundaria.docx",
-                                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                    key="download_docx_prog",
-                                    use_container_width=True
-                                )
-                        else:
-                            st.button("📝 WORD no disponible", disabled=True, key="docx_disabled_prog", use_container_width=True)
-                    
-                    with col3:
-                        # Botón para generar nueva programación
-                        if st.button("🔄 Generar Nueva", key="nueva_prog", use_container_width=True):
-                            st.rerun()
-                            
+                    # Las combinaciones predefinidas se sirven desde la biblioteca pregenerada
+                    entrada_biblioteca = biblioteca.buscar(grado, competencia, capacidades, contenidos)
+                    if entrada_biblioteca:
+                        resultado_raw = entrada_biblioteca['texto']
+                        doc_bytes_biblioteca = entrada_biblioteca['docx']
+                        if not entrada_biblioteca['vigente']:
+                            # Prompts o modelo cambiaron: se sirve la versión actual y se regenera en segundo plano
+                            biblioteca.refrescar_en_segundo_plano()
+                        st.session_state.programacion = {
+                            'grado': grado,
+                            'texto': resultado_raw,
+                            'docx': doc_bytes_biblioteca,
+                            'desde_biblioteca': True,
+                        }
+                    else:
+                        # La cadena RSIP completa puede superar los timeouts del proxy y del websocket
+                        enviar_trabajo('programacion', {
+                            'grado': grado,
+                            'competencia': competencia,
+                            'capacidades': capacidades,
+                            'contenidos': contenidos,
+                        })
                 except Exception as e:
                     st.error(f"❌ Error generando programación: {str(e)}")
                     st.info("💡 Verifica la conexión con AWS Bedrock")
+
+        seguimiento_trabajo('programacion')
+        panel_depuracion('programacion')
+
+        # El resultado se muestra desde session_state: los reruns no vuelven a llamar a Bedrock
+        programacion = st.session_state.programacion
+        if programacion:
+            grado_resultado = programacion['grado']
+            resultado_raw = programacion['texto']
+
+            # Formatear el contenido
+            contenido_formateado = formatear_contenido_educativo(resultado_raw, grado_resultado, datetime.now().strftime('%d de %B de %Y'))
+            if programacion['desde_biblioteca']:
+                st.info("⚡ Programación servida desde la biblioteca pregenerada")
+            if programacion.get('respaldos'):
+                st.warning(MENSAJES_RESPALDO.get(programacion['respaldos'][0], "⚠️ Servicio degradado"))
+            st.success("✅ ¡Programación curricular generada exitosamente!")
+
+            # Mostrar resultado formateado
+            st.markdown("---")
+            st.markdown(contenido_formateado)
+            st.markdown("---")
+
+            # Botones de descarga
+            col1, col2, col3 = st.columns(3)
+
+            with col1:
+                st.download_button(
+                    "📄 Descargar TXT",
+                    data=contenido_formateado,
+                    file_name=f"programacion_curricular_{grado_resultado}to_secundaria.txt",
+                    mime="text/plain",
+                    key="download_txt_prog",
+                    use_container_width=True
+                )
+
+            with col2:
+                if DOCX_OK:
+                    doc_bytes = programacion['docx'] or servicios['precalentamiento'].get('docx').crear_documento_profesional(
+                        resultado_raw, f"Programación Curricular {grado_resultado}º Secundaria", grado_resultado
+                    )
+                    if doc_bytes:
+                        st.download_button(
+                            "📝 Descargar WORD",
+                            data=doc_bytes,
+                            file_name=f"programacion_curricular_{grado_resultado}to_secundaria.docx",
+                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                            key="download_docx_prog",
+                            use_container_width=True
+                        )
+                else:
+                    st.button("📝 WORD no disponible", disabled=True, key="docx_disabled_prog", use_container_width=True)
+
+            with col3:
+                # Botón para generar nueva programación
+                if st.button("🔄 Generar Nueva", key="nueva_prog", use_container_width=True):
+                    st.session_state.programacion = None
+                    st.rerun()
     
     with tab2:
         st.header("🖼️ Generador de Imágenes Educativas")
@@ -297,119 +598,205 @@ if SERVICES_OK:
                 st.markdown("- Experimento de química")
                 st.markdown("- Aula de física moderna")
                 st.markdown("- Estudiantes investigando")
+
+            col3, col4, col5 = st.columns(3)
+            with col3:
+                variantes = st.slider("🖼️ Variantes", 1, 4, 1)
+            with col4:
+                seed = st.number_input("🎲 Semilla", min_value=0, max_value=4294967295, value=0, step=1)
+            with col5:
+                borrador = st.checkbox("⚡ Borrador rápido", help="Menos pasos de difusión: más rápido, menos detalle")
             
             generar_img = st.form_submit_button("🎨 Generar Imagen Educativa", use_container_width=True)
         
         # FUERA del formulario
         if generar_img:
-            with st.spinner('🎨 Generando imagen educativa...'):
-                try:
-                    imagen = generar_imagen_promocional(prompt)
-                    if imagen.startswith("Error"):
-                        st.error(imagen)
-                    else:
-                        st.subheader("🖼️ Imagen Educativa Generada")
-                        st.image(imagen, caption=f"Imagen generada: {prompt[:50]}...", use_column_width=True)
-                except Exception as e:
-                    st.error(f"❌ Error generando imagen: {str(e)}")
+            try:
+                enviar_trabajo('imagen', {'prompt': prompt, 'variantes': variantes, 'seed': int(seed), 'borrador': borrador})
+            except Exception as e:
+                st.error(f"❌ Error generando imagen: {str(e)}")
+
+        seguimiento_trabajo('imagen')
+        panel_depuracion('imagen')
+
+        if st.session_state.imagen:
+            for error in st.session_state.imagen.get('errores', []):
+                st.error(f"❌ {error}")
+        if st.session_state.imagen and st.session_state.imagen['imagenes']:
+            st.subheader("🖼️ Imagen Educativa Generada")
+            rutas = st.session_state.imagen['imagenes']
+            # Streamlit sirve los PNG desde disco, sin pasar por cadenas base64
+            for indice, (columna, ruta) in enumerate(zip(st.columns(len(rutas)), rutas)):
+                with columna:
+                    st.image(
+                        ruta,
+                        caption=f"Imagen generada: {st.session_state.imagen['prompt'][:50]}...",
+                        use_column_width=True
+                    )
+                    with open(ruta, 'rb') as f:
+                        st.download_button(
+                            "⬇️ Descargar PNG",
+                            data=f.read(),
+                            file_name=os.path.basename(ruta),
+                            mime="image/png",
+                            key=f"download_png_{indice}",
+                            use_container_width=True
+                        )
     
     with tab3:
         st.header("🗣️ Análisis de Comentarios Educativos")
-        
-        with st.form("form_comment"):
-            col1, col2 = st.columns([2, 1])
+        modo_analisis = st.radio(
+            "Modo de análisis", ["✍️ Texto", "📁 Archivo"], horizontal=True, key="modo_analisis",
+            help="Archivo: JSON, NDJSON o CSV con decenas de miles de comentarios"
+        )
+
+        if modo_analisis == "✍️ Texto":
+            with st.form("form_comment"):
+                col1, col2 = st.columns([2, 1])
             
-            with col1:
-                comentarios = st.text_area(
-                    "💬 Comentarios de estudiantes/docentes",
-                    "Las clases de ciencia son muy interesantes y aprendo mucho.\n"
-                    "Me gustaría tener más experimentos prácticos en el laboratorio.\n"
-                    "A veces los conceptos de física son difíciles de entender.\n"
-                    "El profesor explica muy bien los temas de química.",
-                    height=120
-                )
+                with col1:
+                    comentarios = st.text_area(
+                        "💬 Comentarios de estudiantes/docentes",
+                        "Las clases de ciencia son muy interesantes y aprendo mucho.\n"
+                        "Me gustaría tener más experimentos prácticos en el laboratorio.\n"
+                        "A veces los conceptos de física son difíciles de entender.\n"
+                        "El profesor explica muy bien los temas de química.",
+                        height=120
+                    )
             
-            with col2:
-                st.markdown("**📊 El análisis incluirá:**")
-                st.markdown("- Sentimientos generales")
-                st.markdown("- Temas de interés")
-                st.markdown("- Áreas de mejora")
-                st.markdown("- Recomendaciones")
+                with col2:
+                    st.markdown("**📊 El análisis incluirá:**")
+                    st.markdown("- Sentimientos generales")
+                    st.markdown("- Temas de interés")
+                    st.markdown("- Áreas de mejora")
+                    st.markdown("- Recomendaciones")
             
-            analizar = st.form_submit_button("🔍 Analizar Comentarios", use_container_width=True)
+                analizar = st.form_submit_button("🔍 Analizar Comentarios", use_container_width=True)
         
-        # FUERA del formulario
-        if analizar and comentarios.strip():
-            with st.spinner('🔍 Analizando comentarios educativos...'):
+            # FUERA del formulario
+            if analizar and comentarios.strip():
                 try:
-                    analisis_raw = generar_resumen_comentarios(comentarios)
-                    
-                    # Formatear análisis
-                    analisis_formateado = f"""
-# 📊 ANÁLISIS DE COMENTARIOS EDUCATIVOS
+                    enviar_trabajo('analisis', {'comentarios': comentarios})
+                except Exception as e:
+                    st.error(f"❌ Error en análisis: {str(e)}")
+            elif analizar:
+                st.warning("⚠️ Por favor ingresa algunos comentarios para analizar")
 
-## 📅 {datetime.now().strftime('%d de %B de %Y')}
+            seguimiento_trabajo('analisis')
+            panel_depuracion('analisis')
 
----
+            analisis = st.session_state.analisis
+            if analisis:
+                # Formatear análisis
+                analisis_formateado = formatear_analisis_comentarios(
+                    analisis['comentarios'], analisis['texto'], datetime.now().strftime('%d de %B de %Y')
+                )
 
-### 📝 COMENTARIOS ANALIZADOS
-{comentarios}
+                st.success("✅ ¡Análisis completado!")
+                st.markdown("---")
+                st.markdown(analisis_formateado)
+                st.markdown("---")
 
----
+                # Botones de descarga
+                col1, col2 = st.columns(2)
 
-### 🔍 ANÁLISIS DETALLADO
-{analisis_raw}
+                with col1:
+                    st.download_button(
+                        "📄 Descargar Análisis TXT",
+                        data=analisis_formateado,
+                        file_name=f"analisis_comentarios_{datetime.now().strftime('%Y%m%d')}.txt",
+                        mime="text/plain",
+                        key="download_txt_analisis",
+                        use_container_width=True
+                    )
 
----
+                with col2:
+                    if DOCX_OK:
+                        doc_bytes = servicios['precalentamiento'].get('docx').crear_documento_profesional(
+                            analisis['texto'], "Análisis de Comentarios Educativos", "Análisis"
+                        )
+                        if doc_bytes:
+                            st.download_button(
+                                "📝 Descargar WORD", 
+                                data=doc_bytes,
+                                file_name=f"analisis_comentarios_{datetime.now().strftime('%Y%m%d')}.docx",
+                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                key="download_docx_analisis",
+                                use_container_width=True
+                            )
+                    else:
+                        st.button("📝 WORD no disponible", disabled=True, key="docx_disabled_analisis", use_container_width=True)
 
-### 📋 RECOMENDACIONES GENERALES
-- Implementar metodologías activas de enseñanza
-- Fomentar el aprendizaje experimental
-- Adaptar estrategias según retroalimentación estudiantil
-- Mantener comunicación constante con estudiantes
+        else:
+            with st.form("form_archivo_comentarios"):
+                archivo = st.file_uploader(
+                    "📁 Archivo de comentarios", type=['json', 'ndjson', 'jsonl', 'csv'],
+                    help="Arreglo JSON o NDJSON con el campo 'text', o CSV con una columna text/texto/comentario"
+                )
+                analizar_archivo = st.form_submit_button("🔍 Analizar Archivo", use_container_width=True)
 
----
+            if analizar_archivo and archivo is not None:
+                # Se copia a disco por partes: el trabajo lo lee en lotes sin cargarlo completo
+                extension = os.path.splitext(archivo.name)[1].lower()
+                with tempfile.NamedTemporaryFile(prefix='comentarios_', suffix=extension, delete=False) as destino:
+                    for bloque in iter(lambda: archivo.read(1 << 20), b''):
+                        destino.write(bloque)
+                enviar_trabajo('analisis_archivo', {'ruta': destino.name, 'nombre': archivo.name})
+            elif analizar_archivo:
+                st.warning("⚠️ Por favor selecciona un archivo de comentarios")
 
-*Análisis generado por Sistema IA Educativa*
-"""
-                    
-                    st.success("✅ ¡Análisis completado!")
-                    st.markdown("---")
-                    st.markdown(analisis_formateado)
-                    st.markdown("---")
-                    
-                    # Botones de descarga
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.download_button(
-                            "📄 Descargar Análisis TXT",
-                            data=analisis_formateado,
-                            file_name=f"analisis_comentarios_{datetime.now().strftime('%Y%m%d')}.txt",
-                            mime="text/plain",
-                            key="download_txt_analisis",
-                            use_container_width=True
-                        )
-                    
-                    with col2:
-                        if DOCX_OK:
-                            doc_bytes = crear_documento_profesional(analisis_raw, "Análisis de Comentarios Educativos", "Análisis")
-                            if doc_bytes:
-                                st.download_button(
-                                    "📝 Descargar WORD", 
-                                    data=doc_bytes,
-                                    file_name=f"analisis_comentarios_{datetime.now().strftime('%Y%m%d')}.docx",
-                                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                    key="download_docx_analisis",
-                                    use_container_width=True
-                                )
-                        else:
-                            st.button("📝 WORD no disponible", disabled=True, key="docx_disabled_analisis", use_container_width=True)
-                            
-                except Exception as e:
-                    st.error(f"❌ Error en análisis: {str(e)}")
-        elif analizar:
-            st.warning("⚠️ Por favor ingresa algunos comentarios para analizar")
+            seguimiento_trabajo('analisis_archivo')
+            panel_depuracion('analisis_archivo')
+
+            analisis_archivo = st.session_state.analisis_archivo
+            if analisis_archivo:
+                st.success(f"✅ ¡Análisis de {analisis_archivo['nombre']} completado!")
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Comentarios", f"{analisis_archivo['total']:,}")
+                col2.metric("Sin texto (omitidos)", f"{analisis_archivo['invalidos']:,}")
+                col3.metric("Muestra resumida", f"{analisis_archivo['muestra']:,}")
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.markdown("**Sentimientos**")
+                    st.bar_chart(analisis_archivo['por_sentimiento'])
+                with col2:
+                    st.markdown("**Hashtags más frecuentes**")
+                    st.bar_chart(analisis_archivo['hashtags'], horizontal=True)
+                if len(analisis_archivo['por_dia']) > 1:
+                    st.markdown("**Comentarios por día y sentimiento**")
+                    st.bar_chart(
+                        [{'día': dia, **conteos} for dia, conteos in analisis_archivo['por_dia'].items()],
+                        x='día', y=list(analisis_archivo['por_sentimiento'])
+                    )
+
+                informe = formatear_analisis_archivo(analisis_archivo, datetime.now().strftime('%d de %B de %Y'))
+                st.markdown("---")
+                st.markdown(informe)
+                st.download_button(
+                    "📄 Descargar Análisis TXT",
+                    data=informe,
+                    file_name=f"analisis_archivo_{datetime.now().strftime('%Y%m%d')}.txt",
+                    mime="text/plain",
+                    key="download_txt_analisis_archivo",
+                    use_container_width=True
+                )
+
+    with tab4:
+        st.header("📈 Dashboard de Análisis de Comentarios")
+        st.markdown("Visualización en tiempo real del sentimiento y las tendencias de los comentarios sobre los nuevos snacks.")
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            en_vivo = st.toggle("🔴 Actualizar en vivo", key="dashboard_en_vivo",
+                                help="Lee de DynamoDB solo los comentarios nuevos desde la última actualización")
+        with col2:
+            intervalo = st.select_slider(
+                "Actualizar cada (segundos)",
+                options=sorted(set(INTERVALOS_DASHBOARD + [INTERVALO_DASHBOARD])),
+                value=INTERVALO_DASHBOARD, key="dashboard_intervalo"
+            )
+        if en_vivo:
+            st.fragment(run_every=intervalo)(panel_dashboard)()
 
 else:
     st.error("⚠️ Los servicios no están disponibles. Verifica la configuración.")
@@ -0,0 +1,85 @@
+import boto3
+import json
+import os
+import threading
+from botocore.config import Config
+
+# Los clientes de boto3 son thread-safe y costosos de crear (carga de modelos
+# de servicio, resolución de credenciales), así que se crean una sola vez por proceso.
+_clients = {}
+_resources = {}
+_lock = threading.Lock()
+
+# Los reintentos de estos servicios los maneja core.rate_limiter (con backoff
+# adaptativo); si botocore también reintentara, cada rechazo se multiplicaría.
+_LIMITED_SERVICES = ('bedrock-runtime', 'bedrock-agent-runtime', 'comprehend')
+
+# Timeouts (segundos) de conexión y lectura. Una generación larga de Bedrock
+# puede superar el read_timeout de 60s de botocore; el resto debe fallar pronto
+# para que el circuit breaker lo detecte. Se sobrescriben con AWS_TIMEOUTS, ej.
+# AWS_TIMEOUTS='{"bedrock-runtime": {"read_timeout": 300}}'
+DEFAULT_TIMEOUTS = {
+    'bedrock-runtime': {'connect_timeout': 5, 'read_timeout': 180},
+    'bedrock-agent-runtime': {'connect_timeout': 3, 'read_timeout': 15},
+    'comprehend': {'connect_timeout': 3, 'read_timeout': 10},
+}
+
+def _client_config(service_name):
+    opciones = dict(DEFAULT_TIMEOUTS.get(service_name, {}))
+    try:
+        opciones.update(json.loads(os.environ.get('AWS_TIMEOUTS', '{}')).get(service_name, {}))
+    except ValueError:
+        pass
+    if service_name in _LIMITED_SERVICES:
+        # max_attempts cuenta solo los reintentos; total_max_attempts incluye el primer intento
+        opciones['retries'] = {'mode': 'standard', 'total_max_attempts': 1}
+    return Config(**opciones) if opciones else None
+
+def _region():
+    return os.environ.get('AWS_REGION')
+
+def get_client(service_name):
+    """
+    Retorna un cliente de boto3 compartido para el servicio indicado.
+    """
+    key = (service_name, _region())
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = boto3.client(service_name, region_name=key[1], config=_client_config(service_name))
+                _clients[key] = client
+    return client
+
+def get_resource(service_name):
+    """
+    Retorna un recurso de boto3 compartido (ej. 'dynamodb').
+    Los recursos no son thread-safe: usar solo desde el hilo que lo obtuvo
+    o crear uno propio para trabajo concurrente.
+    """
+    key = (service_name, _region())
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = boto3.resource(service_name, region_name=key[1])
+                _resources[key] = resource
+    return resource
+
+def register_client(service_name, client):
+    """
+    Sustituye el cliente compartido de un servicio (ej. por un doble local
+    en benchmarks o pruebas sin conexión a AWS).
+    """
+    with _lock:
+        _clients[(service_name, _region())] = client
+
+def reset_clients():
+    """
+    Descarta los clientes creados (ej. tras cambiar credenciales o región).
+    """
+    with _lock:
+        _clients.clear()
+        _resources.clear()
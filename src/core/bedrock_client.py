@@ -0,0 +1,49 @@
+# core/bedrock_client.py
+import json
+from typing import Dict
+
+from .aws_clients import get_client
+from .circuit_breaker import get_breaker
+from .metrics import track_call, record_bedrock_usage
+from .rate_limiter import get_limiter
+
+def estimate_reserved_tokens(payload: str, body: Dict) -> int:
+    """
+    Tokens que una llamada descuenta de la cuota por minuto: Bedrock reserva
+    la entrada más max_tokens al iniciar y corrige al terminar.
+    """
+    max_tokens = body.get('max_tokens_to_sample') or body.get('max_tokens') or 0
+    return len(payload) // 4 + max_tokens if max_tokens else 0
+
+def invoke_model(model_id: str, body: Dict, operation: str = 'invoke_model', client=None, **attrs) -> Dict:
+    """
+    Invoca un modelo de Bedrock y retorna el cuerpo de la respuesta ya decodificado.
+    Todas las llamadas a Bedrock pasan por aquí para medir latencia, tamaño,
+    tokens y costo estimado. `operation` identifica la etapa (ej. 'programacion_borrador').
+    Las llamadas respetan las cuotas de core.rate_limiter, se reintentan ante throttling
+    y fallan de inmediato (CircuitOpenError) si el circuito del modelo está abierto.
+    """
+    payload = json.dumps(body)
+    client = client or get_client('bedrock-runtime')
+    limiter = get_limiter('bedrock', model_id)
+    reservados = estimate_reserved_tokens(payload, body)
+    with track_call('bedrock', operation, model_id=model_id, request_bytes=len(payload), **attrs) as record:
+        response = limiter.call(
+            client.invoke_model,
+            body=payload,
+            modelId=model_id,
+            accept='application/json',
+            contentType='application/json',
+            tokens=reservados,
+            record=record,
+            breaker=get_breaker('bedrock', model_id),
+        )
+        raw_body = response.get('body').read()
+        record['response_bytes'] = len(raw_body)
+        response_body = json.loads(raw_body)
+        record_bedrock_usage(record, response, response_body, model_id)
+    if reservados and record['input_tokens'] is not None:
+        # Los tokens leídos de la caché de prompts no se vuelven a procesar
+        procesados = record['input_tokens'] + record.get('cache_write_tokens', 0) + (record['output_tokens'] or 0)
+        limiter.settle(reservados, procesados)
+    return response_body
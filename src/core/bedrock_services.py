@@ -1,43 +1,41 @@
-import boto3
-import json
-import os
+import base64
+import contextvars
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+from core.bedrock_client import invoke_model
+from core.comment_clustering import clustered_prompt_block, parse_comment_lines
+from core.image_cache import ImageCache
+from core.metrics import record_event
+from core.model_routing import complete
 from core.rag_service import generar_programacion_curricular_rag
 
-def generar_programacion_curricular_2(grado, competencia, capacidades, contenidos):
-    return generar_programacion_curricular_rag(grado, competencia, capacidades, contenidos)
+logger = logging.getLogger(__name__)
 
-# Función alternativa con mejor manejo de respuestas
-def generar_programacion_curricular(grado_secundaria, competencia, capacidades, contenidos, num_iteraciones=3):
-    """
-    Genera una programación curricular completa para Ciencia y Tecnología 
-    utilizando un modelo de lenguaje de Bedrock con técnica de auto-crítica
-    y llamadas iterativas a la API.
-    """
-    try:
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=os.environ['AWS_REGION']
-        )
-       
-        # --- PASO 1: Generar la programación inicial ---
-        prompt_inicial = f"""
-Actúa como especialista en programación curricular. Tu tarea es crear una tabla de programación educativa para estudiantes de {grado_secundaria}º de secundaria del área de Ciencia y Tecnología.
+# Modelo de difusión y pasos por defecto / en modo borrador
+MODELO_IMAGEN = 'stability.stable-diffusion-xl-v1'
+PASOS_IMAGEN = 50
+PASOS_BORRADOR = 20
 
-Genera una tabla completa con las siguientes columnas: COMPETENCIA, CAPACIDADES, CONTENIDOS, DESEMPEÑOS, CRITERIOS DE EVALUACIÓN, INSTRUMENTOS DE EVALUACIÓN.
+_cache_imagenes = ImageCache()
 
-INFORMACIÓN BASE:
----
-GRADO: {grado_secundaria}º de secundaria
-COMPETENCIA: {competencia}
-CAPACIDADES: {capacidades}
-CONTENIDOS: {contenidos}
----
+# Plantillas de prompt del generador RSIP. Se mantienen a nivel de módulo para
+# que la biblioteca curricular pueda detectar cambios y refrescar su contenido.
+# SISTEMA_PROGRAMACION reúne las instrucciones fijas del borrador y de las
+# mejoras: va como mensaje de sistema, idéntico en todas las llamadas, para
+# que los modelos con caché de prompts no lo reprocesen si alcanza su mínimo
+# de tokens (core.model_routing.prompt_cacheable).
+SISTEMA_PROGRAMACION = """
+Actúa como especialista en programación curricular y evaluación educativa. Tu tarea es crear y mejorar tablas de programación educativa para estudiantes de secundaria del área de Ciencia y Tecnología.
+
+La tabla tiene las siguientes columnas: COMPETENCIA, CAPACIDADES, CONTENIDOS, DESEMPEÑOS, CRITERIOS DE EVALUACIÓN, INSTRUMENTOS DE EVALUACIÓN.
 
 INSTRUCCIONES PARA COMPLETAR:
 1. Transcribe exactamente la COMPETENCIA y CAPACIDADES proporcionadas
 2. Organiza los CONTENIDOS por bloques temáticos (Física, Química)
-3. Genera DESEMPEÑOS específicos para {grado_secundaria}º de secundaria que sean:
+3. Genera DESEMPEÑOS específicos para el grado indicado que sean:
    - Observables y medibles en el aula
    - Relacionados directamente con los contenidos
    - Apropiados para la edad de los estudiantes
@@ -63,169 +61,378 @@ CONSIDERACIONES IMPORTANTES:
 - Incluye aspectos de indagación científica apropiados para la edad
 - Los instrumentos deben ser prácticos de implementar en el aula
 
-FORMATO REQUERIDO:
-Quiero que me presentes la siguiente información en un formato de texto plano y muy ordenado, 
-sin usar tablas ni formato Markdown. Organiza la información en secciones claras con títulos y/0 listas con viñetas.
-"""
-        
-        # Ajustar parámetros del modelo
-        body = json.dumps({
-            "prompt": f"Human: {prompt_inicial}\n\nAssistant:",
-            "max_tokens_to_sample": 4000,  # Aumentar límite de tokens
-            "temperature": 0.7,
-            "top_p": 0.9,
-            "stop_sequences": ["Human:"]  # Evitar que se corte prematuramente
-        })
-       
-        response = bedrock_runtime.invoke_model(
-            body=body,
-            modelId='anthropic.claude-v2',
-            accept='application/json',
-            contentType='application/json'
-        )
-        
-        response_body = json.loads(response.get('body').read())
-        ultima_programacion = response_body.get('completion')
-        
-        # Agregar logging para debug
-        print(f"Respuesta inicial - Longitud: {len(ultima_programacion) if ultima_programacion else 0}")
-        print(f"Primeros 500 caracteres: {ultima_programacion[:500] if ultima_programacion else 'None'}")
-       
-        # --- PASO 2: Bucle de mejora recursiva (llamadas iterativas) ---
-        for i in range(num_iteraciones):
-            criterios = [
-                "Revisa la programación anterior y mejora la especificidad de los desempeños para que sean más observables y medibles en el contexto educativo. Cada desempeño debe describir claramente qué hará el estudiante.",
-                "Analiza la coherencia entre contenidos, desempeños y criterios de evaluación. Verifica que cada criterio permita evaluar efectivamente el desempeño correspondiente y que estén perfectamente alineados.",
-                "Revisa y mejora los instrumentos de evaluación para que sean variados, pertinentes y prácticos de implementar en el aula. Incluye tanto instrumentos formativos como sumativos."
-            ]
-            criterio_actual = criterios[i % len(criterios)]
-           
-            # El prompt de cada iteración incluye la programación anterior
-            prompt_mejora = f"""
-Eres un especialista en programación curricular y evaluación educativa. 
-
-Aquí tienes la programación curricular que necesita mejoras:
----
-{ultima_programacion}
----
-
-Basándote en la programación anterior, genera una nueva y mejorada versión. Enfócate específicamente en: "{criterio_actual}"
+CADA SOLICITUD INDICA QUÉ PARTE DEL DOCUMENTO GENERAR (la tabla, las secciones transversales, el esqueleto de sesiones o una sesión): responde solo con esa parte.
 
+CUANDO SE PIDA MEJORAR UNA PROGRAMACIÓN:
 MANTENER:
 - El formato de tabla exacto con las 6 columnas
-- Todas las secciones adicionales (competencias transversales, enfoques, sesiones)
-- La estructura general del documento
+- La estructura general de la parte recibida
 
 MEJORAR:
 - La calidad pedagógica del contenido según el criterio especificado
-- La pertinencia para estudiantes de {grado_secundaria}º de secundaria
+- La pertinencia para estudiantes del grado indicado
 - La claridad y precisión de los elementos a evaluar
 - La viabilidad de implementación práctica
 
-Conserva el formato de tabla completo y mejora la calidad del contenido educativo.
+FORMATO REQUERIDO:
+Quiero que me presentes la información en un formato de texto plano y muy ordenado, 
+sin usar tablas ni formato Markdown. Organiza la información en secciones claras con títulos y/0 listas con viñetas.
 """
-           
-            body_mejora = json.dumps({
-                "prompt": f"Human: {prompt_mejora}\n\nAssistant:",
-                "max_tokens_to_sample": 4000,  # Aumentar límite de tokens
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "stop_sequences": ["Human:"]
-            })
-           
-            response_mejora = bedrock_runtime.invoke_model(
-                body=body_mejora,
-                modelId='anthropic.claude-v2',
-                accept='application/json',
-                contentType='application/json'
-            )
-            
-            response_body_mejora = json.loads(response_mejora.get('body').read())
-            nueva_programacion = response_body_mejora.get('completion')
-            
-            # Verificar que la nueva respuesta sea válida antes de actualizar
-            if nueva_programacion and len(nueva_programacion) > len(ultima_programacion) * 0.5:
-                ultima_programacion = nueva_programacion
-                print(f"Iteración {i+1} completada - Longitud: {len(ultima_programacion)}")
-            else:
-                print(f"Iteración {i+1} descartada - Respuesta incompleta")
-                break
-           
-        return ultima_programacion
-        
+
+PROMPT_INICIAL = """
+Genera SOLO LA TABLA DE PROGRAMACIÓN: COMPETENCIA, CAPACIDADES, CONTENIDOS, DESEMPEÑOS, CRITERIOS DE EVALUACIÓN e INSTRUMENTOS DE EVALUACIÓN. No incluyas competencias transversales, enfoques transversales ni la secuencia de sesiones: esas partes se generan por separado.
+
+INFORMACIÓN BASE:
+---
+GRADO: {grado_secundaria}º de secundaria
+COMPETENCIA: {competencia}
+CAPACIDADES: {capacidades}
+CONTENIDOS: {contenidos}
+---
+"""
+
+# La programación se arma con llamadas cortas e independientes en lugar de
+# una sola completion larga: la tabla (que luego pasa por la crítica RSIP),
+# las secciones transversales, el esqueleto de la secuencia de sesiones y
+# el desarrollo de cada sesión. Todas comparten SISTEMA_PROGRAMACION.
+NUM_SESIONES = 6
+
+PROMPT_TRANSVERSALES = """
+Genera SOLO LAS SECCIONES TRANSVERSALES de la programación curricular de {grado_secundaria}º de secundaria para la competencia "{competencia}" con los contenidos:
+{contenidos}
+
+Responde únicamente con estas dos secciones:
+COMPETENCIAS TRANSVERSALES: (Se desenvuelve en entornos virtuales y Gestiona su aprendizaje) con una o dos actuaciones concretas de cada una ligadas a los contenidos.
+ENFOQUES TRANSVERSALES: dos o tres enfoques con sus valores y comportamientos observables.
+"""
+
+PROMPT_ESQUELETO = """
+Planifica el ESQUELETO DE LA SECUENCIA DE {num_sesiones} SESIONES DE APRENDIZAJE para {grado_secundaria}º de secundaria, competencia "{competencia}", que recorra en orden estos contenidos:
+{contenidos}
+
+Responde únicamente con {num_sesiones} líneas, una por sesión, con el formato exacto:
+Sesión N: <título breve> | <propósito de aprendizaje en una oración>
+"""
+
+PROMPT_SESION = """
+DESARROLLA LA SESIÓN {numero} de una secuencia de {num_sesiones} sesiones de aprendizaje para {grado_secundaria}º de secundaria (competencia "{competencia}").
+
+Secuencia completa, para no repetir lo que corresponde a otras sesiones:
+{esqueleto}
+
+Sesión a desarrollar: {titulo}
+Propósito: {proposito}
+
+Responde únicamente con esta sesión, empezando por la línea "Sesión {numero}: {titulo}", e incluye: propósito, actividades de inicio, desarrollo y cierre (con la actividad de indagación principal) y la evidencia de aprendizaje. Sé concreto: no más de 200 palabras.
+"""
+
+CRITERIOS_MEJORA = [
+    "Revisa la programación anterior y mejora la especificidad de los desempeños para que sean más observables y medibles en el contexto educativo. Cada desempeño debe describir claramente qué hará el estudiante.",
+    "Analiza la coherencia entre contenidos, desempeños y criterios de evaluación. Verifica que cada criterio permita evaluar efectivamente el desempeño correspondiente y que estén perfectamente alineados.",
+    "Revisa y mejora los instrumentos de evaluación para que sean variados, pertinentes y prácticos de implementar en el aula. Incluye tanto instrumentos formativos como sumativos."
+]
+
+PROMPT_MEJORA = """
+Aquí tienes la tabla de programación curricular para {grado_secundaria}º de secundaria que necesita mejoras:
+---
+{ultima_programacion}
+---
+
+Basándote en la tabla anterior, genera una nueva y mejorada versión. Enfócate específicamente en: "{criterio_actual}"
+
+Conserva el formato de tabla completo y mejora la calidad del contenido educativo. Responde solo con la tabla: las secciones transversales y las sesiones se generan por separado.
+"""
+
+def generar_programacion_curricular_2(grado, competencia, capacidades, contenidos, rag_service=None):
+    # Si la Knowledge Base no responde se genera sin RAG en lugar de fallar
+    return generar_programacion_curricular_rag(
+        grado, competencia, capacidades, contenidos, rag_service=rag_service,
+        respaldo=lambda: generar_programacion_curricular(grado, competencia, capacidades, contenidos)
+    )
+
+PROPOSITO_POR_DEFECTO = "Continuar con el siguiente contenido de la unidad"
+_LINEA_ESQUELETO = re.compile(r'^\W*sesi[oó]n\s*(\d+)\s*[:.\-–]\s*(.+)$', re.IGNORECASE)
+
+
+def _parsear_esqueleto(texto, num_sesiones):
+    """
+    Lista de (título, propósito) por sesión a partir del esqueleto. Las
+    sesiones que falten o no se puedan leer quedan con un título genérico.
+    """
+    sesiones = {}
+    for linea in (texto or '').splitlines():
+        coincidencia = _LINEA_ESQUELETO.match(linea.strip())
+        if coincidencia and 1 <= int(coincidencia.group(1)) <= num_sesiones:
+            titulo, _, proposito = coincidencia.group(2).partition('|')
+            sesiones.setdefault(int(coincidencia.group(1)),
+                                (titulo.strip(' *'), proposito.strip(' *') or PROPOSITO_POR_DEFECTO))
+    return [sesiones.get(n, (f"Sesión {n} de la secuencia", PROPOSITO_POR_DEFECTO)) for n in range(1, num_sesiones + 1)]
+
+
+def _generar_sesion(numero, titulo, proposito, esqueleto, datos):
+    prompt = PROMPT_SESION.format(numero=numero, titulo=titulo, proposito=proposito, esqueleto=esqueleto, **datos)
+    try:
+        texto = complete('programacion_sesion', prompt, system=SISTEMA_PROGRAMACION,
+                         operation=f'programacion_sesion_{numero}')
+        if texto and texto.strip():
+            texto = texto.strip()
+            # Encabezado uniforme aunque el modelo lo omita
+            if not re.match(rf'\W*sesi[oó]n\s*{numero}\b', texto, re.IGNORECASE):
+                texto = f"Sesión {numero}: {titulo}\n{texto}"
+            return texto
+    except Exception as e:
+        logger.warning(f"Sesión {numero} fallida, se usa la línea del esqueleto: {e}")
+    record_event('fallback', 'sesion_a_esqueleto', sesion=numero)
+    return f"Sesión {numero}: {titulo}\nPropósito: {proposito}"
+
+
+def _generar_secuencia_sesiones(datos, max_workers, avance):
+    """
+    Esqueleto de la secuencia (una llamada corta) y luego el desarrollo de
+    cada sesión en paralelo, ensamblado en orden. Cada sesión terminada
+    avanza `avance`.
+    """
+    num_sesiones = datos['num_sesiones']
+    try:
+        esqueleto = complete('programacion_esqueleto', PROMPT_ESQUELETO.format(**datos), system=SISTEMA_PROGRAMACION)
+    except Exception as e:
+        logger.warning(f"Esqueleto de sesiones fallido, se usan títulos genéricos: {e}")
+        esqueleto = ''
+    sesiones = _parsear_esqueleto(esqueleto, num_sesiones)
+    esqueleto = '\n'.join(f"Sesión {n}: {titulo} | {proposito}" for n, (titulo, proposito) in enumerate(sesiones, 1))
+
+    def sesion(numero, titulo, proposito):
+        texto = _generar_sesion(numero, titulo, proposito, esqueleto, datos)
+        avance.avanzar(f"Sesión {numero} de {num_sesiones} generada")
+        return texto
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, num_sesiones)) as executor:
+        futuros = [
+            executor.submit(contextvars.copy_context().run, sesion, n, titulo, proposito)
+            for n, (titulo, proposito) in enumerate(sesiones, 1)
+        ]
+        return [futuro.result() for futuro in futuros]
+
+
+def _generar_transversales(datos):
+    try:
+        return complete('programacion_transversales', PROMPT_TRANSVERSALES.format(**datos),
+                        system=SISTEMA_PROGRAMACION).strip()
+    except Exception as e:
+        logger.warning(f"Secciones transversales fallidas: {e}")
+        return ''
+
+
+class _Avance:
+    """
+    Avance compartido entre la tabla RSIP y las sesiones, que terminan en
+    hilos distintos: cada parte completada suma sus pasos a los de `total`.
+    """
+
+    def __init__(self, progreso, total):
+        self.progreso = progreso
+        self.total = total
+        self._paso = 0
+        self._lock = threading.Lock()
+
+    def avanzar(self, mensaje, pasos=1):
+        if not self.progreso:
+            return
+        with self._lock:
+            self._paso += pasos
+            self.progreso(self._paso, self.total, mensaje)
+
+
+def generar_programacion_curricular(grado_secundaria, competencia, capacidades, contenidos, num_iteraciones=3,
+                                    progreso=None, max_workers=NUM_SESIONES):
+    """
+    Genera una programación curricular completa para Ciencia y Tecnología 
+    utilizando un modelo de lenguaje de Bedrock con técnica de auto-crítica
+    y llamadas iterativas a la API.
+    El documento se divide en partes que se generan en paralelo y se
+    ensamblan en orden: la tabla de programación (borrador y mejoras RSIP,
+    que solo reescriben la tabla), las secciones transversales, y la
+    secuencia de sesiones (un esqueleto corto y luego una llamada por
+    sesión). Cada completion es corta, así que ninguna llega al límite de
+    max_tokens, y el tiempo total es el de la parte más lenta.
+    Si se indica `progreso`, se llama como progreso(paso, total, mensaje)
+    tras el borrador inicial, tras cada iteración RSIP y al terminar cada
+    sesión; el total cuenta todos esos pasos.
+    Si una iteración de mejora falla (ej. circuito de Bedrock abierto) se
+    retorna la última versión válida en lugar de un error; si falla una
+    sesión se usa su línea del esqueleto.
+    El modelo, max_tokens y temperatura de cada etapa ('programacion_borrador',
+    'programacion_mejora_N', 'programacion_transversales',
+    'programacion_esqueleto', 'programacion_sesion') vienen de
+    core.model_routing. Todas las etapas comparten el mensaje de sistema
+    SISTEMA_PROGRAMACION.
+    """
+    avance = _Avance(progreso, 1 + num_iteraciones + NUM_SESIONES)
+    datos = {'grado_secundaria': grado_secundaria, 'competencia': competencia, 'capacidades': capacidades,
+             'contenidos': contenidos, 'num_sesiones': NUM_SESIONES}
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Las partes que no dependen de la tabla corren mientras esta se genera y se mejora
+            futuro_sesiones = executor.submit(contextvars.copy_context().run, _generar_secuencia_sesiones,
+                                              datos, max_workers, avance)
+            futuro_transversales = executor.submit(contextvars.copy_context().run, _generar_transversales, datos)
+
+            tabla = _generar_tabla_rsip(datos, num_iteraciones, avance)
+
+            secciones = [tabla.strip()]
+            transversales = futuro_transversales.result()
+            if transversales:
+                secciones.append(transversales)
+            sesiones = futuro_sesiones.result()
+        secciones.append(f"SECUENCIA DE {NUM_SESIONES} SESIONES DE APRENDIZAJE:\n\n" + '\n\n'.join(sesiones))
+        programacion = '\n\n'.join(secciones)
+        logger.info(f"Programación ensamblada - Longitud: {len(programacion)}")
+        return programacion
+
     except Exception as e:
-        print(f"Error detallado: {str(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception(f"Error al generar la programación curricular: {e}")
         return f"Error al generar la programación curricular: {e}"
 
-def generar_imagen_promocional(prompt_imagen):
+
+def _generar_tabla_rsip(datos, num_iteraciones, avance):
+    """
+    Borrador de la tabla de programación y bucle de mejora recursiva (RSIP).
+    """
+    # --- PASO 1: Generar la tabla inicial ---
+    prompt_inicial = PROMPT_INICIAL.format(**datos)
+
+    ultima_programacion = complete('programacion_borrador', prompt_inicial, system=SISTEMA_PROGRAMACION)
+
+    logger.debug(f"Respuesta inicial - Longitud: {len(ultima_programacion) if ultima_programacion else 0}")
+    avance.avanzar("Borrador inicial generado")
+
+    # --- PASO 2: Bucle de mejora recursiva (llamadas iterativas) ---
+    for i in range(num_iteraciones):
+        indice_criterio = i % len(CRITERIOS_MEJORA)
+        criterio_actual = CRITERIOS_MEJORA[indice_criterio]
+
+        # El prompt de cada iteración incluye la tabla anterior
+        prompt_mejora = PROMPT_MEJORA.format(
+            ultima_programacion=ultima_programacion,
+            criterio_actual=criterio_actual,
+            grado_secundaria=datos['grado_secundaria']
+        )
+
+        try:
+            # Cada criterio de crítica tiene su propia ruta de modelo
+            nueva_programacion = complete(f'programacion_mejora_{indice_criterio + 1}', prompt_mejora,
+                                          system=SISTEMA_PROGRAMACION, operation=f'programacion_mejora_{i+1}')
+        except Exception as e:
+            logger.warning(f"Iteración {i+1} fallida, se conserva la versión anterior: {e}")
+            record_event('fallback', 'rsip_a_borrador', iteracion=i + 1)
+            # Las iteraciones que no se harán cuentan como hechas para que el total se complete
+            avance.avanzar("Mejoras interrumpidas: se conserva la versión anterior", num_iteraciones - i)
+            break
+
+        # Verificar que la nueva respuesta sea válida antes de actualizar
+        if nueva_programacion and len(nueva_programacion) > len(ultima_programacion) * 0.5:
+            ultima_programacion = nueva_programacion
+            logger.debug(f"Iteración {i+1} completada - Longitud: {len(ultima_programacion)}")
+            avance.avanzar(f"Iteración {i+1} de mejora completada")
+        else:
+            logger.warning(f"Iteración {i+1} descartada - Respuesta incompleta")
+            avance.avanzar(f"Iteración {i+1} descartada", num_iteraciones - i)
+            break
+
+    return ultima_programacion
+
+
+def generar_imagen_promocional(prompt_imagen, seed=0, cfg_scale=10, borrador=False):
     """
     Genera una imagen promocional utilizando un modelo de difusión de Bedrock.
+    Retorna la ruta del PNG en la caché de imágenes (o un texto de error).
+    Con `borrador=True` usa menos pasos de difusión para una vista previa rápida.
     """
     try:
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=os.environ['AWS_REGION']
-        )
+        steps = PASOS_BORRADOR if borrador else PASOS_IMAGEN
         prompt = f'''
         Generate a high-quality, professional educational image for a high school.
         The image should be visually appealing and focus on the prompt:
         '{prompt_imagen}'
         '''
-        body = json.dumps({
+        clave = ImageCache.key(prompt, seed, cfg_scale, steps, MODELO_IMAGEN)
+        ruta = _cache_imagenes.get(clave)
+        if ruta:
+            record_event('image_cache', 'hit')
+            return ruta
+
+        body = {
             "text_prompts": [{"text": prompt}],
-            "cfg_scale": 10,
-            "seed": 0,
-            "steps": 50,
-        })
-        response = bedrock_runtime.invoke_model(
-            body=body,
-            modelId='stability.stable-diffusion-xl-v1',
-            accept='application/json',
-            contentType='application/json'
-        )
-        response_body = json.loads(response.get('body').read())
+            "cfg_scale": cfg_scale,
+            "seed": seed,
+            "steps": steps,
+        }
+        response_body = invoke_model(MODELO_IMAGEN, body, operation='imagen', images=1, steps=steps)
         image_base64 = response_body.get('artifacts')[0].get('base64')
-        return f"data:image/png;base64,{image_base64}"
+        # Se guardan los bytes PNG, no la cadena base64 (un 33% más grande)
+        return _cache_imagenes.put(clave, base64.b64decode(image_base64))
     except Exception as e:
         return f"Error al generar la imagen: {e}"
 
+def generar_variantes_imagen(prompt_imagen, num_variantes=4, seed_inicial=0, cfg_scale=10, borrador=False, max_workers=4):
+    """
+    Genera varias variantes de una imagen en paralelo, una por seed consecutiva.
+    Retorna la lista de rutas (o textos de error) en orden de seed.
+    """
+    seeds = [seed_inicial + i for i in range(num_variantes)]
+    with ThreadPoolExecutor(max_workers=min(max_workers, num_variantes)) as executor:
+        # Cada tarea corre en una copia del contexto para que sus métricas lleguen al recolector activo
+        futuros = [
+            executor.submit(
+                contextvars.copy_context().run,
+                generar_imagen_promocional, prompt_imagen, seed=seed, cfg_scale=cfg_scale, borrador=borrador
+            )
+            for seed in seeds
+        ]
+        return [futuro.result() for futuro in futuros]
+
+SISTEMA_RESUMEN = "Actúa como un especialista de educacion, experto en calidad educativa. Lee los siguientes comentarios de estudaintes sobre las sesiones y genera un resumen conciso que destaque las opiniones clave, tanto positivas como negativas. Los comentarios casi iguales vienen agrupados: cada línea es un representante y '(xN)' indica cuántos comentarios resume; usa esos conteos para ponderar qué tan frecuente es cada opinión."
+
 def generar_resumen_comentarios(comentarios):
     """
     Genera un resumen de comentarios de clientes utilizando un modelo de lenguaje de Bedrock.
+    Los comentarios (uno por línea) se agrupan antes por similitud y al modelo
+    solo llega un representante por grupo con su conteo (core.comment_clustering).
     """
     try:
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=os.environ['AWS_REGION']
-        )
-        
-        # Formato de prompt correcto para el modelo de Bedrock
-        prompt = f"""
-Human: Actúa como un especialista de educacion, experto en calidad educativa. Lee los siguientes comentarios de estudaintes sobre las sesiones y genera un resumen conciso que destaque las opiniones clave, tanto positivas como negativas.
---- Comentarios ---
-{comentarios}
+        textos, pesos = parse_comment_lines(comentarios)
+        bloque, grupos = clustered_prompt_block(textos, weights=pesos)
+        prompt = f"""--- Comentarios ({sum(pesos)} en {len(grupos)} grupos) ---
+{bloque}
 ---
-Resumen:
-Assistant:
-"""
+Resumen:"""
 
-        body = json.dumps({
-            "prompt": prompt,
-            "max_tokens_to_sample": 500,
-            "temperature": 0.5,
-        })
-
-        response = bedrock_runtime.invoke_model(
-            body=body,
-            modelId='anthropic.claude-v2',
-            accept='application/json',
-            contentType='application/json'
-        )
+        return complete('resumen_comentarios', prompt, system=SISTEMA_RESUMEN)
+
+    except Exception as e:
+        return f"Error al generar el resumen: {e}"
+
+SISTEMA_RESUMEN_CONSOLIDADO = "Actúa como un especialista de educacion, experto en calidad educativa. Recibirás resúmenes parciales de distintos lotes de comentarios y la distribución de sentimientos del archivo completo. Intégralos en un único resumen conciso, sin repetir ideas, que destaque las opiniones clave positivas y negativas, los temas recurrentes y las áreas de mejora."
+
+def generar_resumen_consolidado(resumenes_parciales, estadisticas):
+    """
+    Integra los resúmenes de varios lotes de comentarios en uno solo, junto
+    con la distribución de sentimientos del archivo completo.
+    """
+    try:
+        distribucion = ", ".join(f"{sentimiento}: {conteo}" for sentimiento, conteo in estadisticas['por_sentimiento'].items())
+        hashtags = ", ".join(list(estadisticas.get('hashtags', {}))[:10]) or "ninguno"
+        parciales = "\n\n".join(f"Lote {i}:\n{resumen}" for i, resumen in enumerate(resumenes_parciales, start=1))
+        prompt = f"""--- Estadísticas ---
+Comentarios analizados: {estadisticas['total']}
+Sentimientos: {distribucion}
+Hashtags más frecuentes: {hashtags}
+--- Resúmenes parciales ---
+{parciales}
+---
+Resumen consolidado:"""
 
-        response_body = json.loads(response.get('body').read())
-        return response_body.get('completion')
+        return complete('resumen_comentarios', prompt, system=SISTEMA_RESUMEN_CONSOLIDADO, operation='resumen_consolidado')
 
     except Exception as e:
-        return f"Error al generar el resumen: {e}"
\ No newline at end of file
+        return f"Error al generar el resumen: {e}"
@@ -1,47 +1,36 @@
-import boto3
-import json
-import os
+from .comment_clustering import clustered_prompt_block
+from .model_routing import complete
 
-def generate_summary_bedrock(comments_text_list):
+# Instrucciones fijas: van como mensaje de sistema (prefijo cacheable)
+SISTEMA_RESUMEN_LOTE = "Actúa como un analista de mercado experto. Lee los siguientes comentarios de clientes sobre un nuevo snack y genera un resumen conciso que destaque las opiniones clave, tanto positivas como negativas, y temas recurrentes. Los comentarios casi iguales vienen agrupados: cada línea es un representante y '(xN)' indica cuántos comentarios resume; usa esos conteos para ponderar qué tan frecuente es cada opinión."
+
+def generate_clustered_summary(comments_text_list, sentiments=None):
     """
-    Genera un resumen conciso de una lista de comentarios usando Amazon Bedrock (Anthropic Claude).
+    Resume una lista de comentarios enviando al modelo un representante por
+    cada grupo de comentarios casi iguales (dentro de cada sentimiento, si se
+    indican) con su conteo. Devuelve un diccionario con el resumen y los
+    grupos de core.comment_clustering, que conservan los índices de los
+    comentarios que representa cada línea del prompt.
     """
-    bedrock_runtime = boto3.client(
-        service_name='bedrock-runtime',
-        region_name=os.environ['AWS_REGION']
-    )
-    
-    comments_str = "\n".join(comments_text_list)
-    
-    prompt = f"""
-Human: Actúa como un analista de mercado experto. Lee los siguientes comentarios de clientes sobre un nuevo snack y genera un resumen conciso que destaque las opiniones clave, tanto positivas como negativas, y temas recurrentes.
+    comments_str, clusters = clustered_prompt_block(comments_text_list, sentiments)
 
---- Comentarios ---
+    prompt = f"""--- Comentarios ({len(comments_text_list)} en {len(clusters)} grupos) ---
 {comments_str}
 ---
 
-Resumen:
-Assistant:
-"""
+Resumen:"""
     
     try:
-        body = json.dumps({
-            "prompt": prompt,
-            "max_tokens_to_sample": 500,
-            "temperature": 0.5,
-            "top_p": 0.9,
-        })
-        
-        response = bedrock_runtime.invoke_model(
-            body=body,
-            modelId='anthropic.claude-v2', # 
-            accept='application/json',
-            contentType='application/json'
-        )
-        
-        response_body = json.loads(response.get('body').read())
-        return response_body.get('completion', "No se pudo generar el resumen.")
+        summary = complete('resumen_lote', prompt, system=SISTEMA_RESUMEN_LOTE) or "No se pudo generar el resumen."
     
     except Exception as e:
         print(f"❌ Error al generar resumen con Bedrock: {e}")
-        return f"Error al generar el resumen: {e}"
\ No newline at end of file
+        summary = f"Error al generar el resumen: {e}"
+    return {'summary': summary, 'clusters': clusters}
+
+def generate_summary_bedrock(comments_text_list, sentiments=None):
+    """
+    Genera un resumen conciso de una lista de comentarios usando Amazon Bedrock (Anthropic Claude).
+    El modelo se configura en la etapa 'resumen_lote' de core.model_routing.
+    """
+    return generate_clustered_summary(comments_text_list, sentiments)['summary']
@@ -0,0 +1,189 @@
+# core/bulk_analysis.py
+import contextvars
+import os
+import random
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .comment_clustering import cluster_comments, format_cluster_line, parse_comment_lines
+from .data_ingestion import iter_comments
+from .sentiment_analysis import analyze_sentiment_batch
+
+SENTIMIENTOS = ('POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED')
+
+# Comentarios por lote de sentimiento; cada lote se analiza con una sola
+# llamada a analyze_sentiment_batch y hasta MAX_LOTES_EN_VUELO a la vez.
+TAMANO_LOTE = 500
+MAX_WORKERS = 4
+MAX_LOTES_EN_VUELO = 2 * MAX_WORKERS
+
+# El resumen no lee todo el archivo: se resume una muestra estratificada por
+# sentimiento, repartida en hasta LOTES_RESUMEN prompts de a lo más
+# MAX_CARACTERES_LOTE caracteres, y luego se consolidan los resúmenes
+# parciales. El costo queda acotado aunque el archivo tenga decenas de miles
+# de comentarios, y ningún prompt supera el tamaño de la etapa. Antes de
+# repartirla, la muestra se agrupa por similitud dentro de cada sentimiento
+# (core.comment_clustering): cada opinión repetida ocupa una sola línea con
+# su conteo y los bloques cubren más opiniones distintas.
+LOTES_RESUMEN = 6
+MAX_CARACTERES_LOTE = 12000
+
+# Fracción de la barra de avance para el sentimiento; el resto es el resumen
+FRACCION_SENTIMIENTO = 0.8
+TOP_HASHTAGS = 15
+
+_HASHTAG = re.compile(r'#\w+')
+
+
+class _Muestra:
+    """
+    Muestreo de reservorio por sentimiento: conserva hasta `tamano` textos
+    uniformes de cada sentimiento sin guardar el archivo completo.
+    """
+
+    def __init__(self, tamano: int, seed: int = 0):
+        self.tamano = tamano
+        self._random = random.Random(seed)
+        self._vistos: Counter = Counter()
+        self._textos: Dict[str, List[str]] = defaultdict(list)
+
+    def agregar(self, sentimiento: str, texto: str):
+        self._vistos[sentimiento] += 1
+        reservorio = self._textos[sentimiento]
+        if len(reservorio) < self.tamano:
+            reservorio.append(texto)
+        else:
+            j = self._random.randrange(self._vistos[sentimiento])
+            if j < self.tamano:
+                reservorio[j] = texto
+
+    def extraer(self, total: int) -> List[Tuple[str, str]]:
+        """
+        Hasta `total` pares (sentimiento, texto) con la proporción de
+        sentimientos del archivo.
+        """
+        vistos = sum(self._vistos.values())
+        elegidos = []
+        for sentimiento, reservorio in self._textos.items():
+            cupo = max(1, round(total * self._vistos[sentimiento] / vistos))
+            elegidos.extend((sentimiento, texto) for texto in reservorio[:cupo])
+        self._random.shuffle(elegidos)
+        return elegidos[:total]
+
+
+def _lotes_de_texto(grupos: List[Dict], num_lotes: int, max_caracteres: int) -> List[str]:
+    """
+    Reparte los grupos de comentarios, del más grande al más chico, en hasta
+    `num_lotes` bloques de a lo más `max_caracteres`, una línea por grupo.
+    """
+    lotes, actual = [], []
+    largo = 0
+    for grupo in sorted(grupos, key=lambda g: -g['count']):
+        linea = format_cluster_line(grupo)
+        if actual and largo + len(linea) + 1 > max_caracteres:
+            lotes.append('\n'.join(actual))
+            if len(lotes) == num_lotes:
+                return lotes
+            actual, largo = [], 0
+        actual.append(linea)
+        largo += len(linea) + 1
+    if actual:
+        lotes.append('\n'.join(actual))
+    return lotes
+
+
+def _lotes(comentarios, tamano: int):
+    lote = []
+    for comentario in comentarios:
+        lote.append(comentario)
+        if len(lote) == tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _analizar_lote(lote: List[Dict]) -> List:
+    return analyze_sentiment_batch([comentario['text'] for comentario in lote])
+
+
+def analizar_archivo_comentarios(ruta: str, nombre: str, resumir_lote: Callable[[str], str],
+                                 consolidar: Callable[[List[str], Dict], str],
+                                 progreso: Optional[Callable] = None, tamano_lote: int = TAMANO_LOTE,
+                                 max_workers: int = MAX_WORKERS) -> Dict:
+    """
+    Analiza un archivo de comentarios (JSON, NDJSON o CSV) leyéndolo por
+    partes: el sentimiento se calcula en lotes paralelos con el motor
+    configurado (core.sentiment_analysis) y se acumulan solo agregados
+    (conteos por sentimiento, por día y hashtags) más una muestra para el
+    resumen. `resumir_lote(texto)` resume un bloque de comentarios y
+    `consolidar(resumenes, estadisticas)` integra los resúmenes parciales.
+    Si se indica `progreso`, se llama como progreso(paso, total, mensaje).
+    """
+    tamano_archivo = os.path.getsize(ruta) or 1
+    por_sentimiento: Counter = Counter()
+    por_dia: Dict[str, Counter] = defaultdict(Counter)
+    hashtags: Counter = Counter()
+    muestra = _Muestra(tamano=LOTES_RESUMEN * MAX_CARACTERES_LOTE // 100)
+    invalidos = 0
+
+    def acumular(lote, resultados):
+        for comentario, (sentimiento, _) in zip(lote, resultados):
+            por_sentimiento[sentimiento] += 1
+            dia = str(comentario.get('timestamp') or '')[:10] or 'sin fecha'
+            por_dia[dia][sentimiento] += 1
+            hashtags.update(tag.lower() for tag in _HASHTAG.findall(comentario['text']))
+            muestra.agregar(sentimiento, comentario['text'])
+
+    with open(ruta, 'rb') as archivo, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def validos():
+            nonlocal invalidos
+            for comentario in iter_comments(archivo, nombre):
+                if isinstance(comentario, dict) and str(comentario.get('text') or '').strip():
+                    yield comentario
+                else:
+                    invalidos += 1
+
+        # Se mantienen pocos lotes en vuelo: el archivo se lee al ritmo del análisis
+        en_vuelo = []
+        for lote in _lotes(validos(), tamano_lote):
+            en_vuelo.append((lote, executor.submit(contextvars.copy_context().run, _analizar_lote, lote)))
+            if len(en_vuelo) >= MAX_LOTES_EN_VUELO:
+                lote_listo, futuro = en_vuelo.pop(0)
+                acumular(lote_listo, futuro.result())
+                if progreso:
+                    leido = archivo.tell() / tamano_archivo
+                    progreso(round(leido * FRACCION_SENTIMIENTO * 1000), 1000,
+                             f"{sum(por_sentimiento.values()):,} comentarios analizados")
+        for lote_listo, futuro in en_vuelo:
+            acumular(lote_listo, futuro.result())
+
+    total = sum(por_sentimiento.values())
+    estadisticas = {
+        'total': total,
+        'invalidos': invalidos,
+        'por_sentimiento': {s: por_sentimiento.get(s, 0) for s in SENTIMIENTOS if por_sentimiento.get(s)},
+        'por_dia': {dia: dict(conteo) for dia, conteo in sorted(por_dia.items())},
+        'hashtags': dict(hashtags.most_common(TOP_HASHTAGS)),
+    }
+    # Sentimientos fuera de los cuatro de Comprehend (ej. UNKNOWN si falló el análisis)
+    for sentimiento, conteo in por_sentimiento.items():
+        estadisticas['por_sentimiento'].setdefault(sentimiento, conteo)
+    if not total:
+        return {**estadisticas, 'resumen': "No se encontraron comentarios con texto en el archivo.", 'muestra': 0}
+
+    elegidos = muestra.extraer(LOTES_RESUMEN * MAX_CARACTERES_LOTE // 100)
+    grupos = cluster_comments([texto for _, texto in elegidos], [sentimiento for sentimiento, _ in elegidos])
+    bloques = _lotes_de_texto(grupos, LOTES_RESUMEN, MAX_CARACTERES_LOTE)
+    if progreso:
+        progreso(round(FRACCION_SENTIMIENTO * 1000), 1000, f"Resumiendo {len(bloques)} bloques de la muestra")
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(bloques))) as executor:
+        futuros = [executor.submit(contextvars.copy_context().run, resumir_lote, bloque) for bloque in bloques]
+        resumenes = [futuro.result() for futuro in futuros]
+    resumenes = [r for r in resumenes if r and not r.startswith("Error")]
+    if progreso:
+        progreso(950, 1000, "Consolidando resúmenes")
+    resumen = consolidar(resumenes, estadisticas) if len(resumenes) > 1 else (resumenes or ["No se pudo generar el resumen."])[0]
+    return {**estadisticas, 'resumen': resumen, 'muestra': sum(sum(parse_comment_lines(b)[1]) for b in bloques)}
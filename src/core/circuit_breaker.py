@@ -0,0 +1,146 @@
+# core/circuit_breaker.py
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .metrics import record_event
+
+logger = logging.getLogger(__name__)
+
+# Estados del circuito
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# failure_threshold: fallos consecutivos para abrir; recovery_timeout: segundos
+# en abierto antes de dejar pasar una llamada de prueba; slow_call_s: una
+# llamada exitosa más lenta que esto también cuenta como fallo.
+DEFAULT_BREAKERS = {
+    'bedrock': {'failure_threshold': 3, 'recovery_timeout': 30, 'slow_call_s': 150},
+    'bedrock-kb': {'failure_threshold': 3, 'recovery_timeout': 30, 'slow_call_s': 10},
+    'comprehend': {'failure_threshold': 5, 'recovery_timeout': 15, 'slow_call_s': 5},
+}
+
+_breakers: Dict[str, 'CircuitBreaker'] = {}
+_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """
+    La dependencia está marcada como caída: la llamada se rechaza sin esperar.
+    """
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Servicio '{name}' no disponible temporalmente (reintento en {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de una dependencia externa. Tras `failure_threshold`
+    fallos seguidos se abre y rechaza las llamadas de inmediato; pasado
+    `recovery_timeout` deja pasar una sola llamada de prueba (semiabierto)
+    que lo cierra si funciona o lo vuelve a abrir si falla.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30,
+                 slow_call_s: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_s = slow_call_s
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        # Se cuenta como evento para que el cambio aparezca en métricas y EMF
+        logger.warning(f"Circuito '{self.name}': {self.state} -> {state}")
+        self.state = state
+        record_event('circuit_breaker', f"{self.name}:{state}", breaker=self.name, failures=self.failures)
+
+    def before_call(self):
+        """
+        Lanza CircuitOpenError si la llamada no debe intentarse.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            restante = self.opened_at + self.recovery_timeout - time.monotonic()
+            if self.state == OPEN and restante <= 0:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(self.name, max(0.0, restante))
+
+    def on_success(self, duration: float = 0.0):
+        if self.slow_call_s and duration > self.slow_call_s:
+            logger.warning(f"Circuito '{self.name}': llamada lenta ({duration:.1f}s)")
+            self.on_failure()
+            return
+        with self._lock:
+            self.failures = 0
+            self._probe_in_flight = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'name': self.name, 'state': self.state, 'failures': self.failures}
+
+
+def _config() -> Dict[str, Dict]:
+    # CIRCUIT_BREAKERS='{"bedrock": {"recovery_timeout": 60}}' sobrescribe los valores por defecto
+    config = {name: dict(values) for name, values in DEFAULT_BREAKERS.items()}
+    try:
+        for name, values in json.loads(os.environ.get('CIRCUIT_BREAKERS', '{}')).items():
+            config.setdefault(name, {}).update(values)
+    except ValueError as e:
+        logger.error(f"CIRCUIT_BREAKERS no es un JSON válido: {e}")
+    return config
+
+
+def get_breaker(service: str, resource: Optional[str] = None) -> CircuitBreaker:
+    """
+    Retorna el circuit breaker compartido por el proceso para un servicio y,
+    opcionalmente, un recurso (ej. un modelo de Bedrock), con la misma
+    convención de nombres que core.rate_limiter.
+    """
+    name = f"{service}/{resource}" if resource else service
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                config = _config()
+                breaker = CircuitBreaker(name, **{**config.get(service, {}), **config.get(name, {})})
+                _breakers[name] = breaker
+    return breaker
+
+
+def states() -> List[Dict]:
+    """
+    Estado actual de todos los circuitos creados en el proceso.
+    """
+    with _lock:
+        return [breaker.snapshot() for breaker in _breakers.values()]
+
+
+def reset_breakers():
+    with _lock:
+        _breakers.clear()
@@ -0,0 +1,297 @@
+# core/comment_archive.py
+"""
+Exportación de los comentarios procesados de DynamoDB a Parquet, particionado
+por fecha (estilo Hive: <destino>/fecha=AAAA-MM-DD/part-<corrida>.parquet),
+en un directorio local o en S3 (s3://bucket/prefijo). Cada exportación agrega
+archivos nuevos solo con los comentarios posteriores a la anterior, y puede
+marcar lo exportado para que el TTL de DynamoDB lo borre. Una exportación
+completa (--full) reemplaza todos los archivos anteriores.
+
+Uso:
+    python -m core.comment_archive export ./archivo_comentarios
+    python -m core.comment_archive export s3://mi-bucket/comentarios --expire-after-days 90
+    python -m core.comment_archive query ./archivo_comentarios
+"""
+import argparse
+import calendar
+import datetime
+import glob
+import io
+import json
+import os
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from .aws_clients import get_client
+from .comment_feed import SENTIMIENTOS, SentimentWatermarks
+from .metrics import track_call, record_aws_response
+
+ARCHIVO_ESTADO = '_export_state.json'
+COLUMNA_PARTICION = 'fecha'
+COMPRESION = 'zstd'
+PREFIJO_ARCHIVO = 'part-'
+# DeleteObjects acepta hasta 1000 claves por llamada
+LOTE_BORRADO_S3 = 1000
+PUNTAJES = ('Positive', 'Negative', 'Neutral', 'Mixed')
+
+
+def _pyarrow():
+    # Dependencia opcional: solo la necesitan la exportación y las consultas
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("La exportación a Parquet requiere pyarrow (pip install pyarrow)") from e
+
+
+def _esquema(pa):
+    return pa.schema([
+        ('comment_id', pa.string()),
+        ('timestamp', pa.timestamp('s', tz='UTC')),
+        ('text', pa.string()),
+        ('sentiment', pa.dictionary(pa.int8(), pa.string())),
+        ('score_positive', pa.float32()),
+        ('score_negative', pa.float32()),
+        ('score_neutral', pa.float32()),
+        ('score_mixed', pa.float32()),
+        ('entity_texts', pa.list_(pa.string())),
+        ('entity_types', pa.list_(pa.dictionary(pa.int8(), pa.string()))),
+        ('entity_scores', pa.list_(pa.float32())),
+    ])
+
+
+def _epoch(timestamp: str) -> int:
+    return calendar.timegm(time.strptime(timestamp[:19], '%Y-%m-%dT%H:%M:%S'))
+
+
+def to_table(comments: List[Dict]):
+    """
+    Convierte comentarios procesados a una tabla de Arrow: columnas de
+    puntaje por sentimiento y entidades aplanadas en listas paralelas.
+    """
+    pa = _pyarrow()
+    entidades = [c.get('entities') or [] for c in comments]
+    puntajes = [c.get('sentiment_score') or {} for c in comments]
+    columnas = {
+        'comment_id': [c['comment_id'] for c in comments],
+        'timestamp': [datetime.datetime.fromtimestamp(_epoch(c['timestamp']), datetime.timezone.utc) for c in comments],
+        'text': [c.get('text') for c in comments],
+        'sentiment': [c.get('sentiment') for c in comments],
+        'entity_texts': [[e.get('Text') for e in lista] for lista in entidades],
+        'entity_types': [[e.get('Type') for e in lista] for lista in entidades],
+        'entity_scores': [[float(e.get('Score', 0)) for e in lista] for lista in entidades],
+    }
+    for clave in PUNTAJES:
+        columnas[f"score_{clave.lower()}"] = [float(p[clave]) if p.get(clave) is not None else None for p in puntajes]
+    return pa.Table.from_pydict(columnas, schema=_esquema(pa))
+
+
+class _Destino:
+    """
+    Escribe y lee archivos bajo un directorio local o un prefijo de S3.
+    """
+
+    def __init__(self, destino: str):
+        self.es_s3 = destino.startswith('s3://')
+        if self.es_s3:
+            self.bucket, _, prefijo = destino[len('s3://'):].partition('/')
+            self.prefijo = prefijo.strip('/')
+        else:
+            self.raiz = destino
+
+    def _clave(self, ruta: str) -> str:
+        return f"{self.prefijo}/{ruta}" if self.prefijo else ruta
+
+    def escribir(self, ruta: str, contenido: bytes):
+        if self.es_s3:
+            with track_call('s3', 'put_object', request_bytes=len(contenido)) as record:
+                response = get_client('s3').put_object(Bucket=self.bucket, Key=self._clave(ruta), Body=contenido)
+                record_aws_response(record, response)
+        else:
+            completa = os.path.join(self.raiz, ruta)
+            os.makedirs(os.path.dirname(completa), exist_ok=True)
+            with open(completa, 'wb') as f:
+                f.write(contenido)
+
+    def leer(self, ruta: str) -> Optional[bytes]:
+        if self.es_s3:
+            s3 = get_client('s3')
+            try:
+                with track_call('s3', 'get_object') as record:
+                    response = s3.get_object(Bucket=self.bucket, Key=self._clave(ruta))
+                    contenido = response['Body'].read()
+                    record_aws_response(record, response)
+                return contenido
+            except s3.exceptions.NoSuchKey:
+                return None
+        completa = os.path.join(self.raiz, ruta)
+        if not os.path.exists(completa):
+            return None
+        with open(completa, 'rb') as f:
+            return f.read()
+
+    def listar_particiones(self) -> List[str]:
+        """
+        Rutas relativas de los archivos Parquet de todas las particiones.
+        """
+        if self.es_s3:
+            rutas = []
+            paginator = get_client('s3').get_paginator('list_objects_v2')
+            for pagina in paginator.paginate(Bucket=self.bucket, Prefix=self._clave(f"{COLUMNA_PARTICION}=")):
+                for objeto in pagina.get('Contents', []):
+                    ruta = objeto['Key'][len(self.prefijo) + 1:] if self.prefijo else objeto['Key']
+                    if os.path.basename(ruta).startswith(PREFIJO_ARCHIVO) and ruta.endswith('.parquet'):
+                        rutas.append(ruta)
+            return rutas
+        patron = os.path.join(self.raiz, f"{COLUMNA_PARTICION}=*", f"{PREFIJO_ARCHIVO}*.parquet")
+        return [os.path.relpath(ruta, self.raiz).replace(os.sep, '/') for ruta in glob.glob(patron)]
+
+    def borrar(self, rutas: List[str]):
+        if self.es_s3:
+            s3 = get_client('s3')
+            for inicio in range(0, len(rutas), LOTE_BORRADO_S3):
+                lote = rutas[inicio:inicio + LOTE_BORRADO_S3]
+                with track_call('s3', 'delete_objects', items=len(lote)) as record:
+                    response = s3.delete_objects(Bucket=self.bucket, Delete={
+                        'Objects': [{'Key': self._clave(ruta)} for ruta in lote], 'Quiet': True})
+                    record_aws_response(record, response)
+                if response.get('Errors'):
+                    raise RuntimeError(f"No se pudieron borrar {len(response['Errors'])} archivos anteriores: "
+                                       f"{response['Errors'][0]}")
+            return
+        for ruta in rutas:
+            completa = os.path.join(self.raiz, ruta)
+            os.remove(completa)
+            try:
+                os.rmdir(os.path.dirname(completa))  # solo si la partición quedó vacía
+            except OSError:
+                pass
+
+
+def export_comments(db_manager, destino: str, expire_after_days: Optional[int] = None, full: bool = False) -> Dict:
+    """
+    Exporta a Parquet los comentarios nuevos desde la exportación anterior.
+
+    Lee cada partición de sentimiento del índice SentimentTimestampIndex a
+    partir de su marca (guardada en _export_state.json junto a los
+    archivos), agrupa por fecha del comentario y escribe un archivo por fecha
+    y corrida, así que nunca reescribe lo ya exportado. La marca es el
+    timestamp del comentario: un comentario que llegue con un timestamp
+    anterior a la última exportación solo se incluye con full=True, que
+    vuelve a exportar todo en archivos nuevos y luego borra los de las
+    corridas anteriores, para que read_archive no cuente dos veces ningún
+    comentario. El historial de corridas del estado se conserva.
+
+    Con expire_after_days, los comentarios exportados se marcan con
+    expires_at = timestamp + días y se activa el TTL de la tabla: DynamoDB
+    los borra solos y las consultas históricas pasan al archivo Parquet.
+    Retorna un resumen de la corrida.
+    """
+    pa = _pyarrow()
+    salida = _Destino(destino)
+    estado_previo = salida.leer(ARCHIVO_ESTADO)
+    estado = json.loads(estado_previo) if estado_previo else {}
+    marcas = SentimentWatermarks.from_dict({} if full else estado)
+
+    nuevos = []
+    for sentimiento in SENTIMIENTOS:
+        items = db_manager.get_comments_since(sentimiento, marcas.get(sentimiento), attributes=None)
+        nuevos.extend(marcas.filter_new(sentimiento, items))
+
+    corrida = f"{datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    por_fecha = defaultdict(list)
+    for comentario in nuevos:
+        por_fecha[comentario['timestamp'][:10]].append(comentario)
+
+    archivos = []
+    for fecha, comentarios in sorted(por_fecha.items()):
+        comentarios.sort(key=lambda c: (c['timestamp'], c['comment_id']))
+        buffer = io.BytesIO()
+        pa.parquet.write_table(to_table(comentarios), buffer, compression=COMPRESION)
+        ruta = f"{COLUMNA_PARTICION}={fecha}/part-{corrida}.parquet"
+        salida.escribir(ruta, buffer.getvalue())
+        archivos.append({'ruta': ruta, 'filas': len(comentarios), 'bytes': buffer.tell()})
+
+    # Los archivos de otras corridas que reemplaza una exportación completa
+    nuestros = {a['ruta'] for a in archivos}
+    reemplazados = [ruta for ruta in salida.listar_particiones() if ruta not in nuestros] if full else []
+
+    # El estado se guarda después de los datos: si la corrida falla a mitad,
+    # la siguiente vuelve a exportar desde la marca anterior
+    registro = {'corrida': corrida, 'archivos': archivos}
+    if full:
+        registro.update(completa=True, reemplazados=len(reemplazados))
+    estado = {**marcas.to_dict(), 'ultima_corrida': corrida,
+              'corridas': estado.get('corridas', []) + ([registro] if archivos or full else [])}
+    salida.escribir(ARCHIVO_ESTADO, json.dumps(estado, ensure_ascii=False, indent=2).encode('utf-8'))
+    # Se borran al final: si algo falla antes, los archivos anteriores siguen ahí
+    # y basta con repetir la exportación completa
+    salida.borrar(reemplazados)
+
+    expirados = 0
+    if expire_after_days is not None and nuevos:
+        db_manager.enable_ttl()
+        segundos = expire_after_days * 24 * 3600
+        expirados = db_manager.set_expiration((c, _epoch(c['timestamp']) + segundos) for c in nuevos)
+
+    return {'corrida': corrida, 'filas': len(nuevos), 'archivos': archivos, 'expirados': expirados,
+            'reemplazados': len(reemplazados)}
+
+
+def read_archive(destino: str, columns: Optional[List[str]] = None, filter=None):
+    """
+    Abre el archivo Parquet como un dataset de Arrow con la columna de
+    partición 'fecha'; `columns` y `filter` (expresión de pyarrow.dataset)
+    se aplican al leer, así que solo se leen las columnas y fechas necesarias.
+    """
+    pa = _pyarrow()
+    import pyarrow.dataset as ds
+    if destino.startswith('s3://'):
+        from pyarrow import fs
+        sistema, ruta = fs.S3FileSystem(region=os.environ.get('AWS_REGION', 'us-east-1')), destino[len('s3://'):]
+    else:
+        sistema, ruta = None, destino
+    dataset = ds.dataset(ruta, filesystem=sistema, format='parquet',
+                         partitioning=ds.partitioning(pa.schema([(COLUMNA_PARTICION, pa.string())]), flavor='hive'))
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def sentiment_by_day(destino: str):
+    """
+    Conteo de comentarios y puntaje positivo promedio por fecha y sentimiento,
+    leyendo solo tres columnas del archivo.
+    """
+    tabla = read_archive(destino, columns=[COLUMNA_PARTICION, 'sentiment', 'score_positive'])
+    tabla = tabla.set_column(1, 'sentiment', tabla.column('sentiment').cast('string'))
+    return (tabla.group_by([COLUMNA_PARTICION, 'sentiment'])
+            .aggregate([('sentiment', 'count'), ('score_positive', 'mean')])
+            .sort_by([(COLUMNA_PARTICION, 'ascending'), ('sentiment', 'ascending')]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('accion', choices=['export', 'query'])
+    parser.add_argument('destino', help="Directorio local o s3://bucket/prefijo")
+    parser.add_argument('--table', help="Tabla DynamoDB de comentarios (por defecto, la del esquema "
+                                        "DYNAMODB_TABLE_SCHEMA)")
+    parser.add_argument('--tenant', help="Inquilino a exportar en el esquema por inquilino (por defecto COMMENTS_TENANT)")
+    parser.add_argument('--expire-after-days', type=int, default=None,
+                        help="Marcar lo exportado para que el TTL de DynamoDB lo borre tras N días")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignorar la marca, exportar todo de nuevo y borrar los archivos anteriores")
+    args = parser.parse_args()
+
+    if args.accion == 'export':
+        from .database_management import DynamoDBManager
+        resumen = export_comments(DynamoDBManager(args.table, tenant=args.tenant), args.destino, args.expire_after_days, args.full)
+        print(f"✅ {resumen['filas']} comentarios exportados en {len(resumen['archivos'])} archivos "
+              f"(corrida {resumen['corrida']}, {resumen['expirados']} marcados para expirar)")
+    else:
+        print(sentiment_by_day(args.destino).to_pandas().to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
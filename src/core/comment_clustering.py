@@ -0,0 +1,228 @@
+# core/comment_clustering.py
+"""
+Agrupación de comentarios casi iguales antes de resumirlos.
+
+Cada comentario se normaliza (minúsculas, sin tildes ni puntuación) y se
+describe con una firma MinHash de sus k-gramas de caracteres; los
+candidatos a parecerse salen de LSH por bandas. Cada grupo tiene un centro
+(su comentario más frecuente) y solo incluye textos cuya similitud de
+Jaccard estimada con él llega a UMBRAL_SIMILITUD; los grupos nunca mezclan
+sentimientos. Al modelo se le envía solo el centro de cada grupo con la
+cantidad de comentarios que representa, así el prompt crece con las opiniones distintas y no con el
+volumen. Cada grupo conserva los índices de sus miembros en la lista de
+entrada para poder rastrear el resumen hasta los comentarios originales.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+LONGITUD_KGRAMA = 5
+NUM_PERMUTACIONES = 64
+FILAS_POR_BANDA = 4
+UMBRAL_SIMILITUD = 0.6
+SEMILLA = 1
+
+# Presupuesto del bloque de comentarios en el prompt
+MAX_CARACTERES_PROMPT = 12000
+MAX_CARACTERES_COMENTARIO = 600
+
+_MEZCLA = np.uint64(0x9E3779B97F4A7C15)
+_NO_PALABRA = re.compile(r'[\W_]+')
+_VINETA = re.compile(r'^\s*(?:[-*•]\s+)?(?:\(x(\d+)\)\s+)?')
+
+
+def normalize_text(texto: str) -> str:
+    """
+    Forma comparable de un comentario: minúsculas, solo ASCII (sin tildes;
+    la ñ queda como n), sin puntuación ni '#', con los espacios colapsados.
+    """
+    texto = unicodedata.normalize('NFKD', (texto or '').lower()).encode('ascii', 'ignore').decode('ascii')
+    return _NO_PALABRA.sub(' ', texto).strip()
+
+
+def _firmas(textos: Sequence[str]) -> np.ndarray:
+    """
+    Firmas MinHash (una fila de NUM_PERMUTACIONES por texto) de los
+    k-gramas de bytes de cada texto, calculadas para todos a la vez. Cada
+    permutación es un hash multiplicar-desplazar (a * h + b) >> 32 sobre 64
+    bits, sin módulo.
+    """
+    datos = [t.encode('utf-8').ljust(LONGITUD_KGRAMA) for t in textos]
+    largos = np.fromiter(map(len, datos), dtype=np.int64, count=len(datos))
+    buffer = np.frombuffer(b''.join(datos), dtype=np.uint8).astype(np.uint64)
+    n = len(buffer) - LONGITUD_KGRAMA + 1
+    codigos = np.zeros(n, dtype=np.uint64)
+    for j in range(LONGITUD_KGRAMA):
+        codigos = (codigos << np.uint64(8)) | buffer[j:j + n]
+    # Solo los k-gramas que caen completos dentro de un mismo texto
+    inicios = np.concatenate(([0], np.cumsum(largos)[:-1]))
+    texto = np.repeat(np.arange(len(datos)), largos)[:n]
+    codigos = codigos[np.arange(n) - inicios[texto] <= largos[texto] - LONGITUD_KGRAMA]
+    hashes = (codigos * _MEZCLA) >> np.uint64(32)
+
+    cortes = np.concatenate(([0], np.cumsum(largos - LONGITUD_KGRAMA + 1)[:-1]))
+    rng = np.random.default_rng(SEMILLA)
+    a = rng.integers(0, 1 << 63, NUM_PERMUTACIONES, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, NUM_PERMUTACIONES, dtype=np.uint64)
+    firmas = np.empty((len(datos), NUM_PERMUTACIONES), dtype=np.uint32)
+    desplazamiento = np.uint64(32)
+    for k in range(NUM_PERMUTACIONES):
+        firmas[:, k] = np.minimum.reduceat((a[k] * hashes + b[k]) >> desplazamiento, cortes)
+    return firmas
+
+
+def _cubetas(firmas: np.ndarray, grupos: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Cubetas de LSH: cada banda de FILAS_POR_BANDA valores de la firma (junto
+    con el grupo de sentimiento) es una clave, y los textos que comparten
+    alguna clave son candidatos a parecerse. Por banda devuelve el orden de
+    los textos por clave y, para cada texto, el inicio y fin de su cubeta
+    en ese orden.
+    """
+    bandas = []
+    for inicio in range(0, NUM_PERMUTACIONES - FILAS_POR_BANDA + 1, FILAS_POR_BANDA):
+        clave = grupos.astype(np.uint64)
+        for columna in range(inicio, inicio + FILAS_POR_BANDA):
+            clave = clave * np.uint64(1000003) + firmas[:, columna]
+        orden = np.argsort(clave, kind='stable')
+        ordenada = clave[orden]
+        cortes = np.flatnonzero(np.concatenate(([True], ordenada[1:] != ordenada[:-1], [True])))
+        cubeta = np.empty(len(orden), dtype=np.int64)
+        cubeta[orden] = np.repeat(np.arange(len(cortes) - 1), np.diff(cortes))
+        bandas.append((orden, cortes[cubeta], cortes[cubeta + 1]))
+    return bandas
+
+
+def cluster_comments(texts: Sequence[str], sentiments: Optional[Sequence[str]] = None,
+                     weights: Optional[Sequence[int]] = None, threshold: float = UMBRAL_SIMILITUD) -> List[Dict]:
+    """
+    Agrupa comentarios casi iguales dentro de cada sentimiento. Devuelve una
+    lista de grupos ordenada por sentimiento (en orden de aparición) y por
+    tamaño, cada uno como diccionario con:
+        sentiment       sentimiento del grupo (None si no se indicaron)
+        representative  texto del comentario representante
+        count           comentarios del grupo (suma de `weights` si se indican)
+        members         índices de los miembros en `texts`
+    """
+    if not texts:
+        return []
+    sentiments = list(sentiments) if sentiments is not None else [None] * len(texts)
+    weights = list(weights) if weights is not None else [1] * len(texts)
+
+    # Los textos idénticos tras normalizar se agrupan sin calcular firmas
+    unicos: Dict[Tuple, int] = {}
+    miembros_unico: List[List[int]] = []
+    for indice, (texto, sentimiento) in enumerate(zip(texts, sentiments)):
+        clave = (sentimiento, normalize_text(texto))
+        if clave not in unicos:
+            unicos[clave] = len(miembros_unico)
+            miembros_unico.append([])
+        miembros_unico[unicos[clave]].append(indice)
+
+    claves = list(unicos)
+    orden_sentimientos = list(dict.fromkeys(s for s, _ in claves))
+    grupos = np.array([orden_sentimientos.index(s) for s, _ in claves], dtype=np.int64)
+    pesos = np.array([sum(weights[i] for i in m) for m in miembros_unico], dtype=np.float64)
+    firmas = _firmas([t for _, t in claves])
+
+    # Agrupamiento en estrella: el texto más frecuente aún sin grupo es el
+    # centro de uno nuevo y se lleva a sus candidatos de LSH que se le parecen.
+    # Todos los miembros se comparan con el centro, así que no se encadenan
+    # comentarios largos que solo comparten una frase.
+    bandas = _cubetas(firmas, grupos)
+    asignado = np.full(len(claves), -1, dtype=np.int64)
+    resultado = []
+    for centro in np.argsort(-pesos, kind='stable').tolist():
+        if asignado[centro] >= 0:
+            continue
+        # Puede repetir textos (los que comparten varias bandas); el set final los une
+        candidatos = np.concatenate([orden[inicio[centro]:fin[centro]] for orden, inicio, fin in bandas])
+        candidatos = candidatos[(asignado[candidatos] < 0) & (grupos[candidatos] == grupos[centro])]
+        similares = candidatos[(firmas[candidatos] == firmas[centro]).mean(axis=1) >= threshold]
+        componente = sorted(set(similares.tolist()) | {centro})
+        asignado[componente] = len(resultado)
+        resultado.append({
+            'sentiment': claves[centro][0],
+            'representative': texts[miembros_unico[centro][0]],
+            'count': int(pesos[componente].sum()),
+            'members': sorted(i for u in componente for i in miembros_unico[u]),
+        })
+    resultado.sort(key=lambda g: (orden_sentimientos.index(g['sentiment']), -g['count'], g['members'][0]))
+    return resultado
+
+
+def parse_comment_lines(texto: str) -> Tuple[List[str], List[int]]:
+    """
+    Separa un bloque de comentarios (uno por línea, con o sin viñeta) en
+    textos y pesos. Una línea '- (x12) texto', como las que produce
+    format_clusters, pesa 12; las demás pesan 1.
+    """
+    textos, pesos = [], []
+    for linea in (texto or '').splitlines():
+        vineta = _VINETA.match(linea)
+        contenido = linea[vineta.end():].strip()
+        if contenido:
+            textos.append(contenido)
+            pesos.append(int(vineta.group(1)) if vineta.group(1) else 1)
+    return textos, pesos
+
+
+def format_cluster_line(grupo: Dict) -> str:
+    """
+    Línea del prompt para un grupo: '- (xN) representante', o '- texto' si
+    el grupo tiene un solo comentario.
+    """
+    texto = ' '.join(grupo['representative'].split())[:MAX_CARACTERES_COMENTARIO]
+    return f"- (x{grupo['count']}) {texto}" if grupo['count'] > 1 else f"- {texto}"
+
+
+def format_clusters(clusters: List[Dict], max_chars: int = MAX_CARACTERES_PROMPT) -> str:
+    """
+    Bloque de comentarios para el prompt: un representante por línea con
+    '(xN)' si agrupa N comentarios, bajo un encabezado por sentimiento
+    cuando se conocen. Si no caben todos en `max_chars`, se priorizan los
+    grupos más grandes (siempre al menos el mayor de cada sentimiento) y lo
+    omitido se resume en una línea con su volumen.
+    """
+    por_sentimiento: Dict[Optional[str], List[Dict]] = defaultdict(list)
+    for grupo in clusters:
+        por_sentimiento[grupo['sentiment']].append(grupo)
+    con_encabezado = any(s is not None for s in por_sentimiento)
+
+    incluidos = set()
+    largo = 0
+    primeros = [grupos[0] for grupos in por_sentimiento.values()]
+    resto = sorted((g for grupos in por_sentimiento.values() for g in grupos[1:]), key=lambda g: -g['count'])
+    for posicion, grupo in enumerate(primeros + resto):
+        linea = len(format_cluster_line(grupo)) + 1
+        if posicion >= len(primeros) and largo + linea > max_chars:
+            continue
+        incluidos.add(id(grupo))
+        largo += linea
+
+    bloques = []
+    for sentimiento, grupos in por_sentimiento.items():
+        lineas = []
+        if con_encabezado:
+            total = sum(g['count'] for g in grupos)
+            lineas.append(f"[{sentimiento}] {total} comentarios, {len(grupos)} opiniones distintas")
+        lineas.extend(format_cluster_line(g) for g in grupos if id(g) in incluidos)
+        omitidos = [g for g in grupos if id(g) not in incluidos]
+        if omitidos:
+            lineas.append(f"- (+{sum(g['count'] for g in omitidos)} comentarios en {len(omitidos)} "
+                          f"opiniones menos frecuentes)")
+        bloques.append('\n'.join(lineas))
+    return '\n\n'.join(bloques)
+
+
+def clustered_prompt_block(texts: Sequence[str], sentiments: Optional[Sequence[str]] = None,
+                           weights: Optional[Iterable[int]] = None,
+                           max_chars: int = MAX_CARACTERES_PROMPT) -> Tuple[str, List[Dict]]:
+    """
+    Agrupa los comentarios y devuelve (bloque para el prompt, grupos).
+    """
+    grupos = cluster_comments(texts, sentiments, list(weights) if weights is not None else None)
+    return format_clusters(grupos, max_chars), grupos
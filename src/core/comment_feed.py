@@ -0,0 +1,136 @@
+# core/comment_feed.py
+import contextvars
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .search_index import FUENTE_PALABRA, terms_for_comment
+
+# Particiones del índice SentimentTimestampIndex que lee el dashboard
+# (UNKNOWN: comentarios cuyo análisis de sentimiento falló)
+SENTIMIENTOS = ('POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED', 'UNKNOWN')
+ULTIMOS_POR_DEFECTO = 20
+
+
+def puntaje_1_a_5(sentiment_score: Dict[str, float]) -> Optional[float]:
+    """
+    Lleva el SentimentScore de Comprehend a una escala de 1 (negativo) a 5
+    (positivo); neutral y mixto cuentan como punto medio.
+    """
+    if not sentiment_score:
+        return None
+    positivo = sentiment_score.get('Positive', 0.0)
+    intermedio = sentiment_score.get('Neutral', 0.0) + sentiment_score.get('Mixed', 0.0)
+    return 1 + 4 * (positivo + 0.5 * intermedio)
+
+
+class SentimentWatermarks:
+    """
+    Marca de tiempo por partición de sentimiento más los ids ya vistos con
+    ese mismo timestamp (get_comments_since incluye la marca, así que esos
+    vuelven a llegar y se descartan). Se puede guardar como JSON.
+    """
+
+    def __init__(self, marcas: Optional[Dict[str, str]] = None, ids_en_marca: Optional[Dict[str, List[str]]] = None):
+        self.marcas: Dict[str, str] = dict(marcas or {})
+        self._ids_en_marca: Dict[str, set] = {s: set(ids) for s, ids in (ids_en_marca or {}).items()}
+
+    def get(self, sentimiento: str) -> Optional[str]:
+        return self.marcas.get(sentimiento)
+
+    def filter_new(self, sentimiento: str, items: List[Dict]) -> List[Dict]:
+        """
+        Descarta los ítems ya vistos y avanza la marca de la partición.
+        """
+        marca = self.marcas.get(sentimiento)
+        vistos = self._ids_en_marca.setdefault(sentimiento, set())
+        nuevos = [item for item in items if not (item['timestamp'] == marca and item['comment_id'] in vistos)]
+        if nuevos:
+            nueva_marca = max(item['timestamp'] for item in nuevos)
+            if nueva_marca != marca:
+                vistos.clear()
+            vistos.update(item['comment_id'] for item in nuevos if item['timestamp'] == nueva_marca)
+            self.marcas[sentimiento] = nueva_marca
+        return nuevos
+
+    def to_dict(self) -> Dict:
+        return {'marcas': self.marcas, 'ids_en_marca': {s: sorted(ids) for s, ids in self._ids_en_marca.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SentimentWatermarks':
+        return cls(data.get('marcas'), data.get('ids_en_marca'))
+
+
+class CommentFeed:
+    """
+    Estado incremental del dashboard de comentarios. Guarda una marca de
+    tiempo por partición de sentimiento y en cada refresh() solo pide a
+    DynamoDB los comentarios desde esa marca, que se suman a agregados
+    (conteos por sentimiento y por hora, puntaje promedio, palabras clave y
+    últimos comentarios). Nunca vuelve a leer lo ya procesado.
+    """
+
+    def __init__(self, sentimientos=SENTIMIENTOS, ultimos: int = ULTIMOS_POR_DEFECTO):
+        self.sentimientos = sentimientos
+        self.max_ultimos = ultimos
+        self.marcas = SentimentWatermarks()
+        self.por_sentimiento: Counter = Counter()
+        self.por_hora: Dict[str, Counter] = {}
+        self.palabras: Counter = Counter()
+        self.ultimos: List[Dict] = []
+        self._suma_puntaje = 0.0
+        self._con_puntaje = 0
+        self.actualizado: Optional[float] = None
+        self.nuevos_ultimo_refresh = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return sum(self.por_sentimiento.values())
+
+    @property
+    def puntaje_promedio(self) -> Optional[float]:
+        return self._suma_puntaje / self._con_puntaje if self._con_puntaje else None
+
+    def _agregar(self, item: Dict):
+        self.por_sentimiento[item['sentiment']] += 1
+        hora = item['timestamp'][:13]
+        self.por_hora.setdefault(hora, Counter())[item['sentiment']] += 1
+        puntaje = puntaje_1_a_5(item.get('sentiment_score'))
+        if puntaje is not None:
+            self._suma_puntaje += puntaje
+            self._con_puntaje += 1
+        self.palabras.update(
+            termino for termino, fuentes in terms_for_comment(item.get('text', '')).items() if FUENTE_PALABRA in fuentes
+        )
+
+    def refresh(self, db_manager, max_workers: int = 5) -> int:
+        """
+        Lee los comentarios nuevos de cada partición en paralelo y los suma
+        al estado. Retorna cuántos comentarios nuevos llegaron.
+        """
+        with self._lock:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futuros = {
+                    sentimiento: executor.submit(contextvars.copy_context().run, db_manager.get_comments_since,
+                                                 sentimiento, self.marcas.get(sentimiento))
+                    for sentimiento in self.sentimientos
+                }
+                nuevos = [item for sentimiento, futuro in futuros.items()
+                          for item in self.marcas.filter_new(sentimiento, futuro.result())]
+            for item in nuevos:
+                self._agregar(item)
+            self.ultimos = sorted(self.ultimos + nuevos, key=lambda item: item['timestamp'],
+                                  reverse=True)[:self.max_ultimos]
+            self.nuevos_ultimo_refresh = len(nuevos)
+            self.actualizado = time.time()
+            return len(nuevos)
+
+    def serie_por_hora(self) -> List[Dict]:
+        """
+        Filas {hora, POSITIVE, NEGATIVE, ...} ordenadas, para los gráficos.
+        """
+        return [{'hora': f"{hora}:00", **{s: conteo.get(s, 0) for s in self.sentimientos if self.por_sentimiento.get(s)}}
+                for hora, conteo in sorted(self.por_hora.items())]
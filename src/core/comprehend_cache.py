@@ -0,0 +1,206 @@
+# core/comprehend_cache.py
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .aws_clients import get_client
+from .metrics import record_aws_response, record_event, track_call
+
+logger = logging.getLogger(__name__)
+
+# COMPREHEND_CACHE_SIZE: entradas del LRU en memoria (0 lo desactiva).
+# COMPREHEND_CACHE_TABLE: tabla DynamoDB del nivel compartido (opcional).
+# COMPREHEND_CACHE_TTL: segundos de vida de las entradas compartidas.
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+_ESPACIOS = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza un texto para la clave de caché: forma Unicode NFC y espacios
+    colapsados. Se conservan mayúsculas y puntuación porque Comprehend las
+    usa (las entidades devuelven el texto tal como aparece).
+    """
+    return _ESPACIOS.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def cache_key(operation: str, text: str, language: str) -> str:
+    partes = '\x1f'.join([operation, language, normalize_text(text)])
+    return hashlib.sha256(partes.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """
+    LRU thread-safe en memoria. En Lambda vive lo mismo que el contenedor.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: str, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DynamoDBCacheTier:
+    """
+    Nivel compartido entre contenedores y ejecuciones, en una tabla DynamoDB
+    con TTL nativo en el atributo 'expires_at'. DynamoDB borra las entradas
+    vencidas con retraso, así que también se descartan al leer.
+    """
+
+    def __init__(self, table_name: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+
+    def create_table(self):
+        """
+        Crea la tabla (clave 'cache_key') y activa el TTL, si no existe.
+        """
+        dynamodb = get_client('dynamodb')
+        try:
+            dynamodb.create_table(
+                TableName=self.table_name,
+                KeySchema=[{'AttributeName': 'cache_key', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'cache_key', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST',
+            )
+            dynamodb.get_waiter('table_exists').wait(TableName=self.table_name)
+            dynamodb.update_time_to_live(
+                TableName=self.table_name,
+                TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expires_at'},
+            )
+            print(f"✅ Tabla de caché '{self.table_name}' creada exitosamente.")
+        except dynamodb.exceptions.ResourceInUseException:
+            print(f"✅ Tabla de caché '{self.table_name}' ya existe.")
+
+    def get(self, key: str) -> Optional[Any]:
+        with track_call('dynamodb', 'cache_get_item') as record:
+            response = get_client('dynamodb').get_item(
+                TableName=self.table_name, Key={'cache_key': {'S': key}},
+                ProjectionExpression='#r, expires_at', ExpressionAttributeNames={'#r': 'result'},
+            )
+            record_aws_response(record, response)
+        item = response.get('Item')
+        if not item or int(item['expires_at']['N']) <= time.time():
+            return None
+        return json.loads(item['result']['S'])
+
+    def put(self, key: str, value: Any):
+        body = json.dumps(value, ensure_ascii=False)
+        with track_call('dynamodb', 'cache_put_item', request_bytes=len(body)) as record:
+            response = get_client('dynamodb').put_item(
+                TableName=self.table_name,
+                Item={
+                    'cache_key': {'S': key},
+                    'result': {'S': body},
+                    'expires_at': {'N': str(int(time.time()) + self.ttl_seconds)},
+                },
+            )
+            record_aws_response(record, response)
+
+
+class ComprehendCache:
+    """
+    Caché de resultados de Comprehend en dos niveles: LRU en memoria y, si
+    se configura, una tabla DynamoDB compartida. Un error del nivel
+    compartido se trata como fallo de caché: nunca impide el análisis.
+    Cada consulta se cuenta como evento 'comprehend_cache' de nombre
+    '<operacion>:memory_hit', ':shared_hit' o ':miss' (core.metrics.record_event).
+    """
+
+    def __init__(self, memory: Optional[LRUCache] = None, shared: Optional[DynamoDBCacheTier] = None):
+        self.memory = memory if memory is not None else LRUCache()
+        self.shared = shared
+        self._stats = {'memory_hit': 0, 'shared_hit': 0, 'miss': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, operation: str, outcome: str):
+        with self._lock:
+            self._stats[outcome] += 1
+        record_event('comprehend_cache', f"{operation}:{outcome}")
+
+    def get(self, operation: str, text: str, language: str) -> Tuple[str, Optional[Any]]:
+        """
+        Retorna (clave, resultado); el resultado es None si no está en caché.
+        """
+        key = cache_key(operation, text, language)
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(operation, 'memory_hit')
+            return key, value
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except Exception as e:
+                logger.warning(f"Caché compartida de Comprehend no disponible: {e}")
+            if value is not None:
+                self.memory.put(key, value)
+                self._count(operation, 'shared_hit')
+                return key, value
+        self._count(operation, 'miss')
+        return key, None
+
+    def put(self, key: str, value: Any):
+        self.memory.put(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.put(key, value)
+            except Exception as e:
+                logger.warning(f"No se pudo guardar en la caché compartida de Comprehend: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Aciertos y fallos acumulados por el proceso, con la tasa de aciertos.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        consultas = sum(stats.values())
+        stats['hit_rate'] = round((stats['memory_hit'] + stats['shared_hit']) / consultas, 4) if consultas else 0.0
+        stats['memory_entries'] = len(self.memory)
+        return stats
+
+    def clear(self):
+        self.memory.clear()
+        with self._lock:
+            self._stats = {'memory_hit': 0, 'shared_hit': 0, 'miss': 0}
+
+
+def cache_from_env() -> ComprehendCache:
+    """
+    Construye la caché según COMPREHEND_CACHE_SIZE, COMPREHEND_CACHE_TABLE y COMPREHEND_CACHE_TTL.
+    """
+    tabla = os.environ.get('COMPREHEND_CACHE_TABLE')
+    shared = DynamoDBCacheTier(tabla, int(os.environ.get('COMPREHEND_CACHE_TTL', DEFAULT_TTL_SECONDS))) if tabla else None
+    memory = LRUCache(int(os.environ.get('COMPREHEND_CACHE_SIZE', DEFAULT_MAX_ENTRIES)))
+    return ComprehendCache(memory, shared)
@@ -0,0 +1,284 @@
+# core/curriculum_library.py
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# core.bedrock_services (boto3) y core.docx_exporter (python-docx) se importan
+# dentro de las funciones: la interfaz usa los presets de este módulo para
+# dibujar la primera página y no debe pagar esas importaciones.
+
+logger = logging.getLogger(__name__)
+
+# Presets que ofrece la interfaz: son la gran mayoría de solicitudes reales
+CONTENIDOS_POR_GRADO = {
+    3: "1. LA FÍSICA Y MAGNITUDES\n2. VECTORES EN EL PLANO\n3. CINEMÁTICA\n4. DINÁMICA LINEAL\n5. TRABAJO Y ENERGÍA\n6. QUÍMICA Y MATERIA",
+    4: "1. ONDAS Y SONIDO\n2. ÓPTICA GEOMÉTRICA\n3. ELECTRICIDAD\n4. MAGNETISMO\n5. QUÍMICA ORGÁNICA\n6. BIOQUÍMICA",
+    5: "1. FÍSICA MODERNA\n2. TERMODINÁMICA\n3. FÍSICA NUCLEAR\n4. QUÍMICA AVANZADA\n5. BIOTECNOLOGÍA\n6. INVESTIGACIÓN CIENTÍFICA"
+}
+
+COMPETENCIA_POR_DEFECTO = "Indaga mediante métodos científicos para construir sus conocimientos."
+
+CAPACIDADES_POR_DEFECTO = (
+    "• Problematiza situaciones para hacer indagación.\n"
+    "• Diseña estrategias para hacer indagación.\n"
+    "• Genera y registra datos o información.\n"
+    "• Analiza datos e información.\n"
+    "• Evalúa y comunica el proceso y resultados de su indagación."
+)
+
+# Secciones que toda programación almacenada debe contener
+SECCIONES_REQUERIDAS = [
+    "COMPETENCIA",
+    "CAPACIDADES",
+    "DESEMPENOS",
+    "CRITERIOS",
+    "INSTRUMENTOS",
+    "SESION",
+]
+
+LONGITUD_MINIMA = 1500
+
+DIRECTORIO_POR_DEFECTO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'biblioteca_curricular'
+)
+
+
+def _normalizar(texto: str) -> str:
+    """
+    Normaliza un texto para que variaciones de espacios no cambien la clave.
+    """
+    lineas = [re.sub(r'\s+', ' ', linea).strip() for linea in str(texto).strip().splitlines()]
+    return '\n'.join(linea for linea in lineas if linea)
+
+
+def _sin_tildes(texto: str) -> str:
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', texto)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+
+def clave_programacion(grado, competencia: str, capacidades: str, contenidos: str) -> str:
+    """
+    Calcula la clave de una combinación grado/competencia/capacidades/contenidos.
+    """
+    partes = [str(grado), _normalizar(competencia), _normalizar(capacidades), _normalizar(contenidos)]
+    return hashlib.sha256('\x1f'.join(partes).encode('utf-8')).hexdigest()[:32]
+
+
+def etapas_generador() -> List[str]:
+    """
+    Etapas de core.model_routing que usa el generador RSIP.
+    """
+    from core import bedrock_services
+
+    return ['programacion_borrador'] + [
+        f'programacion_mejora_{i + 1}' for i in range(len(bedrock_services.CRITERIOS_MEJORA))
+    ] + ['programacion_transversales', 'programacion_esqueleto', 'programacion_sesion']
+
+
+def huella_configuracion() -> str:
+    """
+    Huella de los prompts y modelos del generador. Si cambia, las
+    programaciones almacenadas quedan desactualizadas y deben refrescarse.
+    """
+    from core import bedrock_services
+    from core.model_routing import get_route
+
+    configuracion = json.dumps({
+        'rutas': {etapa: get_route(etapa) for etapa in etapas_generador()},
+        'sistema': bedrock_services.SISTEMA_PROGRAMACION,
+        'prompt_inicial': bedrock_services.PROMPT_INICIAL,
+        'prompt_mejora': bedrock_services.PROMPT_MEJORA,
+        'criterios': bedrock_services.CRITERIOS_MEJORA,
+        'prompt_transversales': bedrock_services.PROMPT_TRANSVERSALES,
+        'prompt_esqueleto': bedrock_services.PROMPT_ESQUELETO,
+        'prompt_sesion': bedrock_services.PROMPT_SESION,
+        'num_sesiones': bedrock_services.NUM_SESIONES,
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(configuracion.encode('utf-8')).hexdigest()[:16]
+
+
+def combinaciones_predefinidas() -> List[Dict]:
+    """
+    Lista todas las combinaciones de presets de la interfaz.
+    """
+    return [
+        {
+            'grado': grado,
+            'competencia': COMPETENCIA_POR_DEFECTO,
+            'capacidades': CAPACIDADES_POR_DEFECTO,
+            'contenidos': contenidos,
+        }
+        for grado, contenidos in CONTENIDOS_POR_GRADO.items()
+    ]
+
+
+def validar_programacion(texto: Optional[str]) -> List[str]:
+    """
+    Valida una programación generada.
+    Retorna la lista de problemas encontrados (vacía si es válida).
+    """
+    if not texto or texto.startswith("Error"):
+        return ["La generación devolvió un error o un texto vacío"]
+
+    problemas = []
+    if len(texto) < LONGITUD_MINIMA:
+        problemas.append(f"Texto demasiado corto ({len(texto)} caracteres)")
+
+    texto_normalizado = _sin_tildes(texto).upper()
+    for seccion in SECCIONES_REQUERIDAS:
+        if seccion not in texto_normalizado:
+            problemas.append(f"Falta la sección {seccion}")
+    return problemas
+
+
+class BibliotecaCurricular:
+    """
+    Almacén local de programaciones pregeneradas (TXT + DOCX) para las
+    combinaciones predefinidas de la interfaz.
+    """
+
+    # Compartidos entre instancias: Streamlit crea una instancia por ejecución
+    # del script y no debe haber más de un refresco por directorio.
+    _lock_refresco = threading.Lock()
+    _hilos_refresco: Dict[str, threading.Thread] = {}
+
+    def __init__(self, directorio: Optional[str] = None):
+        self.directorio = directorio or os.environ.get('BIBLIOTECA_CURRICULAR_DIR', DIRECTORIO_POR_DEFECTO)
+
+    def _ruta(self, clave: str, extension: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.{extension}")
+
+    def buscar(self, grado, competencia: str, capacidades: str, contenidos: str) -> Optional[Dict]:
+        """
+        Busca una programación almacenada para la combinación dada.
+        Retorna un diccionario con 'texto', 'docx', 'metadata' y 'vigente',
+        o None si la combinación no está en la biblioteca.
+        """
+        clave = clave_programacion(grado, competencia, capacidades, contenidos)
+        ruta_metadata = self._ruta(clave, 'json')
+        if not os.path.exists(ruta_metadata):
+            return None
+
+        try:
+            with open(ruta_metadata, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            with open(self._ruta(clave, 'txt'), 'r', encoding='utf-8') as f:
+                texto = f.read()
+            docx_bytes = None
+            if os.path.exists(self._ruta(clave, 'docx')):
+                with open(self._ruta(clave, 'docx'), 'rb') as f:
+                    docx_bytes = f.read()
+        except Exception as e:
+            logger.error(f"Error leyendo la biblioteca curricular ({clave}): {e}")
+            return None
+
+        return {
+            'texto': texto,
+            'docx': docx_bytes,
+            'metadata': metadata,
+            'vigente': metadata.get('huella') == huella_configuracion(),
+        }
+
+    def guardar(self, grado, competencia: str, capacidades: str, contenidos: str, texto: str) -> str:
+        """
+        Guarda una programación validada en formato TXT y DOCX.
+        Los archivos se escriben primero en temporales para que una lectura
+        concurrente nunca vea una entrada a medias.
+        """
+        from core.docx_exporter import crear_documento_profesional
+        from core.model_routing import get_route
+
+        os.makedirs(self.directorio, exist_ok=True)
+        clave = clave_programacion(grado, competencia, capacidades, contenidos)
+
+        docx_bytes = crear_documento_profesional(texto, f"Programación Curricular {grado}º Secundaria", grado)
+        metadata = {
+            'clave': clave,
+            'grado': grado,
+            'huella': huella_configuracion(),
+            'modelo': get_route('programacion_borrador')['model_id'],
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'longitud': len(texto),
+        }
+
+        archivos = [('txt', texto.encode('utf-8'))]
+        if docx_bytes:
+            archivos.append(('docx', docx_bytes))
+        elif os.path.exists(self._ruta(clave, 'docx')):
+            # Sin python-docx no queda el documento de una versión anterior junto al texto nuevo
+            os.remove(self._ruta(clave, 'docx'))
+        # La metadata se escribe al final: su presencia marca la entrada como completa
+        archivos.append(('json', json.dumps(metadata, ensure_ascii=False, indent=2).encode('utf-8')))
+
+        for extension, contenido in archivos:
+            ruta = self._ruta(clave, extension)
+            with open(ruta + '.tmp', 'wb') as f:
+                f.write(contenido)
+            os.replace(ruta + '.tmp', ruta)
+        return clave
+
+    def precomputar(self, solo_desactualizadas: bool = True, max_intentos: int = 2) -> Dict[str, int]:
+        """
+        Genera, valida y almacena las programaciones de todas las
+        combinaciones predefinidas.
+        """
+        from core import bedrock_services
+
+        resumen = {'generadas': 0, 'vigentes': 0, 'fallidas': 0}
+        for combinacion in combinaciones_predefinidas():
+            existente = self.buscar(**combinacion)
+            if solo_desactualizadas and existente and existente['vigente']:
+                resumen['vigentes'] += 1
+                continue
+
+            for intento in range(1, max_intentos + 1):
+                texto = bedrock_services.generar_programacion_curricular(
+                    combinacion['grado'],
+                    combinacion['competencia'],
+                    combinacion['capacidades'],
+                    combinacion['contenidos']
+                )
+                problemas = validar_programacion(texto)
+                if not problemas:
+                    self.guardar(texto=texto, **combinacion)
+                    resumen['generadas'] += 1
+                    logger.info(f"Programación {combinacion['grado']}º almacenada en la biblioteca")
+                    break
+                logger.warning(f"Programación {combinacion['grado']}º inválida (intento {intento}): {'; '.join(problemas)}")
+            else:
+                resumen['fallidas'] += 1
+        return resumen
+
+    def refrescar_en_segundo_plano(self) -> bool:
+        """
+        Lanza un hilo que regenera las entradas desactualizadas.
+        Retorna False si ya hay un refresco en curso.
+        """
+        with self._lock_refresco:
+            hilo = self._hilos_refresco.get(self.directorio)
+            if hilo and hilo.is_alive():
+                return False
+            hilo = threading.Thread(
+                target=self._refrescar,
+                name='refresco-biblioteca-curricular',
+                daemon=True
+            )
+            self._hilos_refresco[self.directorio] = hilo
+            hilo.start()
+            return True
+
+    def _refrescar(self):
+        try:
+            resumen = self.precomputar(solo_desactualizadas=True)
+            logger.info(f"Refresco de la biblioteca curricular completado: {resumen}")
+        except Exception as e:
+            logger.error(f"Error refrescando la biblioteca curricular: {e}")
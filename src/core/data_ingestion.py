@@ -1,41 +1,154 @@
-import boto3
+import codecs
+import csv
+import io
 import json
-import os
 import datetime
+import os
+
+from .aws_clients import get_client
+from .metrics import track_call, record_aws_response
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+CSV_EXTENSIONS = ('.csv',)
+# Columnas aceptadas como texto del comentario en un CSV, en orden de preferencia
+CSV_TEXT_COLUMNS = ('text', 'texto', 'comentario', 'comment')
+STREAM_BLOCK_SIZE = 1 << 16
 
 def upload_comments_to_s3(comments_data, bucket_name, file_prefix='comments/'):
     """
     Simula la carga de comentarios (JSON) a S3.
     En un entorno real, los comentarios llegarían de forma continua.
     """
-    s3_client = boto3.client('s3', region_name=os.environ['AWS_REGION'])
+    s3_client = get_client('s3')
     
     timestamp_str = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
     file_key = f"{file_prefix}comments_{timestamp_str}.json"
     
     try:
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=file_key,
-            Body=json.dumps(comments_data, ensure_ascii=False).encode('utf-8'),
-            ContentType='application/json'
-        )
+        body = json.dumps(comments_data, ensure_ascii=False).encode('utf-8')
+        with track_call('s3', 'put_object', request_bytes=len(body)) as record:
+            response = s3_client.put_object(
+                Bucket=bucket_name,
+                Key=file_key,
+                Body=body,
+                ContentType='application/json'
+            )
+            record_aws_response(record, response)
         print(f" Archivo '{file_key}' cargado a S3 exitosamente.")
         return True
     except Exception as e:
         print(f" Error al cargar a S3: {e}")
         return False
 
+def upload_file_to_s3(file_path, bucket_name, file_prefix='comments/'):
+    """
+    Carga a S3 un archivo de comentarios ya existente en disco (JSON o NDJSON),
+    en partes y sin leerlo completo en memoria. Retorna la clave creada o None.
+    """
+    s3_client = get_client('s3')
+
+    timestamp_str = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    extension = os.path.splitext(file_path)[1] or '.json'
+    file_key = f"{file_prefix}comments_{timestamp_str}{extension}"
+    content_type = 'application/x-ndjson' if extension in NDJSON_EXTENSIONS else 'application/json'
+
+    try:
+        with track_call('s3', 'upload_file', request_bytes=os.path.getsize(file_path)):
+            s3_client.upload_file(file_path, bucket_name, file_key, ExtraArgs={'ContentType': content_type})
+        print(f" Archivo '{file_key}' cargado a S3 exitosamente.")
+        return file_key
+    except Exception as e:
+        print(f" Error al cargar a S3: {e}")
+        return None
+
+def parse_comments(file_content, file_key=''):
+    """
+    Interpreta el contenido de un archivo de comentarios: un arreglo JSON o
+    NDJSON (un comentario por línea, extensión .ndjson/.jsonl).
+    """
+    if file_key.endswith(NDJSON_EXTENSIONS) or not file_content.lstrip().startswith('['):
+        return [json.loads(line) for line in file_content.splitlines() if line.strip()]
+    return json.loads(file_content)
+
+def _iter_json_array(binary_file):
+    """
+    Recorre un arreglo JSON de objetos leyendo bloques de STREAM_BLOCK_SIZE
+    bytes: nunca tiene en memoria más que el bloque y el objeto en curso.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer, pos, started, eof = '', 0, False, False
+    while True:
+        # Saltar espacios, la apertura del arreglo y las comas entre objetos
+        while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ',' or (not started and buffer[pos] == '[')):
+            started = started or buffer[pos] == '['
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            if pos >= len(buffer):
+                raise ValueError('bloque vacío')
+            obj, end = decoder.raw_decode(buffer, pos)
+            yield obj
+            pos = end
+            continue
+        except ValueError:
+            if eof:
+                if buffer[pos:].strip():
+                    raise ValueError(f"JSON incompleto o inválido cerca de: {buffer[pos:pos + 80]!r}")
+                return
+        block = binary_file.read(STREAM_BLOCK_SIZE)
+        eof = not block
+        buffer = buffer[pos:] + utf8.decode(block, final=eof)
+        pos = 0
+
+def _iter_csv(binary_file):
+    texto = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.DictReader(texto)
+        columnas = {c.strip().lower(): c for c in reader.fieldnames or []}
+        columna_texto = next((columnas[c] for c in CSV_TEXT_COLUMNS if c in columnas), None)
+        if columna_texto is None:
+            raise ValueError(f"El CSV necesita una columna de texto ({', '.join(CSV_TEXT_COLUMNS)})")
+        for fila in reader:
+            comentario = {c.strip().lower(): v for c, v in fila.items() if c}
+            comentario['text'] = fila[columna_texto]
+            yield comentario
+    finally:
+        # No cerrar el archivo binario del llamador junto con el envoltorio de texto
+        texto.detach()
+
+def iter_comments(binary_file, file_name=''):
+    """
+    Recorre los comentarios de un archivo abierto en modo binario, uno a la
+    vez y sin leerlo completo: arreglo JSON, NDJSON (.ndjson/.jsonl) o CSV
+    (.csv, con una columna text/texto/comentario/comment). binary_file.tell()
+    indica cuánto del archivo se ha consumido, para mostrar avance.
+    """
+    nombre = file_name.lower()
+    if nombre.endswith(CSV_EXTENSIONS):
+        yield from _iter_csv(binary_file)
+    elif nombre.endswith(NDJSON_EXTENSIONS):
+        for line in binary_file:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from _iter_json_array(binary_file)
+
 def get_comment_from_s3(bucket_name, file_key):
     """
-    Obtiene un archivo JSON de comentarios desde S3.
+    Obtiene un archivo de comentarios (JSON o NDJSON) desde S3.
     (Usado por Lambda o para pruebas directas)
     """
-    s3_client = boto3.client('s3', region_name=os.environ['AWS_REGION'])
+    s3_client = get_client('s3')
     try:
-        response = s3_client.get_object(Bucket=bucket_name, Key=file_key)
-        file_content = response['Body'].read().decode('utf-8')
-        return json.loads(file_content)
+        with track_call('s3', 'get_object') as record:
+            response = s3_client.get_object(Bucket=bucket_name, Key=file_key)
+            raw_content = response['Body'].read()
+            record_aws_response(record, response)
+            record['response_bytes'] = len(raw_content)
+        file_content = raw_content.decode('utf-8')
+        return parse_comments(file_content, file_key)
     except Exception as e:
         print(f" Error al obtener archivo de S3: {e}")
         return None
\ No newline at end of file
@@ -1,126 +1,463 @@
-import boto3
-import os
-import decimal 
-import json
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from .aws_clients import get_client, get_resource
+from .item_codec import encode_item, decode_item, item_size, stored_attributes
+from .metrics import track_call, record_aws_response
+from .search_index import (
+    SEPARADOR, terms_for_comment, normalize_term, partition_key, sort_key, encode_token, decode_token,
+    LONGITUD_PARTICION,
+)
+from .table_schema import (
+    INQUILINO, ESQUEMA_POR_DEFECTO, TABLA_POR_ESQUEMA, INQUILINO_POR_DEFECTO, INDICE_SENTIMIENTO,
+    INDICE_SENTIMIENTO_LEGADO, SHARDS_SENTIMIENTO, ATRIBUTOS_CLAVE, key_attributes, primary_key, sentiment_key,
+    sort_key as ts_sort_key, table_definition, tenant_of,
+)
+
+logger = logging.getLogger(__name__)
+
+# BatchWriteItem acepta hasta 25 ítems y BatchGetItem hasta 100 claves por llamada
+LOTE_ESCRITURA = 25
+LOTE_LECTURA = 100
+REINTENTOS_LOTE = 5
+# Atributos que lee el dashboard en vivo (get_comments_since)
+CAMPOS_DASHBOARD = ('comment_id', 'timestamp', 'text', 'sentiment', 'sentiment_score')
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
 
 class DynamoDBManager:
-    def __init__(self, table_name='ProductComments'):
-        self.dynamodb = boto3.resource('dynamodb', region_name=os.environ['AWS_REGION'])
+    def __init__(self, table_name=None, search_table_name='ProductCommentsSearch', encoding=None, schema=None,
+                 tenant=None):
+        # Esquema de claves (ver core.table_schema); la tabla por defecto depende del esquema
+        self.schema = schema or ESQUEMA_POR_DEFECTO
+        table_name = table_name or TABLA_POR_ESQUEMA[self.schema]
+        # Inquilino de los comentarios que no traen 'tenant' y de las consultas sin inquilino
+        self.tenant = tenant or INQUILINO_POR_DEFECTO
+        # El recurso de boto3 es compartido por el proceso (core.aws_clients)
+        self.dynamodb = get_resource('dynamodb')
         self.table = self.dynamodb.Table(table_name)
-        print(f"✅ Conectado a la tabla DynamoDB: {table_name}")
+        # Índice invertido término -> comentarios (ver core.search_index)
+        self.search_table = self.dynamodb.Table(search_table_name)
+        # Formato de los ítems nuevos (ver core.item_codec); los lectores aceptan ambos
+        self.encoding = encoding
+        logger.info(f"Conectado a la tabla DynamoDB: {table_name} (esquema {self.schema})")
 
     def create_table(self):
         """
         Crea la tabla DynamoDB si no existe.
         Ideal para configuración inicial.
         """
+        try:
+            self.dynamodb.create_table(TableName=self.table.name, **table_definition(self.schema))
+            self.table.wait_until_exists()
+            print(f"✅ Tabla '{self.table.name}' creada exitosamente.")
+        except self.dynamodb.meta.client.exceptions.ResourceInUseException:
+            print(f"✅ Tabla '{self.table.name}' ya existe.")
+        except Exception as e:
+            print(f"❌ Error al crear tabla DynamoDB: {e}")
+        self.create_search_table()
+
+    def create_search_table(self):
+        """
+        Crea la tabla del índice de búsqueda si no existe. Se factura por
+        solicitud porque las escrituras llegan en ráfagas, una por término de
+        cada comentario ingerido.
+        """
         try:
             self.dynamodb.create_table(
-                TableName=self.table.name,
+                TableName=self.search_table.name,
                 KeySchema=[
-                    {
-                        'AttributeName': 'comment_id',
-                        'KeyType': 'HASH'  # Partition key
-                    }
+                    {'AttributeName': 'term_prefix', 'KeyType': 'HASH'},
+                    {'AttributeName': 'term_key', 'KeyType': 'RANGE'},
                 ],
                 AttributeDefinitions=[
-                    {
-                        'AttributeName': 'comment_id',
-                        'AttributeType': 'S'
-                    },
-                    {
-                        'AttributeName': 'timestamp',
-                        'AttributeType': 'S' # Se puede usar 'N' para números si el formato es EPOCH
-                    },
-                    {
-                        'AttributeName': 'sentiment',
-                        'AttributeType': 'S'
-                    }
+                    {'AttributeName': 'term_prefix', 'AttributeType': 'S'},
+                    {'AttributeName': 'term_key', 'AttributeType': 'S'},
                 ],
-                GlobalSecondaryIndexes=[
-                    {
-                        'IndexName': 'SentimentTimestampIndex',
-                        'KeySchema': [
-                            {
-                                'AttributeName': 'sentiment',
-                                'KeyType': 'HASH'
-                            },
-                            {
-                                'AttributeName': 'timestamp',
-                                'KeyType': 'RANGE'
-                            }
-                        ],
-                        'Projection': {
-                            'ProjectionType': 'ALL'
-                        },
-                        'ProvisionedThroughput': {
-                            'ReadCapacityUnits': 5,
-                            'WriteCapacityUnits': 5
-                        }
-                    }
-                ],
-                ProvisionedThroughput={
-                    'ReadCapacityUnits': 5,
-                    'WriteCapacityUnits': 5
-                }
+                BillingMode='PAY_PER_REQUEST',
             )
-            self.table.wait_until_exists()
-            print(f"✅ Tabla '{self.table.name}' creada exitosamente.")
+            self.search_table.wait_until_exists()
+            print(f"✅ Tabla '{self.search_table.name}' creada exitosamente.")
         except self.dynamodb.meta.client.exceptions.ResourceInUseException:
-            print(f"✅ Tabla '{self.table.name}' ya existe.")
+            print(f"✅ Tabla '{self.search_table.name}' ya existe.")
         except Exception as e:
-            print(f"❌ Error al crear tabla DynamoDB: {e}")
+            print(f"❌ Error al crear tabla del índice de búsqueda: {e}")
 
 
+    def encode_comment(self, comment):
+        """
+        Ítem a guardar para un comentario procesado: el formato de
+        core.item_codec más las claves del esquema por inquilino.
+        """
+        item = encode_item(comment, self.encoding)
+        if self.schema == INQUILINO:
+            item.update(key_attributes(comment, self.tenant))
+        return item
+
+    def decode_comment(self, item):
+        """
+        Comentario en la forma de siempre a partir de un ítem de la tabla, sin
+        los atributos que solo son claves del esquema por inquilino.
+        """
+        comentario = decode_item(item)
+        for atributo in ATRIBUTOS_CLAVE:
+            comentario.pop(atributo, None)
+        return comentario
+
+    def key_for(self, comment):
+        """
+        Clave primaria de un comentario (comment_id, timestamp y tenant si lo tiene).
+        """
+        return primary_key(comment, self.schema, self.tenant)
+
     def add_comment(self, comment_data):
         """
         Añade un nuevo comentario procesado a la tabla DynamoDB.
         """
         try:
-            # Convertir floats a Decimal para DynamoDB (buena práctica para números exactos)
-            item = json.loads(json.dumps(comment_data), parse_float=decimal.Decimal)
-            self.table.put_item(Item=item)
+            item = self.encode_comment(comment_data)
+            with track_call('dynamodb', 'put_item', request_bytes=item_size(item)) as record:
+                response = self.table.put_item(Item=item)
+                record_aws_response(record, response)
             # print(f" Comentario '{comment_data['comment_id']}' añadido a DynamoDB.")
             return True
         except Exception as e:
             print(f"❌ Error al añadir comentario a DynamoDB: {e}")
             return False
 
+    def _scan(self, **kwargs):
+        with track_call('dynamodb', 'scan') as record:
+            response = self.table.scan(**kwargs)
+            record_aws_response(record, response)
+            record['items'] = response.get('Count')
+        return response
+
     def get_all_comments(self):
         """
         Obtiene todos los comentarios de la tabla DynamoDB.
         """
         try:
-            response = self.table.scan()
+            response = self._scan()
             data = response['Items']
             while 'LastEvaluatedKey' in response:
-                response = self.table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
+                response = self._scan(ExclusiveStartKey=response['LastEvaluatedKey'])
                 data.extend(response['Items'])
             
-            # Convertir Decimal de vuelta a float si es necesario para el dashboard
-            for item in data:
-                for key, value in item.items():
-                    if isinstance(value, decimal.Decimal):
-                        item[key] = float(value)
-            return data
+            # Decimal de vuelta a float para el dashboard, en cualquiera de los dos formatos
+            return [self.decode_comment(item) for item in data]
         except Exception as e:
             print(f" Error al obtener comentarios de DynamoDB: {e}")
             return []
     
-    def get_latest_comments(self, limit=10):
+    def get_latest_comments(self, limit=10, tenant=None):
         """
         Obtiene los N comentarios más recientes de DynamoDB.
-        Requiere ordenar por timestamp después de la consulta.
+        En el esquema legado requiere ordenar por timestamp después de la
+        consulta; en el esquema por inquilino es un Query sobre la partición
+        del inquilino en orden descendente.
         """
+        if self.schema == INQUILINO:
+            return self.query_comments(tenant=tenant, limit=limit)['comments']
         try:
-            response = self.table.scan() # Scan para prototipo, en producción usar Query con GSI si es muy grande
+            response = self._scan() # Scan para prototipo, en producción usar Query con GSI si es muy grande
             comments = sorted(response['Items'], key=lambda x: x['timestamp'], reverse=True)
-            # Convertir Decimal a float para el dashboard
-            for item in comments:
-                for key, value in item.items():
-                    if isinstance(value, decimal.Decimal):
-                        item[key] = float(value)
-            return comments[:limit]
+            return [self.decode_comment(item) for item in comments[:limit]]
         except Exception as e:
             print(f" Error al obtener últimos comentarios de DynamoDB: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def get_comments_since(self, sentiment, since=None, attributes=CAMPOS_DASHBOARD, tenant=None):
+        """
+        Comentarios de un sentimiento con timestamp mayor o igual a `since`
+        (todos si es None), en orden cronológico. Usa Query sobre el índice
+        SentimentTimestampIndex: solo lee la partición del sentimiento a
+        partir de la marca, no la tabla completa. En el esquema por
+        inquilino consulta en paralelo los shards de SentimentShardIndex del
+        inquilino (`tenant` o el del manager) y los mezcla por timestamp. Se incluye el timestamp
+        igual a la marca para no perder comentarios que comparten el mismo
+        segundo; quien llama descarta los ids ya vistos (ver
+        core.comment_feed.SentimentWatermarks). `attributes` usa los nombres
+        del formato legado (se proyectan también los del compacto);
+        `attributes=None` trae el ítem completo.
+        """
+        if self.schema == INQUILINO:
+            return self._get_sharded_since(sentiment, since, attributes, tenant or self.tenant)
+        try:
+            # Con el cliente de bajo nivel, como los shards: core.comment_feed
+            # consulta varios sentimientos a la vez desde hilos distintos
+            nombres = {'#p': 'sentiment', **({'#o': 'timestamp'} if since else {})}
+            valores = {':p': _serializer.serialize(sentiment)}
+            if since:
+                valores[':o'] = _serializer.serialize(since)
+            consulta = {'TableName': self.table.name, 'IndexName': INDICE_SENTIMIENTO_LEGADO,
+                        'KeyConditionExpression': '#p = :p' + (' AND #o >= :o' if since else ''),
+                        'ExpressionAttributeValues': valores}
+            if attributes:
+                nombres.update({f"#a{i}": atributo for i, atributo in enumerate(stored_attributes(attributes))})
+                consulta['ProjectionExpression'] = ', '.join(n for n in nombres if n.startswith('#a'))
+            consulta['ExpressionAttributeNames'] = nombres
+            return [self.decode_comment(item) for item in self._query_shard(consulta, 'query_since')]
+        except Exception as e:
+            print(f" Error al obtener comentarios nuevos de DynamoDB: {e}")
+            return []
+
+    def _query_shard(self, consulta, operation='query_shard'):
+        """
+        Todas las páginas de un Query con el cliente de bajo nivel, que a
+        diferencia del recurso se puede usar desde varios hilos.
+        """
+        cliente = get_client('dynamodb')
+        items = []
+        while True:
+            with track_call('dynamodb', operation) as record:
+                response = cliente.query(**consulta)
+                record_aws_response(record, response)
+                record['items'] = response.get('Count')
+            items.extend({k: _deserializer.deserialize(v) for k, v in item.items()} for item in response['Items'])
+            if 'LastEvaluatedKey' not in response:
+                return items
+            consulta = {**consulta, 'ExclusiveStartKey': response['LastEvaluatedKey']}
+
+    def _get_sharded_since(self, sentiment, since, attributes, tenant):
+        try:
+            nombres = {'#p': 'sentiment_shard', **({'#o': 'ts_id'} if since else {})}
+            condicion = '#p = :p' + (' AND #o >= :o' if since else '')
+            base = {'TableName': self.table.name, 'IndexName': INDICE_SENTIMIENTO, 'KeyConditionExpression': condicion}
+            if attributes:
+                # comment_id y timestamp siempre, para mezclar los shards en orden
+                proyectados = stored_attributes(tuple(attributes) + ('comment_id', 'timestamp'))
+                nombres.update({f"#a{i}": atributo for i, atributo in enumerate(proyectados)})
+                base['ProjectionExpression'] = ', '.join(n for n in nombres if n.startswith('#a'))
+            base['ExpressionAttributeNames'] = nombres
+            consultas = []
+            for shard in range(SHARDS_SENTIMIENTO):
+                valores = {':p': _serializer.serialize(sentiment_key(tenant, sentiment, shard))}
+                if since:
+                    valores[':o'] = _serializer.serialize(since)
+                consultas.append({**base, 'ExpressionAttributeValues': valores})
+            # Cada shard corre en una copia del contexto para que sus métricas lleguen al recolector activo
+            with ThreadPoolExecutor(max_workers=SHARDS_SENTIMIENTO) as executor:
+                futuros = [executor.submit(contextvars.copy_context().run, self._query_shard, c) for c in consultas]
+                items = [item for futuro in futuros for item in futuro.result()]
+            comentarios = [self.decode_comment(item) for item in items]
+            comentarios.sort(key=lambda c: (c['timestamp'], c['comment_id']))
+            if attributes:
+                for comentario in comentarios:
+                    for campo in ('comment_id', 'timestamp'):
+                        if campo not in attributes:
+                            comentario.pop(campo, None)
+            return comentarios
+        except Exception as e:
+            print(f" Error al obtener comentarios nuevos de DynamoDB: {e}")
+            return []
+
+    def query_comments(self, tenant=None, since=None, until=None, limit=50, newest_first=True, next_token=None):
+        """
+        Comentarios de un inquilino (`tenant` o el del manager) con timestamp
+        entre `since` y `until` (inclusive; cualquiera puede faltar), del más
+        reciente al más antiguo salvo newest_first=False. En el esquema por
+        inquilino es un Query sobre la partición del inquilino y el rango de
+        ts_id, paginado como search_comments: retorna {'comments': [...],
+        'next_token': token o None}. En el esquema legado no hay partición
+        por inquilino: recorre la tabla con Scan y filtra en memoria (sin
+        paginación), como referencia para comparar con el esquema nuevo.
+        """
+        tenant = tenant or self.tenant
+        if self.schema != INQUILINO:
+            comentarios = [
+                c for c in self.get_all_comments()
+                if tenant_of(c, self.tenant) == tenant and (not since or c['timestamp'] >= since)
+                and (not until or c['timestamp'] <= until)
+            ]
+            comentarios.sort(key=lambda c: (c['timestamp'], c['comment_id']), reverse=newest_first)
+            return {'comments': comentarios[:limit], 'next_token': None}
+        # Solo las consultas usan las condiciones; el camino de escritura (Lambda) no las importa
+        from boto3.dynamodb.conditions import Key
+
+        try:
+            condicion = Key('tenant').eq(tenant)
+            # ts_id empieza por el timestamp: el separador '#' es menor que cualquier
+            # carácter del id y '~' mayor, así el rango incluye ambos extremos
+            if since and until:
+                condicion = condicion & Key('ts_id').between(since, ts_sort_key(until, '~'))
+            elif since:
+                condicion = condicion & Key('ts_id').gte(since)
+            elif until:
+                condicion = condicion & Key('ts_id').lte(ts_sort_key(until, '~'))
+            consulta = {'KeyConditionExpression': condicion, 'ScanIndexForward': not newest_first, 'Limit': limit}
+            inicio = decode_token(next_token)
+            if inicio:
+                consulta['ExclusiveStartKey'] = inicio
+            with track_call('dynamodb', 'query_tenant') as record:
+                response = self.table.query(**consulta)
+                record_aws_response(record, response)
+                record['items'] = response.get('Count')
+            return {'comments': [self.decode_comment(item) for item in response['Items']],
+                    'next_token': encode_token(response.get('LastEvaluatedKey'))}
+        except Exception as e:
+            print(f" Error al consultar comentarios del inquilino {tenant}: {e}")
+            return {'comments': [], 'next_token': None}
+
+    def enable_ttl(self, attribute='expires_at'):
+        """
+        Activa el TTL nativo de la tabla de comentarios sobre `attribute`.
+        """
+        try:
+            self.dynamodb.meta.client.update_time_to_live(
+                TableName=self.table.name,
+                TimeToLiveSpecification={'Enabled': True, 'AttributeName': attribute},
+            )
+            print(f"✅ TTL activado en '{self.table.name}' ({attribute}).")
+        except self.dynamodb.meta.client.exceptions.ClientError as e:
+            if 'already enabled' not in str(e):
+                print(f"❌ Error al activar TTL: {e}")
+
+    def set_expiration(self, expirations, attribute='expires_at'):
+        """
+        Marca comentarios para que DynamoDB los borre: `expirations` es un
+        iterable de (comentario, epoch en segundos), donde el comentario es
+        un diccionario con comment_id y timestamp (y tenant si lo tiene) o,
+        en el esquema legado, solo el comment_id. Retorna cuántos se marcaron.
+        """
+        marcados = 0
+        for comentario, expira in expirations:
+            comment_id = comentario if isinstance(comentario, str) else comentario['comment_id']
+            try:
+                clave = {'comment_id': comentario} if isinstance(comentario, str) else self.key_for(comentario)
+                with track_call('dynamodb', 'update_item_ttl') as record:
+                    response = self.table.update_item(
+                        Key=clave,
+                        UpdateExpression='SET #exp = :exp',
+                        ConditionExpression='attribute_exists(comment_id)',
+                        ExpressionAttributeNames={'#exp': attribute},
+                        ExpressionAttributeValues={':exp': int(expira)},
+                    )
+                    record_aws_response(record, response)
+                marcados += 1
+            except Exception as e:
+                print(f"❌ Error al marcar expiración de {comment_id}: {e}")
+        return marcados
+
+    def _batch_write(self, table_name, items):
+        """
+        Escribe ítems con BatchWriteItem en lotes de 25, reintentando con
+        espera exponencial los que DynamoDB devuelve sin procesar.
+        """
+        for inicio in range(0, len(items), LOTE_ESCRITURA):
+            pendientes = [{'PutRequest': {'Item': item}} for item in items[inicio:inicio + LOTE_ESCRITURA]]
+            for intento in range(REINTENTOS_LOTE):
+                with track_call('dynamodb', 'batch_write_item', items=len(pendientes)) as record:
+                    response = self.dynamodb.batch_write_item(RequestItems={table_name: pendientes})
+                    record_aws_response(record, response)
+                pendientes = response.get('UnprocessedItems', {}).get(table_name, [])
+                if not pendientes:
+                    break
+                time.sleep(0.05 * 2 ** intento)
+            if pendientes:
+                raise RuntimeError(f"{len(pendientes)} ítems sin procesar en {table_name}")
+
+    def search_entries(self, comments):
+        """
+        Entradas del índice de búsqueda (hashtags, entidades y palabras
+        clave) de comentarios ya procesados (con comment_id, timestamp,
+        text, sentiment y entities).
+        """
+        items = []
+        for comment in comments:
+            terminos = terms_for_comment(comment['text'], comment.get('entities'))
+            for termino, fuentes in terminos.items():
+                items.append({
+                    'term_prefix': partition_key(termino),
+                    'term_key': sort_key(termino, comment['timestamp'], comment['comment_id']),
+                    'term': termino,
+                    'comment_id': comment['comment_id'],
+                    'timestamp': comment['timestamp'],
+                    'sentiment': comment.get('sentiment', 'UNKNOWN'),
+                    'tenant': tenant_of(comment, self.tenant),
+                    'sources': sorted(fuentes),
+                })
+        return items
+
+    def index_comments(self, comments):
+        """
+        Agrega al índice de búsqueda las entradas de search_entries.
+        Retorna el número de entradas escritas.
+        """
+        items = self.search_entries(comments)
+        try:
+            self._batch_write(self.search_table.name, items)
+            return len(items)
+        except Exception as e:
+            print(f"❌ Error al indexar comentarios para búsqueda: {e}")
+            return 0
+
+    def _get_comments_by_id(self, refs):
+        """
+        Lee comentarios con BatchGetItem, en el orden recibido. `refs` son
+        entradas del índice de búsqueda (comment_id, timestamp y tenant);
+        las escritas antes del esquema por inquilino no traen tenant y se
+        buscan en el del manager.
+        """
+        encontrados = {}
+        comment_ids = [ref['comment_id'] for ref in refs]
+        for inicio in range(0, len(refs), LOTE_LECTURA):
+            pendientes = {self.table.name: {'Keys': [self.key_for(ref) for ref in refs[inicio:inicio + LOTE_LECTURA]]}}
+            for intento in range(REINTENTOS_LOTE):
+                with track_call('dynamodb', 'batch_get_item') as record:
+                    response = self.dynamodb.batch_get_item(RequestItems=pendientes)
+                    record_aws_response(record, response)
+                    record['items'] = len(response['Responses'].get(self.table.name, []))
+                for item in response['Responses'].get(self.table.name, []):
+                    encontrados[item['comment_id']] = item
+                pendientes = response.get('UnprocessedKeys')
+                if not pendientes:
+                    break
+                time.sleep(0.05 * 2 ** intento)
+        return [encontrados[cid] for cid in comment_ids if cid in encontrados]
+
+    def search_comments(self, term, prefix=False, limit=20, next_token=None, source=None):
+        """
+        Busca comentarios por término (hashtag, entidad o palabra clave) con el
+        índice de búsqueda, sin recorrer la tabla. Con prefix=True encuentra
+        los términos que empiezan por `term` (mínimo 3 caracteres).
+        `source` ('hashtag', 'entity' o 'keyword') restringe la fuente del
+        término; como es un filtro, una página puede traer menos de `limit`.
+        Los resultados de un término van del más reciente al más antiguo.
+        Retorna {'comments': [...], 'next_token': token o None}; el token se
+        pasa como next_token para obtener la página siguiente.
+        """
+        termino = normalize_term(term)
+        if not termino or (prefix and len(termino) < LONGITUD_PARTICION):
+            print(f"🟡 Búsqueda ignorada: el prefijo debe tener al menos {LONGITUD_PARTICION} caracteres")
+            return {'comments': [], 'next_token': None}
+        from boto3.dynamodb.conditions import Attr, Key
+
+        try:
+            condicion = Key('term_prefix').eq(partition_key(termino)) & Key('term_key').begins_with(
+                termino if prefix else termino + SEPARADOR
+            )
+            consulta = {'KeyConditionExpression': condicion, 'ScanIndexForward': False, 'Limit': limit,
+                        'ProjectionExpression': 'comment_id, #ts, tenant',
+                        'ExpressionAttributeNames': {'#ts': 'timestamp'}}
+            if source:
+                consulta['FilterExpression'] = Attr('sources').contains(source)
+            inicio = decode_token(next_token)
+            if inicio:
+                consulta['ExclusiveStartKey'] = inicio
+            with track_call('dynamodb', 'query_search') as record:
+                response = self.search_table.query(**consulta)
+                record_aws_response(record, response)
+                record['items'] = response.get('Count')
+
+            # Con prefix=True un comentario puede aparecer con varios términos
+            refs = list({item['comment_id']: item for item in response['Items']}.values())
+            comments = [self.decode_comment(item) for item in self._get_comments_by_id(refs)]
+            return {'comments': comments, 'next_token': encode_token(response.get('LastEvaluatedKey'))}
+        except Exception as e:
+            print(f" Error al buscar comentarios en DynamoDB: {e}")
+            return {'comments': [], 'next_token': None}
@@ -0,0 +1,246 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from io import BytesIO
+
+try:
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml import parse_xml
+    from lxml import etree
+    DOCX_OK = True
+except ImportError:
+    DOCX_OK = False
+
+# Caché de documentos ya renderizados, indexada por el hash del contenido
+MAX_DOCUMENTOS_EN_CACHE = 32
+_cache_documentos = OrderedDict()
+_lock_cache = threading.Lock()
+
+# Exportación incremental: el contenido se divide en bloques (separados por
+# líneas vacías o encabezados '#') y se guarda el XML Word de cada bloque por
+# el hash de su texto. Un documento que cambia solo en algunas partes (otra
+# versión de la misma programación, una sesión regenerada) vuelve a
+# renderizar únicamente esos bloques; el resto se copia del XML guardado.
+MAX_BLOQUES_EN_CACHE = 4096
+_cache_bloques = OrderedDict()
+
+# Filas separadoras de tablas Markdown, ej. |---|:---:|
+_SEPARADOR_TABLA = re.compile(r'^\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?$')
+
+
+def _es_linea_tabla(line):
+    return '|' in line and line.count('|') >= 2
+
+
+def _celdas(line):
+    return [celda.strip() for celda in line.strip().strip('|').split('|')]
+
+
+def clave_documento(contenido, titulo, grado):
+    """
+    Clave de caché de un documento. Incluye la fecha porque se imprime en el documento.
+    """
+    fecha = datetime.now().strftime('%d/%m/%Y')
+    partes = '\x1f'.join([str(contenido), str(titulo), str(grado), fecha])
+    return hashlib.sha256(partes.encode('utf-8')).hexdigest()
+
+
+def crear_documento_profesional(contenido, titulo, grado):
+    """
+    Crea un documento Word profesional a partir del contenido generado.
+    Retorna los bytes del archivo .docx o None si python-docx no está disponible.
+    El resultado se memoriza por hash del contenido, de modo que volver a
+    pedir el mismo documento (ej. en cada rerun de Streamlit) no lo reconstruye.
+    """
+    if not DOCX_OK:
+        return None
+
+    clave = clave_documento(contenido, titulo, grado)
+    with _lock_cache:
+        if clave in _cache_documentos:
+            _cache_documentos.move_to_end(clave)
+            return _cache_documentos[clave]
+
+    doc_bytes = _renderizar_documento(contenido, titulo, grado)
+
+    with _lock_cache:
+        _cache_documentos[clave] = doc_bytes
+        _cache_documentos.move_to_end(clave)
+        while len(_cache_documentos) > MAX_DOCUMENTOS_EN_CACHE:
+            _cache_documentos.popitem(last=False)
+    return doc_bytes
+
+
+def limpiar_cache():
+    """
+    Vacía la caché de documentos renderizados y la de bloques.
+    """
+    with _lock_cache:
+        _cache_documentos.clear()
+        _cache_bloques.clear()
+
+
+def dividir_en_bloques(contenido):
+    """
+    Divide el contenido en bloques que se renderizan de forma independiente:
+    una línea vacía termina un bloque (también cierra una tabla) y cada
+    encabezado '#' empieza uno nuevo.
+    """
+    bloques, actual = [], []
+    for line in contenido.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            if actual:
+                bloques.append(actual)
+            actual = [line] if line else []
+            continue
+        actual.append(line)
+    if actual:
+        bloques.append(actual)
+    return bloques
+
+
+def _agregar_tabla(doc, filas, estilo_tabla):
+    """
+    Convierte un bloque de líneas delimitadas por | en una tabla Word real.
+    La primera fila se trata como encabezado.
+    """
+    filas = [_celdas(fila) for fila in filas if not _SEPARADOR_TABLA.match(fila)]
+    if not filas:
+        return
+    num_columnas = max(len(fila) for fila in filas)
+
+    tabla = doc.add_table(rows=0, cols=num_columnas)
+    if estilo_tabla is not None:
+        tabla.style = estilo_tabla
+
+    for indice, fila in enumerate(filas):
+        celdas = tabla.add_row().cells
+        for celda, texto in zip(celdas, fila):
+            if indice == 0:
+                celda.paragraphs[0].add_run(texto).bold = True
+            else:
+                celda.text = texto
+
+
+def _renderizar_lineas(doc, lineas, estilos):
+    """
+    Agrega al documento los párrafos y tablas de un bloque de líneas.
+    """
+    bloque_tabla = []
+    for line in lineas:
+        # Detectar tablas (líneas con múltiples |): se acumulan hasta que termina el bloque
+        if _es_linea_tabla(line):
+            bloque_tabla.append(line)
+            continue
+        if bloque_tabla:
+            _agregar_tabla(doc, bloque_tabla, estilos['tabla'])
+            bloque_tabla = []
+
+        # Detectar encabezados
+        if line.startswith('#'):
+            level = line.count('#')
+            text = line.replace('#', '').strip()
+            if text:
+                doc.add_paragraph(text, style=estilos['titulo'][min(level, 3)])
+
+        # Detectar listas con bullets
+        elif line.startswith(('•', '-', '*', '→')):
+            doc.add_paragraph(line[1:].strip(), style=estilos['lista'])
+
+        # Detectar texto en mayúsculas (posibles títulos)
+        elif line.isupper() and len(line) > 5:
+            doc.add_paragraph(line.title(), style=estilos['titulo'][2])
+
+        # Texto normal
+        else:
+            if len(line) > 10:  # Solo agregar líneas con contenido significativo
+                doc.add_paragraph(line)
+
+    if bloque_tabla:
+        _agregar_tabla(doc, bloque_tabla, estilos['tabla'])
+
+
+def _agregar_bloque(doc, lineas, estilos):
+    """
+    Agrega un bloque al documento: copia su XML si ya se renderizó antes
+    (en cualquier documento) o lo renderiza y guarda el resultado.
+    """
+    clave = hashlib.sha256('\n'.join(lineas).encode('utf-8')).hexdigest()
+    cuerpo = doc.element.body
+    fin = cuerpo.sectPr
+    with _lock_cache:
+        fragmentos = _cache_bloques.get(clave)
+        if fragmentos is not None:
+            _cache_bloques.move_to_end(clave)
+    if fragmentos is not None:
+        for fragmento in fragmentos:
+            fin.addprevious(parse_xml(fragmento))
+        return
+
+    previos = len(cuerpo)
+    _renderizar_lineas(doc, lineas, estilos)
+    # Los elementos nuevos quedan antes de sectPr, que siempre es el último
+    fragmentos = [etree.tostring(elemento) for elemento in cuerpo[previos - 1:len(cuerpo) - 1]]
+    with _lock_cache:
+        _cache_bloques[clave] = fragmentos
+        while len(_cache_bloques) > MAX_BLOQUES_EN_CACHE:
+            _cache_bloques.popitem(last=False)
+
+
+def _renderizar_documento(contenido, titulo, grado):
+    doc = Document()
+
+    # Los estilos se resuelven una sola vez por documento
+    estilos = doc.styles
+    try:
+        estilo_tabla = estilos['Table Grid']
+    except KeyError:
+        estilo_tabla = None
+    estilos = {
+        'lista': estilos['List Bullet'],
+        'titulo': {nivel: estilos[f'Heading {nivel}'] for nivel in (1, 2, 3)},
+        'tabla': estilo_tabla,
+    }
+
+    # Configurar propiedades del documento
+    doc.core_properties.title = titulo
+    doc.core_properties.author = "Sistema IA Educativa"
+    doc.core_properties.subject = f"Programación Curricular {grado}º Secundaria"
+
+    # Título principal
+    titulo_principal = doc.add_heading(f"PROGRAMACIÓN CURRICULAR", 0)
+    titulo_principal.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    # Subtítulo
+    subtitulo = doc.add_paragraph(f"CIENCIA Y TECNOLOGÍA - {grado}º SECUNDARIA", style=estilos['titulo'][1])
+    subtitulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    # Información del documento
+    info_para = doc.add_paragraph()
+    info_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    info_run = info_para.add_run(f"Fecha: {datetime.now().strftime('%d/%m/%Y')}\nGenerado por: IA Educativa")
+    info_run.italic = True
+
+    # Línea separadora
+    doc.add_paragraph("=" * 80)
+
+    # Contenido por bloques, reutilizando los ya renderizados
+    for lineas in dividir_en_bloques(contenido):
+        _agregar_bloque(doc, lineas, estilos)
+
+    # Pie de página
+    doc.add_page_break()
+    footer = doc.add_paragraph()
+    footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    footer_run = footer.add_run("GENERADO POR SISTEMA IA EDUCATIVA\nMinisterio de Educación - República del Perú")
+    footer_run.italic = True
+
+    # Convertir a bytes
+    buffer = BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer.getvalue()
@@ -0,0 +1,59 @@
+# core/image_cache.py
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'cache_imagenes'
+)
+
+
+class ImageCache:
+    """
+    Caché de imágenes direccionada por contenido: los parámetros de la
+    generación (prompt, seed, cfg, steps, modelo) determinan el nombre del PNG.
+    Con la misma combinación el modelo de difusión produce la misma imagen,
+    así que no hace falta volver a llamar a Bedrock.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.environ.get('IMAGE_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+    @staticmethod
+    def key(prompt: str, seed: int, cfg_scale: float, steps: int, model_id: str) -> str:
+        params = json.dumps(
+            {'prompt': prompt, 'seed': seed, 'cfg_scale': cfg_scale, 'steps': steps, 'model_id': model_id},
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(params.encode('utf-8')).hexdigest()
+
+    def path(self, key: str) -> str:
+        # Dos niveles de directorio para no acumular miles de archivos en uno solo
+        return os.path.join(self.directory, key[:2], f"{key}.png")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Retorna la ruta del PNG si ya está en caché.
+        """
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def put(self, key: str, data: bytes) -> str:
+        """
+        Guarda los bytes PNG y retorna su ruta.
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Un temporal único por escritura: varios hilos pueden guardar la misma clave a la vez
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=f"{key}.", suffix='.tmp',
+                                         delete=False) as f:
+            f.write(data)
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.remove(f.name)
+            raise
+        return path
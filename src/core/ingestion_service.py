@@ -0,0 +1,427 @@
+# core/ingestion_service.py
+"""
+Servicio de ingesta de comentarios individuales.
+
+Recibe comentarios por HTTP (POST /comments con un objeto JSON, un arreglo
+o NDJSON), los acumula en memoria y los escribe a S3 como shards NDJSON
+cuando el lote llega a un tamaño o a una antigüedad máxima. Cada shard
+dispara una sola invocación de lambda_handler en vez de una por comentario.
+Cuando los comentarios pendientes llegan al límite, el servicio deja de
+aceptar (503 con Retry-After) hasta que los shards en curso terminen. Al
+detenerse, los shards que no se pudieron escribir quedan en --spill-dir.
+
+Uso:
+    python -m core.ingestion_service --bucket bucket-comentarios-snacks --port 8080
+    python -m core.ingestion_service --local-dir ./shards --max-batch 200 --max-wait 2
+    curl -X POST localhost:8080/comments -d '{"text": "Me encantó el sabor #nuevo"}'
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .aws_clients import get_client
+from .metrics import track_call, record_aws_response
+
+logger = logging.getLogger(__name__)
+
+# Un shard se escribe al llegar a MAX_COMENTARIOS_LOTE comentarios,
+# MAX_BYTES_LOTE bytes de NDJSON o MAX_ESPERA_LOTE segundos desde el primer
+# comentario del lote, lo que ocurra primero.
+MAX_COMENTARIOS_LOTE = 500
+MAX_BYTES_LOTE = 4 * 1024 * 1024
+MAX_ESPERA_LOTE = 5.0
+
+# Contrapresión: comentarios en memoria (en el búfer o en shards aún no
+# escritos) por encima de los cuales se rechazan nuevos envíos.
+MAX_PENDIENTES = 20000
+MAX_ESCRITURAS_EN_VUELO = 4
+ESPERA_ADMISION = 2.0
+REINTENTOS_ESCRITURA = 5
+# Al detenerse, los shards que agotan sus reintentos se guardan aquí en
+# lugar de volver al búfer (no habrá otro intento en este proceso)
+DIRECTORIO_DERRAME = 'ingestion_spill'
+
+MAX_CUERPO_SOLICITUD = 1024 * 1024
+PREFIJO_SHARDS = 'comments/'
+
+_MENSAJES_HTTP = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+                  405: 'Method Not Allowed', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+
+class S3ShardSink:
+    """
+    Escribe cada shard como un objeto NDJSON en el bucket de comentarios
+    (la extensión .ndjson hace que lambda_handler lo lea línea por línea).
+    """
+
+    def __init__(self, bucket_name: str, prefix: str = PREFIJO_SHARDS):
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+
+    def write(self, name: str, body: bytes) -> str:
+        key = f"{self.prefix}{name}"
+        with track_call('s3', 'put_object_shard', request_bytes=len(body)) as record:
+            response = get_client('s3').put_object(Bucket=self.bucket_name, Key=key, Body=body,
+                                                   ContentType='application/x-ndjson')
+            record_aws_response(record, response)
+        return key
+
+
+class LocalShardSink:
+    """
+    Escribe los shards en un directorio local (pruebas y desarrollo sin
+    AWS). El archivo se renombra al terminar, así que un lector nunca ve un
+    shard a medio escribir.
+    """
+
+    def __init__(self, directory: str, prefix: str = PREFIJO_SHARDS):
+        self.directory = directory
+        self.prefix = prefix
+
+    def write(self, name: str, body: bytes) -> str:
+        ruta = os.path.join(self.directory, self.prefix, name)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.tmp"
+        with track_call('local', 'write_shard', request_bytes=len(body)):
+            with open(temporal, 'wb') as f:
+                f.write(body)
+            os.replace(temporal, ruta)
+        return ruta
+
+
+def normalize_comment(comment) -> Optional[Dict]:
+    """
+    Valida un comentario entrante y completa id y timestamp si faltan
+    (lambda_handler descarta los comentarios sin id, text o timestamp).
+    Retorna None si no es un objeto con texto.
+    """
+    if not isinstance(comment, dict) or not str(comment.get('text') or '').strip():
+        return None
+    comment = dict(comment)
+    comment['id'] = str(comment.get('id') or uuid.uuid4())
+    comment.setdefault('timestamp', datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'))
+    return comment
+
+
+def parse_body(body: bytes) -> List:
+    """
+    Comentarios de un cuerpo de solicitud: objeto JSON, arreglo JSON o NDJSON.
+    """
+    texto = body.decode('utf-8').strip()
+    if not texto:
+        return []
+    if texto[0] in '[{':
+        try:
+            datos = json.loads(texto)
+            return datos if isinstance(datos, list) else [datos]
+        except json.JSONDecodeError:
+            if texto[0] == '[':
+                raise
+    return [json.loads(linea) for linea in texto.splitlines() if linea.strip()]
+
+
+class MicroBatcher:
+    """
+    Búfer de comentarios que se vacía en shards NDJSON por tamaño o tiempo.
+
+    Las escrituras corren en hilos (el cliente de boto3 es bloqueante) con a
+    lo más max_inflight a la vez. Un shard que falla se reintenta con
+    backoff; si se agotan los reintentos vuelve al búfer, así que un
+    comentario aceptado no se pierde mientras el proceso siga vivo. Durante
+    flush() ya no vuelve al búfer: se escribe en `spill_dir` (un directorio
+    local) o, si no se indicó, flush() termina con error.
+    """
+
+    def __init__(self, sink, max_batch: int = MAX_COMENTARIOS_LOTE, max_bytes: int = MAX_BYTES_LOTE,
+                 max_wait: float = MAX_ESPERA_LOTE, max_pending: int = MAX_PENDIENTES,
+                 max_inflight: int = MAX_ESCRITURAS_EN_VUELO, write_retries: int = REINTENTOS_ESCRITURA,
+                 spill_dir: Optional[str] = None):
+        self.sink = sink
+        self.max_batch = max_batch
+        self.max_bytes = max_bytes
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.write_retries = write_retries
+        self._derrame = LocalShardSink(spill_dir, prefix='') if spill_dir else None
+        self._vaciando = False
+        self._lineas: deque = deque()
+        self._bytes = 0
+        self._pendientes = 0
+        self._espacio = asyncio.Condition()
+        self._escrituras = asyncio.Semaphore(max_inflight)
+        self._tareas: set = set()
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+        self.stats = {'accepted': 0, 'rejected': 0, 'shards': 0, 'shard_comments': 0, 'write_errors': 0,
+                      'spilled': 0}
+
+    @property
+    def pending(self) -> int:
+        return self._pendientes
+
+    async def add(self, comments: List[Dict], timeout: float = ESPERA_ADMISION) -> bool:
+        """
+        Agrega comentarios al búfer. Si no hay espacio espera hasta `timeout`
+        segundos a que se libere y retorna False si sigue lleno.
+        """
+        async with self._espacio:
+            try:
+                await asyncio.wait_for(
+                    self._espacio.wait_for(lambda: self._pendientes + len(comments) <= self.max_pending
+                                           or self._pendientes == 0),
+                    timeout)
+            except asyncio.TimeoutError:
+                self.stats['rejected'] += len(comments)
+                return False
+            self._pendientes += len(comments)
+        for comment in comments:
+            linea = json.dumps(comment, ensure_ascii=False).encode('utf-8') + b'\n'
+            self._lineas.append(linea)
+            self._bytes += len(linea)
+            if len(self._lineas) >= self.max_batch or self._bytes >= self.max_bytes:
+                self._cortar_lote()
+        self.stats['accepted'] += len(comments)
+        if self._lineas and self._temporizador is None:
+            self._temporizador = asyncio.get_running_loop().call_later(self.max_wait, self._cortar_lote)
+        return True
+
+    def _cortar_lote(self):
+        """
+        Saca un lote del búfer y lanza su escritura en segundo plano.
+        """
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote = []
+        tamano = 0
+        while self._lineas and len(lote) < self.max_batch and (not lote or tamano + len(self._lineas[0]) <= self.max_bytes):
+            linea = self._lineas.popleft()
+            lote.append(linea)
+            tamano += len(linea)
+        self._bytes -= tamano
+        if lote:
+            tarea = asyncio.get_running_loop().create_task(self._escribir(lote))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+        if self._lineas:
+            if len(self._lineas) >= self.max_batch or self._bytes >= self.max_bytes:
+                self._cortar_lote()
+            else:
+                self._temporizador = asyncio.get_running_loop().call_later(self.max_wait, self._cortar_lote)
+
+    async def _escribir(self, lote: List[bytes]):
+        nombre = f"shard_{datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:12]}.ndjson"
+        cuerpo = b''.join(lote)
+        loop = asyncio.get_running_loop()
+        async with self._escrituras:
+            for intento in range(self.write_retries):
+                try:
+                    await loop.run_in_executor(None, self.sink.write, nombre, cuerpo)
+                    self.stats['shards'] += 1
+                    self.stats['shard_comments'] += len(lote)
+                    break
+                except Exception as e:
+                    self.stats['write_errors'] += 1
+                    logger.warning("Error al escribir el shard %s (intento %d): %s", nombre, intento + 1, e)
+                    if intento + 1 < self.write_retries:
+                        await asyncio.sleep(min(0.2 * 2 ** intento, 5.0))
+            else:
+                if not self._vaciando:
+                    # Vuelve al búfer: los comentarios siguen contando como pendientes
+                    self._lineas.extendleft(reversed(lote))
+                    self._bytes += len(cuerpo)
+                    if self._temporizador is None:
+                        self._temporizador = loop.call_later(self.max_wait, self._cortar_lote)
+                    return
+                await self._derramar(nombre, cuerpo, len(lote))
+        async with self._espacio:
+            self._pendientes -= len(lote)
+            self._espacio.notify_all()
+
+    async def _derramar(self, nombre: str, cuerpo: bytes, comentarios: int):
+        """
+        Último recurso al vaciar el búfer: guarda el shard en el directorio
+        local de derrame para reenviarlo después (ej. copiándolo al bucket).
+        """
+        if self._derrame is None:
+            async with self._espacio:
+                self._pendientes -= comentarios
+            raise RuntimeError(f"No se pudo escribir el shard {nombre} ({comentarios} comentarios) "
+                               f"y no hay directorio de derrame")
+        ruta = await asyncio.get_running_loop().run_in_executor(None, self._derrame.write, nombre, cuerpo)
+        self.stats['spilled'] += comentarios
+        logger.error("Shard %s (%d comentarios) guardado en %s tras agotar los reintentos", nombre, comentarios, ruta)
+
+    async def flush(self):
+        """
+        Escribe todo lo que queda en el búfer y espera los shards en curso.
+        Cada shard tiene sus write_retries intentos; los que fallan se
+        derraman (ver _derramar) en lugar de reintentarse sin fin. Lanza el
+        primer error de los shards que no se pudieron guardar en ningún lado.
+        """
+        self._vaciando = True
+        errores = []
+        while self._lineas or self._tareas:
+            if self._lineas:
+                self._cortar_lote()
+            if self._tareas:
+                resultados = await asyncio.gather(*list(self._tareas), return_exceptions=True)
+                errores.extend(r for r in resultados if isinstance(r, Exception))
+        if errores:
+            raise errores[0]
+
+
+class IngestionServer:
+    """
+    Servidor HTTP/1.1 mínimo sobre asyncio delante de un MicroBatcher.
+
+    POST /comments   objeto, arreglo JSON o NDJSON -> 202 {'accepted': n}
+    GET  /health     estado del búfer y contadores
+    """
+
+    def __init__(self, batcher: MicroBatcher, host: str = '127.0.0.1', port: int = 8080):
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._atender, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Ingesta escuchando en %s:%d", self.host, self.port)
+
+    async def stop(self):
+        """
+        Deja de aceptar conexiones y vacía el búfer antes de terminar.
+        """
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.flush()
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # Conexiones keep-alive: varias solicitudes por conexión
+            while True:
+                solicitud = await self._leer_solicitud(reader)
+                if solicitud is None:
+                    break
+                metodo, ruta, cuerpo, cerrar = solicitud
+                estado, respuesta, cabeceras = await self._responder(metodo, ruta, cuerpo)
+                self._escribir_respuesta(writer, estado, respuesta, cabeceras, cerrar)
+                await writer.drain()
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.warning("Error al atender la solicitud: %s", e)
+        finally:
+            writer.close()
+
+    async def _leer_solicitud(self, reader) -> Optional[Tuple[str, str, bytes, bool]]:
+        linea = await reader.readline()
+        if not linea:
+            return None
+        partes = linea.decode('latin-1').split()
+        if len(partes) != 3:
+            # Línea de solicitud mal formada: se responde 400 y se cierra la conexión
+            return '', '', b'', True
+        metodo, ruta, version = partes
+        cabeceras = {}
+        while True:
+            linea = await reader.readline()
+            if linea in (b'\r\n', b'\n', b''):
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            cabeceras[nombre.strip().lower()] = valor.strip()
+        try:
+            largo = int(cabeceras.get('content-length', 0))
+        except ValueError:
+            return '', '', b'', True
+        if largo < 0:
+            return '', '', b'', True
+        if largo > MAX_CUERPO_SOLICITUD:
+            return metodo, ruta, None, True
+        cuerpo = await reader.readexactly(largo) if largo else b''
+        cerrar = cabeceras.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+        return metodo, ruta.split('?')[0], cuerpo, cerrar
+
+    async def _responder(self, metodo: str, ruta: str, cuerpo: Optional[bytes]):
+        if not metodo:
+            return 400, {'error': 'Solicitud HTTP mal formada'}, {}
+        if ruta == '/health' and metodo == 'GET':
+            return 200, {**self.batcher.stats, 'pending': self.batcher.pending}, {}
+        if ruta != '/comments':
+            return 404, {'error': 'Ruta no encontrada'}, {}
+        if metodo != 'POST':
+            return 405, {'error': 'Use POST'}, {'Allow': 'POST'}
+        if cuerpo is None:
+            return 413, {'error': f'El cuerpo supera {MAX_CUERPO_SOLICITUD} bytes'}, {}
+        try:
+            recibidos = parse_body(cuerpo)
+        except (ValueError, UnicodeDecodeError) as e:
+            return 400, {'error': f'JSON inválido: {e}'}, {}
+        comentarios = [normalize_comment(c) for c in recibidos]
+        validos = [c for c in comentarios if c is not None]
+        if not validos:
+            return 400, {'error': 'Ningún comentario con texto'}, {}
+        if not await self.batcher.add(validos):
+            return 503, {'error': 'Búfer lleno, reintente'}, {'Retry-After': str(max(1, round(self.batcher.max_wait)))}
+        return 202, {'accepted': len(validos), 'invalid': len(comentarios) - len(validos),
+                     'ids': [c['id'] for c in validos]}, {}
+
+    @staticmethod
+    def _escribir_respuesta(writer, estado: int, respuesta: Dict, cabeceras: Dict, cerrar: bool):
+        cuerpo = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+        lineas = [f"HTTP/1.1 {estado} {_MENSAJES_HTTP.get(estado, '')}",
+                  'Content-Type: application/json; charset=utf-8',
+                  f"Content-Length: {len(cuerpo)}",
+                  f"Connection: {'close' if cerrar else 'keep-alive'}"]
+        lineas += [f"{nombre}: {valor}" for nombre, valor in cabeceras.items()]
+        writer.write(('\r\n'.join(lineas) + '\r\n\r\n').encode('latin-1') + cuerpo)
+
+
+async def serve(sink, host: str = '127.0.0.1', port: int = 8080, **batcher_options):
+    """
+    Corre el servicio hasta que se cancele; al detenerse escribe lo pendiente.
+    """
+    server = IngestionServer(MicroBatcher(sink, **batcher_options), host, port)
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument('--bucket', help="Bucket S3 de comentarios (dispara lambda_handler)")
+    destino.add_argument('--local-dir', help="Directorio local en lugar de S3")
+    parser.add_argument('--prefix', default=PREFIJO_SHARDS)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch', type=int, default=MAX_COMENTARIOS_LOTE, help="Comentarios por shard")
+    parser.add_argument('--max-wait', type=float, default=MAX_ESPERA_LOTE, help="Segundos máximos de un lote abierto")
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDIENTES, help="Comentarios en memoria antes de rechazar")
+    parser.add_argument('--spill-dir', default=DIRECTORIO_DERRAME,
+                        help="Directorio local para los shards que no se pudieron escribir al detenerse")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    sink = S3ShardSink(args.bucket, args.prefix) if args.bucket else LocalShardSink(args.local_dir, args.prefix)
+    try:
+        asyncio.run(serve(sink, args.host, args.port, max_batch=args.max_batch,
+                          max_wait=args.max_wait, max_pending=args.max_pending, spill_dir=args.spill_dir))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+# core/item_codec.py
+"""
+Codificación de los comentarios procesados como ítems de DynamoDB.
+
+Formato legado (sin atributo 'v'): el diccionario del comentario tal cual,
+con nombres largos, sentiment_score como mapa de cuatro números y entities
+como lista de mapas {Text, Type, Score}.
+
+Formato compacto versión 1 ('v' = 1):
+    comment_id, timestamp, sentiment  sin cambios (claves de la tabla y del
+                                      índice SentimentTimestampIndex)
+    x   texto, o bien
+    z   texto comprimido con zlib (binario) si ocupa más de UMBRAL_COMPRESION
+        bytes y la compresión lo reduce
+    p   los cuatro puntajes (Positive, Negative, Neutral, Mixed) como enteros
+        de 16 bits escalados por ESCALA_PUNTAJE, en 8 bytes binarios (vacío
+        si el análisis falló)
+    e   entidades en un solo texto: <tipo>\x1f<puntaje escalado>\x1f<texto>
+        separadas por \x1e (vacío si no hay); el tipo es un dígito si está
+        en TIPOS_ENTIDAD
+Los puntajes conservan cuatro decimales. Los demás atributos (ej. expires_at)
+se copian sin cambios. decode_item lee ambos formatos, así que una tabla
+puede mezclarlos y no hace falta migrar los ítems existentes.
+
+Las escrituras usan el formato legado por defecto: los lectores que aún no
+usan decode_item (otros servicios, exportaciones) no entienden el compacto.
+DYNAMODB_ITEM_ENCODING=compact lo activa cuando todos se hayan migrado.
+"""
+import decimal
+import json
+import os
+import struct
+import zlib
+from typing import Dict, Iterable, Tuple
+
+VERSION_COMPACTA = 1
+LEGADA = 'legacy'
+COMPACTA = 'compact'
+# Codificación de las escrituras nuevas (DYNAMODB_ITEM_ENCODING=compact cuando los lectores la soporten)
+CODIFICACION_POR_DEFECTO = os.environ.get('DYNAMODB_ITEM_ENCODING', LEGADA)
+
+ESCALA_PUNTAJE = 10000
+UMBRAL_COMPRESION = 512
+NIVEL_COMPRESION = 6
+CLAVES_PUNTAJE = ('Positive', 'Negative', 'Neutral', 'Mixed')
+TIPOS_ENTIDAD = ('OTHER', 'COMMERCIAL_ITEM', 'ORGANIZATION', 'PERSON', 'LOCATION', 'EVENT', 'DATE',
+                 'QUANTITY', 'TITLE')
+SEPARADOR_ENTIDAD = '\x1e'
+SEPARADOR_CAMPO = '\x1f'
+
+_PUNTAJES = struct.Struct('>4H')
+# Nombre en el formato legado -> nombres que puede tener en el compacto
+_ATRIBUTOS_COMPACTOS = {'text': ('x', 'z'), 'sentiment_score': ('p',), 'entities': ('e',)}
+
+
+def _escalar(valor) -> int:
+    return max(0, min(ESCALA_PUNTAJE, round(float(valor) * ESCALA_PUNTAJE)))
+
+
+def _pack_entities(entities: Iterable[Dict]) -> str:
+    partes = []
+    for entidad in entities:
+        tipo = entidad.get('Type', 'OTHER')
+        codigo = str(TIPOS_ENTIDAD.index(tipo)) if tipo in TIPOS_ENTIDAD else tipo
+        partes.append(SEPARADOR_CAMPO.join([codigo, str(_escalar(entidad.get('Score', 0))), entidad.get('Text', '')]))
+    return SEPARADOR_ENTIDAD.join(partes)
+
+
+def _unpack_entities(empaquetadas: str):
+    entidades = []
+    for parte in empaquetadas.split(SEPARADOR_ENTIDAD):
+        codigo, puntaje, texto = parte.split(SEPARADOR_CAMPO, 2)
+        tipo = TIPOS_ENTIDAD[int(codigo)] if codigo.isdigit() else codigo
+        entidades.append({'Text': texto, 'Type': tipo, 'Score': int(puntaje) / ESCALA_PUNTAJE})
+    return entidades
+
+
+def encode_item(comment: Dict, encoding: str = None) -> Dict:
+    """
+    Convierte un comentario procesado en el ítem que se guarda en DynamoDB,
+    en `encoding` (LEGADA o COMPACTA; por defecto CODIFICACION_POR_DEFECTO).
+    """
+    if (encoding or CODIFICACION_POR_DEFECTO) == LEGADA:
+        # Floats a Decimal, que es lo que acepta boto3
+        return json.loads(json.dumps(comment), parse_float=decimal.Decimal)
+    item = {'v': VERSION_COMPACTA}
+    for clave, valor in comment.items():
+        if clave == 'text':
+            crudo = (valor or '').encode('utf-8')
+            comprimido = zlib.compress(crudo, NIVEL_COMPRESION) if len(crudo) > UMBRAL_COMPRESION else None
+            if comprimido is not None and len(comprimido) < len(crudo):
+                item['z'] = comprimido
+            else:
+                item['x'] = valor
+        elif clave == 'sentiment_score':
+            # Vacío si el análisis falló (sentimiento UNKNOWN)
+            item['p'] = _PUNTAJES.pack(*(_escalar(valor.get(k, 0)) for k in CLAVES_PUNTAJE)) if valor else b''
+        elif clave == 'entities':
+            item['e'] = _pack_entities(valor or [])
+        else:
+            item[clave] = json.loads(json.dumps(valor), parse_float=decimal.Decimal)
+    return item
+
+
+def _a_float(valor):
+    return float(valor) if isinstance(valor, decimal.Decimal) else valor
+
+
+def decode_item(item: Dict) -> Dict:
+    """
+    Devuelve el comentario en la forma de siempre (text, sentiment_score con
+    floats, entities con Score float) a partir de un ítem en cualquiera de
+    los dos formatos. Los números sueltos se convierten a float, como hacían
+    los lectores. Funciona con ítems proyectados (solo algunos atributos).
+    """
+    version = item.get('v')
+    if version is None:
+        comentario = {clave: _a_float(valor) for clave, valor in item.items()}
+        if isinstance(comentario.get('sentiment_score'), dict):
+            comentario['sentiment_score'] = {k: float(v) for k, v in comentario['sentiment_score'].items()}
+        if isinstance(comentario.get('entities'), list):
+            comentario['entities'] = [{**e, 'Score': _a_float(e['Score'])} if 'Score' in e else e
+                                      for e in comentario['entities']]
+        return comentario
+    if int(version) != VERSION_COMPACTA:
+        raise ValueError(f"Versión de ítem desconocida: {version}")
+
+    comentario = {}
+    for clave, valor in item.items():
+        if clave == 'v':
+            continue
+        if clave == 'x':
+            comentario['text'] = valor
+        elif clave == 'z':
+            comentario['text'] = zlib.decompress(bytes(valor)).decode('utf-8')
+        elif clave == 'p':
+            valor = bytes(valor)
+            comentario['sentiment_score'] = {
+                k: n / ESCALA_PUNTAJE for k, n in zip(CLAVES_PUNTAJE, _PUNTAJES.unpack(valor))
+            } if valor else {}
+        elif clave == 'e':
+            comentario['entities'] = _unpack_entities(valor) if valor else []
+        else:
+            comentario[clave] = _a_float(valor)
+    return comentario
+
+
+def stored_attributes(fields: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Nombres físicos a proyectar para leer `fields` (nombres del formato
+    legado) en ambos formatos, para ProjectionExpression.
+    """
+    nombres = ['v']
+    for campo in fields:
+        nombres.append(campo)
+        nombres.extend(_ATRIBUTOS_COMPACTOS.get(campo, ()))
+    return tuple(dict.fromkeys(nombres))
+
+
+def item_size(item: Dict) -> int:
+    """
+    Tamaño aproximado del ítem según las reglas de DynamoDB: nombres y
+    cadenas en UTF-8, binarios en bytes, números ~1 byte por cada dos
+    dígitos significativos más uno, y 3 bytes más 1 por elemento en listas
+    y mapas. Es lo que determina las unidades de capacidad consumidas.
+    """
+    return sum(len(nombre.encode('utf-8')) + _value_size(valor) for nombre, valor in item.items())
+
+
+def _value_size(valor) -> int:
+    if isinstance(valor, str):
+        return len(valor.encode('utf-8'))
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    if hasattr(valor, 'value') and isinstance(valor.value, (bytes, bytearray)):
+        # boto3.dynamodb.types.Binary
+        return len(valor.value)
+    if isinstance(valor, bool) or valor is None:
+        return 1
+    if isinstance(valor, (int, float, decimal.Decimal)):
+        digitos = decimal.Decimal(str(valor)).normalize().as_tuple().digits
+        return 1 + (len(digitos) + 1) // 2
+    if isinstance(valor, dict):
+        return 3 + sum(1 + len(k.encode('utf-8')) + _value_size(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple, set)):
+        return 3 + sum(1 + _value_size(v) for v in valor)
+    return len(str(valor))
@@ -0,0 +1,278 @@
+# core/job_queue.py
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from .metrics import collect, collect_events, summarize, summarize_events
+
+logger = logging.getLogger(__name__)
+
+# Estados de un trabajo
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'jobs.sqlite3'
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    job_type    TEXT NOT NULL,
+    params      TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    progress    REAL NOT NULL DEFAULT 0,
+    message     TEXT,
+    result      TEXT,
+    error       TEXT,
+    worker      TEXT,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    metrics     TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """
+    Cola de trabajos persistida en SQLite con un pool local de hilos.
+    Los trabajos sobreviven a reconexiones del navegador y a reinicios del
+    proceso: un trabajo que quedó 'running' sin latido se vuelve a encolar.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_workers: int = 2,
+                 stale_after: float = 900, max_attempts: int = 2):
+        self.db_path = db_path or os.environ.get('JOB_QUEUE_DB', DEFAULT_DB_PATH)
+        self.max_workers = max_workers
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, Callable] = {}
+        self._on_failure: Dict[str, Callable] = {}
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Bases creadas antes de que los trabajos guardaran métricas
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            if 'metrics' not in columns:
+                conn.execute('ALTER TABLE jobs ADD COLUMN metrics TEXT')
+
+    def _connect(self):
+        # Una conexión por hilo; SQLite serializa las escrituras entre hilos y procesos
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def register(self, job_type: str, handler: Callable, on_failure: Optional[Callable] = None):
+        """
+        Registra la función que ejecuta un tipo de trabajo.
+        La función recibe (params, progress) y retorna un resultado serializable en JSON.
+        `progress(step, total, message)` actualiza el avance visible en la interfaz.
+        `on_failure(params)`, si se indica, se llama una vez cuando el trabajo
+        agota sus intentos (ej. para borrar archivos temporales).
+        """
+        self._handlers[job_type] = handler
+        if on_failure is not None:
+            self._on_failure[job_type] = on_failure
+        else:
+            self._on_failure.pop(job_type, None)
+
+    def start(self):
+        """
+        Recupera trabajos interrumpidos y arranca los hilos del pool.
+        """
+        if self._threads:
+            return
+        self.requeue_stale()
+        for i in range(self.max_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, job_type: str, params: Dict) -> str:
+        """
+        Encola un trabajo y retorna su id.
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"Tipo de trabajo no registrado: {job_type}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            'INSERT INTO jobs (job_id, job_type, params, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, job_type, json.dumps(params, ensure_ascii=False), PENDING, now, now)
+        )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Retorna el estado de un trabajo (y su resultado si terminó) o None si no existe.
+        """
+        row = self._connect().execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        if status:
+            rows = self._connect().execute(
+                'SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?', (status, limit)
+            ).fetchall()
+        else:
+            rows = self._connect().execute(
+                'SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,)
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def last_result(self, job_type: str, params: Dict, accept: Optional[Callable] = None,
+                    scan_limit: int = 200) -> Optional[Dict]:
+        """
+        Último trabajo terminado con los mismos parámetros (y cuyo resultado
+        cumpla `accept`, si se indica), o None. Sirve como resultado de
+        respaldo cuando el servicio externo no responde.
+        """
+        rows = self._connect().execute(
+            'SELECT * FROM jobs WHERE job_type = ? AND status = ? ORDER BY updated_at DESC LIMIT ?',
+            (job_type, DONE, scan_limit)
+        ).fetchall()
+        for row in rows:
+            job = self._row_to_job(row)
+            if job['params'] == params and (accept is None or accept(job['result'])):
+                return job
+        return None
+
+    def requeue_stale(self) -> int:
+        """
+        Vuelve a encolar los trabajos 'running' sin latido reciente (su proceso murió).
+        """
+        cursor = self._connect().execute(
+            'UPDATE jobs SET status = ?, worker = NULL, message = ? WHERE status = ? AND updated_at < ?',
+            (PENDING, 'Reencolado tras una interrupción', RUNNING, time.time() - self.stale_after)
+        )
+        if cursor.rowcount:
+            logger.info(f"{cursor.rowcount} trabajos interrumpidos reencolados")
+        return cursor.rowcount
+
+    def purge(self, older_than: float = 7 * 24 * 3600) -> int:
+        """
+        Elimina trabajos terminados más antiguos que `older_than` segundos.
+        """
+        cursor = self._connect().execute(
+            'DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
+            (DONE, FAILED, time.time() - older_than)
+        )
+        return cursor.rowcount
+
+    def _row_to_job(self, row) -> Dict:
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        job['metrics'] = json.loads(job['metrics']) if job.get('metrics') else None
+        return job
+
+    def _claim_next(self) -> Optional[Dict]:
+        """
+        Toma atómicamente el trabajo pendiente más antiguo.
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1', (PENDING,)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                'UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ?',
+                (RUNNING, self.worker_id, now, row['job_id'])
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        job = self._row_to_job(row)
+        job['attempts'] += 1
+        return job
+
+    def _update(self, job_id: str, **fields):
+        fields['updated_at'] = time.time()
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        self._connect().execute(f'UPDATE jobs SET {columns} WHERE job_id = ?', (*fields.values(), job_id))
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self._claim_next()
+            except sqlite3.Error as e:
+                logger.error(f"Error leyendo la cola de trabajos: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(timeout=1)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict):
+        job_id = job['job_id']
+        handler = self._handlers.get(job['job_type'])
+        if handler is None:
+            self._update(job_id, status=FAILED, error=f"Tipo de trabajo no registrado: {job['job_type']}")
+            return
+
+        def progress(step, total, message=''):
+            # Cada actualización sirve también como latido del trabajo
+            self._update(job_id, progress=min(step / total, 1.0) if total else 0, message=message)
+
+        try:
+            # Las llamadas externas y los eventos del trabajo se guardan para el desglose de tiempos
+            with collect() as records, collect_events() as events:
+                result = handler(job['params'], progress)
+            metrics = {'summary': summarize(records), 'calls': records, 'events': summarize_events(events)}
+            self._update(job_id, status=DONE, progress=1.0, result=json.dumps(result, ensure_ascii=False),
+                         metrics=json.dumps(metrics, ensure_ascii=False, default=str))
+        except Exception as e:
+            logger.error(f"Trabajo {job_id} falló: {e}")
+            if job['attempts'] < self.max_attempts:
+                self._update(job_id, status=PENDING, worker=None, message=f"Reintentando tras error: {e}")
+                self._wakeup.set()
+            else:
+                error = traceback.format_exc()
+                # La limpieza va antes de marcarlo: quien ve FAILED ya no encuentra sus temporales
+                self._fail(job)
+                self._update(job_id, status=FAILED, error=error)
+
+    def _fail(self, job: Dict):
+        on_failure = self._on_failure.get(job['job_type'])
+        if on_failure is None:
+            return
+        try:
+            on_failure(job['params'])
+        except Exception as e:
+            logger.error(f"Limpieza del trabajo {job['job_id']} falló: {e}")
@@ -1,15 +1,56 @@
 import json
 import os
-import datetime
+from .aws_clients import get_client
 from .data_ingestion import get_comment_from_s3
-from .sentiment_analysis import analyze_sentiment, extract_entities
-from .bedrock_summarization import generate_summary_bedrock # Para resúmenes por lotes
+from .sentiment_analysis import analyze_sentiment_batch, extract_entities, cache_stats, get_backend
 from .database_management import DynamoDBManager
+from .metrics import collect, collect_events, emit_emf
+
+# Se reutilizan entre invocaciones del mismo contenedor (invocaciones "en caliente")
+_db_manager = None
+
+def get_db_manager():
+    """
+    Retorna el DynamoDBManager del contenedor, creándolo en el primer uso.
+    """
+    global _db_manager
+    if _db_manager is None:
+        _db_manager = DynamoDBManager()
+    return _db_manager
+
+def _init_container():
+    """
+    Crea los clientes y el handle de la tabla durante la fase de init de
+    Lambda, que corre con CPU completa y no se cobra en la primera invocación
+    con concurrencia aprovisionada. Bedrock no se prepara aquí: el resumen del
+    lote se importa y crea su cliente solo cuando se necesita. El motor de
+    sentimiento también se crea aquí (con SENTIMENT_BACKEND=local o hybrid
+    eso incluye importar NumPy y armar el léxico).
+    """
+    get_client('s3')
+    get_client('comprehend')
+    get_backend()
+    get_db_manager()
+
+# Fuera de Lambda (benchmarks, scripts) la inicialización queda para el primer uso
+if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+    _init_container()
 
 def lambda_handler(event, context):
     """
     Función principal de AWS Lambda para procesar comentarios.
     Se activa con un evento de S3.
+    Al terminar emite métricas EMF con latencia, tokens y costo por servicio.
+    """
+    with collect() as records, collect_events() as events:
+        try:
+            return _process_event(event, context)
+        finally:
+            emit_emf(records, events=events, FunctionName=getattr(context, 'function_name', 'local'))
+
+def _process_event(event, context):
+    """
+    Procesa el archivo de comentarios indicado en el evento de S3.
     """
     s3_bucket = event['Records'][0]['s3']['bucket']['name']
     s3_key = event['Records'][0]['s3']['object']['key']
@@ -22,24 +63,33 @@ def lambda_handler(event, context):
         print("🔴 No se pudieron obtener comentarios del archivo S3.")
         return {'statusCode': 500, 'body': json.dumps('Error al procesar el archivo S3')}
 
-    db_manager = DynamoDBManager()
+    db_manager = get_db_manager()
     processed_comments = []
-    all_comment_texts = [] 
+    all_comment_texts = []
+    all_comment_ids = []
+    all_comment_sentiments = []
 
+    valid_comments = []
     for comment in comments_raw:
+        if not all([comment.get('id'), comment.get('text'), comment.get('timestamp')]):
+            print(f"🟡 Comentario inválido, saltando: {comment}")
+            continue
+        valid_comments.append(comment)
+
+    # 2. Análisis de Sentimiento del archivo completo en un lote (el motor local
+    # lo puntúa de una vez) y Extracción de Entidades por comentario
+    sentiments = analyze_sentiment_batch([comment['text'] for comment in valid_comments])
+
+    for comment, (sentiment, sentiment_score) in zip(valid_comments, sentiments):
         comment_id = comment.get('id')
         comment_text = comment.get('text')
         timestamp = comment.get('timestamp')
 
-        if not all([comment_id, comment_text, timestamp]):
-            print(f"🟡 Comentario inválido, saltando: {comment}")
-            continue
-
-        # 2. Análisis de Sentimiento y Extracción de Entidades
-        sentiment, sentiment_score = analyze_sentiment(comment_text)
         entities = extract_entities(comment_text)
         
         all_comment_texts.append(comment_text) # Añadir para posible resumen de lotes
+        all_comment_ids.append(comment_id)
+        all_comment_sentiments.append(sentiment)
 
         # 3. Preparar datos para DynamoDB
         processed_comment_data = {
@@ -50,6 +100,9 @@ def lambda_handler(event, context):
             'sentiment_score': sentiment_score, # Guardar el diccionario completo
             'entities': entities
         }
+        # Producto o colegio del comentario: partición en el esquema por inquilino (core.table_schema)
+        if comment.get('tenant'):
+            processed_comment_data['tenant'] = comment['tenant']
         
         # 4. Almacenar en DynamoDB
         if db_manager.add_comment(processed_comment_data):
@@ -57,12 +110,27 @@ def lambda_handler(event, context):
         else:
             print(f"❌ Fallo al añadir comentario {comment_id} a DynamoDB.")
 
+    # 4b. Indexar hashtags, entidades y palabras clave para la búsqueda del dashboard
+    if processed_comments:
+        indexados = db_manager.index_comments(processed_comments)
+        print(f"🔎 {indexados} entradas agregadas al índice de búsqueda.")
+
     # 5.  Generar un resumen de Bedrock para el lote de comentarios recién procesados
     if all_comment_texts:
-        summary = generate_summary_bedrock(all_comment_texts)
+        # Importación diferida: model_routing, bedrock_client y el cliente de Bedrock
+        # solo se cargan en las invocaciones que llegan a generar un resumen
+        # Los comentarios casi iguales de un mismo sentimiento van como un solo representante con su conteo
+        from .bedrock_summarization import generate_clustered_summary
+        resultado = generate_clustered_summary(all_comment_texts, all_comment_sentiments)
+        summary, clusters = resultado['summary'], resultado['clusters']
+        print(f"🧩 {len(all_comment_texts)} comentarios agrupados en {len(clusters)} opiniones para el resumen.")
+        for cluster in sorted(clusters, key=lambda c: -c['count'])[:5]:
+            ids = [all_comment_ids[i] for i in cluster['members']]
+            print(f"   {cluster['sentiment']} x{cluster['count']}: {ids[:10]}{' ...' if len(ids) > 10 else ''}")
         print(f"✨ Resumen de Bedrock para este lote de comentarios: {summary[:200]}...") # Imprime los primeros 200 chars
 
     print(f"✅ Procesamiento completado para {len(processed_comments)} comentarios.")
+    print(f"📦 Caché de Comprehend del contenedor: {cache_stats()}")
     return {
         'statusCode': 200,
         'body': json.dumps(f'Procesados {len(processed_comments)} comentarios.')
@@ -0,0 +1,203 @@
+# core/local_sentiment.py
+import re
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Mismo orden y nombres que SentimentScore de Comprehend
+SENTIMIENTOS = ('POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED')
+CLAVES_PUNTAJE = ('Positive', 'Negative', 'Neutral', 'Mixed')
+
+# Léxico en minúsculas y sin tildes: (peso positivo, peso negativo, peso neutral)
+LEXICO = {
+    # Positivas
+    'encanta': (2, 0, 0), 'encanto': (2, 0, 0), 'encantan': (2, 0, 0), 'encantaron': (2, 0, 0),
+    'delicioso': (2, 0, 0), 'deliciosa': (2, 0, 0), 'deliciosos': (2, 0, 0), 'sabroso': (2, 0, 0),
+    'rico': (1.5, 0, 0), 'rica': (1.5, 0, 0), 'riquisimo': (2, 0, 0), 'exquisito': (2, 0, 0),
+    'excelente': (2, 0, 0), 'excelentes': (2, 0, 0), 'espectacular': (2, 0, 0), 'genial': (2, 0, 0),
+    'mejor': (1.5, 0, 0), 'perfecto': (2, 0, 0), 'perfecta': (2, 0, 0), 'ideal': (1.5, 0, 0),
+    'bueno': (1, 0, 0), 'buena': (1, 0, 0), 'buenos': (1, 0, 0), 'buenas': (1, 0, 0), 'buenisimo': (2, 0, 0),
+    'bien': (1, 0, 0), 'recomiendo': (2, 0, 0), 'recomendado': (2, 0, 0), 'recomendable': (2, 0, 0),
+    'amo': (2, 0, 0), 'amaron': (2, 0, 0), 'gusta': (1.5, 0, 0), 'gustan': (1.5, 0, 0), 'gusto': (1, 0, 0),
+    'practico': (1, 0, 0), 'bonito': (1, 0, 0), 'bonita': (1, 0, 0), 'autentico': (1, 0, 0),
+    'crujiente': (1, 0, 0), 'fresco': (1, 0, 0), 'natural': (0.5, 0, 0), 'naturales': (0.5, 0, 0),
+    'calidad': (0.5, 0, 0), 'supero': (1.5, 0, 0), 'interesante': (1, 0, 0), 'interesantes': (1, 0, 0),
+    'satisfecho': (1.5, 0, 0), 'satisfecha': (1.5, 0, 0), 'feliz': (1.5, 0, 0), 'energia': (0.5, 0, 0),
+    'comprare': (1, 0, 0), 'volvere': (1, 0, 0), 'volveria': (1, 0, 0), 'facil': (0.5, 0, 0),
+    'rapida': (0.5, 0, 0), 'rapido': (0.5, 0, 0), 'buen': (1, 0, 0), 'favorito': (1.5, 0, 0),
+    'favorita': (1.5, 0, 0), 'exito': (1.5, 0, 0), 'nutritivo': (1, 0, 0), 'amable': (1.5, 0, 0),
+    'satisfactorio': (1.5, 0, 0), 'adictiva': (1, 0, 0), 'adictivo': (1, 0, 0), 'refrescante': (1, 0, 0),
+    'perfectas': (2, 0, 0), 'perfectos': (2, 0, 0), 'salvacion': (1.5, 0, 0), 'sacia': (1, 0, 0),
+    'gracias': (1, 0, 0), 'increible': (2, 0, 0),
+    # Negativas
+    'problema': (0, 1.5, 0), 'problemas': (0, 1.5, 0), 'excesivo': (0, 1.5, 0), 'excesiva': (0, 1.5, 0),
+    'decepciono': (0, 2, 0), 'decepcion': (0, 2, 0), 'decepcionado': (0, 2, 0), 'decepcionada': (0, 2, 0),
+    'decepcionante': (0, 2, 0), 'malo': (0, 2, 0), 'mala': (0, 2, 0), 'malos': (0, 2, 0), 'malas': (0, 2, 0),
+    'pesimo': (0, 2.5, 0), 'pesima': (0, 2.5, 0), 'horrible': (0, 2.5, 0), 'asco': (0, 2.5, 0),
+    'rancio': (0, 2, 0), 'rancia': (0, 2, 0), 'vencido': (0, 2, 0), 'insipido': (0, 1.5, 0),
+    'aplastado': (0, 1.5, 0), 'roto': (0, 1.5, 0), 'abierto': (0, 1, 0), 'caro': (0, 1.5, 0),
+    'alto': (0, 0.5, 0), 'regular': (0, 1, 0.5), 'dificil': (0, 1, 0), 'dificiles': (0, 1, 0),
+    'duro': (0, 1, 0), 'feo': (0, 1.5, 0), 'pesado': (0, 1, 0), 'tarde': (0, 1, 0), 'demora': (0, 1, 0),
+    'reclamo': (0, 1.5, 0), 'devolucion': (0, 1, 0), 'golosina': (0, 0.5, 0), 'desear': (0, 1, 0),
+    'esperaba': (0, 1, 0), 'artificial': (0, 1, 0), 'enganoso': (0, 1.5, 0), 'amargo': (0, 1, 0),
+    'regusto': (0, 0.5, 0), 'blando': (0, 1, 0), 'pequena': (0, 1, 0), 'deberian': (0, 0.5, 0.5),
+    'mejorar': (0, 0.5, 0.5), 'gustaria': (0, 0.5, 0.5), 'peor': (0, 2, 0), 'mal': (0, 1.5, 0),
+    'lamentablemente': (0, 1.5, 0), 'reconsiderarlo': (0, 0.5, 0.5),
+    # Neutrales: descripciones sin valoración
+    'promedio': (0, 0, 1), 'normal': (0, 0, 1), 'cumple': (0, 0, 0.5), 'similar': (0, 0, 0.5),
+    'simplemente': (0, 0, 0.5), 'presentacion': (0, 0, 0.5), 'gramos': (0, 0, 0.5), 'opinion': (0, 0, 0.5),
+}
+
+# Hashtags con valoración propia; el resto se puntúa con la palabra sin '#'
+HASHTAGS = {
+    '#decepcion': (0, 2, 0), '#problema': (0, 1.5, 0), '#demasiadodulce': (0, 1.5, 0),
+    '#delicioso': (2, 0, 0), '#recomendado': (2, 0, 0), '#encanta': (2, 0, 0),
+}
+PESO_HASHTAG = 1.0
+
+NEGADORES = {'no', 'ni', 'nada', 'tampoco', 'sin', 'nunca'}
+INTENSIFICADORES = {'muy', 'super', 'bastante', 'demasiado', 'totalmente', 'mucho', 'tan', 'realmente',
+                    'increiblemente'}
+CONTRASTES = {'pero', 'aunque', 'sinembargo', 'eso_si'}
+
+# Alcance de una negación (tokens siguientes) y efecto sobre la palabra negada:
+# parte de su peso pasa al polo opuesto y el resto a neutral. Negar algo
+# positivo es casi siempre una queja ("no me gustó"); negar algo negativo
+# suele ser un elogio tibio ("tampoco malo").
+ALCANCE_NEGACION = 2
+INVERSION_POSITIVA = 0.75
+INVERSION_NEGATIVA = 0.5
+FACTOR_INTENSIFICADOR = 1.5
+
+# Evidencia neutral de base: con poca señal léxica el texto queda NEUTRAL,
+# pero con confianza baja gracias a la evidencia mínima de los demás puntajes
+PRIOR_NEUTRAL = 0.8
+SUAVIZADO = 0.15
+# Evidencia de MIXED por cada unidad del polo más débil, aumentada con un conector de contraste
+FACTOR_MIXTO = 2.0
+BONO_CONTRASTE = 0.5
+
+_TOKEN = re.compile(r'#?\w+')
+_SIN_TILDES = str.maketrans('áéíóúüàèìòù', 'aeiouuaeiou')
+_FRASES = [(re.compile(r'\bsin embargo\b'), 'sinembargo'), (re.compile(r'\beso s[ií]\b'), 'eso_si')]
+
+
+def _plegar(texto: str) -> str:
+    """
+    Minúsculas y sin tildes (conserva la ñ), para comparar con el léxico.
+    """
+    return unicodedata.normalize('NFC', texto).lower().translate(_SIN_TILDES)
+
+
+class LexiconSentimentEngine:
+    """
+    Motor local de sentimiento en español, sin llamadas remotas: léxico con
+    negación e intensificadores más rasgos de hashtags. Tokenizar es lo único
+    que se hace por texto; negación, intensificadores y puntajes se calculan
+    con NumPy sobre todos los tokens del lote a la vez.
+    Los puntajes imitan a los de Comprehend (suman 1) y el mayor se usa como
+    confianza del resultado.
+    """
+
+    def __init__(self, lexico: Dict[str, Tuple[float, float, float]] = None,
+                 hashtags: Dict[str, Tuple[float, float, float]] = None):
+        lexico = dict(LEXICO if lexico is None else lexico)
+        hashtags = HASHTAGS if hashtags is None else hashtags
+        for palabra, pesos in list(lexico.items()):
+            lexico.setdefault('#' + palabra, tuple(p * PESO_HASHTAG for p in pesos))
+        lexico.update(hashtags)
+
+        # Vocabulario: palabras con peso y marcadores (negación, intensificador, contraste)
+        self._vocab = {palabra: i for i, palabra in enumerate(lexico)}
+        pesos = np.array(list(lexico.values()), dtype=np.float64).reshape(-1, 3)
+        marcadores = sorted((NEGADORES | INTENSIFICADORES | CONTRASTES) - set(self._vocab))
+        for palabra in marcadores:
+            self._vocab[palabra] = len(self._vocab)
+        pesos = np.vstack([pesos, np.zeros((len(marcadores), 3))])
+
+        # Pesos de cada palabra negada: parte al polo opuesto y el resto a neutral
+        negados = np.empty_like(pesos)
+        negados[:, 0] = pesos[:, 1] * INVERSION_NEGATIVA
+        negados[:, 1] = pesos[:, 0] * INVERSION_POSITIVA
+        negados[:, 2] = pesos[:, 2] + pesos[:, 0] * (1 - INVERSION_POSITIVA) + pesos[:, 1] * (1 - INVERSION_NEGATIVA)
+        self._pesos = pesos
+        self._pesos_negados = negados
+
+        def mascara(palabras):
+            marca = np.zeros(len(self._vocab), dtype=bool)
+            marca[[self._vocab[p] for p in palabras if p in self._vocab]] = True
+            return marca
+        self._es_negador = mascara(NEGADORES)
+        self._es_intensificador = mascara(INTENSIFICADORES)
+        self._es_contraste = mascara(CONTRASTES)
+
+    def _tokenizar(self, textos: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna (documento, id de vocabulario) de cada token conocido del lote,
+        en orden. Las palabras fuera del vocabulario quedan como -1 para que
+        la ventana de negación cuente posiciones reales.
+        """
+        documentos, ids = [], []
+        for i, texto in enumerate(textos):
+            texto = _plegar(texto or '')
+            for patron, reemplazo in _FRASES:
+                texto = patron.sub(reemplazo, texto)
+            tokens = _TOKEN.findall(texto)
+            documentos.extend([i] * len(tokens))
+            ids.extend(self._vocab.get(t, -1) for t in tokens)
+        return np.array(documentos, dtype=np.int64), np.array(ids, dtype=np.int64)
+
+    def score_batch(self, textos: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Puntúa un lote de textos. Retorna las etiquetas (POSITIVE, NEGATIVE,
+        NEUTRAL o MIXED) y una matriz (n, 4) de puntajes en el orden de
+        CLAVES_PUNTAJE.
+        """
+        n = len(textos)
+        documentos, ids = self._tokenizar(textos)
+        conocidos = ids >= 0
+        indices = np.where(conocidos, ids, 0)
+
+        # Un token está negado si un negador del mismo documento lo precede
+        # dentro de ALCANCE_NEGACION posiciones; igual para intensificadores (1).
+        negado = np.zeros(len(ids), dtype=bool)
+        for paso in range(1, ALCANCE_NEGACION + 1):
+            previo = np.zeros(len(ids), dtype=bool)
+            previo[paso:] = (conocidos[:-paso] & self._es_negador[indices[:-paso]]
+                             & (documentos[:-paso] == documentos[paso:]))
+            negado |= previo
+        intensificado = np.zeros(len(ids), dtype=bool)
+        intensificado[1:] = (conocidos[:-1] & self._es_intensificador[indices[:-1]]
+                             & (documentos[:-1] == documentos[1:]))
+
+        factor = np.where(intensificado, FACTOR_INTENSIFICADOR, 1.0) * conocidos
+        pesos = np.where(negado[:, None], self._pesos_negados[indices], self._pesos[indices]) * factor[:, None]
+        positivo = np.bincount(documentos, weights=pesos[:, 0], minlength=n)
+        negativo = np.bincount(documentos, weights=pesos[:, 1], minlength=n)
+        neutral = np.bincount(documentos, weights=pesos[:, 2], minlength=n) + PRIOR_NEUTRAL
+        contraste = np.bincount(documentos, weights=(conocidos & self._es_contraste[indices]).astype(np.float64),
+                                minlength=n)
+
+        mixto = FACTOR_MIXTO * np.minimum(positivo, negativo) * (1 + BONO_CONTRASTE * (contraste > 0))
+        evidencia = np.column_stack([positivo, negativo, neutral, mixto]) + SUAVIZADO
+        puntajes = evidencia / evidencia.sum(axis=1, keepdims=True)
+        etiquetas = [SENTIMIENTOS[i] for i in puntajes.argmax(axis=1)]
+        return etiquetas, puntajes
+
+    def analyze_batch(self, textos: Sequence[str]) -> List[Tuple[str, Dict[str, float]]]:
+        """
+        Igual que score_batch, con el formato de analyze_sentiment:
+        una lista de (sentimiento, SentimentScore).
+        """
+        etiquetas, puntajes = self.score_batch(textos)
+        return [
+            (etiqueta, {clave: round(float(valor), 4) for clave, valor in zip(CLAVES_PUNTAJE, fila)})
+            for etiqueta, fila in zip(etiquetas, puntajes)
+        ]
+
+    def extract_entities(self, texto: str) -> List[Dict]:
+        """
+        Entidades locales: los hashtags del texto, con el formato de Comprehend.
+        """
+        return [{'Text': tag, 'Type': 'OTHER', 'Score': 1.0} for tag in dict.fromkeys(re.findall(r'#\w+', texto))]
@@ -0,0 +1,349 @@
+# core/metrics.py
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Precios aproximados en USD (us-east-1) para estimar el costo de cada llamada.
+# Texto: por 1000 tokens de entrada/salida. Imagen: por imagen generada.
+MODEL_PRICES = {
+    'anthropic.claude-v2': {'input': 0.008, 'output': 0.024},
+    'anthropic.claude-v2:1': {'input': 0.008, 'output': 0.024},
+    'anthropic.claude-instant-v1': {'input': 0.0008, 'output': 0.0024},
+    'anthropic.claude-3-haiku-20240307-v1:0': {'input': 0.00025, 'output': 0.00125},
+    'anthropic.claude-3-5-haiku-20241022-v1:0': {'input': 0.0008, 'output': 0.004},
+    'anthropic.claude-3-sonnet-20240229-v1:0': {'input': 0.003, 'output': 0.015},
+    'anthropic.claude-3-5-sonnet-20240620-v1:0': {'input': 0.003, 'output': 0.015},
+    'anthropic.claude-3-7-sonnet-20250219-v1:0': {'input': 0.003, 'output': 0.015},
+    'stability.stable-diffusion-xl-v1': {'image': 0.04, 'image_over_50_steps': 0.08},
+}
+# Prefijos de región de los perfiles de inferencia; cuestan lo mismo que el modelo base
+PREFIJOS_PERFIL_INFERENCIA = ('us', 'eu', 'apac', 'global')
+# Caché de prompts: los tokens leídos de caché cuestan una fracción de la
+# entrada normal y los escritos un recargo sobre ella.
+CACHE_READ_PRICE_FACTOR = 0.1
+CACHE_WRITE_PRICE_FACTOR = 1.25
+# Comprehend cobra por unidad de 100 caracteres, con un mínimo de 3 unidades
+COMPREHEND_PRICE_PER_UNIT = 0.0001
+
+EMF_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'ContentEdu')
+
+# Recolectores activos de la operación en curso (una generación, una invocación
+# Lambda). Se usa un ContextVar para que hilos y trabajos concurrentes no se
+# mezclen; los bloques collect() anidados reciben todos los registros.
+_collectors: contextvars.ContextVar[tuple] = contextvars.ContextVar('metrics_collectors', default=())
+# Igual para los eventos (respaldos, aciertos de caché, cambios de circuito):
+# se cuentan aparte para no mezclarse con la latencia ni el costo de las llamadas
+_event_collectors: contextvars.ContextVar[tuple] = contextvars.ContextVar('metrics_event_collectors', default=())
+
+# Agregado global del proceso, útil para inspección en caliente
+_totals: Dict[tuple, Dict] = {}
+_event_totals: Dict[tuple, int] = {}
+_totals_lock = threading.Lock()
+
+
+@contextmanager
+def collect():
+    """
+    Recolecta los registros de todas las llamadas externas hechas dentro del bloque.
+
+        with collect() as records:
+            generar_programacion_curricular(...)
+        print(summarize(records))
+    """
+    records: List[Dict] = []
+    token = _collectors.set(_collectors.get() + (records,))
+    try:
+        yield records
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def collect_events():
+    """
+    Recolecta los eventos registrados con record_event dentro del bloque.
+
+        with collect() as records, collect_events() as events:
+            generar_programacion_curricular(...)
+        print(summarize_events(events))
+    """
+    events: List[Dict] = []
+    token = _event_collectors.set(_event_collectors.get() + (events,))
+    try:
+        yield events
+    finally:
+        _event_collectors.reset(token)
+
+
+def record_event(service: str, name: str, count: int = 1, **dims):
+    """
+    Cuenta un evento (ej. un respaldo usado o un acierto de caché). No es
+    una llamada externa: no tiene latencia ni costo y no aparece en
+    summarize, solo en summarize_events y en los documentos EMF.
+
+        record_event('fallback', 'rsip_a_borrador', iteracion=2)
+    """
+    event = {'service': service, 'event': name, 'count': count, 'time': time.time(), **dims}
+    for events in _event_collectors.get():
+        events.append(event)
+    with _totals_lock:
+        _event_totals[(service, name)] = _event_totals.get((service, name), 0) + count
+
+    if os.environ.get('METRICS_LOG_CALLS'):
+        logger.info(json.dumps({'metric': 'event', **event}, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def track_call(service: str, operation: str, **attrs):
+    """
+    Mide una llamada a un servicio externo. El registro producido se puede
+    completar dentro del bloque (tokens, tamaños, costo):
+
+        with track_call('comprehend', 'detect_sentiment', request_bytes=len(text)) as record:
+            response = comprehend.detect_sentiment(...)
+            record_aws_response(record, response)
+    """
+    record = {
+        'service': service,
+        'operation': operation,
+        'start': time.time(),
+        'latency_ms': None,
+        'retries': 0,
+        'request_bytes': None,
+        'response_bytes': None,
+        'input_tokens': None,
+        'output_tokens': None,
+        'cost_usd': None,
+        'error': None,
+    }
+    record.update(attrs)
+    inicio = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['latency_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+        _store(record)
+
+
+def _store(record: Dict):
+    for records in _collectors.get():
+        records.append(record)
+
+    key = (record['service'], record['operation'])
+    with _totals_lock:
+        total = _totals.setdefault(key, {'calls': 0, 'errors': 0, 'latency_ms': 0.0, 'cost_usd': 0.0})
+        total['calls'] += 1
+        total['errors'] += 1 if record['error'] else 0
+        total['latency_ms'] += record['latency_ms']
+        total['cost_usd'] += record['cost_usd'] or 0.0
+
+    if os.environ.get('METRICS_LOG_CALLS'):
+        logger.info(json.dumps({'metric': 'external_call', **record}, ensure_ascii=False, default=str))
+
+
+def record_aws_response(record: Dict, response: Dict):
+    """
+    Suma los reintentos de botocore y copia el código HTTP desde
+    ResponseMetadata de una respuesta de boto3.
+    """
+    metadata = (response or {}).get('ResponseMetadata', {})
+    record['retries'] = (record.get('retries') or 0) + metadata.get('RetryAttempts', 0)
+    record['http_status'] = metadata.get('HTTPStatusCode')
+
+
+def record_bedrock_usage(record: Dict, response: Dict, response_body: Dict, model_id: str):
+    """
+    Completa tokens y costo estimado de una llamada a invoke_model.
+    Bedrock informa los tokens en las cabeceras HTTP; si faltan se usa el
+    bloque 'usage' del cuerpo (formato Messages). Con caché de prompts,
+    input_tokens excluye los tokens leídos o escritos en la caché.
+    """
+    record_aws_response(record, response)
+    headers = (response or {}).get('ResponseMetadata', {}).get('HTTPHeaders', {})
+    usage = response_body.get('usage', {}) if isinstance(response_body, dict) else {}
+
+    input_tokens = headers.get('x-amzn-bedrock-input-token-count', usage.get('input_tokens'))
+    output_tokens = headers.get('x-amzn-bedrock-output-token-count', usage.get('output_tokens'))
+    record['input_tokens'] = int(input_tokens) if input_tokens is not None else None
+    record['output_tokens'] = int(output_tokens) if output_tokens is not None else None
+    cache_read = headers.get('x-amzn-bedrock-cache-read-input-token-count', usage.get('cache_read_input_tokens'))
+    cache_write = headers.get('x-amzn-bedrock-cache-write-input-token-count',
+                              usage.get('cache_creation_input_tokens'))
+    if cache_read is not None or cache_write is not None:
+        record['cache_read_tokens'] = int(cache_read or 0)
+        record['cache_write_tokens'] = int(cache_write or 0)
+    record['model_id'] = model_id
+    record['cost_usd'] = estimate_bedrock_cost(model_id, record['input_tokens'], record['output_tokens'],
+                                               images=record.get('images'), steps=record.get('steps'),
+                                               cache_read_tokens=record.get('cache_read_tokens'),
+                                               cache_write_tokens=record.get('cache_write_tokens'))
+
+
+def base_model_id(model_id: str) -> str:
+    """
+    Id del modelo sin el prefijo de región de los perfiles de inferencia
+    (ej. 'us.anthropic.claude-3-7-sonnet-...' -> 'anthropic.claude-3-7-sonnet-...').
+    """
+    region, _, resto = model_id.partition('.')
+    return resto if resto and region in PREFIJOS_PERFIL_INFERENCIA else model_id
+
+
+def estimate_bedrock_cost(model_id: str, input_tokens=None, output_tokens=None, images=None, steps=None,
+                          cache_read_tokens=None, cache_write_tokens=None):
+    prices = MODEL_PRICES.get(base_model_id(model_id))
+    if not prices:
+        return None
+    if 'image' in prices:
+        precio = prices['image_over_50_steps'] if steps and steps > 50 else prices['image']
+        return round(precio * (images or 1), 6)
+    entrada = ((input_tokens or 0) + (cache_read_tokens or 0) * CACHE_READ_PRICE_FACTOR
+               + (cache_write_tokens or 0) * CACHE_WRITE_PRICE_FACTOR)
+    return round(entrada / 1000 * prices['input'] + (output_tokens or 0) / 1000 * prices['output'], 6)
+
+
+def estimate_comprehend_cost(text: str) -> float:
+    unidades = max(3, -(-len(text.encode('utf-8')) // 100))
+    return round(unidades * COMPREHEND_PRICE_PER_UNIT, 6)
+
+
+def summarize(records: List[Dict]) -> List[Dict]:
+    """
+    Agrupa los registros por servicio y operación para un desglose de tiempos.
+    """
+    grupos: Dict[tuple, Dict] = {}
+    for record in records:
+        key = (record['service'], record['operation'])
+        grupo = grupos.setdefault(key, {
+            'service': key[0], 'operation': key[1], 'calls': 0, 'errors': 0, 'retries': 0,
+            'latency_ms': 0.0, 'max_latency_ms': 0.0, 'queue_ms': 0.0, 'throttled': 0,
+            'input_tokens': 0, 'output_tokens': 0, 'cache_read_tokens': 0, 'cache_write_tokens': 0,
+            'cost_usd': 0.0,
+        })
+        grupo['calls'] += 1
+        grupo['errors'] += 1 if record['error'] else 0
+        grupo['retries'] += record.get('retries') or 0
+        grupo['latency_ms'] += record['latency_ms'] or 0
+        grupo['max_latency_ms'] = max(grupo['max_latency_ms'], record['latency_ms'] or 0)
+        grupo['queue_ms'] += record.get('queue_ms') or 0
+        grupo['throttled'] += record.get('throttled') or 0
+        grupo['input_tokens'] += record.get('input_tokens') or 0
+        grupo['output_tokens'] += record.get('output_tokens') or 0
+        grupo['cache_read_tokens'] += record.get('cache_read_tokens') or 0
+        grupo['cache_write_tokens'] += record.get('cache_write_tokens') or 0
+        grupo['cost_usd'] += record.get('cost_usd') or 0.0
+    for grupo in grupos.values():
+        grupo['latency_ms'] = round(grupo['latency_ms'], 2)
+        grupo['queue_ms'] = round(grupo['queue_ms'], 2)
+        grupo['cost_usd'] = round(grupo['cost_usd'], 6)
+    return sorted(grupos.values(), key=lambda g: g['latency_ms'], reverse=True)
+
+
+def summarize_events(events: List[Dict]) -> List[Dict]:
+    """
+    Cantidad de cada evento por servicio, de mayor a menor.
+    """
+    conteos: Dict[tuple, int] = {}
+    for event in events:
+        key = (event['service'], event['event'])
+        conteos[key] = conteos.get(key, 0) + event['count']
+    return [{'service': s, 'event': e, 'count': c}
+            for (s, e), c in sorted(conteos.items(), key=lambda item: item[1], reverse=True)]
+
+
+def totals() -> List[Dict]:
+    """
+    Totales acumulados por el proceso desde que arrancó.
+    """
+    with _totals_lock:
+        return [{'service': s, 'operation': o, **dict(v)} for (s, o), v in _totals.items()]
+
+
+def event_totals() -> List[Dict]:
+    """
+    Eventos contados por el proceso desde que arrancó.
+    """
+    with _totals_lock:
+        return [{'service': s, 'event': e, 'count': c} for (s, e), c in _event_totals.items()]
+
+
+def emf_documents(records: List[Dict], namespace: str = EMF_NAMESPACE, events: Optional[List[Dict]] = None,
+                  **dimensions) -> List[Dict]:
+    """
+    Construye documentos en CloudWatch Embedded Metric Format (uno por
+    servicio/operación) a partir de los registros recolectados, y uno por
+    servicio/evento con la métrica Count si se indican `events`.
+    """
+    documentos = []
+    timestamp = int(time.time() * 1000)
+    for grupo in summarize(records):
+        dims = {'Service': grupo['service'], 'Operation': grupo['operation'], **dimensions}
+        documentos.append({
+            '_aws': {
+                'Timestamp': timestamp,
+                'CloudWatchMetrics': [{
+                    'Namespace': namespace,
+                    'Dimensions': [list(dims.keys())],
+                    'Metrics': [
+                        {'Name': 'Calls', 'Unit': 'Count'},
+                        {'Name': 'Errors', 'Unit': 'Count'},
+                        {'Name': 'Retries', 'Unit': 'Count'},
+                        {'Name': 'Throttles', 'Unit': 'Count'},
+                        {'Name': 'QueueTime', 'Unit': 'Milliseconds'},
+                        {'Name': 'Latency', 'Unit': 'Milliseconds'},
+                        {'Name': 'MaxLatency', 'Unit': 'Milliseconds'},
+                        {'Name': 'InputTokens', 'Unit': 'Count'},
+                        {'Name': 'OutputTokens', 'Unit': 'Count'},
+                        {'Name': 'CacheReadTokens', 'Unit': 'Count'},
+                        {'Name': 'CacheWriteTokens', 'Unit': 'Count'},
+                        {'Name': 'EstimatedCost', 'Unit': 'None'},
+                    ],
+                }],
+            },
+            **dims,
+            'Calls': grupo['calls'],
+            'Errors': grupo['errors'],
+            'Retries': grupo['retries'],
+            'Throttles': grupo['throttled'],
+            'QueueTime': grupo['queue_ms'],
+            'Latency': grupo['latency_ms'],
+            'MaxLatency': grupo['max_latency_ms'],
+            'InputTokens': grupo['input_tokens'],
+            'OutputTokens': grupo['output_tokens'],
+            'CacheReadTokens': grupo['cache_read_tokens'],
+            'CacheWriteTokens': grupo['cache_write_tokens'],
+            'EstimatedCost': grupo['cost_usd'],
+        })
+    for grupo in summarize_events(events or []):
+        dims = {'Service': grupo['service'], 'Event': grupo['event'], **dimensions}
+        documentos.append({
+            '_aws': {
+                'Timestamp': timestamp,
+                'CloudWatchMetrics': [{
+                    'Namespace': namespace,
+                    'Dimensions': [list(dims.keys())],
+                    'Metrics': [{'Name': 'Count', 'Unit': 'Count'}],
+                }],
+            },
+            **dims,
+            'Count': grupo['count'],
+        })
+    return documentos
+
+
+def emit_emf(records: List[Dict], events: Optional[List[Dict]] = None, **dimensions):
+    """
+    Escribe los documentos EMF en stdout; en Lambda, CloudWatch Logs los
+    convierte en métricas sin llamadas adicionales a la API.
+    """
+    for documento in emf_documents(records, events=events, **dimensions):
+        print(json.dumps(documento, ensure_ascii=False))
@@ -0,0 +1,216 @@
+# core/model_routing.py
+import contextvars
+import json
+import logging
+import os
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Union
+
+from .bedrock_client import invoke_model
+from .metrics import base_model_id
+
+logger = logging.getLogger(__name__)
+
+MODELO_FUERTE = 'anthropic.claude-v2'
+MODELO_RAPIDO = 'anthropic.claude-3-haiku-20240307-v1:0'
+# Modelos equivalentes con caché de prompts en Bedrock. Se invocan con un
+# perfil de inferencia entre regiones ('us.', 'eu.', 'apac.'): Bedrock no los
+# sirve bajo demanda con el id del modelo solo. Se ajustan a la región con
+# BEDROCK_CACHE_MODEL_STRONG y BEDROCK_CACHE_MODEL_FAST.
+MODELO_FUERTE_CACHE = os.environ.get('BEDROCK_CACHE_MODEL_STRONG', 'us.anthropic.claude-3-7-sonnet-20250219-v1:0')
+MODELO_RAPIDO_CACHE = os.environ.get('BEDROCK_CACHE_MODEL_FAST', 'us.anthropic.claude-3-5-haiku-20241022-v1:0')
+
+ANTHROPIC_VERSION = 'bedrock-2023-05-31'
+
+# Modelos con caché de prompts y tokens mínimos del prefijo para que se
+# guarde: con un prefijo más corto el servicio ignora la marca de caché.
+# Se compara sin el prefijo de región de los perfiles de inferencia ('us.').
+# Los tokens del prefijo se estiman como en core.bedrock_client (4 caracteres
+# por token); en español el tokenizador produce algo más, así que la
+# estimación se queda corta y nunca marca un prefijo que no alcance.
+CARACTERES_POR_TOKEN = 4
+MODELOS_CON_CACHE = {
+    'anthropic.claude-3-5-haiku': 2048,
+    'anthropic.claude-3-7-sonnet': 1024,
+    'anthropic.claude-sonnet-4': 1024,
+    'anthropic.claude-opus-4': 1024,
+}
+
+# Configuración por etapa del pipeline. El borrador de la tabla, el esqueleto
+# de sesiones y la respuesta RAG definen el contenido y usan el modelo fuerte;
+# las pasadas de crítica solo reelaboran un aspecto del documento, el
+# desarrollo de cada sesión y las secciones transversales siguen un plan ya
+# dado y los resúmenes son cortos, así que usan el rápido.
+RUTAS_ESCALONADAS = {
+    'programacion_borrador': {'model_id': MODELO_FUERTE, 'max_tokens': 4000, 'temperature': 0.7, 'top_p': 0.9},
+    'programacion_mejora_1': {'model_id': MODELO_RAPIDO, 'max_tokens': 4000, 'temperature': 0.5, 'top_p': 0.9},
+    'programacion_mejora_2': {'model_id': MODELO_RAPIDO, 'max_tokens': 4000, 'temperature': 0.5, 'top_p': 0.9},
+    'programacion_mejora_3': {'model_id': MODELO_RAPIDO, 'max_tokens': 4000, 'temperature': 0.5, 'top_p': 0.9},
+    'programacion_esqueleto': {'model_id': MODELO_FUERTE, 'max_tokens': 500, 'temperature': 0.5, 'top_p': 0.9},
+    'programacion_sesion': {'model_id': MODELO_RAPIDO, 'max_tokens': 700, 'temperature': 0.6, 'top_p': 0.9},
+    'programacion_transversales': {'model_id': MODELO_RAPIDO, 'max_tokens': 800, 'temperature': 0.5, 'top_p': 0.9},
+    'rag_respuesta': {'model_id': 'anthropic.claude-v2:1', 'max_tokens': 2000, 'temperature': 0.3, 'top_p': 0.9},
+    'resumen_comentarios': {'model_id': MODELO_RAPIDO, 'max_tokens': 500, 'temperature': 0.5},
+    'resumen_lote': {'model_id': MODELO_RAPIDO, 'max_tokens': 500, 'temperature': 0.5, 'top_p': 0.9},
+}
+
+# Configuraciones con nombre para comparar (benchmarks/benchmark_routing.py).
+# 'uniforme' reproduce la configuración anterior: claude-v2 en todas las etapas.
+PERFILES = {
+    'escalonado': RUTAS_ESCALONADAS,
+    'uniforme': {
+        **{etapa: {**ruta, 'model_id': MODELO_FUERTE, 'temperature': 0.7} for etapa, ruta in RUTAS_ESCALONADAS.items()},
+        'rag_respuesta': RUTAS_ESCALONADAS['rag_respuesta'],
+        'resumen_comentarios': {'model_id': MODELO_FUERTE, 'max_tokens': 500, 'temperature': 0.5},
+        'resumen_lote': {'model_id': MODELO_FUERTE, 'max_tokens': 500, 'temperature': 0.5, 'top_p': 0.9},
+    },
+}
+# 'escalonado_cache' mantiene el reparto por etapa con modelos que guardan en
+# caché las instrucciones fijas (mensaje de sistema) entre generaciones; se
+# activa con MODEL_ROUTING=escalonado_cache. La marca de caché solo se envía
+# cuando el mensaje de sistema alcanza el mínimo del modelo (prompt_cacheable).
+# Los resúmenes siguen con MODELO_RAPIDO: sus instrucciones son cortas y no
+# alcanzan el mínimo de la caché, así que no ganarían nada con el cambio.
+PERFILES['escalonado_cache'] = {
+    etapa: {**ruta, 'model_id': MODELO_FUERTE_CACHE if ruta['model_id'] != MODELO_RAPIDO else MODELO_RAPIDO_CACHE}
+    if not etapa.startswith('resumen_') else ruta
+    for etapa, ruta in RUTAS_ESCALONADAS.items()
+}
+PERFIL_POR_DEFECTO = 'escalonado'
+
+# Configuración activa en el contexto actual (ej. una variante de un A/B)
+_override: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar('model_routing_override', default=None)
+
+
+def _resolver(configuracion: Union[str, Dict, None]) -> Dict[str, Dict]:
+    """
+    Convierte un nombre de perfil o un dict de rutas por etapa (que puede
+    incluir 'perfil' como base) en la tabla completa de rutas.
+    """
+    if not configuracion:
+        return PERFILES[PERFIL_POR_DEFECTO]
+    if isinstance(configuracion, str):
+        if configuracion not in PERFILES:
+            raise ValueError(f"Perfil de modelos desconocido: {configuracion}")
+        return PERFILES[configuracion]
+    base = _resolver(configuracion.get('perfil'))
+    rutas = {etapa: dict(ruta) for etapa, ruta in base.items()}
+    for etapa, ruta in configuracion.items():
+        if etapa != 'perfil':
+            rutas[etapa] = {**rutas.get(etapa, {}), **ruta}
+    return rutas
+
+
+def _configuracion_entorno():
+    # MODEL_ROUTING puede ser un perfil ('uniforme') o JSON con rutas por etapa:
+    # MODEL_ROUTING='{"programacion_borrador": {"model_id": "anthropic.claude-3-sonnet-20240229-v1:0"}}'
+    valor = os.environ.get('MODEL_ROUTING', '').strip()
+    if valor.startswith('{'):
+        try:
+            return json.loads(valor)
+        except ValueError as e:
+            logger.error(f"MODEL_ROUTING no es un JSON válido: {e}")
+            return None
+    return valor or None
+
+
+def routes() -> Dict[str, Dict]:
+    """
+    Tabla de rutas vigente: la del contexto (use_routing) o la del entorno.
+    """
+    override = _override.get()
+    return _resolver(override if override is not None else _configuracion_entorno())
+
+
+def get_route(stage: str) -> Dict:
+    """
+    Modelo, max_tokens y temperatura de una etapa del pipeline.
+    """
+    rutas = routes()
+    if stage not in rutas:
+        raise KeyError(f"Etapa sin ruta de modelo: {stage}")
+    return dict(rutas[stage])
+
+
+@contextmanager
+def use_routing(configuracion: Union[str, Dict]):
+    """
+    Aplica un perfil o rutas por etapa a las generaciones hechas dentro del bloque.
+    """
+    _resolver(configuracion)  # valida antes de aplicar
+    token = _override.set(configuracion)
+    try:
+        yield routes()
+    finally:
+        _override.reset(token)
+
+
+def prompt_cache_min_tokens(model_id: str) -> Optional[int]:
+    """
+    Tokens mínimos del prefijo cacheable del modelo, o None si el modelo
+    no admite caché de prompts.
+    """
+    base = base_model_id(model_id)
+    for prefijo, minimo in MODELOS_CON_CACHE.items():
+        if base.startswith(prefijo):
+            return minimo
+    return None
+
+
+def prompt_cacheable(model_id: str, system: Optional[str]) -> bool:
+    """
+    Indica si el mensaje de sistema alcanza el mínimo de tokens de la caché
+    de prompts del modelo (False si el modelo no la admite).
+    """
+    minimo = prompt_cache_min_tokens(model_id)
+    return bool(minimo and system) and len(system) // CARACTERES_POR_TOKEN >= minimo
+
+
+def build_body(model_id: str, prompt: str, max_tokens: int, temperature: float, system: Optional[str] = None,
+               top_p: Optional[float] = None, stop_sequences: Optional[List[str]] = None,
+               prompt_cache: bool = True) -> Dict:
+    """
+    Cuerpo de invoke_model en formato Messages (todos los modelos de Anthropic
+    en Bedrock lo aceptan, incluido Claude 2). `system` lleva las
+    instrucciones fijas de la etapa; se marca con cache_control solo si el
+    modelo admite caché de prompts y el texto alcanza su mínimo de tokens
+    (prompt_cacheable). Un prefijo más corto se procesa completo en cada
+    llamada, igual que con los modelos sin caché.
+    """
+    body = {
+        'anthropic_version': ANTHROPIC_VERSION,
+        'max_tokens': max_tokens,
+        'temperature': temperature,
+        'messages': [{'role': 'user', 'content': [{'type': 'text', 'text': prompt}]}],
+    }
+    if system:
+        bloque = {'type': 'text', 'text': system}
+        if prompt_cache and prompt_cacheable(model_id, system):
+            bloque['cache_control'] = {'type': 'ephemeral'}
+        body['system'] = [bloque]
+    if top_p is not None:
+        body['top_p'] = top_p
+    if stop_sequences:
+        body['stop_sequences'] = stop_sequences
+    return body
+
+
+def extract_text(response_body: Dict) -> str:
+    return ''.join(bloque.get('text', '') for bloque in response_body.get('content', [])
+                   if bloque.get('type') == 'text')
+
+
+def complete(stage: str, prompt: str, system: Optional[str] = None, operation: Optional[str] = None,
+             client=None, **overrides) -> str:
+    """
+    Ejecuta una etapa del pipeline con el modelo configurado para ella y
+    retorna el texto generado. `system` son las instrucciones fijas de la
+    etapa (prefijo cacheable si es lo bastante largo, ver build_body) y
+    `prompt` la parte que cambia en cada llamada.
+    `overrides` reemplaza campos de la ruta (ej. prompt_cache=False).
+    """
+    ruta = {**get_route(stage), **overrides}
+    model_id = ruta.pop('model_id')
+    body = build_body(model_id, prompt, system=system, **ruta)
+    response_body = invoke_model(model_id, body, operation=operation or stage, client=client, stage=stage)
+    return extract_text(response_body)
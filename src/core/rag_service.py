@@ -1,11 +1,21 @@
 # core/rag_service.py
-import boto3
-import json
 import logging
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
+
+from core.aws_clients import get_client
+from core.circuit_breaker import get_breaker
+from core.metrics import track_call, record_aws_response, record_event
+from core.model_routing import complete
+from core.rate_limiter import get_limiter
 
 logger = logging.getLogger(__name__)
 
+SISTEMA_RAG = """Eres un experto en educación peruana especializado en el Currículo Nacional de Educación Básica.
+
+Basa tu respuesta EXCLUSIVAMENTE en el contexto oficial proporcionado. Si no encuentras información suficiente en el contexto, menciona qué información específica faltaría para completar la respuesta.
+
+Estructura tu respuesta de manera profesional y alineada con los documentos oficiales del MINEDU."""
+
 class RAGEducativoService:
     """
     Servicio RAG especializado para contenido educativo peruano
@@ -13,8 +23,8 @@ class RAGEducativoService:
     """
     
     def __init__(self):
-        self.bedrock_runtime = boto3.client('bedrock-runtime')
-        self.bedrock_agent = boto3.client('bedrock-agent-runtime')
+        self.bedrock_runtime = get_client('bedrock-runtime')
+        self.bedrock_agent = get_client('bedrock-agent-runtime')
         
         # IDs de tu Knowledge Base (configurar después de crear)
         self.knowledge_base_ids = {
@@ -36,18 +46,24 @@ class RAGEducativoService:
             País: Perú, Currículo Nacional de Educación Básica
             """
             
-            response = self.bedrock_agent.retrieve(
-                knowledgeBaseId=self.knowledge_base_ids['curriculo_nacional'],
-                retrievalQuery={
-                    'text': query_enriquecida
-                },
-                retrievalConfiguration={
-                    'vectorSearchConfiguration': {
-                        'numberOfResults': 10,
-                        'overrideSearchType': 'HYBRID'  # Combina búsqueda semántica y por palabras clave
-                    }
-                }
-            )
+            with track_call('bedrock-kb', 'retrieve', request_bytes=len(query_enriquecida.encode('utf-8'))) as record:
+                response = get_limiter('bedrock-kb').call(
+                    self.bedrock_agent.retrieve,
+                    knowledgeBaseId=self.knowledge_base_ids['curriculo_nacional'],
+                    retrievalQuery={
+                        'text': query_enriquecida
+                    },
+                    retrievalConfiguration={
+                        'vectorSearchConfiguration': {
+                            'numberOfResults': 10,
+                            'overrideSearchType': 'HYBRID'  # Combina búsqueda semántica y por palabras clave
+                        }
+                    },
+                    record=record,
+                    breaker=get_breaker('bedrock-kb')
+                )
+                record_aws_response(record, response)
+                record['results'] = len(response.get('retrievalResults', []))
             
             # Procesar resultados
             documentos_relevantes = []
@@ -66,7 +82,7 @@ class RAGEducativoService:
             
         except Exception as e:
             logger.error(f"Error en búsqueda RAG: {e}")
-            return {'documentos': [], 'total_encontrados': 0}
+            return {'documentos': [], 'total_encontrados': 0, 'error': str(e)}
     
     def generar_con_contexto_rag(self, prompt: str, contexto_documentos: List[Dict]) -> str:
         """
@@ -76,37 +92,15 @@ class RAGEducativoService:
             # Construir contexto enriquecido
             contexto_rag = self._construir_contexto_educativo(contexto_documentos)
             
-            prompt_con_rag = f"""
-Human: Eres un experto en educación peruana especializado en el Currículo Nacional de Educación Básica. 
-
-CONTEXTO OFICIAL DEL MINEDU:
+            prompt_con_rag = f"""CONTEXTO OFICIAL DEL MINEDU:
 {contexto_rag}
 
 INSTRUCCIONES:
-{prompt}
-
-Basa tu respuesta EXCLUSIVAMENTE en el contexto oficial proporcionado. Si no encuentras información suficiente en el contexto, menciona qué información específica faltaría para completar la respuesta.
-
-Estructura tu respuesta de manera profesional y alineada con los documentos oficiales del MINEDU.
-Assistant:
-"""
+{prompt}"""
             
-            body = json.dumps({
-                "prompt": prompt_con_rag,
-                "max_tokens_to_sample": 2000,
-                "temperature": 0.3,  # Más conservador para contenido educativo oficial
-                "top_p": 0.9
-            })
-            
-            response = self.bedrock_runtime.invoke_model(
-                body=body,
-                modelId='anthropic.claude-v2:1',
-                accept='application/json',
-                contentType='application/json'
-            )
-            
-            response_body = json.loads(response.get('body').read())
-            return response_body.get('completion', '')
+            # Temperatura baja (ver core.model_routing): más conservador para contenido educativo oficial.
+            # Las instrucciones fijas van como mensaje de sistema (prefijo cacheable).
+            return complete('rag_respuesta', prompt_con_rag, system=SISTEMA_RAG, client=self.bedrock_runtime)
             
         except Exception as e:
             logger.error(f"Error en generación RAG: {e}")
@@ -135,12 +129,22 @@ Contenido:
         return '\n'.join(contexto_partes)
 
 # Función integrada para programación curricular con RAG
-def generar_programacion_curricular_rag(grado: int, competencia: str, capacidades: str, contenidos: str) -> str:
+def generar_programacion_curricular_rag(grado: int, competencia: str, capacidades: str, contenidos: str,
+                                        rag_service: Optional[RAGEducativoService] = None,
+                                        respaldo: Optional[Callable[[], str]] = None) -> str:
     """
-    Genera programación curricular usando RAG con documentos oficiales del MINEDU
+    Genera programación curricular usando RAG con documentos oficiales del MINEDU.
+    Acepta un servicio RAG ya creado para reutilizarlo entre llamadas.
+    Si la Knowledge Base o la generación con contexto fallan y se indica
+    `respaldo`, retorna su resultado (ej. la generación sin RAG).
     """
+    def degradar(motivo):
+        logger.warning(f"Programación RAG degradada ({motivo}): usando generación de respaldo")
+        record_event('fallback', 'rag_a_generacion_directa', motivo=motivo)
+        return respaldo()
+
     try:
-        rag_service = RAGEducativoService()
+        rag_service = rag_service or RAGEducativoService()
         
         # 1. Buscar contexto relevante
         query_busqueda = f"""
@@ -154,6 +158,8 @@ def generar_programacion_curricular_rag(grado: int, competencia: str, capacidade
             grado=grado,
             area="ciencia_tecnologia"
         )
+        if contexto.get('error') and respaldo:
+            return degradar(contexto['error'])
         
         # 2. Generar con contexto RAG
         prompt_programacion = f"""
@@ -180,6 +186,8 @@ def generar_programacion_curricular_rag(grado: int, competencia: str, capacidade
             prompt=prompt_programacion,
             contexto_documentos=contexto['documentos']
         )
+        if resultado.startswith("Error") and respaldo:
+            return degradar(resultado)
         
         # 3. Agregar metadatos de las fuentes consultadas
         fuentes_consultadas = [doc['fuente'] for doc in contexto['documentos'][:3]]
@@ -195,6 +203,8 @@ Total de documentos oficiales analizados: {contexto['total_encontrados']}
         
     except Exception as e:
         logger.error(f"Error en programación curricular RAG: {e}")
+        if respaldo:
+            return degradar(str(e))
         return f"Error al generar programación curricular con RAG: {e}"
 
 # Configuración de AWS Knowledge Bases - Script de setup
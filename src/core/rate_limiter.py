@@ -0,0 +1,292 @@
+# core/rate_limiter.py
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Cuotas del lado del cliente por servicio. Una clave 'servicio/recurso'
+# (modelo de Bedrock u operación de Comprehend) tiene prioridad sobre la del
+# servicio. tps: solicitudes por segundo; tokens_per_minute: solo Bedrock
+# (se reserva max_tokens por adelantado, igual que la cuota de Bedrock).
+DEFAULT_QUOTAS = {
+    'bedrock': {'tps': 2, 'tokens_per_minute': 200000, 'max_concurrency': 8},
+    'bedrock/stability.stable-diffusion-xl-v1': {'tps': 1, 'max_concurrency': 4},
+    'bedrock-kb': {'tps': 5, 'max_concurrency': 4},
+    'comprehend': {'tps': 20, 'max_concurrency': 16},
+    # Cada llamada lleva hasta 25 documentos y su cuota es menor que la de DetectSentiment
+    'comprehend/batch_detect_sentiment': {'tps': 10},
+}
+
+THROTTLING_CODES = {
+    'ThrottlingException', 'Throttling', 'TooManyRequestsException', 'RequestLimitExceeded',
+    'ProvisionedThroughputExceededException', 'ServiceQuotaExceededException', 'SlowDown',
+}
+TRANSIENT_CODES = {
+    'ServiceUnavailableException', 'ServiceUnavailable', 'InternalServerException',
+    'InternalServerError', 'ModelNotReadyException',
+}
+
+_limiters: Dict[str, 'ServiceLimiter'] = {}
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe: `rate` unidades por segundo con ráfagas de hasta `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Bloquea hasta poder consumir `amount` unidades y retorna los segundos esperados.
+        Una solicitud mayor que la capacidad pasa con el balde lleno y lo deja en negativo.
+        """
+        esperado = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                necesario = min(amount, self.capacity)
+                if self._tokens >= necesario:
+                    self._tokens -= amount
+                    return esperado
+                espera = (necesario - self._tokens) / self.rate
+            time.sleep(espera)
+            esperado += espera
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def drain(self):
+        """
+        Vacía el balde: tras un rechazo no se debe gastar la ráfaga acumulada.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+    def adjust(self, delta: float):
+        """
+        Corrige el consumo tras conocer el costo real (positivo: consumió más de lo reservado).
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class AdaptiveConcurrency:
+    """
+    Límite de llamadas simultáneas con control AIMD: crece en 1 por cada
+    ventana de llamadas exitosas y se reduce a la mitad ante throttling.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 32,
+                 decrease_factor: float = 0.5, cooldown: float = 1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        inicio = time.perf_counter()
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return time.perf_counter() - inicio
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            anterior = int(self.limit)
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            if int(self.limit) > anterior:
+                self._cond.notify()
+
+    def on_throttle(self) -> bool:
+        """
+        Reduce el límite y retorna True, salvo dentro del enfriamiento: una
+        ráfaga de rechazos de la misma ventana cuenta como una sola señal.
+        """
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return False
+            self.limit = max(self.minimum, self.limit * self.decrease_factor)
+            self._last_decrease = now
+            return True
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """
+    Retorna 'throttled', 'transient' o None (error no reintentable).
+    """
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code')
+        if code in THROTTLING_CODES:
+            return 'throttled'
+        if code in TRANSIENT_CODES or error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0) >= 500:
+            return 'transient'
+        return None
+    if isinstance(error, (BotoConnectionError, ReadTimeoutError)):
+        return 'transient'
+    return None
+
+
+class ServiceLimiter:
+    """
+    Limitador de un servicio: cuota de solicitudes, cuota de tokens,
+    concurrencia adaptativa y reintentos con backoff exponencial y jitter.
+    Ante throttling también se reduce a la mitad la tasa de envío (AIMD),
+    que luego vuelve a crecer hasta `tps` con cada llamada exitosa.
+    """
+
+    def __init__(self, name: str, tps: float, tokens_per_minute: Optional[float] = None,
+                 max_concurrency: int = 8, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 20.0,
+                 min_tps: Optional[float] = None):
+        self.name = name
+        self.tps = tps
+        self.min_tps = min_tps or tps / 16
+        self.requests = TokenBucket(tps, max(1.0, tps))
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(initial=max(1, max_concurrency // 2), maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _on_success(self):
+        self.concurrency.on_success()
+        if self.requests.rate < self.tps:
+            self.requests.set_rate(min(self.tps, self.requests.rate + self.tps / 20))
+
+    def _on_throttle(self):
+        if self.concurrency.on_throttle():
+            self.requests.set_rate(max(self.min_tps, self.requests.rate * self.concurrency.decrease_factor))
+        self.requests.drain()
+
+    def backoff(self, attempt: int) -> float:
+        # "Full jitter": evita que los clientes rechazados reintenten sincronizados
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn: Callable, *args, tokens: int = 0, record: Optional[Dict] = None, breaker=None, **kwargs):
+        """
+        Ejecuta fn(*args, **kwargs) respetando las cuotas. Reintenta ante
+        throttling y errores transitorios; el último error se propaga.
+        Si se pasa el `record` de track_call, anota reintentos y tiempo en cola.
+        Con un `breaker` (core.circuit_breaker) cada intento se rechaza de
+        inmediato mientras el circuito esté abierto, y los errores transitorios
+        y llamadas lentas cuentan como fallos de la dependencia.
+        """
+        intento = 0
+        while True:
+            if breaker is not None:
+                breaker.before_call()
+            espera = self.requests.acquire()
+            if self.tokens and tokens:
+                espera += self.tokens.acquire(tokens)
+            espera += self.concurrency.acquire()
+            if record is not None:
+                record['queue_ms'] = round(record.get('queue_ms', 0) + espera * 1000, 2)
+            inicio = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                tipo = classify_error(e)
+                if breaker is not None:
+                    # Throttling o un error de validación significan que el servicio respondió
+                    if tipo == 'transient':
+                        breaker.on_failure()
+                    else:
+                        breaker.on_success()
+                if self.tokens and tokens:
+                    self.tokens.adjust(-tokens)
+                if tipo == 'throttled':
+                    self._on_throttle()
+                    if record is not None:
+                        record['throttled'] = record.get('throttled', 0) + 1
+                if tipo is None or intento >= self.max_retries:
+                    raise
+                pausa = self.backoff(intento)
+                logger.info(f"{self.name}: {type(e).__name__} ({tipo}), reintento {intento + 1} en {pausa:.2f}s")
+            else:
+                self._on_success()
+                if breaker is not None:
+                    breaker.on_success(time.perf_counter() - inicio)
+                return result
+            finally:
+                self.concurrency.release()
+            intento += 1
+            if record is not None:
+                record['retries'] = record.get('retries', 0) + 1
+            time.sleep(pausa)
+
+    def settle(self, reserved: int, actual: Optional[int]):
+        """
+        Ajusta la cuota de tokens con el consumo real informado por el servicio.
+        """
+        if self.tokens and actual is not None:
+            self.tokens.adjust(actual - reserved)
+
+
+def _quotas() -> Dict[str, Dict]:
+    # RATE_LIMITS='{"comprehend": {"tps": 50}}' sobrescribe las cuotas por defecto
+    quotas = {name: dict(quota) for name, quota in DEFAULT_QUOTAS.items()}
+    try:
+        for name, quota in json.loads(os.environ.get('RATE_LIMITS', '{}')).items():
+            quotas.setdefault(name, {}).update(quota)
+    except ValueError as e:
+        logger.error(f"RATE_LIMITS no es un JSON válido: {e}")
+    return quotas
+
+
+def get_limiter(service: str, resource: Optional[str] = None) -> ServiceLimiter:
+    """
+    Retorna el limitador compartido por el proceso para un servicio y,
+    opcionalmente, un recurso (modelo de Bedrock u operación de Comprehend).
+    """
+    name = f"{service}/{resource}" if resource else service
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                quotas = _quotas()
+                quota = {**quotas.get(service, {'tps': 10}), **quotas.get(name, {})}
+                limiter = ServiceLimiter(name, **quota)
+                _limiters[name] = limiter
+    return limiter
+
+
+def reset_limiters():
+    """
+    Descarta los limitadores (ej. tras cambiar RATE_LIMITS).
+    """
+    with _lock:
+        _limiters.clear()
@@ -0,0 +1,84 @@
+# core/search_index.py
+import base64
+import json
+import re
+import unicodedata
+from typing import Dict, Iterable, Optional
+
+# Los términos se guardan en la tabla de índice con la partición
+# <primeros LONGITUD_PARTICION caracteres> y la clave de orden
+# <término>#<timestamp>#<comment_id>: un término exacto o un prefijo de al
+# menos LONGITUD_PARTICION caracteres se resuelve con un solo Query
+# (begins_with sobre la clave de orden), sin Scan.
+LONGITUD_PARTICION = 3
+SEPARADOR = '#'
+
+# Fuentes de un término: hashtag del texto, entidad de Comprehend o palabra clave
+FUENTE_HASHTAG = 'hashtag'
+FUENTE_ENTIDAD = 'entity'
+FUENTE_PALABRA = 'keyword'
+
+LONGITUD_MINIMA_PALABRA = 3
+PALABRAS_VACIAS = {
+    'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'de', 'del', 'al', 'a', 'en', 'y', 'o', 'que', 'es',
+    'por', 'para', 'con', 'sin', 'se', 'su', 'sus', 'lo', 'le', 'les', 'me', 'mi', 'mis', 'muy', 'mas', 'pero',
+    'como', 'este', 'esta', 'esto', 'ese', 'esa', 'eso', 'son', 'fue', 'era', 'hay', 'tan', 'ya', 'porque',
+    'cuando', 'todo', 'toda', 'todos', 'nos', 'uno', 'sea', 'estaba', 'tiene', 'tienen', 'cual',
+    'donde', 'entre', 'sobre', 'tambien', 'solo', 'otro', 'otra', 'otros', 'hace', 'ser', 'estar', 'han', 'ha',
+}
+
+_PALABRA = re.compile(r'#?\w+')
+_SIN_TILDES = str.maketrans('áéíóúüàèìòù', 'aeiouuaeiou')
+
+
+def normalize_term(term: str) -> str:
+    """
+    Forma canónica de un término: minúsculas, sin tildes (conserva la ñ),
+    sin '#' (es el separador de la clave de orden) y con los espacios
+    colapsados. '#Precio', 'precio' y 'PRECIO' son el mismo término.
+    """
+    term = unicodedata.normalize('NFC', term).lower().translate(_SIN_TILDES)
+    return ' '.join(term.replace(SEPARADOR, ' ').split())
+
+
+def terms_for_comment(text: str, entities: Optional[Iterable[Dict]] = None) -> Dict[str, set]:
+    """
+    Términos a indexar de un comentario, cada uno con sus fuentes
+    (hashtag, entity, keyword).
+    """
+    terminos: Dict[str, set] = {}
+    for token in _PALABRA.findall(text or ''):
+        termino = normalize_term(token)
+        if token.startswith('#'):
+            if termino:
+                terminos.setdefault(termino, set()).add(FUENTE_HASHTAG)
+        elif len(termino) >= LONGITUD_MINIMA_PALABRA and termino not in PALABRAS_VACIAS and not termino.isdigit():
+            terminos.setdefault(termino, set()).add(FUENTE_PALABRA)
+    for entidad in entities or []:
+        termino = normalize_term(entidad.get('Text', ''))
+        if termino:
+            terminos.setdefault(termino, set()).add(FUENTE_ENTIDAD)
+    return terminos
+
+
+def partition_key(term: str) -> str:
+    return term[:LONGITUD_PARTICION]
+
+
+def sort_key(term: str, timestamp: str, comment_id: str) -> str:
+    return SEPARADOR.join([term, timestamp, comment_id])
+
+
+def encode_token(last_evaluated_key: Optional[Dict]) -> Optional[str]:
+    """
+    Token de paginación opaco para la siguiente página (None si no hay más).
+    """
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key, sort_keys=True).encode('utf-8')).decode('ascii')
+
+
+def decode_token(token: Optional[str]) -> Optional[Dict]:
+    if not token:
+        return None
+    return json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
@@ -1,32 +1,277 @@
-import boto3
+import logging
 import os
+import threading
+from abc import ABC, abstractmethod
 
-def analyze_sentiment(text):
+from .aws_clients import get_client
+from .circuit_breaker import get_breaker
+from .comprehend_cache import cache_from_env
+from .metrics import track_call, record_aws_response, record_event, estimate_comprehend_cost
+from .rate_limiter import get_limiter
+
+logger = logging.getLogger(__name__)
+
+IDIOMA = 'es'
+
+# SENTIMENT_BACKEND elige el motor de sentimiento de la instalación:
+# - comprehend: Amazon Comprehend para todos los comentarios (por defecto);
+# - local: motor léxico en proceso (core.local_sentiment), sin llamadas remotas;
+# - hybrid: el motor local puntúa todo el lote y solo los comentarios con
+#   confianza menor a SENTIMENT_CONFIDENCE_THRESHOLD se envían a Comprehend.
+BACKEND_POR_DEFECTO = 'comprehend'
+UMBRAL_CONFIANZA_POR_DEFECTO = 0.75
+# BatchDetectSentiment acepta hasta 25 documentos por llamada
+LOTE_COMPREHEND = 25
+
+# Los comentarios se repiten mucho (frases cortas, reenvíos, reprocesos del
+# mismo archivo): los resultados se guardan por hash del texto normalizado.
+# En Lambda el LRU dura lo que el contenedor; COMPREHEND_CACHE_TABLE agrega
+# un nivel compartido en DynamoDB (ver core.comprehend_cache).
+_cache = cache_from_env()
+
+def cache_stats():
+    """
+    Aciertos, fallos y tasa de aciertos de la caché de Comprehend del proceso.
+    """
+    return _cache.stats()
+
+def _comprehend_sentiment(text):
     """
     Analiza el sentimiento de un texto usando Amazon Comprehend.
     Retorna 'POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED' y su puntaje.
     """
-    comprehend = boto3.client('comprehend', region_name=os.environ['AWS_REGION'])
+    clave, cacheado = _cache.get('detect_sentiment', text, IDIOMA)
+    if cacheado is not None:
+        return cacheado[0], cacheado[1]
+    comprehend = get_client('comprehend')
     try:
-        response = comprehend.detect_sentiment(Text=text, LanguageCode='es')
+        with track_call('comprehend', 'detect_sentiment', request_bytes=len(text.encode('utf-8')),
+                        cost_usd=estimate_comprehend_cost(text)) as record:
+            response = get_limiter('comprehend', 'detect_sentiment').call(
+                comprehend.detect_sentiment, Text=text, LanguageCode=IDIOMA, record=record,
+                breaker=get_breaker('comprehend')
+            )
+            record_aws_response(record, response)
         sentiment = response['Sentiment']
         sentiment_score = response['SentimentScore'] # Diccionario con puntajes
+        _cache.put(clave, [sentiment, sentiment_score])
         return sentiment, sentiment_score
     except Exception as e:
         print(f" Error al analizar sentimiento con Comprehend: {e}")
         return "UNKNOWN", {}
 
-def extract_entities(text):
+def _comprehend_sentiment_batch(texts):
+    """
+    Sentimiento de varios textos con BatchDetectSentiment, en lotes de
+    LOTE_COMPREHEND y con la misma caché, limitador y circuit breaker que
+    _comprehend_sentiment. Los textos que Comprehend rechaza (ErrorList) o
+    los de un lote que falla quedan como ('UNKNOWN', {}).
+    """
+    resultados = [None] * len(texts)
+    pendientes = []
+    for i, text in enumerate(texts):
+        clave, cacheado = _cache.get('detect_sentiment', text, IDIOMA)
+        if cacheado is not None:
+            resultados[i] = (cacheado[0], cacheado[1])
+        else:
+            pendientes.append((i, clave))
+    comprehend = get_client('comprehend')
+    for inicio in range(0, len(pendientes), LOTE_COMPREHEND):
+        lote = pendientes[inicio:inicio + LOTE_COMPREHEND]
+        textos = [texts[i] for i, _ in lote]
+        try:
+            with track_call('comprehend', 'batch_detect_sentiment', items=len(textos),
+                            request_bytes=sum(len(t.encode('utf-8')) for t in textos),
+                            cost_usd=round(sum(estimate_comprehend_cost(t) for t in textos), 6)) as record:
+                response = get_limiter('comprehend', 'batch_detect_sentiment').call(
+                    comprehend.batch_detect_sentiment, TextList=textos, LanguageCode=IDIOMA, record=record,
+                    breaker=get_breaker('comprehend')
+                )
+                record_aws_response(record, response)
+        except Exception as e:
+            logger.error(f"Error al analizar sentimiento por lotes con Comprehend: {e}")
+            continue
+        for resultado in response['ResultList']:
+            i, clave = lote[resultado['Index']]
+            resultados[i] = (resultado['Sentiment'], resultado['SentimentScore'])
+            _cache.put(clave, [resultado['Sentiment'], resultado['SentimentScore']])
+        for error in response.get('ErrorList', []):
+            logger.warning(f"Comprehend rechazó un comentario del lote: {error.get('ErrorCode')}")
+    return [r if r is not None else ("UNKNOWN", {}) for r in resultados]
+
+def _comprehend_entities(text):
     """
     Extrae entidades clave de un texto usando Amazon Comprehend.
     Retorna una lista de entidades y sus tipos (ej. PRODUCT, LOCATION, ORGANIZATION).
     """
-    comprehend = boto3.client('comprehend', region_name=os.environ['AWS_REGION'])
+    clave, cacheado = _cache.get('detect_entities', text, IDIOMA)
+    if cacheado is not None:
+        return cacheado
+    comprehend = get_client('comprehend')
     try:
-        response = comprehend.detect_entities(Text=text, LanguageCode='es')
+        with track_call('comprehend', 'detect_entities', request_bytes=len(text.encode('utf-8')),
+                        cost_usd=estimate_comprehend_cost(text)) as record:
+            response = get_limiter('comprehend', 'detect_entities').call(
+                comprehend.detect_entities, Text=text, LanguageCode=IDIOMA, record=record,
+                breaker=get_breaker('comprehend')
+            )
+            record_aws_response(record, response)
         entities = [{'Text': entity['Text'], 'Type': entity['Type'], 'Score': entity['Score']} 
                     for entity in response['Entities']]
+        _cache.put(clave, entities)
         return entities
     except Exception as e:
         print(f" Error al extraer entidades con Comprehend: {e}")
-        return []
\ No newline at end of file
+        return []
+
+class SentimentBackend(ABC):
+    """
+    Interfaz de los motores de sentimiento. analyze_batch recibe un lote de
+    textos y retorna una lista de (sentimiento, SentimentScore) con el
+    formato de Comprehend, en el mismo orden. Un motor que no implementa
+    ambos métodos falla al construirse.
+    """
+    nombre = None
+
+    @abstractmethod
+    def analyze_batch(self, texts):
+        ...
+
+    @abstractmethod
+    def extract_entities(self, text):
+        ...
+
+
+class ComprehendBackend(SentimentBackend):
+    """
+    Amazon Comprehend, una llamada por comentario (con caché). Con
+    batch=True usa BatchDetectSentiment, como el remoto de HybridBackend.
+    """
+    nombre = 'comprehend'
+
+    def __init__(self, batch=False):
+        self.batch = batch
+
+    def analyze_batch(self, texts):
+        if self.batch:
+            return _comprehend_sentiment_batch(texts)
+        return [_comprehend_sentiment(text) for text in texts]
+
+    def extract_entities(self, text):
+        return _comprehend_entities(text)
+
+
+class LocalBackend(SentimentBackend):
+    """
+    Motor léxico local: puntúa el lote completo con NumPy y toma los
+    hashtags como entidades. Funciona sin red.
+    """
+    nombre = 'local'
+
+    def __init__(self, engine=None):
+        # Importación diferida: NumPy solo se carga en instalaciones que lo usan
+        from .local_sentiment import LexiconSentimentEngine
+        self.engine = engine or LexiconSentimentEngine()
+
+    def analyze_batch(self, texts):
+        with track_call('local_sentiment', 'score_batch', items=len(texts),
+                        request_bytes=sum(len(text.encode('utf-8')) for text in texts)):
+            return self.engine.analyze_batch(texts)
+
+    def extract_entities(self, text):
+        return self.engine.extract_entities(text)
+
+
+class HybridBackend(SentimentBackend):
+    """
+    Prefiltro local: el motor léxico puntúa el lote y solo los comentarios
+    con confianza (el mayor puntaje) bajo `threshold` se envían a Comprehend.
+    Los de baja confianza se envían juntos con BatchDetectSentiment (lotes
+    de LOTE_COMPREHEND). Si Comprehend falla se conserva el resultado local.
+    Las entidades siguen viniendo de Comprehend. Las decisiones se cuentan
+    como eventos 'sentiment_prefilter' de nombre 'local' o 'comprehend'.
+    """
+    nombre = 'hybrid'
+
+    def __init__(self, threshold=UMBRAL_CONFIANZA_POR_DEFECTO, local=None, remote=None):
+        self.threshold = threshold
+        self.local = local or LocalBackend()
+        self.remote = remote or ComprehendBackend(batch=True)
+
+    def analyze_batch(self, texts):
+        resultados = self.local.analyze_batch(texts)
+        dudosos = [i for i, (_, sentiment_score) in enumerate(resultados)
+                   if max(sentiment_score.values()) < self.threshold]
+        if len(dudosos) < len(texts):
+            record_event('sentiment_prefilter', 'local', count=len(texts) - len(dudosos))
+        if not dudosos:
+            return resultados
+        record_event('sentiment_prefilter', 'comprehend', count=len(dudosos))
+        remotos = self.remote.analyze_batch([texts[i] for i in dudosos])
+        for i, remoto in zip(dudosos, remotos):
+            if remoto[0] != 'UNKNOWN':
+                resultados[i] = remoto
+        return resultados
+
+    def extract_entities(self, text):
+        return self.remote.extract_entities(text)
+
+
+_BACKENDS = {'comprehend': ComprehendBackend, 'local': LocalBackend, 'hybrid': HybridBackend}
+_backend = None
+_backend_lock = threading.Lock()
+
+def backend_from_env():
+    """
+    Construye el motor según SENTIMENT_BACKEND y SENTIMENT_CONFIDENCE_THRESHOLD.
+    """
+    nombre = os.environ.get('SENTIMENT_BACKEND', BACKEND_POR_DEFECTO).strip().lower()
+    if nombre not in _BACKENDS:
+        logger.warning(f"Motor de sentimiento desconocido '{nombre}', se usa '{BACKEND_POR_DEFECTO}'.")
+        nombre = BACKEND_POR_DEFECTO
+    if nombre == 'hybrid':
+        umbral = float(os.environ.get('SENTIMENT_CONFIDENCE_THRESHOLD', UMBRAL_CONFIANZA_POR_DEFECTO))
+        return HybridBackend(umbral)
+    return _BACKENDS[nombre]()
+
+def get_backend():
+    """
+    Retorna el motor de sentimiento del proceso, creándolo en el primer uso.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = backend_from_env()
+    return _backend
+
+def set_backend(backend):
+    """
+    Reemplaza el motor del proceso (None vuelve a leerlo del entorno).
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+def analyze_sentiment_batch(texts):
+    """
+    Analiza el sentimiento de un lote de textos con el motor configurado.
+    Retorna una lista de (sentimiento, puntaje) en el mismo orden.
+    """
+    if not texts:
+        return []
+    return get_backend().analyze_batch(list(texts))
+
+def analyze_sentiment(text):
+    """
+    Analiza el sentimiento de un texto con el motor configurado.
+    Retorna 'POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED' y su puntaje.
+    """
+    return analyze_sentiment_batch([text])[0]
+
+def extract_entities(text):
+    """
+    Extrae entidades clave de un texto con el motor configurado.
+    Retorna una lista de entidades y sus tipos (ej. PRODUCT, LOCATION, ORGANIZATION).
+    """
+    return get_backend().extract_entities(text)
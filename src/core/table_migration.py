@@ -0,0 +1,240 @@
+# core/table_migration.py
+"""
+Migración de la tabla de comentarios al esquema por inquilino (core.table_schema).
+
+Lee la tabla de origen con Scan paralelo (Segment/TotalSegments), una
+tarea por segmento, y escribe cada página en la tabla de destino con
+BatchWriteItem: cada comentario se decodifica (formato legado o compacto) y
+se vuelve a codificar con el formato (DYNAMODB_ITEM_ENCODING) y las claves
+del destino. Con --reindex se reescriben además las entradas del índice de
+búsqueda con el inquilino.
+
+Es reanudable: después de cada página se guarda en un archivo JSON la
+última clave leída de cada segmento. Si el proceso se corta, la siguiente
+corrida con el mismo archivo de estado sigue donde quedó cada segmento;
+como las escrituras son Put por clave, repetir una página no duplica nada.
+Los comentarios escritos en el origen durante la migración se copian
+corriendo de nuevo con --restart después de cambiar los escritores a
+DYNAMODB_TABLE_SCHEMA=tenant.
+
+Uso (desde src/):
+    python -m core.table_migration --create --segments 8 --state migracion.json
+    python -m core.table_migration --tenant colegio-42 --reindex --verify
+    python -m core.table_migration --max-pages 10     # avanza por tramos
+"""
+import argparse
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from .aws_clients import get_client
+from .database_management import DynamoDBManager, LOTE_ESCRITURA, REINTENTOS_LOTE
+from .metrics import record_aws_response, track_call
+from .table_schema import INQUILINO, LEGADO, TABLA_POR_ESQUEMA
+
+SEGMENTOS = 8
+TAMANO_PAGINA = 500
+ARCHIVO_ESTADO = 'table_migration_state.json'
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class EstadoMigracion:
+    """
+    Progreso por segmento (última clave, páginas y comentarios copiados),
+    guardado en disco tras cada página con reemplazo atómico.
+    """
+
+    def __init__(self, ruta: str, origen: str, destino: str, segmentos: int, reiniciar: bool = False):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        datos = None
+        if not reiniciar and os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            if (datos['origen'], datos['destino'], datos['segmentos']) != (origen, destino, segmentos):
+                raise ValueError(
+                    f"El estado {ruta} es de otra migración ({datos['origen']} -> {datos['destino']}, "
+                    f"{datos['segmentos']} segmentos); usa --restart o otro --state"
+                )
+        self.datos = datos or {
+            'origen': origen, 'destino': destino, 'segmentos': segmentos,
+            'progreso': {str(i): {'ultima_clave': None, 'completo': False, 'paginas': 0, 'copiados': 0}
+                         for i in range(segmentos)},
+        }
+
+    def segmento(self, indice: int) -> Dict:
+        return self.datos['progreso'][str(indice)]
+
+    def avanzar(self, indice: int, ultima_clave: Optional[Dict], copiados: int):
+        with self._lock:
+            progreso = self.segmento(indice)
+            progreso['ultima_clave'] = ultima_clave
+            progreso['completo'] = ultima_clave is None
+            progreso['paginas'] += 1
+            progreso['copiados'] += copiados
+            self._guardar()
+
+    def _guardar(self):
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.datos, f, ensure_ascii=False, indent=2)
+        os.replace(temporal, self.ruta)
+
+    @property
+    def completa(self) -> bool:
+        return all(p['completo'] for p in self.datos['progreso'].values())
+
+    @property
+    def copiados(self) -> int:
+        return sum(p['copiados'] for p in self.datos['progreso'].values())
+
+
+def _escribir(cliente, tabla: str, items):
+    """
+    BatchWriteItem con el cliente de bajo nivel (seguro entre hilos), en
+    lotes de 25 y reintentando lo que DynamoDB devuelve sin procesar.
+    """
+    for inicio in range(0, len(items), LOTE_ESCRITURA):
+        pendientes = [{'PutRequest': {'Item': {k: _serializer.serialize(v) for k, v in item.items()}}}
+                      for item in items[inicio:inicio + LOTE_ESCRITURA]]
+        for intento in range(REINTENTOS_LOTE):
+            with track_call('dynamodb', 'batch_write_item', items=len(pendientes)) as record:
+                response = cliente.batch_write_item(RequestItems={tabla: pendientes})
+                record_aws_response(record, response)
+            pendientes = response.get('UnprocessedItems', {}).get(tabla, [])
+            if not pendientes:
+                break
+            time.sleep(0.05 * 2 ** intento)
+        if pendientes:
+            raise RuntimeError(f"{len(pendientes)} ítems sin procesar en {tabla}")
+
+
+def _migrar_segmento(indice: int, origen: DynamoDBManager, destino: DynamoDBManager, estado: EstadoMigracion,
+                     tamano_pagina: int, max_paginas: Optional[int], reindex: bool) -> int:
+    """
+    Copia un segmento desde su última clave. Retorna las páginas procesadas.
+    """
+    cliente = get_client('dynamodb')
+    progreso = estado.segmento(indice)
+    if progreso['completo']:
+        return 0
+    ultima_clave = progreso['ultima_clave']
+    paginas = 0
+    while max_paginas is None or paginas < max_paginas:
+        consulta = {'TableName': origen.table.name, 'Segment': indice, 'TotalSegments': estado.datos['segmentos'],
+                    'Limit': tamano_pagina}
+        if ultima_clave:
+            consulta['ExclusiveStartKey'] = ultima_clave
+        with track_call('dynamodb', 'scan_segment', segment=indice) as record:
+            response = cliente.scan(**consulta)
+            record_aws_response(record, response)
+            record['items'] = response.get('Count')
+        comentarios = [origen.decode_comment({k: _deserializer.deserialize(v) for k, v in item.items()})
+                       for item in response['Items']]
+        _escribir(cliente, destino.table.name, [destino.encode_comment(c) for c in comentarios])
+        if reindex:
+            _escribir(cliente, destino.search_table.name, destino.search_entries(comentarios))
+        # La clave se guarda después de escribir: si el proceso se corta, la página se repite
+        ultima_clave = response.get('LastEvaluatedKey')
+        estado.avanzar(indice, ultima_clave, len(comentarios))
+        paginas += 1
+        if ultima_clave is None:
+            break
+    return paginas
+
+
+def migrate_comments(origen: DynamoDBManager, destino: DynamoDBManager, state_path: str = ARCHIVO_ESTADO,
+                     segments: int = SEGMENTOS, page_size: int = TAMANO_PAGINA, max_pages: Optional[int] = None,
+                     reindex: bool = False, restart: bool = False, progreso: Optional[Callable] = None) -> Dict:
+    """
+    Copia los comentarios de `origen` a `destino` con `segments` tareas en
+    paralelo, retomando el estado guardado en `state_path`. `max_pages`
+    limita las páginas por segmento en esta corrida (para avanzar por
+    tramos). Si se indica `progreso`, se llama como progreso(copiados,
+    mensaje) al terminar cada segmento. Retorna un resumen con los
+    comentarios copiados (acumulados entre corridas) y si quedó completa.
+    """
+    estado = EstadoMigracion(state_path, origen.table.name, destino.table.name, segments, reiniciar=restart)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        # Cada segmento corre en una copia del contexto para que sus métricas lleguen al recolector activo
+        futuros = {
+            executor.submit(contextvars.copy_context().run, _migrar_segmento, i, origen, destino, estado,
+                            page_size, max_pages, reindex): i
+            for i in range(segments)
+        }
+        paginas = 0
+        for futuro, indice in futuros.items():
+            paginas += futuro.result()
+            if progreso:
+                progreso(estado.copiados, f"Segmento {indice} {'completo' if estado.segmento(indice)['completo'] else 'pausado'}")
+    return {
+        'copiados': estado.copiados,
+        'paginas_en_esta_corrida': paginas,
+        'segmentos_completos': sum(p['completo'] for p in estado.datos['progreso'].values()),
+        'completa': estado.completa,
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+
+
+def _contar(tabla: str) -> int:
+    cliente = get_client('dynamodb')
+    consulta = {'TableName': tabla, 'Select': 'COUNT'}
+    total = 0
+    while True:
+        with track_call('dynamodb', 'scan_count') as record:
+            response = cliente.scan(**consulta)
+            record_aws_response(record, response)
+        total += response['Count']
+        if 'LastEvaluatedKey' not in response:
+            return total
+        consulta['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def verify_migration(origen: DynamoDBManager, destino: DynamoDBManager) -> Dict:
+    """
+    Compara la cantidad de ítems de ambas tablas.
+    """
+    en_origen, en_destino = _contar(origen.table.name), _contar(destino.table.name)
+    return {'origen': en_origen, 'destino': en_destino, 'coinciden': en_origen == en_destino}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default=TABLA_POR_ESQUEMA[LEGADO], help="Tabla de origen")
+    parser.add_argument('--source-schema', default=LEGADO, choices=[LEGADO, INQUILINO])
+    parser.add_argument('--target', default=TABLA_POR_ESQUEMA[INQUILINO], help="Tabla de destino (esquema por inquilino)")
+    parser.add_argument('--search-table', default='ProductCommentsSearch', help="Tabla del índice de búsqueda")
+    parser.add_argument('--tenant', help="Inquilino de los comentarios sin 'tenant' (por defecto COMMENTS_TENANT)")
+    parser.add_argument('--segments', type=int, default=SEGMENTOS, help="Segmentos del Scan paralelo")
+    parser.add_argument('--page-size', type=int, default=TAMANO_PAGINA)
+    parser.add_argument('--max-pages', type=int, help="Páginas por segmento en esta corrida")
+    parser.add_argument('--state', default=ARCHIVO_ESTADO, help="Archivo JSON con el progreso")
+    parser.add_argument('--create', action='store_true', help="Crear la tabla de destino si no existe")
+    parser.add_argument('--reindex', action='store_true', help="Reescribir el índice de búsqueda con el inquilino")
+    parser.add_argument('--restart', action='store_true', help="Ignorar el estado guardado y copiar todo de nuevo")
+    parser.add_argument('--verify', action='store_true', help="Comparar la cantidad de ítems al terminar")
+    args = parser.parse_args()
+
+    origen = DynamoDBManager(args.source, args.search_table, schema=args.source_schema, tenant=args.tenant)
+    destino = DynamoDBManager(args.target, args.search_table, schema=INQUILINO, tenant=args.tenant)
+    if args.create:
+        destino.create_table()
+    resumen = migrate_comments(origen, destino, args.state, args.segments, args.page_size, args.max_pages,
+                               args.reindex, args.restart, progreso=lambda n, mensaje: print(f"  {mensaje} ({n:,} copiados)"))
+    estado = "completa" if resumen['completa'] else f"pausada ({resumen['segmentos_completos']}/{args.segments} segmentos)"
+    print(f"✅ Migración {estado}: {resumen['copiados']:,} comentarios copiados en {resumen['segundos']} s")
+    if args.verify and resumen['completa']:
+        print(f"🔎 Verificación: {verify_migration(origen, destino)}")
+
+
+if __name__ == '__main__':
+    main()
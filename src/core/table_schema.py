@@ -0,0 +1,159 @@
+# core/table_schema.py
+"""
+Esquemas de la tabla de comentarios.
+
+Esquema legado ('legacy'): ProductComments con clave comment_id y el índice
+SentimentTimestampIndex (sentiment, timestamp). Cualquier consulta por
+producto o colegio es un Scan, y el índice tiene solo cuatro particiones
+(una por sentimiento) que reciben todas las escrituras.
+
+Esquema por inquilino ('tenant'): cada comentario pertenece a un inquilino
+(producto, colegio o cliente; atributo 'tenant' del comentario o el
+inquilino por defecto del DynamoDBManager).
+    tenant           clave de partición
+    ts_id            clave de orden <timestamp>#<comment_id>: los
+                     comentarios de un inquilino quedan en orden
+                     cronológico y un rango de fechas es un solo Query
+    sentiment_shard  clave del índice SentimentShardIndex,
+                     <tenant>#<sentimiento>#<shard>, con el mismo ts_id como
+                     clave de orden. El shard sale del comment_id, así que
+                     las escrituras de un sentimiento se reparten en
+                     SHARDS_SENTIMIENTO particiones y una consulta por
+                     sentimiento lee esos shards en paralelo y los mezcla.
+SHARDS_SENTIMIENTO es parte del esquema: cambiarlo requiere migrar la tabla.
+"""
+import os
+import zlib
+from typing import Dict, Optional
+
+LEGADO = 'legacy'
+INQUILINO = 'tenant'
+# DYNAMODB_TABLE_SCHEMA=tenant para usar la tabla nueva (ver core.table_migration)
+ESQUEMA_POR_DEFECTO = os.environ.get('DYNAMODB_TABLE_SCHEMA', LEGADO)
+TABLA_POR_ESQUEMA = {LEGADO: 'ProductComments', INQUILINO: 'ProductCommentsByTenant'}
+INQUILINO_POR_DEFECTO = os.environ.get('COMMENTS_TENANT', 'default')
+
+INDICE_SENTIMIENTO_LEGADO = 'SentimentTimestampIndex'
+INDICE_SENTIMIENTO = 'SentimentShardIndex'
+SHARDS_SENTIMIENTO = 8
+SEPARADOR = '#'
+
+# Atributos que solo existen como claves del esquema por inquilino
+ATRIBUTOS_CLAVE = ('ts_id', 'sentiment_shard')
+
+
+def sort_key(timestamp: str, comment_id: str) -> str:
+    return f"{timestamp}{SEPARADOR}{comment_id}"
+
+
+def shard_for(comment_id: str) -> int:
+    """
+    Shard estable de un comentario (no depende de la semilla de hash del proceso).
+    """
+    return zlib.crc32(str(comment_id).encode('utf-8')) % SHARDS_SENTIMIENTO
+
+
+def sentiment_key(tenant: str, sentiment: str, shard: int) -> str:
+    return SEPARADOR.join([tenant, sentiment, str(shard)])
+
+
+def tenant_of(comment: Dict, default: Optional[str] = None) -> str:
+    return comment.get('tenant') or default or INQUILINO_POR_DEFECTO
+
+
+def key_attributes(comment: Dict, default_tenant: Optional[str] = None) -> Dict:
+    """
+    Atributos de clave (tabla e índice) de un comentario en el esquema por inquilino.
+    """
+    tenant = tenant_of(comment, default_tenant)
+    return {
+        'tenant': tenant,
+        'ts_id': sort_key(comment['timestamp'], comment['comment_id']),
+        'sentiment_shard': sentiment_key(tenant, comment.get('sentiment', 'UNKNOWN'), shard_for(comment['comment_id'])),
+    }
+
+
+def primary_key(comment: Dict, schema: str, default_tenant: Optional[str] = None) -> Dict:
+    """
+    Clave primaria de un comentario (con comment_id y timestamp) en `schema`.
+    """
+    if schema == INQUILINO:
+        return {'tenant': tenant_of(comment, default_tenant),
+                'ts_id': sort_key(comment['timestamp'], comment['comment_id'])}
+    return {'comment_id': comment['comment_id']}
+
+
+def table_definition(schema: str) -> Dict:
+    """
+    Parámetros de create_table para `schema` (sin TableName).
+    """
+    if schema == INQUILINO:
+        return {
+            'KeySchema': [
+                {'AttributeName': 'tenant', 'KeyType': 'HASH'},
+                {'AttributeName': 'ts_id', 'KeyType': 'RANGE'},
+            ],
+            'AttributeDefinitions': [
+                {'AttributeName': 'tenant', 'AttributeType': 'S'},
+                {'AttributeName': 'ts_id', 'AttributeType': 'S'},
+                {'AttributeName': 'sentiment_shard', 'AttributeType': 'S'},
+            ],
+            'GlobalSecondaryIndexes': [{
+                'IndexName': INDICE_SENTIMIENTO,
+                'KeySchema': [
+                    {'AttributeName': 'sentiment_shard', 'KeyType': 'HASH'},
+                    {'AttributeName': 'ts_id', 'KeyType': 'RANGE'},
+                ],
+                'Projection': {'ProjectionType': 'ALL'},
+            }],
+            # Como el índice de búsqueda: escrituras en ráfagas por lote ingerido
+            'BillingMode': 'PAY_PER_REQUEST',
+        }
+    return {
+        'KeySchema': [
+            {
+                'AttributeName': 'comment_id',
+                'KeyType': 'HASH'  # Partition key
+            }
+        ],
+        'AttributeDefinitions': [
+            {
+                'AttributeName': 'comment_id',
+                'AttributeType': 'S'
+            },
+            {
+                'AttributeName': 'timestamp',
+                'AttributeType': 'S' # Se puede usar 'N' para números si el formato es EPOCH
+            },
+            {
+                'AttributeName': 'sentiment',
+                'AttributeType': 'S'
+            }
+        ],
+        'GlobalSecondaryIndexes': [
+            {
+                'IndexName': INDICE_SENTIMIENTO_LEGADO,
+                'KeySchema': [
+                    {
+                        'AttributeName': 'sentiment',
+                        'KeyType': 'HASH'
+                    },
+                    {
+                        'AttributeName': 'timestamp',
+                        'KeyType': 'RANGE'
+                    }
+                ],
+                'Projection': {
+                    'ProjectionType': 'ALL'
+                },
+                'ProvisionedThroughput': {
+                    'ReadCapacityUnits': 5,
+                    'WriteCapacityUnits': 5
+                }
+            }
+        ],
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 5,
+            'WriteCapacityUnits': 5
+        }
+    }
@@ -0,0 +1,70 @@
+# core/warmup.py
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Ejecuta una sola vez, en un hilo en segundo plano, tareas de arranque
+    costosas (importar módulos pesados, crear clientes y cachés) para que la
+    primera página se muestre sin esperarlas. Quien necesita el resultado de
+    una tarea lo pide con get(), que espera solo si aún no terminó.
+    """
+
+    def __init__(self, tasks: List[Tuple[str, Callable[[], Any]]]):
+        # Las tareas corren en orden: una puede usar el resultado de otra con get()
+        self._tasks = list(tasks)
+        self._done = {name: threading.Event() for name, _ in self._tasks}
+        self._results: Dict[str, Any] = {}
+        self._errors: Dict[str, Exception] = {}
+        self._timings: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> 'Warmup':
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        for name, task in self._tasks:
+            inicio = time.perf_counter()
+            try:
+                self._results[name] = task()
+            except Exception as e:
+                logger.error(f"Precalentamiento '{name}' fallido: {e}")
+                self._errors[name] = e
+            finally:
+                self._timings[name] = round((time.perf_counter() - inicio) * 1000, 1)
+                self._done[name].set()
+        logger.info(f"Precalentamiento completado: {self._timings}")
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Resultado de una tarea. Arranca el precalentamiento si no se había
+        iniciado, espera a que la tarea termine y relanza su error si falló.
+        """
+        self.start()
+        if not self._done[name].wait(timeout):
+            raise TimeoutError(f"El precalentamiento '{name}' no terminó en {timeout}s")
+        if name in self._errors:
+            raise self._errors[name]
+        return self._results[name]
+
+    def ready(self, name: str) -> bool:
+        return self._done[name].is_set()
+
+    def errors(self) -> Dict[str, str]:
+        return {name: str(error) for name, error in self._errors.items()}
+
+    def timings(self) -> Dict[str, float]:
+        """
+        Milisegundos que tomó cada tarea terminada.
+        """
+        return dict(self._timings)
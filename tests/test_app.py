@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+testing = pytest.importorskip('streamlit.testing.v1')
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'app', 'app.py')
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    # La cola de trabajos y la biblioteca escriben fuera del repositorio
+    monkeypatch.setenv('JOB_QUEUE_DB', str(tmp_path / 'trabajos.db'))
+    monkeypatch.setenv('BIBLIOTECA_CURRICULAR_DIR', str(tmp_path / 'biblioteca'))
+    monkeypatch.setenv('AWS_REGION', 'us-east-1')
+    prueba = testing.AppTest.from_file(APP, default_timeout=30)
+    prueba.run()
+    assert not prueba.exception
+    return prueba
+
+
+def textos(prueba):
+    return [elemento.value for elemento in prueba.markdown]
+
+
+def test_la_programacion_sobrevive_a_los_reruns(app):
+    app.session_state.programacion = {'grado': 3, 'texto': 'Sesión 1: Célula', 'docx': b'DOCX',
+                                      'desde_biblioteca': True}
+    app.run()
+    # Un rerun cualquiera (ej. al pulsar una descarga) vuelve a mostrar el resultado guardado
+    app.run()
+
+    assert not app.exception
+    assert any('Sesión 1: Célula' in texto and '3º DE EDUCACIÓN SECUNDARIA' in texto for texto in textos(app))
+    assert app.session_state.programacion['texto'] == 'Sesión 1: Célula'
+    assert any('biblioteca pregenerada' in info.value for info in app.info)
+
+
+def test_generar_nueva_descarta_el_resultado(app):
+    app.session_state.programacion = {'grado': 3, 'texto': 'Sesión 1: Célula', 'docx': b'DOCX',
+                                      'desde_biblioteca': False}
+    app.run()
+    app.button(key='nueva_prog').click().run()
+
+    assert app.session_state.programacion is None
+    assert not any('Sesión 1: Célula' in texto for texto in textos(app))
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core import aws_clients
+
+
+@pytest.fixture(autouse=True)
+def clientes(monkeypatch):
+    monkeypatch.setenv('AWS_REGION', 'us-east-1')
+    aws_clients.reset_clients()
+    yield
+    aws_clients.reset_clients()
+
+
+def test_un_cliente_por_proceso_y_region(monkeypatch):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        creados = list(pool.map(lambda _: aws_clients.get_client('s3'), range(16)))
+    assert all(cliente is creados[0] for cliente in creados)
+
+    monkeypatch.setenv('AWS_REGION', 'eu-west-1')
+    otro = aws_clients.get_client('s3')
+    assert otro is not creados[0]
+    assert otro.meta.region_name == 'eu-west-1'
+
+
+def test_register_y_reset():
+    doble = object()
+    aws_clients.register_client('comprehend', doble)
+    assert aws_clients.get_client('comprehend') is doble
+
+    aws_clients.reset_clients()
+    assert aws_clients.get_client('comprehend') is not doble
+
+
+def test_timeouts_configurables(monkeypatch):
+    monkeypatch.setenv('AWS_TIMEOUTS', '{"comprehend": {"read_timeout": 42}}')
+    config = aws_clients.get_client('comprehend').meta.config
+    assert (config.connect_timeout, config.read_timeout) == (3, 42)
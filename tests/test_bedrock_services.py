@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from core import bedrock_services
+from core.bedrock_services import NUM_SESIONES, generar_programacion_curricular
+
+
+class EtapasFalsas:
+    """Reemplaza model_routing.complete: registra las etapas y falla las indicadas en `fallar`."""
+
+    def __init__(self):
+        self.llamadas = []
+        self.fallar = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, etapa, prompt, system=None, operation=None):
+        with self._lock:
+            self.llamadas.append(operation or etapa)
+        if (operation or etapa) in self.fallar:
+            raise RuntimeError("Circuito de Bedrock abierto")
+        if etapa == 'programacion_esqueleto':
+            return '\n'.join(f"Sesión {n}: Tema {n} | Propósito {n}" for n in range(1, NUM_SESIONES + 1))
+        if etapa == 'programacion_sesion':
+            return f"Sesión {operation.rsplit('_', 1)[1]}: desarrollo"
+        return f"TABLA {operation or etapa} " * 20
+
+
+@pytest.fixture
+def etapas(monkeypatch):
+    falsas = EtapasFalsas()
+    monkeypatch.setattr(bedrock_services, 'complete', falsas)
+    return falsas
+
+
+def generar(num_iteraciones):
+    pasos = []
+    texto = generar_programacion_curricular(3, 'Indaga', 'Problematiza', 'Célula', num_iteraciones=num_iteraciones,
+                                            progreso=lambda paso, total, mensaje: pasos.append((paso, total, mensaje)))
+    return texto, pasos
+
+
+def test_progreso_cuenta_las_sesiones(etapas):
+    texto, pasos = generar(num_iteraciones=2)
+
+    total = 1 + 2 + NUM_SESIONES
+    assert [paso for paso, _, _ in pasos] == list(range(1, total + 1))
+    assert {t for _, t, _ in pasos} == {total}
+    assert sum('Sesión' in mensaje for _, _, mensaje in pasos) == NUM_SESIONES
+    assert texto.count('desarrollo') == NUM_SESIONES
+
+
+def test_progreso_se_completa_si_las_mejoras_se_interrumpen(etapas):
+    etapas.fallar.add('programacion_mejora_2')
+    texto, pasos = generar(num_iteraciones=3)
+
+    assert 'TABLA programacion_mejora_1' in texto
+    assert 'programacion_mejora_3' not in etapas.llamadas
+    total = 1 + 3 + NUM_SESIONES
+    assert max(paso for paso, _, _ in pasos) == total
+    assert {t for _, t, _ in pasos} == {total}
+
+
+def test_sin_progreso(etapas):
+    texto = generar_programacion_curricular(3, 'Indaga', 'Problematiza', 'Célula', num_iteraciones=1)
+    assert not texto.startswith('Error')
+    assert sum(o.startswith('programacion_sesion') for o in etapas.llamadas) == NUM_SESIONES
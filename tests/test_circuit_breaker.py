@@ -0,0 +1,126 @@
+import io
+import json
+import types
+
+import pytest
+from botocore.exceptions import ClientError
+
+from core import circuit_breaker, rate_limiter
+from core.bedrock_client import invoke_model
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, get_breaker
+from core.metrics import collect_events
+from core.rag_service import generar_programacion_curricular_rag
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    # Solo el reloj del módulo: el resto del proceso sigue con time.monotonic
+    monkeypatch.setattr(circuit_breaker, 'time', types.SimpleNamespace(monotonic=reloj))
+    return reloj
+
+
+@pytest.fixture
+def limpios(monkeypatch):
+    # Reintentos sin pausa para no esperar el backoff
+    monkeypatch.setenv('RATE_LIMITS', json.dumps({'bedrock': {'base_delay': 0}}))
+    rate_limiter.reset_limiters()
+    circuit_breaker.reset_breakers()
+    yield
+    rate_limiter.reset_limiters()
+    circuit_breaker.reset_breakers()
+
+
+def test_transiciones(reloj):
+    breaker = CircuitBreaker('prueba', failure_threshold=2, recovery_timeout=30)
+    with collect_events() as eventos:
+        breaker.on_failure()
+        assert breaker.state == CLOSED
+        breaker.on_failure()
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        # Pasado el timeout deja pasar una sola llamada de prueba
+        reloj.ahora += 30
+        breaker.before_call()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        # Si la prueba falla vuelve a abrirse
+        breaker.on_failure()
+        assert breaker.state == OPEN
+
+        reloj.ahora += 30
+        breaker.before_call()
+        breaker.on_success(0.1)
+        assert breaker.state == CLOSED and breaker.failures == 0
+
+    assert [e['event'] for e in eventos] == ['prueba:open', 'prueba:half_open', 'prueba:open', 'prueba:half_open',
+                                             'prueba:closed']
+
+
+def test_llamada_lenta_cuenta_como_fallo(reloj):
+    breaker = CircuitBreaker('prueba', failure_threshold=1, slow_call_s=5)
+    breaker.on_success(4)
+    assert breaker.state == CLOSED
+    breaker.on_success(6)
+    assert breaker.state == OPEN
+
+
+class BedrockCaido:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        raise ClientError({'Error': {'Code': 'ServiceUnavailableException', 'Message': 'caído'},
+                           'ResponseMetadata': {'HTTPStatusCode': 503}}, 'InvokeModel')
+
+
+class BedrockSano:
+    def invoke_model(self, **kwargs):
+        return {'body': io.BytesIO(b'{"completion": "ok"}'), 'ResponseMetadata': {'HTTPHeaders': {}}}
+
+
+def test_el_circuito_abierto_detiene_los_reintentos(limpios):
+    caido = BedrockCaido()
+    with pytest.raises(CircuitOpenError):
+        invoke_model('modelo-x', {'prompt': 'hola'}, client=caido)
+    umbral = get_breaker('bedrock', 'modelo-x').failure_threshold
+    assert caido.calls == umbral
+
+    # Mientras está abierto no se llama al modelo; otro modelo tiene su propio circuito
+    with pytest.raises(CircuitOpenError):
+        invoke_model('modelo-x', {'prompt': 'hola'}, client=caido)
+    assert caido.calls == umbral
+    assert invoke_model('modelo-y', {'prompt': 'hola'}, client=BedrockSano()) == {'completion': 'ok'}
+
+
+class RAGSinKnowledgeBase:
+    def buscar_contexto_curricular(self, query, grado, area):
+        return {'error': 'Knowledge Base no disponible', 'documentos': [], 'total_encontrados': 0}
+
+    def generar_con_contexto_rag(self, prompt, contexto_documentos):
+        return "Error al generar con contexto: sin documentos"
+
+
+def test_respaldo_sin_rag():
+    with collect_events() as eventos:
+        resultado = generar_programacion_curricular_rag(3, 'Indaga', 'Problematiza', 'Célula',
+                                                        rag_service=RAGSinKnowledgeBase(),
+                                                        respaldo=lambda: 'programación directa')
+    assert resultado == 'programación directa'
+    assert [(e['service'], e['event']) for e in eventos] == [('fallback', 'rag_a_generacion_directa')]
+
+    sin_respaldo = generar_programacion_curricular_rag(3, 'Indaga', 'Problematiza', 'Célula',
+                                                       rag_service=RAGSinKnowledgeBase())
+    assert sin_respaldo.startswith('Error')
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+pytest.importorskip('pyarrow')
+moto = pytest.importorskip('moto')
+
+BUCKET = 'archivo-pruebas'
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    for variable, valor in (('AWS_REGION', 'us-east-1'), ('AWS_DEFAULT_REGION', 'us-east-1'),
+                            ('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing')):
+        monkeypatch.setenv(variable, valor)
+    with moto.mock_aws():
+        from core.aws_clients import get_client
+        get_client('s3').create_bucket(Bucket=BUCKET)
+        yield
+
+
+@pytest.fixture
+def db(aws):
+    from core.database_management import DynamoDBManager
+    manager = DynamoDBManager('ComentariosPrueba', 'BusquedaPrueba', schema='legacy')
+    manager.create_table()
+    return manager
+
+
+def comentario(numero, dia, sentimiento='POSITIVE'):
+    return {'comment_id': f"c{numero}", 'timestamp': f"2025-03-{dia:02d}T10:{numero % 60:02d}:00",
+            'text': f"comentario {numero}", 'sentiment': sentimiento,
+            'sentiment_score': {'Positive': 0.9, 'Negative': 0.05, 'Neutral': 0.04, 'Mixed': 0.01},
+            'entities': []}
+
+
+def agregar(db, comentarios):
+    for c in comentarios:
+        db.add_comment(c)
+
+
+@pytest.mark.parametrize('destino', ['local', 's3'])
+def test_exportacion_completa_reemplaza_archivos_anteriores(db, tmp_path, destino):
+    from core.comment_archive import ARCHIVO_ESTADO, _Destino, export_comments, read_archive
+
+    ruta = str(tmp_path / 'archivo') if destino == 'local' else f"s3://{BUCKET}/comentarios"
+    agregar(db, [comentario(i, 1 + i % 3) for i in range(6)])
+    primera = export_comments(db, ruta)
+    agregar(db, [comentario(i, 4, 'NEGATIVE') for i in range(6, 9)])
+    incremental = export_comments(db, ruta)
+    assert (primera['filas'], incremental['filas']) == (6, 3)
+
+    completa = export_comments(db, ruta, full=True)
+    assert completa['filas'] == 9
+    assert completa['reemplazados'] == len(primera['archivos']) + len(incremental['archivos'])
+    salida = _Destino(ruta)
+    assert sorted(salida.listar_particiones()) == sorted(a['ruta'] for a in completa['archivos'])
+
+    if destino == 'local':
+        tabla = read_archive(ruta, columns=['comment_id'])
+        assert sorted(tabla.column('comment_id').to_pylist()) == sorted(f"c{i}" for i in range(9))
+
+    estado = json.loads(salida.leer(ARCHIVO_ESTADO))
+    assert [c['corrida'] for c in estado['corridas']] == [primera['corrida'], incremental['corrida'],
+                                                          completa['corrida']]
+    assert estado['corridas'][-1]['completa'] is True
+    # Después de la completa, la incremental sigue desde sus marcas
+    assert export_comments(db, ruta)['filas'] == 0
@@ -0,0 +1,62 @@
+import hashlib
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from core.comment_clustering import (clustered_prompt_block, cluster_comments, format_clusters,  # noqa: E402
+                                     parse_comment_lines)
+
+CASI_IGUALES = [
+    "Las clases de laboratorio son muy interesantes y aprendo mucho",
+    "las clases de laboratorio son MUY interesantes y aprendo mucho!!",
+    "Las clases de laboratorio son muy interesantes, y aprendo mucho.",
+    "Las clases de laboratório son muy interesantes y aprendo muchoo",
+]
+DISTINTOS = [
+    "El profesor explica demasiado rápido los temas de física",
+    "Quisiera más tiempo para resolver los ejercicios en clase",
+]
+
+
+def test_agrupa_casi_iguales_y_conserva_los_indices():
+    textos = [CASI_IGUALES[0], DISTINTOS[0], *CASI_IGUALES[1:], DISTINTOS[1]]
+    grupos = cluster_comments(textos)
+
+    assert [g['count'] for g in grupos] == [4, 1, 1]
+    assert grupos[0]['members'] == [0, 2, 3, 4]
+    assert grupos[0]['representative'] == CASI_IGUALES[0]
+    assert sorted(i for g in grupos for i in g['members']) == list(range(len(textos)))
+    assert cluster_comments([]) == []
+
+
+def test_no_mezcla_sentimientos_y_suma_pesos():
+    textos = CASI_IGUALES[:2] + CASI_IGUALES[:1]
+    grupos = cluster_comments(textos, sentiments=['POSITIVE', 'NEGATIVE', 'POSITIVE'], weights=[3, 1, 2])
+
+    assert [(g['sentiment'], g['count'], g['members']) for g in grupos] == [('POSITIVE', 5, [0, 2]),
+                                                                           ('NEGATIVE', 1, [1])]
+
+
+def test_lineas_con_conteo_ida_y_vuelta():
+    bloque, grupos = clustered_prompt_block(CASI_IGUALES + DISTINTOS)
+    assert bloque.splitlines()[0] == f"- (x4) {CASI_IGUALES[0]}"
+
+    textos, pesos = parse_comment_lines(bloque + "\n\n• otro comentario\n   ")
+    assert textos == [CASI_IGUALES[0], *DISTINTOS, 'otro comentario']
+    assert pesos == [4, 1, 1, 1]
+    # Volver a agrupar el bloque conserva el volumen original
+    assert sum(g['count'] for g in cluster_comments(textos, weights=pesos)) == len(CASI_IGUALES + DISTINTOS) + 1
+
+
+def test_presupuesto_del_prompt():
+    # Textos sin k-gramas en común: cada uno es su propio grupo
+    textos = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(50)]
+    grupos = cluster_comments(textos, sentiments=['NEUTRAL'] * 49 + ['NEGATIVE'])
+    bloque = format_clusters(grupos, max_chars=300)
+
+    assert len(bloque) < 600
+    assert bloque.startswith('[NEUTRAL] 49 comentarios, 49 opiniones distintas')
+    # El mayor de cada sentimiento siempre entra y lo omitido se resume
+    assert '[NEGATIVE] 1 comentarios' in bloque and textos[49] in bloque
+    assert 'opiniones menos frecuentes)' in bloque
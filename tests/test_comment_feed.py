@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+moto = pytest.importorskip('moto')
+
+SENTIMIENTOS = ('POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED')
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    for variable, valor in (('AWS_REGION', 'us-east-1'), ('AWS_DEFAULT_REGION', 'us-east-1'),
+                            ('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing')):
+        monkeypatch.setenv(variable, valor)
+    with moto.mock_aws():
+        yield
+
+
+@pytest.fixture(params=['legacy', 'tenant'])
+def db(aws, request):
+    from core.database_management import DynamoDBManager
+    manager = DynamoDBManager(f'Comentarios_{request.param}', 'BusquedaPrueba', schema=request.param)
+    manager.create_table()
+
+    def sin_recurso(**kwargs):
+        raise AssertionError("get_comments_since no debe usar el recurso compartido desde los hilos del feed")
+
+    # El recurso de boto3 no es seguro entre hilos: el feed solo debe usar el cliente
+    manager.table.query = sin_recurso
+    return manager
+
+
+def comentario(numero, sentimiento, minuto):
+    return {'comment_id': f"c{numero}", 'timestamp': f"2025-03-01T10:{minuto:02d}:00",
+            'text': f"comentario {numero} sobre el #laboratorio", 'sentiment': sentimiento,
+            'sentiment_score': {'Positive': 0.5, 'Negative': 0.2, 'Neutral': 0.2, 'Mixed': 0.1}, 'entities': []}
+
+
+def agregar(db, desde, cantidad, minuto):
+    for i in range(desde, desde + cantidad):
+        assert db.add_comment(comentario(i, SENTIMIENTOS[i % len(SENTIMIENTOS)], minuto))
+
+
+def test_refresh_concurrente_por_sentimiento(db):
+    from core.comment_feed import CommentFeed
+
+    agregar(db, 0, 40, minuto=1)
+    feeds = [CommentFeed(sentimientos=SENTIMIENTOS) for _ in range(3)]
+    resultados = []
+    hilos = [threading.Thread(target=lambda feed=feed: resultados.append(feed.refresh(db, max_workers=4)))
+             for feed in feeds]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert resultados == [40, 40, 40]
+    for feed in feeds:
+        assert dict(feed.por_sentimiento) == {s: 10 for s in SENTIMIENTOS}
+
+    # Solo llegan los nuevos, incluidos los que comparten el timestamp de la marca
+    agregar(db, 40, 8, minuto=1)
+    agregar(db, 48, 4, minuto=2)
+    assert feeds[0].refresh(db) == 12
+    assert feeds[0].total == 52
+    assert feeds[0].refresh(db) == 0
+
+
+def test_proyeccion_del_dashboard(db):
+    from core.database_management import CAMPOS_DASHBOARD
+
+    agregar(db, 0, 4, minuto=1)
+    leidos = db.get_comments_since('POSITIVE', '2025-03-01T10:00:00', attributes=CAMPOS_DASHBOARD)
+    assert [c['comment_id'] for c in leidos] == ['c0']
+    assert set(leidos[0]) == set(CAMPOS_DASHBOARD)
+    assert db.get_comments_since('POSITIVE', '2025-03-01T10:05:00') == []
@@ -0,0 +1,109 @@
+import time
+import types
+
+import pytest
+
+from core import aws_clients, comprehend_cache, sentiment_analysis
+from core.comprehend_cache import ComprehendCache, DynamoDBCacheTier, LRUCache, cache_key, normalize_text
+from core.metrics import collect_events, summarize_events
+
+moto = pytest.importorskip('moto')
+
+TABLA = 'cache-comprehend-pruebas'
+
+
+def test_clave_por_texto_normalizado():
+    # 'é' precompuesta y 'e' + acento combinante, con espacios distintos
+    assert normalize_text('  Muy\tbuen  cafe\u0301 ') == normalize_text('Muy buen caf\u00e9')
+    assert cache_key('detect_sentiment', 'Rico  snack\n', 'es') == cache_key('detect_sentiment', 'Rico snack', 'es')
+    # Mayúsculas, operación e idioma sí cambian el resultado de Comprehend
+    claves = {cache_key('detect_sentiment', 'Rico snack', 'es'), cache_key('detect_sentiment', 'rico snack', 'es'),
+              cache_key('detect_entities', 'Rico snack', 'es'), cache_key('detect_sentiment', 'Rico snack', 'en')}
+    assert len(claves) == 4
+
+
+def test_lru_descarta_el_menos_usado():
+    lru = LRUCache(max_entries=2)
+    lru.put('a', 1)
+    lru.put('b', 2)
+    assert lru.get('a') == 1
+    lru.put('c', 3)
+    assert (lru.get('a'), lru.get('b'), lru.get('c')) == (1, None, 3)
+
+    desactivada = LRUCache(max_entries=0)
+    desactivada.put('a', 1)
+    assert desactivada.get('a') is None and len(desactivada) == 0
+
+
+class NivelCaido:
+    def get(self, key):
+        raise RuntimeError('DynamoDB no disponible')
+
+    def put(self, key, value):
+        raise RuntimeError('DynamoDB no disponible')
+
+
+def test_nivel_compartido_caido_es_un_fallo_de_cache():
+    cache = ComprehendCache(shared=NivelCaido())
+    with collect_events() as eventos:
+        clave, valor = cache.get('detect_entities', 'texto', 'es')
+        assert valor is None
+        cache.put(clave, [])
+        assert cache.get('detect_entities', 'texto ', 'es') == (clave, [])
+
+    assert cache.stats() == {'memory_hit': 1, 'shared_hit': 0, 'miss': 1, 'hit_rate': 0.5, 'memory_entries': 1}
+    assert summarize_events(eventos) == [
+        {'service': 'comprehend_cache', 'event': 'detect_entities:miss', 'count': 1},
+        {'service': 'comprehend_cache', 'event': 'detect_entities:memory_hit', 'count': 1},
+    ]
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    for variable, valor in (('AWS_REGION', 'us-east-1'), ('AWS_DEFAULT_REGION', 'us-east-1'),
+                            ('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing')):
+        monkeypatch.setenv(variable, valor)
+    with moto.mock_aws():
+        aws_clients.reset_clients()
+        DynamoDBCacheTier(TABLA).create_table()
+        yield
+        aws_clients.reset_clients()
+
+
+def test_nivel_compartido_entre_contenedores(aws, monkeypatch):
+    clave = cache_key('detect_sentiment', 'Rico snack', 'es')
+    ComprehendCache(shared=DynamoDBCacheTier(TABLA)).put(clave, ['POSITIVE', {'Positive': 0.9}])
+
+    # Otro contenedor: memoria vacía, mismo nivel compartido
+    otro = ComprehendCache(shared=DynamoDBCacheTier(TABLA, ttl_seconds=60))
+    assert otro.get('detect_sentiment', 'Rico  snack', 'es') == (clave, ['POSITIVE', {'Positive': 0.9}])
+    assert otro.get('detect_sentiment', 'Rico snack', 'es')[1] is not None
+    assert otro.stats()['shared_hit'] == 1 and otro.stats()['memory_hit'] == 1
+
+    # Las entradas vencidas se ignoran aunque DynamoDB aún no las haya borrado
+    otro.put(cache_key('detect_sentiment', 'viejo', 'es'), ['NEUTRAL', {}])
+    ahora = time.time()
+    monkeypatch.setattr(comprehend_cache, 'time', types.SimpleNamespace(time=lambda: ahora + 120))
+    assert ComprehendCache(shared=DynamoDBCacheTier(TABLA)).get('detect_sentiment', 'viejo', 'es')[1] is None
+
+
+class ComprehendEntidades:
+    def __init__(self):
+        self.calls = 0
+
+    def detect_entities(self, Text, LanguageCode):
+        self.calls += 1
+        return {'Entities': [{'Text': '#snack', 'Type': 'OTHER', 'Score': 0.9}],
+                'ResponseMetadata': {'HTTPStatusCode': 200, 'RetryAttempts': 0}}
+
+
+def test_comprehend_se_llama_una_vez_por_texto_normalizado(monkeypatch):
+    monkeypatch.setattr(sentiment_analysis, '_cache', ComprehendCache())
+    cliente = ComprehendEntidades()
+    aws_clients.register_client('comprehend', cliente)
+    try:
+        primero = sentiment_analysis._comprehend_entities('Me gusta el #snack')
+        assert sentiment_analysis._comprehend_entities(' Me gusta  el #snack\n') == primero
+    finally:
+        aws_clients.reset_clients()
+    assert cliente.calls == 1
@@ -0,0 +1,66 @@
+import pytest
+
+from core import bedrock_services
+from core.curriculum_library import (CAPACIDADES_POR_DEFECTO, COMPETENCIA_POR_DEFECTO, CONTENIDOS_POR_GRADO,
+                                     LONGITUD_MINIMA, BibliotecaCurricular, clave_programacion,
+                                     validar_programacion)
+
+VALIDA = ("COMPETENCIA: Indaga\nCAPACIDADES: Problematiza\nDESEMPEÑOS: Formula preguntas\n"
+          "CRITERIOS DE EVALUACIÓN: Plantea hipótesis\nINSTRUMENTOS: Rúbrica\nSESIÓN 1: Medición\n")
+VALIDA += "Detalle de la programación. " * (LONGITUD_MINIMA // 20)
+COMBINACION = {'grado': 3, 'competencia': COMPETENCIA_POR_DEFECTO, 'capacidades': CAPACIDADES_POR_DEFECTO,
+               'contenidos': CONTENIDOS_POR_GRADO[3]}
+
+
+@pytest.fixture
+def biblioteca(tmp_path):
+    return BibliotecaCurricular(str(tmp_path / 'biblioteca'))
+
+
+def test_guardar_y_buscar(biblioteca):
+    clave = biblioteca.guardar(texto=VALIDA, **COMBINACION)
+    entrada = biblioteca.buscar(**COMBINACION)
+
+    assert entrada['texto'] == VALIDA
+    assert entrada['vigente']
+    assert entrada['metadata']['clave'] == clave
+    assert entrada['metadata']['longitud'] == len(VALIDA)
+    # Espacios distintos en la solicitud dan la misma entrada
+    assert biblioteca.buscar(**{**COMBINACION, 'contenidos': '  ' + CONTENIDOS_POR_GRADO[3].replace('\n', ' \n')})
+    assert biblioteca.buscar(**{**COMBINACION, 'grado': 4}) is None
+
+
+def test_cambio_de_prompts_desactualiza_la_entrada(biblioteca, monkeypatch):
+    biblioteca.guardar(texto=VALIDA, **COMBINACION)
+    monkeypatch.setattr(bedrock_services, 'PROMPT_INICIAL', bedrock_services.PROMPT_INICIAL + "\nNuevo requisito.")
+    assert not biblioteca.buscar(**COMBINACION)['vigente']
+
+
+def test_sin_docx_se_borra_el_documento_anterior(biblioteca, monkeypatch):
+    from core import docx_exporter
+
+    monkeypatch.setattr(docx_exporter, 'crear_documento_profesional', lambda *args: b'docx anterior')
+    clave = biblioteca.guardar(texto=VALIDA, **COMBINACION)
+    assert biblioteca.buscar(**COMBINACION)['docx'] == b'docx anterior'
+
+    monkeypatch.setattr(docx_exporter, 'crear_documento_profesional', lambda *args: None)
+    assert biblioteca.guardar(texto=VALIDA + "Versión nueva.", **COMBINACION) == clave
+    entrada = biblioteca.buscar(**COMBINACION)
+    assert entrada['texto'].endswith("Versión nueva.")
+    assert entrada['docx'] is None
+
+
+def test_validar_programacion():
+    assert validar_programacion(VALIDA) == []
+    assert validar_programacion("Error al generar la programación curricular: sin servicio")
+    assert any('corto' in p for p in validar_programacion(VALIDA[:200]))
+    assert "Falta la sección INSTRUMENTOS" in validar_programacion(VALIDA.replace('INSTRUMENTOS', 'HERRAMIENTAS'))
+
+
+def test_precomputar_reintenta_y_omite_las_vigentes(biblioteca, monkeypatch):
+    respuestas = iter(["Error al generar", VALIDA, VALIDA, VALIDA])
+    monkeypatch.setattr(bedrock_services, 'generar_programacion_curricular', lambda *args: next(respuestas))
+
+    assert biblioteca.precomputar() == {'generadas': len(CONTENIDOS_POR_GRADO), 'vigentes': 0, 'fallidas': 0}
+    assert biblioteca.precomputar() == {'generadas': 0, 'vigentes': len(CONTENIDOS_POR_GRADO), 'fallidas': 0}
+    assert clave_programacion(**COMBINACION) == biblioteca.buscar(**COMBINACION)['metadata']['clave']
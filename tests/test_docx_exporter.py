@@ -0,0 +1,91 @@
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('docx')
+
+from core import docx_exporter
+from core.docx_exporter import crear_documento_profesional, dividir_en_bloques
+
+CONTENIDO = """# UNIDAD 1: CINEMÁTICA
+COMPETENCIA Y CAPACIDADES
+| CONTENIDOS | DESEMPEÑOS |
+|---|---|
+| Movimiento rectilíneo | Formula preguntas sobre el movimiento |
+
+- Sesión 1: experimento guiado con registro de datos
+- Sesión 2: análisis grupal de los resultados
+
+# UNIDAD 2: DINÁMICA
+Los estudiantes comunican sus conclusiones en un informe."""
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    docx_exporter.limpiar_cache()
+    llamadas = {'documentos': 0, 'bloques': 0}
+    renderizar_documento, renderizar_lineas = docx_exporter._renderizar_documento, docx_exporter._renderizar_lineas
+
+    def contar_documento(*args):
+        llamadas['documentos'] += 1
+        return renderizar_documento(*args)
+
+    def contar_lineas(*args):
+        llamadas['bloques'] += 1
+        return renderizar_lineas(*args)
+
+    monkeypatch.setattr(docx_exporter, '_renderizar_documento', contar_documento)
+    monkeypatch.setattr(docx_exporter, '_renderizar_lineas', contar_lineas)
+    yield llamadas
+    docx_exporter.limpiar_cache()
+
+
+def documento_xml(doc_bytes):
+    return zipfile.ZipFile(io.BytesIO(doc_bytes)).read('word/document.xml').decode('utf-8')
+
+
+def test_cache_por_contenido_titulo_grado_y_fecha(renders, monkeypatch):
+    primero = crear_documento_profesional(CONTENIDO, "Programación", 3)
+    assert crear_documento_profesional(CONTENIDO, "Programación", 3) is primero
+    assert renders['documentos'] == 1
+
+    crear_documento_profesional(CONTENIDO, "Otro título", 3)
+    crear_documento_profesional(CONTENIDO, "Programación", 4)
+    crear_documento_profesional(CONTENIDO + "\nUna línea nueva al final del texto.", "Programación", 3)
+    assert renders['documentos'] == 4
+
+    class Manana(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2099, 1, 2)
+
+    # La fecha se imprime en el documento: otro día es otra entrada
+    monkeypatch.setattr(docx_exporter, 'datetime', Manana)
+    crear_documento_profesional(CONTENIDO, "Programación", 3)
+    assert renders['documentos'] == 5
+
+
+def test_tablas_reales_y_estilos():
+    xml = documento_xml(crear_documento_profesional(CONTENIDO, "Programación", 3))
+    assert xml.count('<w:tbl>') == 1
+    assert 'Movimiento rectilíneo' in xml
+    assert '<w:pStyle w:val="ListBullet"/>' in xml
+    assert '<w:pStyle w:val="Heading1"/>' in xml
+
+
+def test_exportacion_incremental_solo_renderiza_los_bloques_modificados(renders):
+    bloques = dividir_en_bloques(CONTENIDO)
+    assert len(bloques) == 3
+    completo = crear_documento_profesional(CONTENIDO, "Programación", 3)
+    assert renders['bloques'] == 3
+
+    modificado = CONTENIDO.replace("UNIDAD 2: DINÁMICA", "UNIDAD 2: DINÁMICA LINEAL")
+    incremental = crear_documento_profesional(modificado, "Programación", 3)
+    assert renders['bloques'] == 4
+
+    # El resultado es el mismo que renderizar todo de nuevo
+    docx_exporter.limpiar_cache()
+    assert documento_xml(crear_documento_profesional(modificado, "Programación", 3)) == documento_xml(incremental)
+    assert documento_xml(incremental) != documento_xml(completo)
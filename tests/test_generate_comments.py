@@ -0,0 +1,49 @@
+import io
+import json
+import os
+import sys
+import types
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from generate_comments import GeneradorComentarios, escribir_comentarios, generar_archivo  # noqa: E402
+
+
+def test_misma_semilla_mismos_comentarios():
+    primeros = list(GeneradorComentarios(seed=3).generar(50))
+    assert primeros == list(GeneradorComentarios(seed=3).generar(50))
+    assert primeros != list(GeneradorComentarios(seed=4).generar(50))
+
+    assert [c['id'] for c in primeros[:2]] == ['S00000001', 'S00000002']
+    timestamps = [c['timestamp'] for c in primeros]
+    assert timestamps == sorted(timestamps)
+
+
+def test_generar_es_un_iterador():
+    assert isinstance(GeneradorComentarios().generar(10 ** 9), types.GeneratorType)
+
+
+def test_mezcla_de_sentimientos():
+    generados = GeneradorComentarios(seed=1, mezcla=(0.5, 0.3, 0.2, 0.0), etiquetar=True).generar(4000)
+    conteo = Counter(c['expected_sentiment'] for c in generados)
+
+    assert 'MIXED' not in conteo
+    assert abs(conteo['POSITIVE'] / 4000 - 0.5) < 0.03
+    assert abs(conteo['NEGATIVE'] / 4000 - 0.3) < 0.03
+
+
+def test_json_y_ndjson_contienen_lo_mismo(tmp_path):
+    assert generar_archivo(str(tmp_path / 'c.ndjson'), 25, seed=9) == 25
+    assert generar_archivo(str(tmp_path / 'c.json'), 25, seed=9) == 25
+
+    with open(tmp_path / 'c.ndjson', encoding='utf-8') as f:
+        ndjson = [json.loads(linea) for linea in f]
+    with open(tmp_path / 'c.json', encoding='utf-8') as f:
+        arreglo = json.load(f)
+    assert ndjson == arreglo
+    assert set(arreglo[0]) == {'id', 'timestamp', 'text'}
+
+    vacio = io.StringIO()
+    assert escribir_comentarios([], vacio, 'json') == 0
+    assert json.loads(vacio.getvalue()) == []
@@ -0,0 +1,70 @@
+import base64
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core import bedrock_services
+from core.image_cache import ImageCache
+
+PNG = b'\x89PNG\r\n\x1a\nimagen'
+
+
+def test_put_get_y_clave(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    clave = ImageCache.key('aula', 1, 10, 50, 'modelo')
+
+    assert cache.get(clave) is None
+    ruta = cache.put(clave, PNG)
+    assert cache.get(clave) == ruta
+    with open(ruta, 'rb') as f:
+        assert f.read() == PNG
+    # Cualquier parámetro de la generación cambia la clave
+    assert len({clave, ImageCache.key('aula', 2, 10, 50, 'modelo'), ImageCache.key('aula', 1, 10, 20, 'modelo')}) == 3
+
+
+def test_escrituras_concurrentes_de_la_misma_clave(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    clave = ImageCache.key('aula', 1, 10, 50, 'modelo')
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        rutas = list(pool.map(lambda _: cache.put(clave, PNG), range(32)))
+
+    assert set(rutas) == {cache.path(clave)}
+    # No quedan temporales de las escrituras
+    assert os.listdir(os.path.dirname(cache.path(clave))) == [f"{clave}.png"]
+
+
+@pytest.fixture
+def modelo(monkeypatch, tmp_path):
+    llamadas = []
+    lock = threading.Lock()
+
+    def invoke_model(model_id, body, operation=None, **attrs):
+        with lock:
+            llamadas.append(body)
+        return {'artifacts': [{'base64': base64.b64encode(PNG + bytes([body['seed']])).decode()}]}
+
+    monkeypatch.setattr(bedrock_services, 'invoke_model', invoke_model)
+    monkeypatch.setattr(bedrock_services, '_cache_imagenes', ImageCache(str(tmp_path)))
+    return llamadas
+
+
+def test_variantes_en_orden_de_seed_y_desde_cache(modelo):
+    rutas = bedrock_services.generar_variantes_imagen('laboratorio', num_variantes=3, seed_inicial=5)
+
+    assert sorted(body['seed'] for body in modelo) == [5, 6, 7]
+    for seed, ruta in zip((5, 6, 7), rutas):
+        with open(ruta, 'rb') as f:
+            assert f.read() == PNG + bytes([seed])
+
+    assert bedrock_services.generar_variantes_imagen('laboratorio', num_variantes=3, seed_inicial=5) == rutas
+    assert len(modelo) == 3
+
+
+def test_borrador_usa_menos_pasos(modelo):
+    borrador = bedrock_services.generar_imagen_promocional('laboratorio', borrador=True)
+    final = bedrock_services.generar_imagen_promocional('laboratorio')
+
+    assert [body['steps'] for body in modelo] == [bedrock_services.PASOS_BORRADOR, bedrock_services.PASOS_IMAGEN]
+    assert borrador != final
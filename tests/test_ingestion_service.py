@@ -0,0 +1,82 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from core.ingestion_service import IngestionServer, LocalShardSink, MicroBatcher
+
+
+class SinkRoto:
+    def __init__(self):
+        self.intentos = 0
+
+    def write(self, name, body):
+        self.intentos += 1
+        raise ConnectionError("S3 no disponible")
+
+
+def comentarios(n):
+    return [{'id': f"c{i}", 'text': f"comentario {i}", 'timestamp': '2025-03-01T10:00:00Z'} for i in range(n)]
+
+
+def test_flush_escribe_los_shards(tmp_path):
+    async def escenario():
+        batcher = MicroBatcher(LocalShardSink(str(tmp_path)), max_batch=3, max_wait=60)
+        assert await batcher.add(comentarios(7))
+        await batcher.flush()
+        return batcher
+
+    batcher = asyncio.run(escenario())
+    shards = os.listdir(tmp_path / 'comments')
+    lineas = [linea for shard in shards for linea in open(tmp_path / 'comments' / shard, encoding='utf-8')]
+    assert len(shards) == 3
+    assert sorted(json.loads(linea)['id'] for linea in lineas) == sorted(f"c{i}" for i in range(7))
+    assert batcher.pending == 0
+
+
+def test_flush_con_sink_caido_derrama_y_termina(tmp_path):
+    sink = SinkRoto()
+
+    async def escenario():
+        batcher = MicroBatcher(sink, max_batch=5, max_wait=60, write_retries=2, spill_dir=str(tmp_path))
+        await batcher.add(comentarios(8))
+        await asyncio.wait_for(batcher.flush(), timeout=10)
+        return batcher
+
+    batcher = asyncio.run(escenario())
+    derramados = [linea for shard in os.listdir(tmp_path) for linea in open(tmp_path / shard, encoding='utf-8')]
+    assert len(derramados) == 8
+    assert batcher.stats['spilled'] == 8
+    assert batcher.pending == 0
+    assert sink.intentos == 4  # dos shards, dos intentos cada uno
+
+
+def test_flush_sin_derrame_lanza_error():
+    async def escenario():
+        batcher = MicroBatcher(SinkRoto(), max_wait=60, write_retries=1)
+        await batcher.add(comentarios(2))
+        await asyncio.wait_for(batcher.flush(), timeout=10)
+
+    with pytest.raises(RuntimeError, match="no hay directorio de derrame"):
+        asyncio.run(escenario())
+
+
+@pytest.mark.parametrize('solicitud', [b'BASURA\r\n\r\n', b'POST /comments HTTP/1.1\r\nContent-Length: x\r\n\r\n'])
+def test_solicitud_mal_formada_responde_400(tmp_path, solicitud):
+    async def escenario():
+        servidor = IngestionServer(MicroBatcher(LocalShardSink(str(tmp_path))), port=0)
+        await servidor.start()
+        try:
+            reader, writer = await asyncio.open_connection(servidor.host, servidor.port)
+            writer.write(solicitud)
+            await writer.drain()
+            respuesta = await asyncio.wait_for(reader.read(), timeout=5)
+            writer.close()
+            return respuesta
+        finally:
+            await servidor.stop()
+
+    respuesta = asyncio.run(escenario())
+    assert respuesta.startswith(b'HTTP/1.1 400 Bad Request')
+    assert b'Connection: close' in respuesta
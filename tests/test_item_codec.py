@@ -0,0 +1,93 @@
+import zlib
+
+import pytest
+
+from core.item_codec import (COMPACTA, ESCALA_PUNTAJE, LEGADA, UMBRAL_COMPRESION, VERSION_COMPACTA,
+                             decode_item, encode_item, stored_attributes)
+
+PUNTAJES = {'Positive': 0.91234, 'Negative': 0.05, 'Neutral': 0.03, 'Mixed': 0.00766}
+
+
+def comentario(**campos):
+    base = {
+        'comment_id': 'c-1',
+        'timestamp': '2024-05-01T10:00:00',
+        'text': 'Me gustó la clase de laboratorio',
+        'sentiment': 'POSITIVE',
+        'sentiment_score': PUNTAJES,
+        'entities': [{'Text': 'laboratorio', 'Type': 'OTHER', 'Score': 0.87654},
+                     {'Text': 'Lima', 'Type': 'LOCATION', 'Score': 0.99},
+                     {'Text': 'MINEDU', 'Type': 'ORGANIZACION_LOCAL', 'Score': 0.5}],
+    }
+    base.update(campos)
+    return base
+
+
+def test_codificacion_por_defecto_es_legada():
+    item = encode_item(comentario())
+    assert 'v' not in item
+    assert item['text'] == comentario()['text']
+
+
+@pytest.mark.parametrize('encoding', [LEGADA, COMPACTA])
+def test_ida_y_vuelta_puntajes_y_entidades(encoding):
+    original = comentario(expires_at=1767225600)
+    leido = decode_item(encode_item(original, encoding))
+
+    assert leido['text'] == original['text']
+    assert leido['expires_at'] == original['expires_at']
+    for clave, valor in PUNTAJES.items():
+        assert leido['sentiment_score'][clave] == pytest.approx(valor, abs=1 / ESCALA_PUNTAJE)
+    assert [(e['Text'], e['Type']) for e in leido['entities']] == [(e['Text'], e['Type']) for e in original['entities']]
+    for leida, esperada in zip(leido['entities'], original['entities']):
+        assert leida['Score'] == pytest.approx(esperada['Score'], abs=1 / ESCALA_PUNTAJE)
+
+
+def test_compacto_usa_nombres_cortos():
+    item = encode_item(comentario(), COMPACTA)
+    assert item['v'] == VERSION_COMPACTA
+    assert {'x', 'p', 'e'} <= set(item)
+    assert not {'text', 'sentiment_score', 'entities'} & set(item)
+    assert len(item['p']) == 8
+
+
+def test_texto_largo_comprimido_con_zlib():
+    texto = 'La práctica de laboratorio fue muy útil y entretenida. ' * 30
+    item = encode_item(comentario(text=texto), COMPACTA)
+    assert 'x' not in item
+    assert len(texto.encode('utf-8')) > UMBRAL_COMPRESION
+    assert zlib.decompress(item['z']).decode('utf-8') == texto
+    assert decode_item(item)['text'] == texto
+
+
+def test_texto_corto_sin_comprimir():
+    item = encode_item(comentario(text='ok'), COMPACTA)
+    assert item['x'] == 'ok' and 'z' not in item
+
+
+@pytest.mark.parametrize('encoding', [LEGADA, COMPACTA])
+def test_puntajes_vacios_y_unknown(encoding):
+    original = comentario(sentiment='UNKNOWN', sentiment_score={}, entities=[])
+    item = encode_item(original, encoding)
+    if encoding == COMPACTA:
+        assert item['p'] == b'' and item['e'] == ''
+    leido = decode_item(item)
+    assert leido['sentiment'] == 'UNKNOWN'
+    assert leido['sentiment_score'] == {}
+    assert leido['entities'] == []
+
+
+@pytest.mark.parametrize('encoding', [LEGADA, COMPACTA])
+def test_proyeccion(encoding):
+    item = encode_item(comentario(), encoding)
+    nombres = stored_attributes(['comment_id', 'sentiment_score'])
+    proyectado = {k: v for k, v in item.items() if k in nombres}
+
+    leido = decode_item(proyectado)
+    assert set(leido) == {'comment_id', 'sentiment_score'}
+    assert leido['sentiment_score']['Positive'] == pytest.approx(PUNTAJES['Positive'], abs=1 / ESCALA_PUNTAJE)
+
+
+def test_version_desconocida():
+    with pytest.raises(ValueError):
+        decode_item({'v': VERSION_COMPACTA + 1, 'comment_id': 'c-1'})
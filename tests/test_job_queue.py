@@ -0,0 +1,153 @@
+import time
+
+import pytest
+
+from core.job_queue import DONE, FAILED, PENDING, RUNNING, JobQueue
+
+
+@pytest.fixture
+def cola(tmp_path):
+    cola = JobQueue(db_path=str(tmp_path / 'jobs.sqlite3'), max_workers=1, max_attempts=2)
+    yield cola
+    cola.stop()
+
+
+def esperar(cola, job_id, estados=(DONE, FAILED), timeout=10):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        trabajo = cola.get(job_id)
+        if trabajo['status'] in estados:
+            return trabajo
+        time.sleep(0.02)
+    raise AssertionError(f"El trabajo {job_id} no terminó: {cola.get(job_id)}")
+
+
+def test_submit_y_claim(cola):
+    cola.register('eco', lambda params, progreso: params)
+    primero = cola.submit('eco', {'n': 1})
+    cola.submit('eco', {'n': 2})
+
+    assert cola.get(primero)['status'] == PENDING
+    trabajo = cola._claim_next()
+    assert trabajo['job_id'] == primero
+    assert trabajo['attempts'] == 1
+    guardado = cola.get(primero)
+    assert guardado['status'] == RUNNING
+    assert guardado['worker'] == cola.worker_id
+
+
+def test_submit_tipo_no_registrado(cola):
+    with pytest.raises(ValueError):
+        cola.submit('desconocido', {})
+
+
+def test_trabajo_terminado_guarda_resultado_y_progreso(cola):
+    def handler(params, progreso):
+        progreso(1, 2, 'mitad')
+        return {'doble': params['n'] * 2}
+
+    cola.register('doble', handler)
+    cola.start()
+    trabajo = esperar(cola, cola.submit('doble', {'n': 21}))
+    assert trabajo['status'] == DONE
+    assert trabajo['result'] == {'doble': 42}
+    assert trabajo['progress'] == 1.0
+    assert trabajo['metrics']['calls'] == []
+
+
+def test_reintenta_tras_excepcion(cola):
+    intentos = []
+
+    def handler(params, progreso):
+        intentos.append(1)
+        if len(intentos) == 1:
+            raise RuntimeError("Error al generar: servicio no disponible")
+        return 'ok'
+
+    cola.register('inestable', handler)
+    cola.start()
+    trabajo = esperar(cola, cola.submit('inestable', {}))
+    assert trabajo['status'] == DONE
+    assert trabajo['result'] == 'ok'
+    assert trabajo['attempts'] == 2
+
+
+def test_falla_al_agotar_los_intentos(cola):
+    intentos = []
+
+    def handler(params, progreso):
+        intentos.append(1)
+        raise RuntimeError("Error al generar el resumen: sin servicio")
+
+    cola.register('roto', handler)
+    cola.start()
+    trabajo = esperar(cola, cola.submit('roto', {}))
+    assert trabajo['status'] == FAILED
+    assert len(intentos) == cola.max_attempts
+    assert 'Error al generar el resumen' in trabajo['error']
+    assert trabajo['result'] is None
+
+
+def test_on_failure_solo_tras_el_ultimo_intento(cola, tmp_path):
+    archivo = tmp_path / 'comentarios_x.csv'
+    archivo.write_text('texto\n')
+    limpiezas = []
+
+    def handler(params, progreso):
+        # Cada reintento todavía encuentra el archivo
+        assert archivo.exists()
+        raise RuntimeError('Error al analizar')
+
+    def limpiar(params):
+        limpiezas.append(params['ruta'])
+        archivo.unlink()
+
+    cola.register('archivo', handler, on_failure=limpiar)
+    cola.start()
+    trabajo = esperar(cola, cola.submit('archivo', {'ruta': str(archivo)}))
+    assert trabajo['status'] == FAILED
+    assert trabajo['attempts'] == 2
+    assert limpiezas == [str(archivo)]
+    assert not archivo.exists()
+
+
+def test_on_failure_que_falla_no_detiene_la_cola(cola):
+    def limpiar(params):
+        raise OSError('sin permiso')
+
+    cola.register('falla', lambda params, progreso: 1 / 0, on_failure=limpiar)
+    cola.register('eco', lambda params, progreso: params)
+    cola.start()
+    assert esperar(cola, cola.submit('falla', {}))['status'] == FAILED
+    assert esperar(cola, cola.submit('eco', {'n': 1}))['result'] == {'n': 1}
+
+
+def test_requeue_stale(cola):
+    cola.register('eco', lambda params, progreso: params)
+    colgado = cola.submit('eco', {'n': 1})
+    reciente = cola.submit('eco', {'n': 2})
+    cola._claim_next()
+    cola._claim_next()
+    # Solo el primero quedó sin latido más allá de stale_after
+    cola._connect().execute('UPDATE jobs SET updated_at = ? WHERE job_id = ?',
+                            (time.time() - cola.stale_after - 1, colgado))
+
+    assert cola.requeue_stale() == 1
+    assert cola.get(colgado)['status'] == PENDING
+    assert cola.get(colgado)['worker'] is None
+    assert cola.get(reciente)['status'] == RUNNING
+
+
+def test_last_result(cola):
+    resultados = iter(['primera', 'Error al generar', 'otra solicitud'])
+    cola.register('programacion', lambda params, progreso: next(resultados))
+    cola.start()
+    params = {'grado': '3ro', 'competencia': 'Lee'}
+    for solicitud in (params, params, {'grado': '4to', 'competencia': 'Lee'}):
+        esperar(cola, cola.submit('programacion', solicitud))
+
+    assert cola.last_result('programacion', params)['result'] == 'Error al generar'
+    aceptado = cola.last_result('programacion', params, accept=lambda texto: not texto.startswith("Error"))
+    assert aceptado['result'] == 'primera'
+    assert cola.last_result('programacion', {'grado': '5to', 'competencia': 'Lee'}) is None
+    assert cola.last_result('imagen', params) is None
@@ -0,0 +1,26 @@
+import json
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Módulos que el camino de escritura no usa y no deben cargarse en el init de Lambda
+NO_IMPORTADOS = ('boto3.dynamodb.conditions', 'core.bedrock_summarization', 'core.bedrock_services',
+                 'core.model_routing', 'numpy')
+
+
+def modulos_tras_importar(modulo):
+    """Importa `modulo` en un intérprete limpio y retorna los módulos cargados."""
+    codigo = f"import json, sys, {modulo}; print(json.dumps(sorted(sys.modules)))"
+    entorno = dict(os.environ, PYTHONPATH=SRC)
+    entorno.pop('AWS_LAMBDA_FUNCTION_NAME', None)
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, env=entorno, check=True)
+    return set(json.loads(salida.stdout))
+
+
+def test_el_handler_solo_importa_el_camino_de_escritura():
+    cargados = modulos_tras_importar('core.lambda_handler')
+
+    assert {'core.database_management', 'core.item_codec', 'core.search_index', 'core.table_schema'} <= cargados
+    assert not cargados & set(NO_IMPORTADOS)
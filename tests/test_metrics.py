@@ -0,0 +1,39 @@
+from core.metrics import (collect, collect_events, emf_documents, record_event, summarize, summarize_events,
+                          track_call)
+
+
+def test_record_event_no_es_una_llamada():
+    with collect() as records, collect_events() as events:
+        with track_call('bedrock', 'programacion_borrador'):
+            pass
+        record_event('fallback', 'rsip_a_borrador', iteracion=2)
+        record_event('fallback', 'rsip_a_borrador', iteracion=3)
+        record_event('comprehend_cache', 'detect_sentiment:miss', count=5)
+
+    assert [(r['service'], r['operation']) for r in records] == [('bedrock', 'programacion_borrador')]
+    assert [g['service'] for g in summarize(records)] == ['bedrock']
+    assert summarize_events(events) == [
+        {'service': 'comprehend_cache', 'event': 'detect_sentiment:miss', 'count': 5},
+        {'service': 'fallback', 'event': 'rsip_a_borrador', 'count': 2},
+    ]
+    assert events[0]['iteracion'] == 2
+
+
+def test_record_event_sin_recolector_activo():
+    with collect_events() as events:
+        pass
+    record_event('image_cache', 'hit')
+    assert events == []
+
+
+def test_emf_incluye_eventos():
+    with collect() as records, collect_events() as events:
+        with track_call('s3', 'get_object'):
+            pass
+        record_event('circuit_breaker', 'bedrock:open')
+
+    documentos = emf_documents(records, events=events, FunctionName='prueba')
+    evento = [d for d in documentos if 'Event' in d]
+    assert len(documentos) == 2
+    assert evento[0]['Count'] == 1
+    assert evento[0]['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [['Service', 'Event', 'FunctionName']]
@@ -0,0 +1,116 @@
+import pytest
+
+from core import model_routing
+from core.bedrock_services import SISTEMA_PROGRAMACION
+from core.metrics import base_model_id, estimate_bedrock_cost
+from core.model_routing import (CARACTERES_POR_TOKEN, MODELO_FUERTE, MODELO_FUERTE_CACHE, MODELO_RAPIDO,
+                                MODELO_RAPIDO_CACHE, PERFILES, build_body, get_route, prompt_cache_min_tokens,
+                                use_routing)
+
+
+@pytest.fixture(autouse=True)
+def sin_entorno(monkeypatch):
+    monkeypatch.delenv('MODEL_ROUTING', raising=False)
+
+
+def test_perfil_por_defecto_sin_caché():
+    assert model_routing.PERFIL_POR_DEFECTO == 'escalonado'
+    assert get_route('programacion_borrador')['model_id'] == MODELO_FUERTE
+
+
+def test_perfil_con_caché_por_variable_de_entorno(monkeypatch):
+    monkeypatch.setenv('MODEL_ROUTING', 'escalonado_cache')
+    assert get_route('programacion_borrador')['model_id'] == MODELO_FUERTE_CACHE
+    assert get_route('programacion_sesion')['model_id'] == MODELO_RAPIDO_CACHE
+
+
+def test_modelos_con_caché_usan_perfiles_de_inferencia():
+    for model_id in (MODELO_FUERTE_CACHE, MODELO_RAPIDO_CACHE):
+        assert model_id.split('.', 1)[0] in ('us', 'eu', 'apac', 'global')
+        assert prompt_cache_min_tokens(model_id) is not None
+        assert estimate_bedrock_cost(model_id, input_tokens=1000) == estimate_bedrock_cost(base_model_id(model_id),
+                                                                                            input_tokens=1000)
+
+
+def test_cache_control_solo_si_el_prefijo_alcanza_el_mínimo():
+    minimo = prompt_cache_min_tokens(MODELO_FUERTE_CACHE)
+    largo = 'x' * (minimo * CARACTERES_POR_TOKEN)
+    corto = 'x' * (minimo * CARACTERES_POR_TOKEN - CARACTERES_POR_TOKEN)
+
+    marcado = build_body(MODELO_FUERTE_CACHE, 'hola', 100, 0.5, system=largo)
+    assert marcado['system'] == [{'type': 'text', 'text': largo, 'cache_control': {'type': 'ephemeral'}}]
+    assert 'cache_control' not in marcado['messages'][0]['content'][0]
+    assert 'cache_control' not in build_body(MODELO_FUERTE_CACHE, 'hola', 100, 0.5, system=corto)['system'][0]
+    assert 'cache_control' not in build_body(MODELO_FUERTE, 'hola', 100, 0.5, system=largo)['system'][0]
+    assert 'cache_control' not in build_body(MODELO_FUERTE_CACHE, 'hola', 100, 0.5, system=largo,
+                                             prompt_cache=False)['system'][0]
+
+
+def test_sistema_programacion_no_se_marca_si_no_alcanza():
+    # Las instrucciones de la programación no se rellenan para llegar al mínimo
+    with use_routing('escalonado_cache'):
+        ruta = get_route('programacion_borrador')
+    cuerpo = build_body(ruta['model_id'], 'tabla', 100, 0.5, system=SISTEMA_PROGRAMACION)
+    esperado = len(SISTEMA_PROGRAMACION) // CARACTERES_POR_TOKEN >= prompt_cache_min_tokens(ruta['model_id'])
+    assert ('cache_control' in cuerpo['system'][0]) == esperado
+
+
+def test_perfil_desconocido():
+    with pytest.raises(ValueError):
+        with use_routing('inexistente'):
+            pass
+    assert set(PERFILES) >= {'escalonado', 'uniforme', 'escalonado_cache'}
+
+
+def test_escalonado_reparte_por_etapa():
+    with use_routing('escalonado') as rutas:
+        assert rutas['programacion_borrador']['model_id'] == MODELO_FUERTE
+        assert rutas['programacion_esqueleto']['model_id'] == MODELO_FUERTE
+        assert {rutas[f'programacion_mejora_{i}']['model_id'] for i in (1, 2, 3)} == {MODELO_RAPIDO}
+        assert rutas['programacion_sesion']['model_id'] == MODELO_RAPIDO
+    with use_routing('uniforme') as rutas:
+        assert {ruta['model_id'] for etapa, ruta in rutas.items() if etapa != 'rag_respuesta'} == {MODELO_FUERTE}
+    with pytest.raises(KeyError):
+        get_route('etapa_inexistente')
+
+
+def test_use_routing_con_rutas_por_etapa_y_anidado():
+    cambio = {'perfil': 'uniforme', 'programacion_sesion': {'model_id': 'modelo-x', 'max_tokens': 50}}
+    with use_routing(cambio):
+        sesion = get_route('programacion_sesion')
+        assert (sesion['model_id'], sesion['max_tokens']) == ('modelo-x', 50)
+        # Los campos no indicados se heredan del perfil base
+        assert sesion['temperature'] == PERFILES['uniforme']['programacion_sesion']['temperature']
+        with use_routing('escalonado'):
+            assert get_route('programacion_sesion')['model_id'] == MODELO_RAPIDO
+        assert get_route('programacion_sesion')['model_id'] == 'modelo-x'
+    assert get_route('programacion_sesion')['model_id'] == MODELO_RAPIDO
+
+
+def test_model_routing_json(monkeypatch, caplog):
+    monkeypatch.setenv('MODEL_ROUTING', '{"programacion_borrador": {"model_id": "modelo-json"}}')
+    assert get_route('programacion_borrador')['model_id'] == 'modelo-json'
+    assert get_route('programacion_mejora_1')['model_id'] == MODELO_RAPIDO
+
+    monkeypatch.setenv('MODEL_ROUTING', '{no es json')
+    assert get_route('programacion_borrador')['model_id'] == MODELO_FUERTE
+    assert 'MODEL_ROUTING no es un JSON válido' in caplog.text
+
+
+def test_complete_usa_la_ruta_de_la_etapa(monkeypatch):
+    llamadas = []
+
+    def invoke_model(model_id, body, operation=None, client=None, **attrs):
+        llamadas.append((model_id, body, operation, attrs))
+        return {'content': [{'type': 'text', 'text': 'hecho'}]}
+
+    monkeypatch.setattr(model_routing, 'invoke_model', invoke_model)
+    assert model_routing.complete('programacion_mejora_2', 'mejora', system='instrucciones') == 'hecho'
+
+    model_id, body, operation, attrs = llamadas[0]
+    ruta = PERFILES['escalonado']['programacion_mejora_2']
+    assert model_id == MODELO_RAPIDO
+    assert (body['max_tokens'], body['temperature'], body['top_p']) == (ruta['max_tokens'], ruta['temperature'],
+                                                                        ruta['top_p'])
+    assert body['system'] == [{'type': 'text', 'text': 'instrucciones'}]
+    assert operation == 'programacion_mejora_2' and attrs == {'stage': 'programacion_mejora_2'}
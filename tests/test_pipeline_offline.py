@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+moto = pytest.importorskip('moto')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from fake_aws import install_fakes  # noqa: E402
+from generate_comments import generar_archivo  # noqa: E402
+
+BUCKET = 'comentarios-pruebas'
+
+
+@pytest.fixture
+def aws(monkeypatch, tmp_path):
+    for variable, valor in (('AWS_REGION', 'us-east-1'), ('AWS_DEFAULT_REGION', 'us-east-1'),
+                            ('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing')):
+        monkeypatch.setenv(variable, valor)
+    monkeypatch.setenv('IMAGE_CACHE_DIR', str(tmp_path / 'imagenes'))
+    from core import aws_clients, lambda_handler
+    from core.database_management import DynamoDBManager
+
+    with moto.mock_aws():
+        aws_clients.reset_clients()
+        # El manager del contenedor no debe sobrevivir al contexto de moto
+        monkeypatch.setattr(lambda_handler, '_db_manager', None)
+        fakes = install_fakes()
+        aws_clients.get_client('s3').create_bucket(Bucket=BUCKET)
+        DynamoDBManager().create_table()
+        yield fakes
+        aws_clients.reset_clients()
+
+
+def test_pipeline_sin_conexion(aws, tmp_path):
+    from core.data_ingestion import upload_file_to_s3
+    from core.database_management import DynamoDBManager
+    from core.lambda_handler import lambda_handler
+    from core.metrics import collect
+
+    ruta = str(tmp_path / 'comentarios.ndjson')
+    generar_archivo(ruta, 20, 'ndjson', seed=7)
+    clave = upload_file_to_s3(ruta, BUCKET, file_prefix='comments/')
+
+    # Los bloques collect() anidados reciben todos las llamadas hechas dentro del handler
+    with collect() as externas:
+        with collect() as internas:
+            respuesta = lambda_handler({'Records': [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': clave}}}]},
+                                       None)
+
+    assert respuesta['statusCode'] == 200
+    assert len(DynamoDBManager().get_all_comments()) == 20
+    servicios = {registro['service'] for registro in internas}
+    assert {'s3', 'dynamodb', 'bedrock'} <= servicios
+    assert externas == internas
+    # El resumen del lote sale de las completions grabadas y reporta tokens
+    bedrock = [registro for registro in internas if registro['service'] == 'bedrock']
+    assert bedrock and all(registro.get('output_tokens') for registro in bedrock)
+    assert aws['bedrock-runtime'].calls == len(bedrock)
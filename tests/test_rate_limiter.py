@@ -0,0 +1,122 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from botocore.exceptions import ClientError
+
+from core import aws_clients, rate_limiter
+from core.rate_limiter import AdaptiveConcurrency, ServiceLimiter, TokenBucket, get_limiter
+
+
+def error_aws(codigo, estado=400):
+    return ClientError({'Error': {'Code': codigo, 'Message': codigo}, 'ResponseMetadata': {'HTTPStatusCode': estado}},
+                       'Operacion')
+
+
+@pytest.fixture
+def limitador(monkeypatch):
+    limitador = ServiceLimiter('prueba', tps=1000, max_concurrency=4, max_retries=3)
+    # Sin pausas entre reintentos
+    monkeypatch.setattr(limitador, 'backoff', lambda intento: 0)
+    return limitador
+
+
+def test_token_bucket_respeta_la_tasa():
+    balde = TokenBucket(rate=50, capacity=1)
+    inicio = time.monotonic()
+    esperado = sum(balde.acquire() for _ in range(6))
+    # La primera pasa con el balde lleno; las otras cinco esperan 1/50 s cada una
+    assert esperado == pytest.approx(0.1, abs=0.03)
+    assert time.monotonic() - inicio >= 0.09
+
+
+def test_concurrencia_aimd():
+    concurrencia = AdaptiveConcurrency(initial=8, maximum=16, cooldown=60)
+    assert concurrencia.on_throttle()
+    assert concurrencia.limit == 4
+    # Rechazos de la misma ventana cuentan como una sola señal
+    assert not concurrencia.on_throttle()
+    # Crece en 1 por cada ventana de llamadas exitosas (~limit llamadas)
+    for _ in range(5):
+        concurrencia.on_success()
+    assert int(concurrencia.limit) == 5
+
+
+def test_reintenta_throttling_y_lo_registra(limitador):
+    intentos = []
+
+    def llamada():
+        intentos.append(1)
+        if len(intentos) < 3:
+            raise error_aws('ThrottlingException')
+        return 'ok'
+
+    record = {}
+    assert limitador.call(llamada, record=record) == 'ok'
+    assert len(intentos) == 3
+    assert record['retries'] == 2 and record['throttled'] == 2
+    # El rechazo reduce la tasa de envío
+    assert limitador.requests.rate < limitador.tps
+
+
+def test_errores_no_reintentables_y_limite_de_reintentos(limitador):
+    intentos = []
+
+    def invalida():
+        intentos.append(1)
+        raise error_aws('ValidationException')
+
+    with pytest.raises(ClientError):
+        limitador.call(invalida)
+    assert len(intentos) == 1
+
+    intentos.clear()
+
+    def caida():
+        intentos.append(1)
+        raise error_aws('ServiceUnavailableException', 503)
+
+    with pytest.raises(ClientError):
+        limitador.call(caida)
+    assert len(intentos) == 1 + limitador.max_retries
+
+
+def test_no_supera_la_concurrencia(limitador):
+    activas, maximo = [0], [0]
+    lock = threading.Lock()
+
+    def llamada():
+        with lock:
+            activas[0] += 1
+            maximo[0] = max(maximo[0], activas[0])
+        time.sleep(0.01)
+        with lock:
+            activas[0] -= 1
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda _: limitador.call(llamada), range(48)))
+    assert 1 <= maximo[0] <= limitador.concurrency.maximum
+
+
+def test_cuotas_desde_rate_limits(monkeypatch):
+    monkeypatch.setenv('RATE_LIMITS', '{"comprehend": {"tps": 50}, "bedrock/modelo-x": {"tps": 3}}')
+    rate_limiter.reset_limiters()
+    try:
+        assert get_limiter('comprehend').tps == 50
+        # La cuota del recurso tiene prioridad y hereda el resto de la del servicio
+        modelo = get_limiter('bedrock', 'modelo-x')
+        assert modelo.tps == 3 and modelo.tokens is not None
+        assert get_limiter('bedrock', 'modelo-x') is modelo
+    finally:
+        rate_limiter.reset_limiters()
+
+
+def test_botocore_no_reintenta_los_servicios_limitados(monkeypatch):
+    monkeypatch.setenv('AWS_REGION', 'us-east-1')
+    aws_clients.reset_clients()
+    try:
+        for servicio in ('bedrock-runtime', 'comprehend'):
+            assert aws_clients.get_client(servicio).meta.config.retries['total_max_attempts'] == 1
+    finally:
+        aws_clients.reset_clients()
@@ -0,0 +1,89 @@
+import pytest
+
+from core.search_index import (FUENTE_ENTIDAD, FUENTE_HASHTAG, FUENTE_PALABRA, decode_token, encode_token,
+                               normalize_term, terms_for_comment)
+
+moto = pytest.importorskip('moto')
+
+
+def test_terminos_de_un_comentario():
+    terminos = terms_for_comment("El #Precio es muy alto, pero el sabor a piña es rico. Pagué 25 soles #precio",
+                                 entities=[{'Text': 'Piña', 'Type': 'OTHER'}])
+
+    assert terminos['precio'] == {FUENTE_HASHTAG}
+    assert terminos['piña'] == {FUENTE_PALABRA, FUENTE_ENTIDAD}
+    assert terminos['pague'] == {FUENTE_PALABRA}
+    # Palabras vacías, cortas y números no se indexan
+    assert not {'el', 'es', 'muy', 'pero', 'a', '25'} & set(terminos)
+
+
+def test_normalizacion_y_token():
+    assert normalize_term('#PRÉCIO') == normalize_term('precio') == 'precio'
+    assert normalize_term('año') == 'año'
+    clave = {'term_prefix': 'pre', 'term_key': 'precio#2025-03-01T10:00:00#c1'}
+    assert decode_token(encode_token(clave)) == clave
+    assert encode_token(None) is None and decode_token(None) is None
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    for variable, valor in (('AWS_REGION', 'us-east-1'), ('AWS_DEFAULT_REGION', 'us-east-1'),
+                            ('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing')):
+        monkeypatch.setenv(variable, valor)
+    with moto.mock_aws():
+        yield
+
+
+@pytest.fixture(params=['legacy', 'tenant'])
+def db(aws, request):
+    from core.database_management import DynamoDBManager
+    manager = DynamoDBManager(f'Comentarios_{request.param}', 'BusquedaPrueba', schema=request.param)
+    manager.create_table()
+    comentarios = [
+        {'comment_id': f"c{i}", 'timestamp': f"2025-03-01T10:{i:02d}:00", 'sentiment': 'NEUTRAL',
+         'sentiment_score': {}, 'entities': [{'Text': 'Sabores', 'Type': 'OTHER'}] if i == 0 else [],
+         'text': texto}
+        for i, texto in enumerate([
+            "Buen sabor #precio justo",
+            "El precio subió otra vez",
+            "Sabroso y crujiente #precio",
+            "Me gustó el sabor a coco",
+            "Llegó tarde #delivery",
+        ])
+    ]
+    for comentario in comentarios:
+        assert manager.add_comment(comentario)
+    assert manager.index_comments(comentarios) == len(manager.search_entries(comentarios))
+    return manager
+
+
+def ids(resultado):
+    return [c['comment_id'] for c in resultado['comments']]
+
+
+def test_busqueda_por_termino_y_fuente(db):
+    # Del más reciente al más antiguo
+    assert ids(db.search_comments('#Precio')) == ['c2', 'c1', 'c0']
+    assert ids(db.search_comments('precio', source='hashtag')) == ['c2', 'c0']
+    assert ids(db.search_comments('inexistente')) == []
+    assert db.search_comments('#precio')['comments'][0]['text'] == "Sabroso y crujiente #precio"
+
+
+def test_busqueda_por_prefijo(db):
+    # 'sab' cubre 'sabor', 'sabroso' y la entidad 'sabores'; cada comentario aparece una vez
+    assert sorted(ids(db.search_comments('sab', prefix=True))) == ['c0', 'c2', 'c3']
+    # Un prefijo más corto que la partición no se consulta
+    assert db.search_comments('sa', prefix=True) == {'comments': [], 'next_token': None}
+
+
+def test_paginacion(db):
+    encontrados, token, paginas = [], None, 0
+    while True:
+        pagina = db.search_comments('precio', limit=1, next_token=token)
+        encontrados.extend(ids(pagina))
+        paginas += 1
+        token = pagina['next_token']
+        if not token:
+            break
+    assert encontrados == ['c2', 'c1', 'c0']
+    assert paginas >= 3
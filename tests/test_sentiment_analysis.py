@@ -0,0 +1,86 @@
+import pytest
+
+from core import aws_clients, sentiment_analysis
+from core.comprehend_cache import ComprehendCache
+from core.metrics import collect, collect_events, summarize_events
+from core.sentiment_analysis import LOTE_COMPREHEND, HybridBackend, SentimentBackend, backend_from_env
+
+SEGURO = {'Positive': 0.9, 'Negative': 0.04, 'Neutral': 0.04, 'Mixed': 0.02}
+DUDOSO = {'Positive': 0.4, 'Negative': 0.3, 'Neutral': 0.2, 'Mixed': 0.1}
+
+
+class LocalFijo:
+    """Motor local de prueba: los textos que empiezan con '?' salen con baja confianza."""
+
+    def analyze_batch(self, texts):
+        return [('POSITIVE', DUDOSO if t.startswith('?') else SEGURO) for t in texts]
+
+
+class ComprehendPorLotes:
+    def __init__(self, rechazar=()):
+        self.lotes = []
+        self.rechazar = set(rechazar)
+
+    def batch_detect_sentiment(self, TextList, LanguageCode):
+        self.lotes.append(list(TextList))
+        resultados = [{'Index': i, 'Sentiment': 'NEGATIVE',
+                       'SentimentScore': {'Positive': 0.01, 'Negative': 0.97, 'Neutral': 0.01, 'Mixed': 0.01}}
+                      for i, t in enumerate(TextList) if t not in self.rechazar]
+        errores = [{'Index': i, 'ErrorCode': 'TEXT_SIZE_LIMIT_EXCEEDED'}
+                   for i, t in enumerate(TextList) if t in self.rechazar]
+        return {'ResultList': resultados, 'ErrorList': errores,
+                'ResponseMetadata': {'HTTPStatusCode': 200, 'RetryAttempts': 0}}
+
+    def detect_sentiment(self, Text, LanguageCode):
+        raise AssertionError("El modo hybrid no debe llamar a DetectSentiment por comentario")
+
+
+@pytest.fixture
+def comprehend(monkeypatch):
+    monkeypatch.setattr(sentiment_analysis, '_cache', ComprehendCache())
+    cliente = ComprehendPorLotes(rechazar={'?rechazado'})
+    aws_clients.register_client('comprehend', cliente)
+    yield cliente
+    aws_clients.reset_clients()
+
+
+def test_hybrid_envia_los_dudosos_en_lotes(comprehend):
+    textos = [f"?dudoso {i}" if i % 2 else f"seguro {i}" for i in range(120)] + ['?rechazado']
+    with collect() as records, collect_events() as events:
+        resultados = HybridBackend(threshold=0.75, local=LocalFijo()).analyze_batch(textos)
+
+    dudosos = [t for t in textos if t.startswith('?')]
+    assert [len(lote) for lote in comprehend.lotes] == [LOTE_COMPREHEND, LOTE_COMPREHEND, 11]
+    assert sum(comprehend.lotes, []) == dudosos
+    assert [r['operation'] for r in records if r['service'] == 'comprehend'] == ['batch_detect_sentiment'] * 3
+    assert {(e['event'], e['count']) for e in summarize_events(events)
+            if e['service'] == 'sentiment_prefilter'} == {('local', 60), ('comprehend', 61)}
+    for texto, (sentimiento, puntajes) in zip(textos, resultados):
+        if texto.startswith('?dudoso'):
+            assert sentimiento == 'NEGATIVE'
+        else:
+            # Seguros y rechazados por Comprehend conservan el resultado local
+            assert (sentimiento, puntajes) == ('POSITIVE', SEGURO if texto.startswith('seguro') else DUDOSO)
+
+
+def test_hybrid_usa_la_cache_de_comprehend(comprehend):
+    backend = HybridBackend(threshold=0.75, local=LocalFijo())
+    backend.analyze_batch(['?uno', '?dos'])
+    backend.analyze_batch(['?uno', '?dos', '?tres'])
+    assert comprehend.lotes == [['?uno', '?dos'], ['?tres']]
+
+
+def test_motor_incompleto_falla_al_construirse():
+    class SoloSentimiento(SentimentBackend):
+        def analyze_batch(self, texts):
+            return [('NEUTRAL', {}) for _ in texts]
+
+    with pytest.raises(TypeError):
+        SoloSentimiento()
+
+
+def test_motor_desconocido_usa_el_por_defecto(monkeypatch, caplog):
+    monkeypatch.setenv('SENTIMENT_BACKEND', 'inexistente')
+    with caplog.at_level('WARNING', logger='core.sentiment_analysis'):
+        assert backend_from_env().nombre == 'comprehend'
+    assert 'inexistente' in caplog.text
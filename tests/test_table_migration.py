@@ -0,0 +1,94 @@
+import pytest
+
+from core.table_schema import (INQUILINO, LEGADO, SHARDS_SENTIMIENTO, key_attributes, primary_key, shard_for,
+                               sort_key)
+
+moto = pytest.importorskip('moto')
+
+SENTIMIENTOS = ('POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED')
+
+
+def comentario(numero, tenant=None):
+    datos = {'comment_id': f"c{numero:03d}", 'timestamp': f"2025-03-{1 + numero % 28:02d}T10:00:00",
+             'text': f"comentario {numero} #laboratorio", 'sentiment': SENTIMIENTOS[numero % 4],
+             'sentiment_score': {'Positive': 0.5, 'Negative': 0.2, 'Neutral': 0.2, 'Mixed': 0.1}, 'entities': []}
+    if tenant:
+        datos['tenant'] = tenant
+    return datos
+
+
+def test_claves_del_esquema_por_inquilino():
+    datos = comentario(7, tenant='colegio-42')
+    claves = key_attributes(datos)
+
+    assert claves['tenant'] == 'colegio-42'
+    assert claves['ts_id'] == sort_key(datos['timestamp'], 'c007')
+    assert claves['sentiment_shard'] == f"colegio-42#MIXED#{shard_for('c007')}"
+    assert primary_key(datos, INQUILINO) == {'tenant': 'colegio-42', 'ts_id': claves['ts_id']}
+    assert primary_key(datos, LEGADO) == {'comment_id': 'c007'}
+    # Sin 'tenant' se usa el inquilino por defecto del manager
+    assert key_attributes(comentario(7), default_tenant='snacks')['tenant'] == 'snacks'
+
+    shards = {shard_for(f"c{i}") for i in range(200)}
+    assert shards == set(range(SHARDS_SENTIMIENTO))
+    assert shard_for('c1') == shard_for('c1')
+
+
+@pytest.fixture
+def tablas(monkeypatch):
+    for variable, valor in (('AWS_REGION', 'us-east-1'), ('AWS_DEFAULT_REGION', 'us-east-1'),
+                            ('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing')):
+        monkeypatch.setenv(variable, valor)
+    from core import aws_clients
+    from core.database_management import DynamoDBManager
+
+    with moto.mock_aws():
+        aws_clients.reset_clients()
+        origen = DynamoDBManager('ComentariosLegado', 'BusquedaLegado', schema=LEGADO, tenant='snacks')
+        destino = DynamoDBManager('ComentariosPorInquilino', 'BusquedaInquilino', schema=INQUILINO, tenant='snacks')
+        origen.create_table()
+        destino.create_table()
+        for i in range(30):
+            assert origen.add_comment(comentario(i, tenant='colegio-42' if i % 3 == 0 else None))
+        yield origen, destino
+        aws_clients.reset_clients()
+
+
+def test_migracion_reanudable(tablas, tmp_path):
+    from core.table_migration import migrate_comments, verify_migration
+
+    origen, destino = tablas
+    estado = str(tmp_path / 'estado.json')
+
+    # Primer tramo: una página de 4 comentarios por segmento
+    parcial = migrate_comments(origen, destino, state_path=estado, segments=2, page_size=4, max_pages=1)
+    assert not parcial['completa']
+    assert parcial['copiados'] == 8
+
+    final = migrate_comments(origen, destino, state_path=estado, segments=2, page_size=4)
+    assert final['completa'] and final['copiados'] == 30
+    assert verify_migration(origen, destino) == {'origen': 30, 'destino': 30, 'coinciden': True}
+
+    # Ya completa: otra corrida no vuelve a copiar
+    repetida = migrate_comments(origen, destino, state_path=estado, segments=2, page_size=4)
+    assert repetida['paginas_en_esta_corrida'] == 0 and repetida['copiados'] == 30
+    with pytest.raises(ValueError):
+        migrate_comments(origen, destino, state_path=estado, segments=4)
+
+
+def test_consultas_por_inquilino_tras_migrar(tablas, tmp_path):
+    from core.table_migration import migrate_comments
+
+    origen, destino = tablas
+    migrate_comments(origen, destino, state_path=str(tmp_path / 'estado.json'), segments=2, page_size=10)
+
+    colegio = destino.query_comments(tenant='colegio-42', limit=100)['comments']
+    assert {c['comment_id'] for c in colegio} == {f"c{i:03d}" for i in range(0, 30, 3)}
+    assert [c['timestamp'] for c in colegio] == sorted((c['timestamp'] for c in colegio), reverse=True)
+    assert colegio[0]['text'] == origen.query_comments(tenant='colegio-42', limit=100)['comments'][0]['text']
+
+    # En el esquema por inquilino el feed por sentimiento solo lee el inquilino del manager
+    del_colegio = {c['comment_id'] for c in colegio}
+    for sentimiento in SENTIMIENTOS:
+        esperados = {c['comment_id'] for c in origen.get_comments_since(sentimiento)} - del_colegio
+        assert {c['comment_id'] for c in destino.get_comments_since(sentimiento)} == esperados
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from core.warmup import Warmup
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULOS_PESADOS = ('boto3', 'botocore', 'docx', 'core.bedrock_services', 'core.rag_service', 'core.docx_exporter')
+
+
+def test_tareas_en_orden_y_una_sola_vez():
+    orden = []
+    continuar = threading.Event()
+
+    def lenta():
+        continuar.wait(5)
+        orden.append('lenta')
+        return 1
+
+    def siguiente():
+        # Una tarea puede usar el resultado de una anterior
+        orden.append('siguiente')
+        return precalentamiento.get('lenta') + 1
+
+    precalentamiento = Warmup([('lenta', lenta), ('siguiente', siguiente)])
+    assert precalentamiento.start() is precalentamiento.start()
+    assert not precalentamiento.ready('lenta')
+    with pytest.raises(TimeoutError):
+        precalentamiento.get('lenta', timeout=0.01)
+
+    continuar.set()
+    assert precalentamiento.get('siguiente', timeout=5) == 2
+    assert orden == ['lenta', 'siguiente']
+    assert set(precalentamiento.timings()) == {'lenta', 'siguiente'}
+
+
+def test_los_errores_se_relanzan_al_pedir_la_tarea():
+    def falla():
+        raise ImportError("No module named 'docx'")
+
+    precalentamiento = Warmup([('docx', falla), ('ok', lambda: 'listo')])
+    # get() arranca el precalentamiento si nadie lo había hecho
+    assert precalentamiento.get('ok', timeout=5) == 'listo'
+    with pytest.raises(ImportError):
+        precalentamiento.get('docx')
+    assert precalentamiento.errors() == {'docx': "No module named 'docx'"}
+
+
+def modulos_en_proceso_nuevo(codigo):
+    entorno = dict(os.environ, PYTHONPATH=os.path.join(ROOT_DIR, 'src'))
+    codigo += "\nimport json, sys; print(json.dumps(sorted(sys.modules)))"
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, env=entorno, check=True,
+                            cwd=ROOT_DIR)
+    return set(json.loads(salida.stdout.strip().splitlines()[-1]))
+
+
+def test_la_biblioteca_no_importa_modulos_pesados():
+    cargados = modulos_en_proceso_nuevo("from core.curriculum_library import BibliotecaCurricular")
+    assert not cargados & set(MODULOS_PESADOS)
+
+
+def test_la_primera_pagina_no_importa_modulos_pesados(tmp_path):
+    pytest.importorskip('streamlit.testing.v1')
+    # Con el precalentamiento detenido solo queda lo que la primera página importa por sí misma
+    cargados = modulos_en_proceso_nuevo(f"""
+import os
+os.environ['JOB_QUEUE_DB'] = {str(tmp_path / 'trabajos.db')!r}
+os.environ['BIBLIOTECA_CURRICULAR_DIR'] = {str(tmp_path / 'biblioteca')!r}
+import core.warmup
+core.warmup.Warmup.start = lambda self: self
+from streamlit.testing.v1 import AppTest
+prueba = AppTest.from_file('src/app/app.py', default_timeout=60)
+prueba.run()
+assert not prueba.exception, prueba.exception
+""")
+    assert 'core.warmup' in cargados
+    assert not cargados & set(MODULOS_PESADOS)
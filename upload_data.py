@@ -1,3 +1,4 @@
+import argparse
 import json
 import os
 import sys
@@ -9,14 +10,24 @@ load_dotenv()
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
 
 # Now we can import the function directly
-from core.data_ingestion import upload_comments_to_s3
+from core.data_ingestion import upload_comments_to_s3, upload_file_to_s3
 
 # Define the bucket name
 bucket_name = 'bucket-comentarios-snacks'
 
-# Load data from the JSON file
-with open('comments_data.json', 'r', encoding='utf-8') as f:
-    comments = json.load(f)
+parser = argparse.ArgumentParser(description="Carga un archivo de comentarios al bucket de S3.")
+parser.add_argument('archivo', nargs='?', default=None,
+                    help="Archivo JSON o NDJSON (ej. generado con benchmarks/generate_comments.py); "
+                         "por defecto comments_data.json")
+args = parser.parse_args()
 
-# Upload the data to the S3 bucket
-upload_comments_to_s3(comments, bucket_name)
\ No newline at end of file
+if args.archivo:
+    # Archivos grandes: se suben en partes sin cargarlos en memoria
+    upload_file_to_s3(args.archivo, bucket_name)
+else:
+    # Load data from the JSON file
+    with open('comments_data.json', 'r', encoding='utf-8') as f:
+        comments = json.load(f)
+
+    # Upload the data to the S3 bucket
+    upload_comments_to_s3(comments, bucket_name)